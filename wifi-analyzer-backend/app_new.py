@@ -4,11 +4,29 @@ Main Flask application entry point
 """
 from flask import Flask, jsonify, render_template
 from flask_cors import CORS
-from models import db
+from models import db, upgrade_schema
 from config import config
 from routes.network_routes import network_bp
 from routes.audit_routes import audit_bp
+from routes.stats_routes import stats_bp
+from routes.event_routes import event_bp
+from routes.scheduler_routes import scheduler_bp
+from routes.metrics_routes import metrics_bp
+from routes.profile_routes import profile_bp
 from auth import require_auth
+from services.scan_jobs import init_scan_jobs
+from services.change_service import init_change_tracker
+from services.rogue_detector import init_rogue_detector
+from services.rule_engine import init_audit_rules
+from services.event_bus import init_event_bus
+from services.response_cache import init_response_cache
+from services.db_tuning import init_database
+from services.metrics import init_metrics
+from services.profiler import init_profiler
+from services.token_registry import init_token_registry
+from services.rate_limiter import init_rate_limiter
+from services.scan_scheduler import init_scan_scheduler
+from commands import register_commands
 import os
 
 
@@ -28,12 +46,28 @@ def create_app(config_name='default'):
     app.config.from_object(config[config_name])
     
     # Initialize extensions
-    CORS(app)
-    db.init_app(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'X-Profile-Id'])
+    init_database(app)
+    init_metrics(app)
+    init_token_registry(app)
+    init_profiler(app)
+    init_rate_limiter(app)
+    init_response_cache(app)
+    init_change_tracker(app)
+    init_rogue_detector(app)
+    init_scan_jobs(app)
+    init_audit_rules(app)
+    init_event_bus(app)
+    register_commands(app)
     
     # Register blueprints
     app.register_blueprint(network_bp)
     app.register_blueprint(audit_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(event_bp)
+    app.register_blueprint(scheduler_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profile_bp)
     
     # Frontend Routes
     @app.route('/')
@@ -75,8 +109,19 @@ def create_app(config_name='default'):
                 "health": "/health",
                 "networks": "/api/networks",
                 "scan": "/api/networks/scan",
+                "scan_status": "/api/networks/scan/<job_id>",
+                "changes": "/api/networks/changes",
+                "rogue": "/api/networks/rogue",
+                "ingest": "/api/networks/ingest",
                 "audits": "/api/audits",
-                "export": "/api/audits/export"
+                "export": "/api/audits/export",
+                "stats": "/api/stats",
+                "cache_stats": "/api/stats/cache",
+                "limit_stats": "/api/stats/limits",
+                "events": "/api/events",
+                "scheduler": "/api/scheduler",
+                "metrics": "/metrics",
+                "profiles": "/api/profiles"
             },
             "auth": "Bearer token required for /api/* endpoints"
         })
@@ -84,6 +129,10 @@ def create_app(config_name='default'):
     # Create tables
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+
+    # Started last so scheduled scans never run before the schema exists
+    init_scan_scheduler(app)
     
     return app
 
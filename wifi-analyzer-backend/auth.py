@@ -2,37 +2,60 @@
 Authentication Middleware
 Provides Bearer token authentication for API endpoints
 """
-from functools import wraps
-from flask import request, jsonify, current_app
+from functools import wraps, partial
+from flask import request, jsonify, current_app, g
+from services.token_registry import init_token_registry, READ
 
 
-def require_auth(f):
+def current_token():
+    """The Token that authenticated the current request, or None"""
+    return g.get('api_token')
+
+
+def require_auth(f=None, scope=READ):
     """
     Decorator to require Bearer token authentication
-    
+
+    Tokens are verified against the app's TokenRegistry and must grant
+    `scope` (read by default). The matching Token is available through
+    current_token() while the request runs.
+
     Usage:
         @app.route('/protected')
         @require_auth
         def protected_route():
             return jsonify({"message": "Success"})
+
+        @app.route('/scan', methods=['POST'])
+        @require_auth(scope='scan')
+        def scan():
+            ...
     """
+    if f is None:
+        return partial(require_auth, scope=scope)
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
-        
+
         if not auth_header:
             return jsonify({"error": "Missing Authorization header"}), 401
-        
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
+
+        scheme, _, token = auth_header.partition(' ')
+        token = token.strip()
+        if scheme.lower() != 'bearer' or not token or ' ' in token:
             return jsonify({"error": "Invalid Authorization header format. Use 'Bearer <token>'"}), 401
-        
-        token = parts[1]
-        expected_token = current_app.config.get('API_TOKEN', 'mysecrettoken')
-        
-        if token != expected_token:
+
+        registry = current_app.extensions.get('tokens')
+        if registry is None:
+            registry = init_token_registry(current_app)
+        client = registry.verify(token)
+        if client is None:
             return jsonify({"error": "Invalid token"}), 403
-        
+        if not client.allows(scope):
+            return jsonify({"error": f"Token lacks the '{scope}' scope"}), 403
+
+        g.api_token = client
         return f(*args, **kwargs)
-    
+
     return decorated_function
@@ -0,0 +1,56 @@
+"""
+Benchmark: batch auditing vs the per-BSSID audit loop
+
+The loop mirrors POST /api/audits/start/<bssid>: look the network up,
+audit it and commit one Audit row, once per network. The batch path is
+services.audit_service.audit_networks (POST /api/audits/batch).
+
+Usage:
+    python benchmarks/bench_audit_batch.py [--aps 5000]
+"""
+import argparse
+import datetime
+import uuid
+
+from common import make_app, cleanup, synthetic_networks, timed
+from models import db, Network, Audit
+from services.audit_service import audit_networks
+from services.rule_engine import default_rule_set
+from services.scan_service import perform_security_audit, save_networks_to_db
+
+
+def per_bssid_loop(bssids):
+    for bssid in bssids:
+        net = Network.query.filter_by(bssid=bssid).first()
+        result = perform_security_audit(net)
+        db.session.add(Audit(
+            id=str(uuid.uuid4()),
+            network_bssid=bssid,
+            started_at=datetime.datetime.utcnow(),
+            result=result
+        ))
+        db.session.commit()
+
+
+def run(aps):
+    networks = synthetic_networks(aps)
+    bssids = [n["bssid"] for n in networks]
+    app = make_app()
+    rules = default_rule_set()
+    print(f"Auditing {aps:,} networks with {len(rules.rules)} rules (rule set {rules.version})")
+    print("-" * 60)
+    with app.app_context():
+        save_networks_to_db(db, Network, networks)
+        _, loop_time = timed(per_bssid_loop, bssids)
+        print(f"  per-BSSID loop: {loop_time:8.3f}s  {aps / loop_time:12,.0f} audits/sec")
+        _, batch_time = timed(audit_networks, db, rules=rules)
+        print(f"  batch:          {batch_time:8.3f}s  {aps / batch_time:12,.0f} audits/sec")
+        print(f"  speedup: x{loop_time / batch_time:.1f}")
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--aps', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.aps)
@@ -0,0 +1,93 @@
+"""
+Benchmark: per-request cost of bearer token authentication
+
+Times the require_auth decorator around a no-op view inside one request
+context, so only the authentication work is measured: the previous
+implementation (config lookup, header split, plain comparison against
+API_TOKEN) against the token registry (SHA-256, digest lookup,
+constant-time compare, scope check, reload check) with --tokens
+registered clients. Fails if the registry exceeds --budget microseconds.
+
+Usage:
+    python benchmarks/bench_auth.py [--tokens 10000] [--iterations 200000] [--budget 20]
+"""
+import argparse
+import hashlib
+import sys
+import time
+from functools import wraps
+
+from flask import Flask, request, jsonify, current_app
+
+from common import make_app  # noqa: F401  (sets up the import path)
+from auth import require_auth
+from services.token_registry import TokenRegistry, Token
+
+
+def legacy_require_auth(f):
+    """The decorator as it was before the token registry"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({"error": "Missing Authorization header"}), 401
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0].lower() != 'bearer':
+            return jsonify({"error": "Invalid Authorization header format"}), 401
+        token = parts[1]
+        expected_token = current_app.config.get('API_TOKEN', 'mysecrettoken')
+        if token != expected_token:
+            return jsonify({"error": "Invalid token"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def view():
+    return None
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def run(tokens, iterations, budget):
+    app = Flask(__name__)
+    app.config['API_TOKEN'] = 'mysecrettoken'
+    registry = TokenRegistry(legacy_token='mysecrettoken')
+    registry._static.extend(
+        Token(f"client-{i}", hashlib.sha256(f"token-{i}".encode()).digest(), ("read",))
+        for i in range(tokens))
+    registry._install([])
+    app.extensions['tokens'] = registry
+
+    headers = {'Authorization': f'Bearer token-{tokens // 2}'}
+    baseline = None
+    with app.test_request_context('/api/networks', headers=headers):
+        app.config['API_TOKEN'] = f'token-{tokens // 2}'
+        for name, fn in (("no auth", view),
+                         ("previous (single token)", legacy_require_auth(view)),
+                         (f"registry ({len(registry):,} tokens)", require_auth(view))):
+            per_call(fn, iterations // 10)
+            elapsed = per_call(fn, iterations)
+            if baseline is None:
+                baseline = elapsed
+                print(f"  {name:28s} {elapsed * 1e6:7.2f} us")
+            else:
+                print(f"  {name:28s} {elapsed * 1e6:7.2f} us   "
+                      f"auth cost {(elapsed - baseline) * 1e6:6.2f} us")
+    cost = (elapsed - baseline) * 1e6
+    if cost > budget:
+        print(f"Registry auth costs {cost:.2f} us per request, over the {budget:g} us budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tokens', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--budget', type=float, default=20, help='microseconds per request')
+    args = parser.parse_args()
+    run(args.tokens, args.iterations, args.budget)
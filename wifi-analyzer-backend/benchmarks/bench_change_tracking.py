@@ -0,0 +1,70 @@
+"""
+Benchmark: change-tracked scan saves vs full rewrites
+
+Simulates continuous monitoring of a stable site: every scan sees the same
+access points with a few dB of RSSI jitter, and a small share of them
+appear, disappear or change encryption. Compares writing every scan in full
+(save_networks_to_db) with the ChangeTracker, which writes only deltas.
+
+Usage:
+    python benchmarks/bench_change_tracking.py [--aps 5000] [--scans 20] [--churn 0.01]
+"""
+import argparse
+import random
+
+from common import make_app, cleanup, synthetic_networks, timed
+from models import db, Network, Observation, NetworkChange
+from services.change_service import ChangeTracker
+from services.scan_service import save_networks_to_db
+
+
+def make_scans(aps, scans, churn, seed=0):
+    rng = random.Random(seed)
+    base = synthetic_networks(aps)
+    results = []
+    for _ in range(scans):
+        scan = []
+        for n in base:
+            if rng.random() < churn / 2:
+                continue  # missed this scan
+            n = dict(n, signal=n["signal"] + rng.randint(-2, 2))
+            if rng.random() < churn / 2:
+                n["encryption"] = "WPA3"
+            scan.append(n)
+        results.append(scan)
+    return results
+
+
+def run(aps, scans, churn):
+    results = make_scans(aps, scans, churn)
+    print(f"{scans} scans of {aps:,} APs, churn {churn:.1%}")
+    print("-" * 60)
+
+    app = make_app()
+    with app.app_context():
+        _, full = timed(lambda: [save_networks_to_db(db, Network, s, scan_id=f"s{i}")
+                                 for i, s in enumerate(results)])
+        rows = db.session.query(Observation).count()
+        print(f"  full rewrite: {full:8.2f}s  {rows:10,} observation rows")
+    cleanup(app)
+
+    app = make_app()
+    with app.app_context():
+        tracker = ChangeTracker()
+        _, tracked = timed(lambda: [tracker.save(db, s, scan_id=f"s{i}")
+                                    for i, s in enumerate(results)])
+        tracked_rows = db.session.query(Observation).count()
+        changes = db.session.query(NetworkChange).count()
+        print(f"  tracked:      {tracked:8.2f}s  {tracked_rows:10,} observation rows "
+              f"({changes:,} change rows)")
+    cleanup(app)
+    print(f"  speedup: x{full / tracked:.1f}, observation rows x{rows / max(tracked_rows, 1):.1f} fewer")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--aps', type=int, default=5000)
+    parser.add_argument('--scans', type=int, default=20)
+    parser.add_argument('--churn', type=float, default=0.01)
+    args = parser.parse_args()
+    run(args.aps, args.scans, args.churn)
@@ -0,0 +1,103 @@
+"""
+Benchmark: audit export
+
+Compares peak Python memory and wall time of the original in-memory
+export (load every Audit, decode each result, build one document) with
+the streaming exporters.
+
+Usage:
+    python benchmarks/bench_export.py [--audits 100000]
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import tracemalloc
+import uuid
+
+from sqlalchemy import insert
+from common import make_app, cleanup, timed
+from models import db, Audit
+from services.export_service import iter_audits_csv, iter_audits_json, gzip_stream
+
+
+def seed_audits(count, batch=10000):
+    """Insert `count` audits with realistic result blobs"""
+    start = datetime.datetime.utcnow() - datetime.timedelta(seconds=count)
+    levels = ["low", "medium", "high"]
+    for offset in range(0, count, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, count)):
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "network_bssid": "02:00:00:%02X:%02X:%02X" % (i >> 16 & 0xFF, i >> 8 & 0xFF, i & 0xFF),
+                "started_at": start + datetime.timedelta(seconds=i),
+                "result_json": json.dumps({
+                    "weak_cipher": True,
+                    "open_network": False,
+                    "signal_strength": -60,
+                    "risk_level": levels[i % 3],
+                    "details": ["Network uses weak encryption that may be vulnerable"]
+                })
+            })
+        db.session.execute(insert(Audit.__table__), rows)
+    db.session.commit()
+
+
+def legacy_json():
+    audits = Audit.query.all()
+    return json.dumps({
+        "export_date": datetime.datetime.utcnow().isoformat() + "Z",
+        "total_audits": len(audits),
+        "audits": [a.to_dict() for a in audits]
+    })
+
+
+def legacy_csv():
+    audits = Audit.query.all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Audit ID', 'Network BSSID', 'Started At', 'Risk Level', 'Details'])
+    for audit in audits:
+        result = audit.result or {}
+        writer.writerow([
+            audit.id, audit.network_bssid,
+            audit.started_at.isoformat() if audit.started_at else '',
+            result.get('risk_level', 'unknown'), '; '.join(result.get('details', []))
+        ])
+    return output.getvalue()
+
+
+def drain(chunks):
+    """Consume a stream like a WSGI server would, returning bytes sent"""
+    return sum(len(chunk) for chunk in chunks)
+
+
+def measure(name, fn):
+    db.session.expunge_all()
+    tracemalloc.start()
+    _, elapsed = timed(fn)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<22} {elapsed:7.2f}s   peak {peak / 2**20:8.1f} MiB")
+
+
+def run(count):
+    app = make_app()
+    with app.app_context():
+        seed_audits(count)
+        print(f"Exporting {count:,} audits")
+        print("-" * 60)
+        measure("legacy json", legacy_json)
+        measure("streaming json", lambda: drain(iter_audits_json(db)))
+        measure("legacy csv", legacy_csv)
+        measure("streaming csv", lambda: drain(iter_audits_csv(db)))
+        measure("streaming csv + gzip", lambda: drain(gzip_stream(iter_audits_csv(db))))
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--audits', type=int, default=100000)
+    run(parser.parse_args().audits)
@@ -0,0 +1,42 @@
+"""
+Benchmark: offline scan ingest
+
+Drives the scan -> save pipeline with the synthetic scanner backend, so
+ingest capacity can be measured without a radio.
+
+Usage:
+    python benchmarks/bench_ingest.py [--aps 100000] [--scans 3] [--rate 0]
+"""
+import argparse
+import uuid
+
+from common import make_app, cleanup, timed
+from models import db, Network
+from services.scanners import SyntheticScanner
+from services.scan_service import save_networks_to_db
+
+
+def run(aps, scans, rate):
+    scanner = SyntheticScanner(count=aps, seed=0, rate=rate or None)
+    app = make_app()
+    print(f"Ingesting {scans} synthetic scans of {aps:,} access points")
+    print("-" * 60)
+    with app.app_context():
+        for i in range(scans):
+            networks, scan_time = timed(scanner.scan)
+            _, save_time = timed(save_networks_to_db, db, Network, networks,
+                                 scan_id=str(uuid.uuid4()))
+            total = scan_time + save_time
+            print(f"  scan {i + 1}: generate {scan_time:6.2f}s  save {save_time:6.2f}s  "
+                  f"{aps / total:10,.0f} APs/sec end to end")
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--aps', type=int, default=100000)
+    parser.add_argument('--scans', type=int, default=3)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='generator throttle in APs/sec (0 = unthrottled)')
+    args = parser.parse_args()
+    run(args.aps, args.scans, args.rate)
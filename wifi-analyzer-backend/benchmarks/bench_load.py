@@ -0,0 +1,409 @@
+"""
+Benchmark: load test of the API with concurrent clients
+
+Runs one phase per endpoint against a seeded database (see seed_db.py, or
+--size to seed a temporary one): --clients threads send requests for
+--duration seconds after --warmup seconds, and the throughput and latency
+percentiles of each endpoint are reported and written as JSON, tagged with
+the git commit, so runs can be compared with --compare.
+
+Endpoints:
+    ingest  POST /api/networks/scan?wait=true (synthetic backend, one
+            interface per client so scans are not coalesced)
+    list    GET /api/networks?limit=100 with a random encryption filter
+    detail  GET /api/networks/<random id>
+    audit   POST /api/audits/start/<random bssid>
+    export  GET /api/audits/export?format=ndjson (every stored audit)
+
+Modes:
+    inprocess  Flask test client in this process
+    gunicorn   gunicorn -k gthread with --workers/--threads, over HTTP
+    werkzeug   the threaded development server, over HTTP (where
+               gunicorn is not installed)
+
+The response cache, rate limits and scan admission limit are off unless
+--cache is given, so the uncached request paths are measured.
+
+Usage:
+    python benchmarks/bench_load.py [--db PATH | --size 1k] [--mode inprocess]
+        [--clients 8] [--duration 10] [--endpoints list,detail,...]
+        [--output results.json] [--compare baseline.json --tolerance 0.1]
+"""
+import argparse
+import datetime
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import synthetic_networks  # noqa: F401  (sets up the import path)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+TOKEN = 'mysecrettoken'
+HEADERS = {'Authorization': f'Bearer {TOKEN}'}
+ENCRYPTIONS = ('WPA2-PSK', 'WPA3', 'Open', 'WPA-PSK', 'WEP')
+ENDPOINTS = ('ingest', 'list', 'detail', 'audit', 'export')
+EXPECTED = {'ingest': 201, 'list': 200, 'detail': 200, 'audit': 201, 'export': 200}
+
+
+def make_request(endpoint, rng, sample, client_no):
+    """(method, path) of one request to `endpoint`"""
+    if endpoint == 'ingest':
+        return 'POST', f'/api/networks/scan?wait=true&interface=bench-{client_no}'
+    if endpoint == 'list':
+        return 'GET', f'/api/networks?limit=100&encryption={rng.choice(ENCRYPTIONS)}'
+    if endpoint == 'detail':
+        return 'GET', f'/api/networks/{rng.choice(sample)[0]}'
+    if endpoint == 'audit':
+        return 'POST', f'/api/audits/start/{rng.choice(sample)[1]}'
+    return 'GET', '/api/audits/export?format=ndjson'
+
+
+def server_env(db_path, cache, scan_aps):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URI': f'sqlite:///{db_path}',
+        'API_TOKEN': TOKEN,
+        'CACHE_BACKEND': 'memory' if cache else 'none',
+        'RATE_LIMIT_BACKEND': 'memory' if cache else 'none',
+        'SCAN_QUEUE_SIZE': '8' if cache else '0',
+        'SCAN_BACKEND': 'synthetic',
+        'SCAN_SYNTHETIC_COUNT': str(scan_aps),
+        'SCHEDULER_ENABLED': 'False',
+        'DEBUG': 'False',
+    })
+    return env
+
+
+class InProcessClient:
+    """One test client of an app created in this process"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path):
+        response = self.client.open(path, method=method, headers=HEADERS)
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """One keep-alive HTTP connection, reopened when the server drops it"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.conn = None
+
+    def request(self, method, path):
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=300)
+            try:
+                self.conn.request(method, path, headers=HEADERS)
+                response = self.conn.getresponse()
+                size = len(response.read())
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                return response.status, size
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, env, port, workers, threads):
+    """Start gunicorn or the development server; returns the process"""
+    app_spec = "app_new:create_app('production')"
+    if mode == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'gthread',
+                   '--threads', str(threads), '-b', f'127.0.0.1:{port}', app_spec]
+    else:
+        command = [sys.executable, '-c',
+                   "from app_new import create_app; from werkzeug.serving import run_simple; "
+                   f"run_simple('127.0.0.1', {port}, create_app('production'), threaded=True)"]
+    # A file rather than a pipe: the development server logs every request
+    # and would block once a pipe buffer filled up
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"{mode} exited: {log.read().decode()[-2000:]}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} did not answer /health within 60 s")
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, errors, elapsed, sizes):
+    ordered = sorted(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else None,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "mean_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+    }
+
+
+def run_phase(endpoint, make_client, clients, duration, warmup, sample):
+    """Drive one endpoint with `clients` threads; returns its summary"""
+    results = []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+    timing = {}
+
+    def worker(client_no):
+        rng = random.Random(client_no)
+        client = make_client()
+        latencies, sizes, errors = [], [], 0
+        start.wait()
+        measure_from = timing['start'] + warmup
+        stop_at = measure_from + duration
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    break
+                method, path = make_request(endpoint, rng, sample, client_no)
+                try:
+                    status, size = client.request(method, path)
+                except Exception:
+                    status, size = None, 0
+                done = time.perf_counter()
+                if now < measure_from:
+                    continue
+                if status != EXPECTED[endpoint]:
+                    errors += 1
+                    continue
+                latencies.append(done - now)
+                sizes.append(size)
+        finally:
+            client.close()
+        with lock:
+            results.append((latencies, sizes, errors, time.perf_counter()))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    timing['start'] = time.perf_counter()
+    start.wait()
+    for t in threads:
+        t.join()
+    # Requests in flight at the deadline finish late; count until the last one
+    elapsed = max(r[3] for r in results) - (timing['start'] + warmup)
+    return summarize([l for r in results for l in r[0]], sum(r[2] for r in results),
+                     elapsed, [s for r in results for s in r[1]])
+
+
+def dataset(db_path):
+    """Row counts and a sample of (id, bssid) pairs of the database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        counts = {
+            "networks": conn.execute("SELECT COUNT(*) FROM network").fetchone()[0],
+            "audits": conn.execute("SELECT COUNT(*) FROM audit").fetchone()[0],
+        }
+        sample = conn.execute("SELECT id, bssid FROM network ORDER BY random() LIMIT 1000").fetchall()
+    finally:
+        conn.close()
+    return counts, sample
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """
+    Print throughput and p99 changes against a previous result file
+
+    Returns:
+        list: Endpoints whose throughput dropped or p99 grew by more than
+        `tolerance`
+    """
+    print(f"\nAgainst {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for key in ('mode', 'workers', 'threads', 'clients', 'cache', 'dataset', 'cpus'):
+        if baseline.get(key) != current.get(key):
+            print(f"  note: {key} differs ({baseline.get(key)} -> {current.get(key)})")
+    regressions = []
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before.get('throughput') or not now.get('throughput'):
+            continue
+        throughput = now['throughput'] / before['throughput']
+        p99 = now['p99_ms'] / before['p99_ms'] if before.get('p99_ms') else None
+        flag = ''
+        if throughput < 1 - tolerance or (p99 is not None and p99 > 1 + tolerance):
+            regressions.append(name)
+            flag = '  REGRESSION'
+        p99_text = f"{p99:5.2f}x" if p99 is not None else '    -'
+        print(f"  {name:8s} throughput {throughput:5.2f}x   p99 {p99_text}{flag}")
+    return regressions
+
+
+def run(args):
+    db_path = args.db
+    temporary = db_path is None
+    if temporary:
+        from seed_db import seed, SIZES
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='wifi_load_')
+        os.close(fd)
+        print(f"Seeding {SIZES[args.size]:,} networks")
+        seed(db_path, SIZES[args.size])
+    db_path = os.path.abspath(db_path)
+    counts, sample = dataset(db_path)
+    env = server_env(db_path, args.cache, args.scan_aps)
+
+    server = None
+    if args.mode == 'inprocess':
+        os.environ.update(env)
+        from app_new import create_app
+        app = create_app('production')
+
+        def make_client():
+            return InProcessClient(app)
+    else:
+        port = free_port()
+        server = start_server(args.mode, env, port, args.workers, args.threads)
+
+        def make_client():
+            return HttpClient('127.0.0.1', port)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "mode": args.mode,
+        "workers": args.workers if args.mode == 'gunicorn' else 1,
+        "threads": args.threads if args.mode == 'gunicorn' else None,
+        "clients": args.clients,
+        "duration": args.duration,
+        "cache": args.cache,
+        "dataset": counts,
+        "endpoints": {},
+    }
+    print(f"{args.mode}, {args.clients} clients, {args.duration:g} s per endpoint, "
+          f"{counts['networks']:,} networks / {counts['audits']:,} audits")
+    print(f"  {'endpoint':8s} {'req/s':>9s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} "
+          f"{'max ms':>9s} {'errors':>7s}")
+    try:
+        for endpoint in args.endpoints:
+            summary = run_phase(endpoint, make_client, args.clients, args.duration,
+                                args.warmup, sample)
+            result["endpoints"][endpoint] = summary
+            print(f"  {endpoint:8s} {summary['throughput'] or 0:9.1f} "
+                  + ' '.join(f"{summary[k] if summary[k] is not None else '-':>9}"
+                             for k in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms'))
+                  + f" {summary['errors']:7d}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(30)
+        if temporary:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(db_path + suffix)
+                except OSError:
+                    pass
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{result['commit'] or 'unknown'}-{args.mode}-{counts['networks']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', help='seeded SQLite file (see seed_db.py)')
+    parser.add_argument('--size', choices=('1k', '100k', '1m'), default='1k',
+                        help='seed a temporary database of this size when --db is not given')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'werkzeug'), default='inprocess')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per endpoint')
+    parser.add_argument('--warmup', type=float, default=1, help='unmeasured seconds per endpoint')
+    parser.add_argument('--endpoints', type=lambda s: s.split(','), default=list(ENDPOINTS),
+                        help=f"comma separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument('--scan-aps', type=int, default=1000, help='APs per synthetic scan')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the response cache, rate limits and scan queue limit on')
+    parser.add_argument('--output', help=f'result file (default: {RESULTS_DIR}/load-<commit>-...)')
+    parser.add_argument('--compare', help='previous result file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed throughput drop / p99 increase before failing')
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    if args.mode == 'gunicorn':
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            parser.error("gunicorn is not installed (pip install gunicorn, or use --mode werkzeug)")
+    run(args)
@@ -0,0 +1,83 @@
+"""
+Benchmark: cost of the metrics decorators
+
+Times a no-op view wrapped in timed_route, a no-op scanner wrapped in
+timed_scan and a no-op write wrapped in timed_write inside one request
+context, with metrics disabled and enabled, against the bare functions,
+and the time to render /metrics after --series label sets.
+
+Usage:
+    python benchmarks/bench_metrics.py [--iterations 200000] [--series 200]
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from common import make_app  # noqa: F401  (sets up the import path)
+from services.metrics import init_metrics, timed_route, timed_scan, timed_write
+
+
+class NullScanner:
+    name = 'null'
+
+    def scan(self):
+        return []
+
+    timed = timed_scan(scan)
+
+
+RESPONSE = Flask(__name__).response_class('')
+
+
+def view():
+    return RESPONSE
+
+
+def write():
+    return []
+
+
+def per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def run(iterations, series):
+    app = Flask(__name__)
+    scanner = NullScanner()
+    cases = (
+        ("route", view, timed_route(view)),
+        ("scan", scanner.scan, scanner.timed),
+        ("write", write, timed_write('network')(write)),
+    )
+    with app.test_request_context('/api/networks'):
+        for state in ("disabled", "enabled"):
+            if state == "enabled":
+                app.config['METRICS_ENABLED'] = True
+                init_metrics(app)
+            print(f"Metrics {state}")
+            for name, bare, wrapped in cases:
+                per_call(wrapped, iterations // 10)
+                base = per_call(bare, iterations)
+                elapsed = per_call(wrapped, iterations)
+                print(f"  {name:6s} {elapsed * 1e6:7.2f} us   overhead {(elapsed - base) * 1e6:6.2f} us")
+
+        registry = app.extensions['metrics']
+        for i in range(series):
+            registry.requests.observe(0.01 * (i % 50), f"bp.view_{i % 40}", 'GET', str(200 + i % 5))
+        start = time.perf_counter()
+        text = registry.render()
+        elapsed = time.perf_counter() - start
+        print(f"\nRender with {len(registry.requests._series)} request series: "
+              f"{elapsed * 1000:.2f} ms, {len(text):,} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--series', type=int, default=200)
+    args = parser.parse_args()
+    run(args.iterations, args.series)
@@ -0,0 +1,59 @@
+"""
+Benchmark: observation time series
+
+Seeds the observation table with many scans of many access points and
+times the "RSSI history of AP X over the last N hours" query.
+
+Usage:
+    python benchmarks/bench_observations.py [--aps 10000] [--scans 200]
+"""
+import argparse
+import datetime
+import random
+import time
+
+from common import make_app, cleanup, synthetic_networks, timed
+from models import db
+from services.observation_service import record_observations, get_signal_history
+
+
+def seed(aps, scans):
+    """Write `scans` scans of `aps` access points, one minute apart"""
+    networks = synthetic_networks(aps)
+    start = datetime.datetime.utcnow() - datetime.timedelta(minutes=scans)
+    for i in range(scans):
+        record_observations(db, f"scan-{i}", networks,
+                            observed_at=start + datetime.timedelta(minutes=i))
+        db.session.commit()
+    return networks
+
+
+def run(aps, scans, queries):
+    app = make_app()
+    with app.app_context():
+        networks, elapsed = timed(seed, aps, scans)
+        rows = aps * scans
+        print(f"Seeded {rows:,} observations in {elapsed:.1f}s "
+              f"({rows / elapsed:,.0f} rows/sec)")
+
+        rng = random.Random(0)
+        latencies = []
+        for _ in range(queries):
+            bssid = rng.choice(networks)["bssid"]
+            start = time.perf_counter()
+            history = get_signal_history(db, bssid, hours=1)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"History query over last hour ({len(history)} points):")
+        print(f"  p50 {latencies[len(latencies) // 2] * 1000:.2f} ms   "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--aps', type=int, default=10000)
+    parser.add_argument('--scans', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    run(args.aps, args.scans, args.queries)
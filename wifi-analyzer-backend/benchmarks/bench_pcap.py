@@ -0,0 +1,78 @@
+"""
+Benchmark: offline capture parsing
+
+Generates a beacon-only monitor-mode capture (pcap or pcapng) and reports
+how many frames per second the capture parser sustains on one core, then
+times saving the aggregated access points.
+
+Usage:
+    python benchmarks/bench_pcap.py [--frames 1000000] [--aps 500] [--format pcap]
+"""
+import argparse
+import os
+import random
+import tempfile
+import uuid
+
+from common import make_app, cleanup, timed
+from models import db, Network
+from services.pcap_parser import scan_capture
+from services.scan_service import save_networks_to_db
+from tests.pcap_fixtures import build_beacon, pcap_bytes, pcapng_bytes, RSN_PSK
+
+
+def build_capture(path, frames, aps, fmt):
+    """Write `frames` beacons from `aps` access points to `path`"""
+    rng = random.Random(0)
+    templates = []
+    for i in range(aps):
+        bssid = "02:00:00:%02X:%02X:%02X" % ((i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF)
+        # A few RSSI variants per AP so the signal statistics have work to do
+        templates.append([
+            build_beacon(bssid, f"AP-{i}", 1 + i % 11, -40 - rng.randrange(50), rsn=RSN_PSK)
+            for _ in range(4)
+        ])
+    records = [templates[n % aps][n // aps % 4] for n in range(frames)]
+    builder = pcapng_bytes if fmt == 'pcapng' else pcap_bytes
+    with open(path, 'wb') as f:
+        f.write(builder(records))
+
+
+def run(frames, aps, fmt, repeat):
+    fd, path = tempfile.mkstemp(suffix='.' + fmt, prefix='wifi_bench_')
+    os.close(fd)
+    try:
+        _, build_time = timed(build_capture, path, frames, aps, fmt)
+        size = os.path.getsize(path)
+        print(f"Parsing {frames:,} beacons from {aps:,} APs "
+              f"({size / 1e6:.1f} MB {fmt}, generated in {build_time:.1f}s)")
+        print("-" * 60)
+        best = 0
+        agg = None
+        for i in range(repeat):
+            agg, elapsed = scan_capture(path)
+            rate = agg.frames / elapsed
+            best = max(best, rate)
+            print(f"  run {i + 1}: {elapsed:6.3f}s  {rate:12,.0f} frames/sec  "
+                  f"{size / elapsed / 1e6:8.1f} MB/sec")
+        print(f"  best: {best:,.0f} frames/sec")
+
+        networks = agg.networks()
+        app = make_app()
+        with app.app_context():
+            _, save_time = timed(save_networks_to_db, db, Network, networks,
+                                 scan_id=str(uuid.uuid4()))
+        print(f"  save {len(networks):,} networks: {save_time:.3f}s")
+        cleanup(app)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=1000000)
+    parser.add_argument('--aps', type=int, default=500)
+    parser.add_argument('--format', choices=('pcap', 'pcapng'), default='pcap')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.frames, args.aps, args.format, args.repeat)
@@ -0,0 +1,64 @@
+"""
+Benchmark: parallel capture ingest throughput vs worker processes
+
+Generates a set of beacon-only capture files and parses them with
+1, 2, 4, ... worker processes, reporting frames/sec and the speedup over
+one worker, to size ingest machines.
+
+Usage:
+    python benchmarks/bench_pcap_parallel.py [--files 8] [--frames 250000] [--max-workers N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from common import timed
+from bench_pcap import build_capture
+from services.capture_service import aggregate_captures
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def run(files, frames, aps, fmt, max_workers, shard_mb):
+    folder = tempfile.mkdtemp(prefix='wifi_bench_pcaps_')
+    try:
+        paths = []
+        for i in range(files):
+            path = os.path.join(folder, f'capture{i}.{fmt}')
+            build_capture(path, frames, aps, fmt)
+            paths.append(path)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"Parsing {files} x {frames:,} beacons ({size / 1e6:,.1f} MB {fmt}) "
+              f"on {os.cpu_count()} CPUs")
+        print("-" * 60)
+        baseline = None
+        for workers in worker_counts(max_workers):
+            (agg, _), elapsed = timed(aggregate_captures, paths, workers=workers,
+                                      shard_bytes=shard_mb * 1024 * 1024)
+            rate = agg.frames / elapsed
+            baseline = baseline or rate
+            print(f"  {workers:3d} workers: {elapsed:7.2f}s  {rate:12,.0f} frames/sec  "
+                  f"{size / elapsed / 1e6:8.1f} MB/sec  x{rate / baseline:.2f}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--frames', type=int, default=250000, help='beacons per file')
+    parser.add_argument('--aps', type=int, default=500)
+    parser.add_argument('--format', choices=('pcap', 'pcapng'), default='pcap')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard-mb', type=int, default=256,
+                        help='byte-range size large files are split into')
+    args = parser.parse_args()
+    run(args.files, args.frames, args.aps, args.format, args.max_workers, args.shard_mb)
@@ -0,0 +1,80 @@
+"""
+Benchmark: cost of the profiling middleware
+
+Stores --networks networks and requests one page of the network list
+(uncached) through the Flask test client: without the middleware, with
+the middleware installed but the request not picked, and with every
+request profiled through the X-Profile header. Reports the mean latency
+of each and the size of the captured data.
+
+Usage:
+    python benchmarks/bench_profiler.py [--networks 5000] [--requests 300] [--limit 100]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from common import synthetic_networks
+
+fd, DB_PATH = tempfile.mkstemp(suffix='.db', prefix='wifi_bench_')
+os.close(fd)
+os.environ['DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+
+from app_new import create_app  # noqa: E402
+from models import db, Network  # noqa: E402
+from services.profiler import init_profiler  # noqa: E402
+from services.scan_service import save_networks_to_db  # noqa: E402
+
+HEADERS = {'Authorization': 'Bearer mysecrettoken'}
+
+
+def measure(client, requests, limit, headers, offset):
+    latencies = []
+    for i in range(offset, offset + requests):
+        start = time.perf_counter()
+        # A distinct query string per request bypasses the response cache
+        response = client.get(f'/api/networks?limit={limit}&min_signal={-100 - i}', headers=headers)
+        response.close()
+        latencies.append(time.perf_counter() - start)
+    return statistics.mean(latencies)
+
+
+def run(count, requests, limit):
+    app = create_app('production')
+    with app.app_context():
+        save_networks_to_db(db, Network, synthetic_networks(count))
+    client = app.test_client()
+
+    print(f"GET /api/networks?limit={limit} over {count:,} networks, {requests} requests")
+    measure(client, requests // 10, limit, HEADERS, 0)
+    base = measure(client, requests, limit, HEADERS, requests)
+    print(f"  {'no middleware':22s} {base * 1000:7.2f} ms")
+
+    app.config['PROFILING_ENABLED'] = True
+    profiler = init_profiler(app)
+    idle = measure(client, requests, limit, HEADERS, 2 * requests)
+    print(f"  {'installed, not picked':22s} {idle * 1000:7.2f} ms   ({(idle - base) * 1e6:+.0f} us)")
+    profiled = measure(client, requests, limit, {**HEADERS, 'X-Profile': '1'}, 3 * requests)
+    print(f"  {'profiled':22s} {profiled * 1000:7.2f} ms   ({profiled / base:.1f}x)")
+
+    profile = profiler.recent()[0]
+    print(f"  last profile: {len(profile.pstats_bytes()):,} bytes of pstats, "
+          f"{len(profile.stacks)} distinct stacks, {len(profile.statements)} SQL statements")
+
+    with app.app_context():
+        db.engine.dispose()
+    try:
+        os.remove(DB_PATH)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--networks', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+    run(args.networks, args.requests, args.limit)
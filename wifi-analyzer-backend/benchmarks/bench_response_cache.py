@@ -0,0 +1,83 @@
+"""
+Benchmark: dashboard polling with and without the response cache
+
+Stores many networks, then replays the dashboard's polling mix (network
+list, stats, audit list and one network detail) through the Flask test
+client, with a rescan of part of the networks every --write-every polls.
+Reports requests per second with the cache disabled and with the memory
+and SQLite stores, plus the cache counters.
+
+Usage:
+    python benchmarks/bench_response_cache.py [--networks 20000] [--polls 500] [--write-every 50]
+"""
+import argparse
+import os
+import tempfile
+
+from common import synthetic_networks, timed
+
+fd, DB_PATH = tempfile.mkstemp(suffix='.db', prefix='wifi_bench_')
+os.close(fd)
+os.environ['DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+
+from app_new import create_app  # noqa: E402
+from models import db, Network  # noqa: E402
+from services.response_cache import ResponseCache, MemoryStore, SqliteStore  # noqa: E402
+from services.scan_service import save_networks_to_db  # noqa: E402
+
+HEADERS = {'Authorization': 'Bearer mysecrettoken'}
+
+
+def poll(client, app, networks, polls, write_every):
+    detail = None
+    for i in range(polls):
+        if i and i % write_every == 0:
+            with app.app_context():
+                save_networks_to_db(db, Network, networks[:200])
+        page = client.get('/api/networks?sort=-last_seen&limit=20', headers=HEADERS)
+        client.get('/api/stats', headers=HEADERS)
+        client.get('/api/audits?sort=-started_at&limit=20', headers=HEADERS)
+        detail = detail or page.get_json()[-1]['id']
+        client.get(f'/api/networks/{detail}', headers=HEADERS)
+
+
+def run(count, polls, write_every):
+    app = create_app('production')
+    networks = synthetic_networks(count)
+    with app.app_context():
+        save_networks_to_db(db, Network, networks)
+    client = app.test_client()
+    cache_path = DB_PATH + '.cache'
+
+    stores = (("no cache", None), ("memory", MemoryStore(1024)),
+              ("sqlite", SqliteStore(cache_path, 1024)))
+    print(f"{count:,} networks, {polls} polls of 4 requests, write every {write_every} polls")
+    print("-" * 60)
+    for name, store in stores:
+        if store is None:
+            app.extensions.pop('response_cache', None)
+        else:
+            app.extensions['response_cache'] = ResponseCache(store, ttl=30)
+        _, elapsed = timed(poll, client, app, networks, polls, write_every)
+        line = f"  {name:10s} {polls * 4 / elapsed:10,.0f} req/s"
+        if store is not None:
+            stats = app.extensions['response_cache'].to_dict()
+            line += f"   hit ratio {stats['hit_ratio']:.2f}, {stats['stale']} stale"
+        print(line)
+
+    with app.app_context():
+        db.engine.dispose()
+    for path in (DB_PATH, cache_path, cache_path + '-wal', cache_path + '-shm'):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--networks', type=int, default=20000)
+    parser.add_argument('--polls', type=int, default=500)
+    parser.add_argument('--write-every', type=int, default=50)
+    args = parser.parse_args()
+    run(args.networks, args.polls, args.write_every)
@@ -0,0 +1,61 @@
+"""
+Benchmark: incremental rogue AP checks vs re-querying the network table
+
+Stores many access points spread over multi-AP SSIDs, then times, per
+incoming scan, RogueDetector.observe() on the scan's rows against the
+full-table GROUP BY the evil-twin audit rule uses (ssid_context).
+
+Usage:
+    python benchmarks/bench_rogue.py [--aps 100000] [--scan 200] [--scans 50]
+"""
+import argparse
+import random
+import time
+
+from common import make_app, cleanup, synthetic_networks, timed
+from models import db, Network
+from services.audit_service import ssid_context
+from services.rogue_detector import RogueDetector
+from services.scan_service import save_networks_to_db
+
+
+def run(aps, scan_size, scans):
+    networks = synthetic_networks(aps)
+    for i, n in enumerate(networks):
+        n["ssid"] = f"Site-{i // 8}"  # eight APs per SSID
+    app = make_app()
+    with app.app_context():
+        save_networks_to_db(db, Network, networks)
+        detector = RogueDetector()
+        _, load_time = timed(detector.load, db)
+        print(f"Index of {aps:,} APs in {len(detector.groups):,} SSIDs built in {load_time:.2f}s "
+              f"({len(detector.findings):,} findings)")
+        print("-" * 60)
+
+        rng = random.Random(0)
+        incremental, grouped = [], []
+        for _ in range(scans):
+            scan = [dict(n, signal=n["signal"] + rng.randint(-3, 3))
+                    for n in rng.sample(networks, scan_size)]
+            start = time.perf_counter()
+            detector.observe(scan)
+            incremental.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            ssid_context(db)
+            grouped.append(time.perf_counter() - start)
+
+        for name, times in (("incremental observe()", incremental),
+                            ("full-table GROUP BY", grouped)):
+            times.sort()
+            print(f"  {name:22s} p50 {times[len(times) // 2] * 1000:8.2f} ms   "
+                  f"max {times[-1] * 1000:8.2f} ms")
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--aps', type=int, default=100000)
+    parser.add_argument('--scan', type=int, default=200)
+    parser.add_argument('--scans', type=int, default=50)
+    args = parser.parse_args()
+    run(args.aps, args.scan, args.scans)
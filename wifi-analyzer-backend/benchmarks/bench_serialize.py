@@ -0,0 +1,90 @@
+"""
+Benchmark: encoding network and audit rows as JSON
+
+Stores --rows networks and audits, then times turning them into the JSON
+body of a list response: model objects through to_dict() and jsonify, or
+a dictionary per row (timestamps formatted, result_json decoded) through
+jsonify as the list endpoints did (before), against RowEncoder on raw row tuples with the standard library
+and, when installed, orjson (after). Times are best of --repeat, with the
+rows already fetched; the query is timed separately.
+
+Usage:
+    python benchmarks/bench_serialize.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+
+from flask import jsonify
+from sqlalchemy import select
+
+from common import make_app, cleanup, synthetic_networks
+from models import db, Network, Audit
+from services.audit_service import audit_networks
+from services.query_service import NETWORK_FIELDS, AUDIT_FIELDS
+from services.scan_service import save_networks_to_db
+from services.serialization import RowEncoder, orjson
+
+
+# Per-row dictionary serializers of the previous list endpoint code
+BEFORE = {
+    "time": lambda value: value.isoformat() + "Z" if value else None,
+    "raw_json": lambda value: json.loads(value) if value else None,
+}
+
+
+def row_dicts(rows, layout):
+    serializers = [(i, n, BEFORE.get(kind)) for i, (n, kind) in enumerate(layout)]
+    return [{n: (fn(row[i]) if fn else row[i]) for i, n, fn in serializers} for row in rows]
+
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def run(count, repeat):
+    app = make_app()
+    with app.app_context():
+        save_networks_to_db(db, Network, synthetic_networks(count))
+        audit_networks(db)
+
+        for name, model, fields in (("networks", Network, NETWORK_FIELDS),
+                                    ("audits", Audit, AUDIT_FIELDS)):
+            columns = [column for column, _ in fields.values()]
+            layout = [(n, kind) for n, (_, kind) in fields.items()]
+            objects = model.query.all()
+            rows = db.session.execute(select(*columns)).all()
+            query_orm, _ = best(lambda: model.query.all(), repeat)
+            query_raw, _ = best(lambda: db.session.execute(select(*columns)).all(), repeat)
+
+            print(f"{len(rows):,} {name}")
+            print(f"  fetch: ORM objects {query_orm * 1000:8.1f} ms   "
+                  f"row tuples {query_raw * 1000:8.1f} ms")
+            cases = [("to_dict + jsonify (before)",
+                      lambda: jsonify([o.to_dict() for o in objects]).get_data()),
+                     ("row dicts + jsonify (before)",
+                      lambda: jsonify(row_dicts(rows, layout)).get_data()),
+                     ("RowEncoder, json", RowEncoder(layout, use_orjson=False).encode_many)]
+            if orjson is not None:
+                cases.append(("RowEncoder, orjson", RowEncoder(layout, use_orjson=True).encode_many))
+            baseline = None
+            for label, fn in cases:
+                call = fn if label.endswith("(before)") else (lambda fn=fn: fn(rows))
+                elapsed, body = best(call, repeat)
+                baseline = baseline or elapsed
+                print(f"  {label:30s} {elapsed * 1000:8.1f} ms  {len(body) / 1e6:6.2f} MB  "
+                      f"x{baseline / elapsed:.1f}")
+    cleanup(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
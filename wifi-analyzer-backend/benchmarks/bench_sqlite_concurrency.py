@@ -0,0 +1,160 @@
+"""
+Benchmark: concurrent scan writes and dashboard reads on one SQLite file
+
+Runs --writers processes saving scan batches through save_networks_to_db
+and --readers processes paging through the network list, like gunicorn
+workers sharing a database, for --seconds each with the default
+connection settings and with the SQLITE_TUNING profile (WAL, pragmas,
+pooling). Reports operations per second, p50/p99 latency and failed
+operations ("database is locked") per role.
+
+Writers also insert networks that are not stored yet, several writers the
+same ones, and afterwards the dashboard counters are compared with a full
+recomputation; a BSSID counted as new by two writers shows up there.
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [--writers 2] [--readers 6] [--seconds 10]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from common import synthetic_networks
+
+from flask import Flask
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from config import config
+from models import db, Network, StatCounter, upgrade_schema
+from services.db_tuning import init_database
+from services.query_service import list_networks_page
+from services.scan_service import save_networks_to_db
+from services.stats_service import TABLE_VERSION, rebuild_stats
+
+BATCH = 50
+# Networks of a batch not stored before the run (shared by all writers)
+NEW_PER_BATCH = 5
+
+
+def make_app(path, tuning):
+    app = Flask(__name__)
+    app.config.from_object(config['production'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLITE_TUNING'] = tuning
+    init_database(app)
+    return app
+
+
+def counters():
+    table = StatCounter.__table__
+    rows = db.session.execute(select(table).where(table.c.dimension != TABLE_VERSION))
+    return {(row.dimension, row.key): row.count for row in rows if row.count}
+
+
+def check_counters(app):
+    """Differences between the maintained counters and a rebuild"""
+    with app.app_context():
+        kept = counters()
+        total = db.session.query(Network).count()
+        rebuild_stats(db)
+        exact = counters()
+        db.session.remove()
+        db.engine.dispose()
+    wrong = {key: kept.get(key, 0) - count for key, count in exact.items()
+             if kept.get(key, 0) != count}
+    return total, wrong
+
+
+def worker(role, index, path, tuning, networks, fresh, start_at, deadline, results):
+    app = make_app(path, tuning)
+    time.sleep(max(0.0, start_at - time.time()))
+    rng = random.Random(index)
+    latencies, failures = [], 0
+    with app.app_context():
+        while time.time() < deadline:
+            start = time.perf_counter()
+            try:
+                if role == 'writer':
+                    batch = [dict(n, signal=n["signal"] + rng.randint(-9, 9))
+                             for n in rng.sample(networks, BATCH - NEW_PER_BATCH)]
+                    batch += rng.sample(fresh, NEW_PER_BATCH)
+                    save_networks_to_db(db, Network, batch)
+                else:
+                    list_networks_page(db, {"sort": "-last_seen", "limit": "100"})
+            except OperationalError:
+                db.session.rollback()
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        db.session.remove()
+        db.engine.dispose()
+    results.put((role, latencies, failures))
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def run_profile(name, tuning, writers, readers, seconds, count):
+    fd, path = tempfile.mkstemp(suffix='.db', prefix='wifi_bench_')
+    os.close(fd)
+    networks = synthetic_networks(count)
+    fresh = synthetic_networks(count // 10, start=count)
+    app = make_app(path, tuning)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        save_networks_to_db(db, Network, networks)
+        db.session.remove()
+        db.engine.dispose()
+
+    results = multiprocessing.Queue()
+    # Every process starts measuring at the same time, after its setup
+    start_at = time.time() + 1
+    deadline = start_at + seconds
+    processes = [
+        multiprocessing.Process(target=worker, args=(role, i, path, tuning, networks, fresh,
+                                                     start_at, deadline, results))
+        for i, role in enumerate(['writer'] * writers + ['reader'] * readers)
+    ]
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    print(name)
+    for role in ('writer', 'reader'):
+        latencies = sorted(l for r, ls, _ in collected if r == role for l in ls)
+        failures = sum(f for r, _, f in collected if r == role)
+        print(f"  {role}s: {len(latencies) / seconds:8.1f} ops/s   "
+              f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   "
+              f"p99 {percentile(latencies, 0.99) * 1000:8.1f} ms   failed {failures}")
+    total, wrong = check_counters(app)
+    if wrong:
+        print(f"  counters: {len(wrong)} wrong, e.g. "
+              + ", ".join(f"{d}={k!r} off by {v:+d}" for (d, k), v in list(wrong.items())[:3]))
+    else:
+        print(f"  counters: exact ({total:,} networks)")
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=6)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--networks', type=int, default=20000)
+    args = parser.parse_args()
+    print(f"{args.writers} writers ({BATCH} APs per save), {args.readers} readers, "
+          f"{args.networks:,} networks, {args.seconds:g}s per profile")
+    print("-" * 60)
+    run_profile("default settings", False, args.writers, args.readers, args.seconds, args.networks)
+    run_profile("SQLITE_TUNING", True, args.writers, args.readers, args.seconds, args.networks)
@@ -0,0 +1,72 @@
+"""
+Benchmark: saving scan results
+
+Compares the original one-ORM-object-per-BSSID insert with the chunked
+INSERT ... ON CONFLICT upsert in save_networks_to_db.
+
+Usage:
+    python benchmarks/bench_upsert.py [--count 10000]
+"""
+import argparse
+import uuid
+
+from common import make_app, cleanup, synthetic_networks, timed
+from models import db, Network
+from services.scan_service import save_networks_to_db
+
+
+def legacy_save(networks_data):
+    """The pre-upsert implementation, kept here for comparison"""
+    saved = []
+    for n in networks_data:
+        net = Network(
+            id=str(uuid.uuid4()),
+            ssid=n["ssid"],
+            bssid=n["bssid"],
+            channel=n["channel"],
+            signal=n["signal"],
+            encryption=n["encryption"]
+        )
+        db.session.add(net)
+        saved.append(net.to_dict())
+    db.session.commit()
+    return saved
+
+
+def run(count):
+    networks = synthetic_networks(count)
+    rescan = synthetic_networks(count, signal_shift=-3)
+    results = {}
+
+    app = make_app()
+    with app.app_context():
+        _, elapsed = timed(legacy_save, networks)
+        results['legacy insert'] = elapsed
+        try:
+            legacy_save(rescan)
+            results['legacy rescan'] = None
+        except Exception:
+            db.session.rollback()
+            results['legacy rescan'] = 'fails (UNIQUE constraint on bssid)'
+    cleanup(app)
+
+    app = make_app()
+    with app.app_context():
+        _, results['upsert insert'] = timed(save_networks_to_db, db, Network, networks)
+        _, results['upsert rescan'] = timed(save_networks_to_db, db, Network, rescan)
+    cleanup(app)
+
+    print(f"Saving {count} access points")
+    print("-" * 60)
+    for name, elapsed in results.items():
+        if isinstance(elapsed, float):
+            print(f"  {name:<16} {elapsed:8.3f}s  {count / elapsed:12,.0f} rows/sec")
+        else:
+            print(f"  {name:<16} {elapsed}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=10000)
+    run(parser.parse_args().count)
@@ -0,0 +1,85 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Allow running as `python benchmarks/<script>.py` from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, upgrade_schema
+
+
+def make_app(db_path=None):
+    """
+    Create a bare Flask app bound to a throwaway SQLite file
+
+    Args:
+        db_path: Database file path (a temporary file if omitted)
+
+    Returns:
+        Flask app instance with tables created
+    """
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='wifi_bench_')
+        os.close(fd)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    app.bench_db_path = db_path
+    return app
+
+
+def cleanup(app):
+    """Dispose the engine and delete the app's database file"""
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    try:
+        os.remove(app.bench_db_path)
+    except OSError:
+        pass
+
+
+def synthetic_networks(count, seed=0, signal_shift=0, start=0):
+    """
+    Build deterministic scan results
+
+    Args:
+        count: Number of access points
+        seed: Offset mixed into the BSSIDs so runs can be disjoint
+        signal_shift: dBm added to every RSSI (to simulate a rescan)
+        start: Index of the first access point (to build a large set in
+            chunks)
+
+    Returns:
+        list: Network dictionaries as produced by the scanners
+    """
+    encryptions = ["WPA2-PSK", "WPA3", "Open", "WPA-PSK", "WEP"]
+    networks = []
+    for i in range(start, start + count):
+        n = i + seed * 1_000_000
+        networks.append({
+            "ssid": f"AP-{n}",
+            "bssid": "02:%02X:%02X:%02X:%02X:%02X" % (
+                (n >> 32) & 0xFF, (n >> 24) & 0xFF, (n >> 16) & 0xFF,
+                (n >> 8) & 0xFF, n & 0xFF),
+            "channel": 1 + n % 11,
+            "signal": -30 - n % 60 + signal_shift,
+            "encryption": encryptions[n % len(encryptions)]
+        })
+    return networks
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,66 @@
+"""
+Seed a synthetic database for the load tests
+
+Writes --size networks (1k, 100k or 1m, or --networks N) through the
+normal save path, so the dashboard counters and table versions are
+consistent, then audits every network once with the batch audit path.
+The file is kept; point DATABASE_URI (or bench_load.py --db) at it.
+
+Usage:
+    python benchmarks/seed_db.py PATH [--size 100k | --networks N] [--no-audits]
+"""
+import argparse
+import os
+
+from common import make_app, synthetic_networks, timed
+from models import db, Network, Audit
+from services.audit_service import audit_networks
+from services.scan_service import save_networks_to_db
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+# Networks per save_networks_to_db call
+CHUNK_SIZE = 20_000
+
+
+def seed(path, networks, audits=True, chunk_size=CHUNK_SIZE):
+    """
+    Create (or extend) the database at `path`
+
+    Args:
+        path: SQLite file
+        networks: Number of networks
+        audits: Also audit every network once
+        chunk_size: Networks saved per transaction
+
+    Returns:
+        dict: Row counts of the network and audit tables
+    """
+    app = make_app(os.path.abspath(path))
+    with app.app_context():
+        for start in range(0, networks, chunk_size):
+            count = min(chunk_size, networks - start)
+            _, elapsed = timed(save_networks_to_db, db, Network,
+                               synthetic_networks(count, start=start))
+            print(f"  networks {start + count:>9,} / {networks:,}  ({count / elapsed:,.0f} rows/s)")
+        if audits:
+            summary, elapsed = timed(audit_networks, db)
+            print(f"  audits   {summary['audited']:>9,}            "
+                  f"({summary['audited'] / elapsed:,.0f} rows/s)")
+        counts = {"networks": db.session.query(Network).count(),
+                  "audits": db.session.query(Audit).count()}
+        db.session.remove()
+        db.engine.dispose()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path')
+    parser.add_argument('--size', choices=sorted(SIZES), default='1k')
+    parser.add_argument('--networks', type=int, help='overrides --size')
+    parser.add_argument('--no-audits', action='store_true')
+    args = parser.parse_args()
+    total = args.networks or SIZES[args.size]
+    print(f"Seeding {args.path} with {total:,} networks")
+    print(seed(args.path, total, audits=not args.no_audits))
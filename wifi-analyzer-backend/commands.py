@@ -0,0 +1,118 @@
+"""
+Flask CLI Commands
+Maintenance commands available through `flask --app app_new <command>`
+"""
+import json
+import os
+import secrets
+import time
+import uuid
+import click
+from flask import current_app
+from models import db, Network, migrate_data
+from services.capture_service import ingest_captures
+from services.pcap_parser import CaptureError
+from services.stats_service import rebuild_stats
+from services.token_registry import (
+    SCOPES, READ, TokenError, hash_token, load_token_file, parse_rate_limit
+)
+
+
+def register_commands(app):
+    """Register the CLI commands on `app`"""
+
+    @app.cli.command('ingest-capture')
+    @click.argument('paths', nargs=-1, required=True,
+                    type=click.Path(exists=True, dir_okay=False))
+    @click.option('--workers', type=int, default=None,
+                  help='Parser processes (default: CAPTURE_WORKERS)')
+    def ingest_capture_command(paths, workers):
+        """Import and audit access points from pcap/pcapng capture files"""
+        workers = workers or current_app.config['CAPTURE_WORKERS']
+
+        def progress(done, total):
+            click.echo(f"  parsed {done / total:6.1%} of {total / 1e6:,.1f} MB", err=True)
+
+        try:
+            _, summary = ingest_captures(db, Network, list(paths),
+                                         scan_id=str(uuid.uuid4()),
+                                         workers=workers, progress=progress,
+                                         rules=current_app.extensions['audit_rules'])
+        except CaptureError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"{len(paths)} file(s): {summary['networks']} networks from "
+            f"{summary['frames']:,} frames in {summary['parse_seconds']}s "
+            f"({summary['frames_per_second'] or 0:,} frames/sec, {workers} workers); "
+            f"{summary['audited']} audited"
+        )
+
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Convert the data of a database created by an older version"""
+        summary = migrate_data()
+        for name, count in summary.items():
+            click.echo(f"  {name}: {count} row(s) converted")
+        click.echo("Database migrated")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Recompute the dashboard counters from the networks and audits tables"""
+        rebuild_stats(db)
+        click.echo("Dashboard stats rebuilt")
+
+    @app.cli.command('run-scheduler')
+    def run_scheduler_command():
+        """Run the continuous scan scheduler in the foreground"""
+        scheduler = current_app.extensions['scan_scheduler']
+        scheduler.start()
+        click.echo(f"Scanning {', '.join(s.interface or 'default' for s in scheduler.states.values())} "
+                   f"every {scheduler.min_interval:g}-{scheduler.max_interval:g}s; Ctrl+C to stop")
+        try:
+            while scheduler.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.stop()
+
+    @app.cli.command('create-token')
+    @click.argument('name')
+    @click.option('--scope', 'scopes', multiple=True, type=click.Choice(SCOPES),
+                  help='Granted scope, repeatable (default: read)')
+    @click.option('--rate-limit', default=None, help="e.g. '60/minute' (default: none)")
+    @click.option('--add', is_flag=True,
+                  help='Append the entry to the JSON API_TOKENS_FILE')
+    def create_token_command(name, scopes, rate_limit, add):
+        """Generate an API token and print its registry entry"""
+        try:
+            parse_rate_limit(rate_limit)
+        except TokenError as e:
+            raise click.BadParameter(str(e), param_hint='--rate-limit')
+        token = secrets.token_urlsafe(32)
+        entry = {"name": name, "sha256": hash_token(token), "scopes": list(scopes or [READ])}
+        if rate_limit:
+            entry["rate_limit"] = rate_limit
+
+        path = current_app.config.get('API_TOKENS_FILE')
+        if add:
+            if not path or not path.endswith('.json'):
+                raise click.ClickException("--add needs API_TOKENS_FILE set to a .json file")
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = {"tokens": []}
+            if any(t.get("name") == name for t in data.get("tokens", [])):
+                raise click.ClickException(f"A token named {name!r} already exists")
+            data.setdefault("tokens", []).append(entry)
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            load_token_file(tmp)
+            os.replace(tmp, path)
+            click.echo(f"Added {name!r} to {path}; workers pick it up within "
+                       f"{current_app.config['API_TOKENS_RELOAD']:g}s", err=True)
+        else:
+            click.echo(json.dumps(entry), err=True)
+        click.echo(token)
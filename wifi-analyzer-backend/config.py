@@ -6,12 +6,85 @@ load_dotenv()
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    API_TOKEN = os.getenv('API_TOKEN', 'mysecrettoken')
+    API_TOKEN = os.getenv('API_TOKEN', 'mysecrettoken')  # admin token; empty to disable
+    API_TOKENS_FILE = os.getenv('API_TOKENS_FILE')  # hashed tokens with scopes (.json/.yaml)
+    API_TOKENS_RELOAD = float(os.getenv('API_TOKENS_RELOAD', 5))  # s between file change checks
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///wifi_analyzer.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite connection profile (WAL, pragmas, pooling), on in production
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'False') == 'True'
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', 65536))  # KiB per connection
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))  # connections per worker process
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 8))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # wait for a free connection, s
     DEBUG = os.getenv('DEBUG', 'True') == 'True'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
+    API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+    SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', 2))
+    SCAN_JOB_HISTORY = int(os.getenv('SCAN_JOB_HISTORY', 100))
+    SCAN_WAIT_TIMEOUT = float(os.getenv('SCAN_WAIT_TIMEOUT', 30))
+    SCAN_QUEUE_SIZE = int(os.getenv('SCAN_QUEUE_SIZE', 8))  # queued + running, 0 = unbounded
+    # Per-token limits: 'memory' (per process), 'sqlite' (shared) or 'none'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH')  # sqlite backend, default: <tmp>/wifi-analyzer-ratelimit.db
+    RATE_LIMIT_SCAN = os.getenv('RATE_LIMIT_SCAN', '10/minute')  # tokens without their own rate_limit
+    RATE_LIMIT_AUDIT = os.getenv('RATE_LIMIT_AUDIT', '120/minute')
+    # Scanner backend: pywifi, simulated, iw, nmcli, pcap or synthetic
+    SCAN_BACKEND = os.getenv('SCAN_BACKEND', 'pywifi')
+    SCAN_SOURCE = os.getenv('SCAN_SOURCE')  # input file for iw/nmcli/pcap
+    SCAN_SETTLE_TIME = float(os.getenv('SCAN_SETTLE_TIME', 2))
+    SCAN_FALLBACK_SIMULATED = os.getenv('SCAN_FALLBACK_SIMULATED', 'True') == 'True'
+    SCAN_SYNTHETIC_COUNT = int(os.getenv('SCAN_SYNTHETIC_COUNT', 1000))
+    SCAN_SYNTHETIC_SEED = int(os.getenv('SCAN_SYNTHETIC_SEED', 0))
+    SCAN_SYNTHETIC_RATE = float(os.getenv('SCAN_SYNTHETIC_RATE', 0))  # APs/sec, 0 = unthrottled
+    CAPTURE_DIR = os.getenv('CAPTURE_DIR', 'captures')  # pcaps importable via the API
+    AUDIT_RULES = os.getenv('AUDIT_RULES')  # rule file (.json/.yaml), default rules/default.json
+    AUDIT_MAX_BSSIDS = int(os.getenv('AUDIT_MAX_BSSIDS', 1000))  # per batch audit request
+    CAPTURE_WORKERS = int(os.getenv('CAPTURE_WORKERS', os.cpu_count() or 1))
+    # Scans only write what changed since the previous scan of the interface
+    CHANGE_TRACKING = os.getenv('CHANGE_TRACKING', 'False') == 'True'
+    CHANGE_SIGNAL_DELTA = int(os.getenv('CHANGE_SIGNAL_DELTA', 5))  # dB
+    CHANGE_MISSED_SCANS = int(os.getenv('CHANGE_MISSED_SCANS', 2))  # before 'disappeared'
+    CHANGE_TOUCH_INTERVAL = float(os.getenv('CHANGE_TOUCH_INTERVAL', 300))  # last_seen refresh, s
+    # Cross-network evil-twin checks on every scan
+    ROGUE_DETECTION = os.getenv('ROGUE_DETECTION', 'True') == 'True'
+    OUI_FILE = os.getenv('OUI_FILE')  # Wireshark manuf or IEEE oui.txt; raw OUIs if unset
+    ROGUE_SIGNAL_MARGIN = int(os.getenv('ROGUE_SIGNAL_MARGIN', 20))  # dB above SSID median
+    # Live event feed: 'local' (one process) or 'socket' (gunicorn workers)
+    EVENT_BROKER = os.getenv('EVENT_BROKER', 'local')
+    EVENT_BROKER_DIR = os.getenv('EVENT_BROKER_DIR')  # default: <tmp>/wifi-analyzer-events
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 256))  # per client, oldest dropped
+    EVENT_MAX_CLIENTS = int(os.getenv('EVENT_MAX_CLIENTS', 100))
+    EVENT_HEARTBEAT = float(os.getenv('EVENT_HEARTBEAT', 15))
+    EVENT_SIGNAL_DELTA = int(os.getenv('EVENT_SIGNAL_DELTA', 3))  # dB
+    # Cache of the hot read endpoints: 'memory' (per process), 'sqlite' or 'none'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_PATH = os.getenv('CACHE_PATH')  # sqlite backend, default: <tmp>/wifi-analyzer-cache.db
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_TTL = float(os.getenv('CACHE_TTL', 30))  # seconds
+    # Prometheus metrics at /metrics (per process)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+    # Per-request profiling (X-Profile: 1 with an admin token, or sampled)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+    PROFILE_HEADER = os.getenv('PROFILE_HEADER', 'X-Profile')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # share of requests
+    PROFILE_HISTORY = int(os.getenv('PROFILE_HISTORY', 20))  # profiles kept per process
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))  # s
+    PROFILE_MAX_STATEMENTS = int(os.getenv('PROFILE_MAX_STATEMENTS', 1000))  # SQL timings per profile
+    # Continuous scanning (enable in one process only)
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'False') == 'True'
+    SCHEDULER_INTERFACES = os.getenv('SCHEDULER_INTERFACES', '')  # comma separated
+    SCAN_INTERVAL = float(os.getenv('SCAN_INTERVAL', 60))
+    SCAN_MIN_INTERVAL = float(os.getenv('SCAN_MIN_INTERVAL', 10))
+    SCAN_MAX_INTERVAL = float(os.getenv('SCAN_MAX_INTERVAL', 600))
+    SCAN_CHURN_LOW = float(os.getenv('SCAN_CHURN_LOW', 0.02))  # back off at or below
+    SCAN_CHURN_HIGH = float(os.getenv('SCAN_CHURN_HIGH', 0.2))  # speed up at or above
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -20,11 +93,14 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True') == 'True'
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SCAN_BACKEND = 'simulated'
+    SCHEDULER_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
@@ -3,11 +3,29 @@ Database Inspector
 Quick script to view database contents
 """
 import sqlite3
-import json
 from datetime import datetime
 
 DB_PATH = 'instance/wifi_analyzer.db'
 
+
+def distribution(cursor, dimension, fallback_sql):
+    """
+    Read a distribution from the stat_counter table maintained by the app,
+    falling back to a GROUP BY over the base table for older databases
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='stat_counter'")
+    if cursor.fetchone():
+        cursor.execute(
+            "SELECT key, count FROM stat_counter WHERE dimension = ? AND count != 0 ORDER BY key",
+            (dimension,)
+        )
+        rows = cursor.fetchall()
+        if rows:
+            return rows
+    cursor.execute(fallback_sql)
+    return cursor.fetchall()
+
+
 def inspect_database():
     """Inspect and display database contents"""
     try:
@@ -58,7 +76,10 @@ def inspect_database():
         print(f"\nTotal audits: {count}")
         
         if count > 0:
-            cursor.execute("SELECT id, network_bssid, started_at, result_json FROM audit")
+            cursor.execute(
+                "SELECT id, network_bssid, started_at, risk_level, weak_cipher, "
+                "open_network, signal_strength FROM audit"
+            )
             audits = cursor.fetchall()
             
             print("\nAudits:")
@@ -67,22 +88,20 @@ def inspect_database():
                 print(f"\n  Audit ID: {audit[0]}")
                 print(f"  Network BSSID: {audit[1]}")
                 print(f"  Started: {audit[2]}")
+                print(f"  Risk Level: {audit[3] or 'unknown'}")
+                print(f"  Weak Cipher: {bool(audit[4]) if audit[4] is not None else 'N/A'}")
+                print(f"  Open Network: {bool(audit[5]) if audit[5] is not None else 'N/A'}")
+                print(f"  Signal Strength: {audit[6] if audit[6] is not None else 'N/A'} dBm")
                 
-                if audit[3]:
-                    try:
-                        result = json.loads(audit[3])
-                        print(f"  Risk Level: {result.get('risk_level', 'unknown')}")
-                        print(f"  Weak Cipher: {result.get('weak_cipher', 'N/A')}")
-                        print(f"  Open Network: {result.get('open_network', 'N/A')}")
-                        print(f"  Signal Strength: {result.get('signal_strength', 'N/A')} dBm")
-                        
-                        details = result.get('details', [])
-                        if details:
-                            print("  Details:")
-                            for detail in details:
-                                print(f"    - {detail}")
-                    except json.JSONDecodeError:
-                        print(f"  Result: {audit[3]}")
+                cursor.execute(
+                    "SELECT message FROM audit_finding WHERE audit_id = ? ORDER BY position",
+                    (audit[0],)
+                )
+                details = [row[0] for row in cursor.fetchall()]
+                if details:
+                    print("  Details:")
+                    for detail in details:
+                        print(f"    - {detail}")
                 
                 print("-" * 60)
         
@@ -92,24 +111,22 @@ def inspect_database():
         print("=" * 60)
         
         # Encryption types
-        cursor.execute("SELECT encryption, COUNT(*) FROM network GROUP BY encryption")
-        enc_stats = cursor.fetchall()
+        enc_stats = distribution(
+            cursor, 'network_encryption',
+            "SELECT encryption, COUNT(*) FROM network GROUP BY encryption"
+        )
         print("\nEncryption Distribution:")
         for enc in enc_stats:
-            print(f"  {enc[0]}: {enc[1]} network(s)")
+            print(f"  {enc[0] or 'Unknown'}: {enc[1]} network(s)")
         
         # Risk levels
-        cursor.execute("SELECT result_json FROM audit WHERE result_json IS NOT NULL")
-        audit_results = cursor.fetchall()
         risk_counts = {'low': 0, 'medium': 0, 'high': 0, 'unknown': 0}
-        
-        for result in audit_results:
-            try:
-                data = json.loads(result[0])
-                risk = data.get('risk_level', 'unknown')
-                risk_counts[risk] = risk_counts.get(risk, 0) + 1
-            except:
-                risk_counts['unknown'] += 1
+        for risk, count in distribution(
+            cursor, 'audit_risk',
+            "SELECT COALESCE(risk_level, 'unknown'), COUNT(*) FROM audit GROUP BY 1"
+        ):
+            risk = risk or 'unknown'
+            risk_counts[risk] = risk_counts.get(risk, 0) + count
         
         print("\nRisk Level Distribution:")
         for risk, count in risk_counts.items():
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 import datetime
 import json
 
@@ -8,6 +9,7 @@ def init_db(app):
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        upgrade_schema()
 
 class Network(db.Model):
     id = db.Column(db.String, primary_key=True)
@@ -16,7 +18,8 @@ class Network(db.Model):
     channel = db.Column(db.Integer, nullable=True)
     signal = db.Column(db.Integer, nullable=True)  # RSSI
     encryption = db.Column(db.String, nullable=True)
-    discovered_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    discovered_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+    last_seen = db.Column(db.DateTime, default=datetime.datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -26,14 +29,29 @@ class Network(db.Model):
             "channel": self.channel,
             "signal": self.signal,
             "encryption": self.encryption,
-            "discovered_at": self.discovered_at.isoformat() + "Z" if self.discovered_at else None
+            "discovered_at": self.discovered_at.isoformat() + "Z" if self.discovered_at else None,
+            "last_seen": self.last_seen.isoformat() + "Z" if self.last_seen else None
         }
 
+# Result keys mirrored into indexed Audit columns
+AUDIT_RESULT_COLUMNS = ('risk_level', 'weak_cipher', 'open_network', 'signal_strength')
+
 class Audit(db.Model):
+    __table_args__ = (
+        db.Index('ix_audit_risk_level_started_at', 'risk_level', 'started_at'),
+    )
+
     id = db.Column(db.String, primary_key=True)
     network_bssid = db.Column(db.String, db.ForeignKey('network.bssid'), nullable=False)
-    started_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
     result_json = db.Column(db.Text, nullable=True)
+    rule_set = db.Column(db.String, nullable=True)  # version of the rules that produced result
+    risk_level = db.Column(db.String, nullable=True)
+    weak_cipher = db.Column(db.Boolean, nullable=True)
+    open_network = db.Column(db.Boolean, nullable=True)
+    signal_strength = db.Column(db.Integer, nullable=True)
+    findings = db.relationship('AuditFinding', order_by='AuditFinding.position',
+                               cascade='all, delete-orphan', lazy='select')
 
     @property
     def result(self):
@@ -41,12 +59,187 @@ class Audit(db.Model):
 
     @result.setter
     def result(self, value):
+        """Store the result blob and mirror its summary keys into the columns"""
         self.result_json = json.dumps(value)
+        for name in AUDIT_RESULT_COLUMNS:
+            setattr(self, name, (value or {}).get(name))
 
     def to_dict(self):
         return {
             "id": self.id,
             "network_bssid": self.network_bssid,
             "started_at": self.started_at.isoformat() + "Z" if self.started_at else None,
-            "result": self.result
+            "result": self.result,
+            "rule_set": self.rule_set
         }
+
+class AuditFinding(db.Model):
+    """One rule that fired in an audit, in result order"""
+    __tablename__ = 'audit_finding'
+
+    id = db.Column(db.Integer, primary_key=True)
+    audit_id = db.Column(db.String, db.ForeignKey('audit.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    rule_id = db.Column(db.String, nullable=False, index=True)
+    severity = db.Column(db.String, nullable=True)
+    message = db.Column(db.Text, nullable=True)
+
+    def to_dict(self):
+        return {
+            "rule_id": self.rule_id,
+            "severity": self.severity,
+            "message": self.message
+        }
+
+class Observation(db.Model):
+    """Append-only RSSI/channel readings, one row per BSSID per scan"""
+    __table_args__ = (
+        db.Index('ix_observation_bssid_ts', 'bssid', 'ts'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    bssid = db.Column(db.String, nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    signal = db.Column(db.Integer, nullable=True)  # RSSI
+    channel = db.Column(db.Integer, nullable=True)
+    scan_id = db.Column(db.String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "bssid": self.bssid,
+            "ts": self.ts.isoformat() + "Z" if self.ts else None,
+            "signal": self.signal,
+            "channel": self.channel,
+            "scan_id": self.scan_id
+        }
+
+class NetworkChange(db.Model):
+    """
+    One detected change between consecutive scans of an interface:
+    appeared, disappeared, signal, encryption, channel or ssid
+    """
+    __tablename__ = 'network_change'
+    __table_args__ = (
+        db.Index('ix_network_change_ts_id', 'ts', 'id'),
+        db.Index('ix_network_change_bssid_ts', 'bssid', 'ts'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    scan_id = db.Column(db.String, nullable=True)
+    interface = db.Column(db.String, nullable=True)
+    bssid = db.Column(db.String, nullable=False)
+    kind = db.Column(db.String, nullable=False)
+    old_value = db.Column(db.String, nullable=True)
+    new_value = db.Column(db.String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "ts": self.ts.isoformat() + "Z" if self.ts else None,
+            "scan_id": self.scan_id,
+            "interface": self.interface,
+            "bssid": self.bssid,
+            "kind": self.kind,
+            "old_value": self.old_value,
+            "new_value": self.new_value
+        }
+
+class ScanJobRecord(db.Model):
+    """
+    State of a scan or capture import job, shared by all worker processes
+    so a job can be polled through any of them
+    """
+    __tablename__ = 'scan_job'
+
+    id = db.Column(db.String, primary_key=True)
+    interface = db.Column(db.String, nullable=True)
+    status = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    summary_json = db.Column(db.Text, nullable=True)
+    networks_json = db.Column(db.Text, nullable=True)
+
+class StatCounter(db.Model):
+    """
+    Summary counter maintained alongside the tables it describes, e.g.
+    ('network_encryption', 'WPA2') -> number of networks using WPA2
+    """
+    __tablename__ = 'stat_counter'
+
+    dimension = db.Column(db.String, primary_key=True)
+    key = db.Column(db.String, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Columns added after the first release, as (DDL type, backfill SQL
+# expression or None). db.create_all() never alters existing tables, so
+# older database files are patched in place.
+ADDED_COLUMNS = {
+    'network': {
+        'last_seen': ('DATETIME', 'discovered_at'),
+    },
+    'audit': {
+        'rule_set': ('VARCHAR', None),
+        'risk_level': ('VARCHAR', None),
+        'weak_cipher': ('BOOLEAN', None),
+        'open_network': ('BOOLEAN', None),
+        'signal_strength': ('INTEGER', None),
+    },
+}
+
+def upgrade_schema():
+    """
+    Bring the schema of an existing database up to the current models
+
+    Adds any columns from ADDED_COLUMNS that are missing and creates
+    indexes declared on the models that older databases were built
+    without. Only idempotent DDL runs here, as every worker calls it on
+    start; the data is converted once by migrate_data().
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            for name, (ddl, _) in columns.items():
+                if name not in existing:
+                    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def migrate_data():
+    """
+    Convert the rows of a database created by an older version
+
+    Backfills the columns of ADDED_COLUMNS left empty by upgrade_schema(),
+    moves the summary of legacy audit result blobs into the structured
+    audit columns and builds the dashboard summary counters if they are
+    missing. Safe to run again; rows already converted are skipped.
+
+    Returns:
+        dict: Rows backfilled per column and audits converted
+    """
+    from services.audit_service import backfill_audit_columns
+    from services.db_tuning import write_engine
+    from services.stats_service import ensure_stats, rebuild_stats
+
+    summary = {}
+    with write_engine(db.engine).begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            for name, (_, backfill) in columns.items():
+                if backfill:
+                    result = conn.execute(text(
+                        f'UPDATE {table} SET {name} = {backfill} WHERE {name} IS NULL'))
+                    summary[f'{table}.{name}'] = result.rowcount
+
+    summary['audits'] = backfill_audit_columns(db.engine)
+    if summary['audits']:
+        rebuild_stats(db)
+    else:
+        ensure_stats(db)
+    return summary
@@ -2,20 +2,30 @@
 Audit Routes
 Handles security audit operations and reporting
 """
-from flask import Blueprint, jsonify, request
-import datetime
-import uuid
-import csv
-import io
-from models import db, Network, Audit
-from services.scan_service import perform_security_audit
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from models import db, Network
+from services.query_service import (
+    list_audits_page, get_audit_json, network_conditions, parse_time, QueryError
+)
+from services.serialization import json_response
+from services.audit_service import audit_networks, record_audit
+from services.export_service import (
+    iter_audits_csv, iter_audits_json, iter_audits_ndjson, gzip_stream
+)
+from services.response_cache import cached_response
+from services.etags import conditional_get
+from services.token_registry import AUDIT
+from services.rate_limiter import rate_limited
+from services.metrics import timed_route
 from auth import require_auth
 
 audit_bp = Blueprint('audits', __name__, url_prefix='/api/audits')
 
 
 @audit_bp.route('/start/<bssid>', methods=['POST'])
-@require_auth
+@timed_route
+@require_auth(scope=AUDIT)
+@rate_limited(AUDIT)
 def start_audit(bssid):
     """
     Start a security audit for a specific network
@@ -30,35 +40,102 @@ def start_audit(bssid):
     if not net:
         return jsonify({"error": "Network not found"}), 404
 
-    result = perform_security_audit(net)
+    audit, result = record_audit(db, net, current_app.extensions['audit_rules'])
+    return jsonify({"audit_id": audit.id, "rule_set": audit.rule_set, "result": result}), 201
 
-    audit = Audit(
-        id=str(uuid.uuid4()),
-        network_bssid=bssid,
-        started_at=datetime.datetime.utcnow(),
-        result=result
-    )
-    db.session.add(audit)
-    db.session.commit()
-    
-    return jsonify({"audit_id": audit.id, "result": result}), 201
+
+@audit_bp.route('/batch', methods=['POST'])
+@timed_route
+@require_auth(scope=AUDIT)
+@rate_limited(AUDIT)
+def batch_audit():
+    """
+    Audit many networks in one pass
+
+    With no filters every stored network is audited. All audits are
+    written in a single transaction.
+
+    JSON body / query params (all optional):
+        bssids: List of BSSIDs to audit (at most AUDIT_MAX_BSSIDS)
+        encryption, channel: Comma separated values (or JSON lists) to match
+        min_signal: Minimum RSSI in dBm
+        since, until: discovered_at range (ISO 8601)
+
+    Returns:
+        201 with the number of audits created per risk level
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    filters = dict(request.args.items())
+    for key, value in data.items():
+        values = value if isinstance(value, list) else [value]
+        if not all(isinstance(v, (str, int, float)) for v in values):
+            return jsonify({"error": f"{key} must be a value or a list of values"}), 400
+        filters[key] = ','.join(map(str, values))
+
+    bssids = data.get('bssids')
+    if bssids is None and filters.get('bssids'):
+        bssids = [b.strip() for b in filters['bssids'].split(',') if b.strip()]
+    if bssids is not None and not (isinstance(bssids, list)
+                                   and all(isinstance(b, str) for b in bssids)):
+        return jsonify({"error": "bssids must be a list"}), 400
+    limit = current_app.config['AUDIT_MAX_BSSIDS']
+    if bssids is not None and len(bssids) > limit:
+        return jsonify({"error": f"bssids is limited to {limit} entries"}), 400
+
+    try:
+        conditions = network_conditions(filters)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    summary = audit_networks(db, conditions, bssids=bssids,
+                             rules=current_app.extensions['audit_rules'])
+    return jsonify(summary), 201
 
 
 @audit_bp.route('', methods=['GET'])
+@timed_route
 @require_auth
+@conditional_get('audit')
+@cached_response('audits', tables=('audit',))
 def list_audits():
     """
-    List all audits
-    
+    List audits
+
+    Query params (all optional):
+        risk_level: Comma separated risk levels
+        finding: Comma separated rule ids; audits where any of them fired
+        bssid: Only audits of this network
+        since, until: started_at range (ISO 8601)
+        sort: started_at ('-started_at' for newest first)
+        fields: Comma separated list of fields to return
+        limit, cursor: Keyset pagination; the next page's cursor is sent
+            in the X-Next-Cursor header
+
     Returns:
         JSON array of audit objects
     """
-    audits = Audit.query.all()
-    return jsonify([a.to_dict() for a in audits])
+    try:
+        audits, next_cursor = list_audits_page(
+            db, request.args,
+            default_limit=current_app.config['API_PAGE_SIZE'],
+            max_limit=current_app.config['API_MAX_PAGE_SIZE']
+        )
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = json_response(audits)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 
 @audit_bp.route('/<audit_id>', methods=['GET'])
+@timed_route
 @require_auth
+@conditional_get('audit')
+@cached_response('audit:{audit_id}', tables=('audit',))
 def get_audit(audit_id):
     """
     Get a specific audit by ID
@@ -67,53 +144,56 @@ def get_audit(audit_id):
         audit_id: Audit ID
         
     Returns:
-        JSON audit object or 404
+        JSON audit object, with its findings, or 404
     """
-    a = Audit.query.filter_by(id=audit_id).first()
-    if not a:
+    body = get_audit_json(db, audit_id)
+    if body is None:
         return jsonify({"error": "Audit not found"}), 404
-    return jsonify(a.to_dict())
+    return json_response(body)
 
 
 @audit_bp.route('/export', methods=['GET'])
+@timed_route
 @require_auth
 def export_audits():
     """
-    Export all audits as JSON or CSV
-    
+    Export audits as JSON, NDJSON or CSV
+
+    The export is streamed in chunks straight from the database cursor,
+    and gzip-compressed on the fly when the client accepts it.
+
     Query params:
-        format: 'json' or 'csv' (default: json)
-        
+        format: 'json', 'ndjson' or 'csv' (default: json)
+        since, until: started_at range (ISO 8601, optional)
+
     Returns:
-        Exported data in requested format
+        Streaming response in requested format
     """
     export_format = request.args.get('format', 'json').lower()
-    audits = Audit.query.all()
-    
+    try:
+        since = parse_time(request.args.get('since'), 'since')
+        until = parse_time(request.args.get('until'), 'until')
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
     if export_format == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Audit ID', 'Network BSSID', 'Started At', 'Risk Level', 'Details'])
-        
-        for audit in audits:
-            result = audit.result or {}
-            writer.writerow([
-                audit.id,
-                audit.network_bssid,
-                audit.started_at.isoformat() if audit.started_at else '',
-                result.get('risk_level', 'unknown'),
-                '; '.join(result.get('details', []))
-            ])
-        
-        output.seek(0)
-        return output.getvalue(), 200, {
-            'Content-Type': 'text/csv',
-            'Content-Disposition': 'attachment; filename=audits.csv'
-        }
-    
-    # Default: JSON export
-    return jsonify({
-        "export_date": datetime.datetime.utcnow().isoformat() + "Z",
-        "total_audits": len(audits),
-        "audits": [a.to_dict() for a in audits]
-    })
+        chunks = iter_audits_csv(db, since, until)
+        content_type = 'text/csv'
+        filename = 'audits.csv'
+    elif export_format == 'ndjson':
+        chunks = iter_audits_ndjson(db, since, until)
+        content_type = 'application/x-ndjson'
+        filename = 'audits.ndjson'
+    else:
+        chunks = iter_audits_json(db, since, until)
+        content_type = 'application/json'
+        filename = None
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename={filename}'
+    if request.accept_encodings['gzip']:
+        chunks = gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(chunks), content_type=content_type, headers=headers)
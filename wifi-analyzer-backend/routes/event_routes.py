@@ -0,0 +1,52 @@
+"""
+Event Routes
+Server-sent events feed of scan and audit results
+"""
+from flask import Blueprint, jsonify, request, current_app, Response
+from services.event_bus import EVENT_TYPES
+from auth import require_auth
+
+event_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+
+@event_bp.route('', methods=['GET'])
+@require_auth
+def events():
+    """
+    Stream live events as text/event-stream
+
+    Event types: network.new, network.signal, audit.completed and
+    audit.batch. A client that falls behind receives an `overflow` event
+    with the number of events it missed and should re-fetch the lists.
+
+    Query params:
+        types: Comma separated event types (default: all)
+
+    Returns:
+        Event stream; 503 when the per-process client limit is reached
+    """
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    unknown = set(types) - set(EVENT_TYPES)
+    if unknown:
+        return jsonify({"error": f"types must be among: {', '.join(EVENT_TYPES)}"}), 400
+
+    bus = current_app.extensions['events']
+    subscription = bus.subscribe(types)
+    if subscription is None:
+        return jsonify({"error": "Too many event stream clients"}), 503
+    heartbeat = current_app.config['EVENT_HEARTBEAT']
+
+    def stream():
+        yield ": connected\n\n"
+        while True:
+            frames = subscription.get(timeout=heartbeat)
+            # A comment line keeps proxies from closing an idle stream
+            yield "".join(frames) if frames else ": keepalive\n\n"
+
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    # Runs when the client disconnects, even before the first chunk
+    response.call_on_close(lambda: bus.unsubscribe(subscription))
+    return response
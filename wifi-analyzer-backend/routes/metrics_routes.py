@@ -0,0 +1,24 @@
+"""
+Metrics Routes
+Prometheus scrape endpoint
+"""
+from flask import Blueprint, jsonify, current_app
+from services.metrics import CONTENT_TYPE
+from auth import require_auth
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@require_auth
+def metrics():
+    """
+    Get the metrics of this process in the Prometheus text format
+
+    Returns:
+        text/plain exposition, or 404 when METRICS_ENABLED is off
+    """
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return current_app.response_class(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -2,44 +2,266 @@
 Network Routes
 Handles all WiFi network scanning and listing endpoints
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, url_for
 from models import db, Network
-from services.scan_service import real_scan, simulate_scan, save_networks_to_db
+from services.scan_jobs import FAILED, ScanQueueFull
+from services.scanners import UnknownInterface
+from services.capture_service import resolve_capture_path, ingest_captures
+from services.pcap_parser import CaptureError
+from services.observation_service import get_signal_history, MAX_HISTORY_HOURS
+from services.rogue_detector import current_detector
+from services.query_service import (
+    list_networks_page, list_changes_page, get_network_json, QueryError
+)
+from services.serialization import json_response
+from services.response_cache import cached_response
+from services.etags import conditional_get
+from services.token_registry import SCAN
+from services.rate_limiter import rate_limited
+from services.metrics import timed_route
 from auth import require_auth
 
 network_bp = Blueprint('networks', __name__, url_prefix='/api/networks')
 
 
+def scan_queue_full(error):
+    """429 answer for a scan rejected by admission control"""
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
 @network_bp.route('/scan', methods=['POST'])
-@require_auth
+@timed_route
+@require_auth(scope=SCAN)
+@rate_limited(SCAN)
 def scan_networks():
     """
-    Perform real WiFi network scan and save results
-    
+    Queue a WiFi network scan
+
+    The scan runs on a background worker and the job id is returned
+    immediately. Concurrent requests for the same interface share one scan.
+    Requests over the token's scan rate limit, or that would queue a new
+    scan while SCAN_QUEUE_SIZE scans are pending, get 429 with Retry-After.
+
+    JSON body / query params:
+        interface: Wireless interface to scan (optional)
+        wait: If true, block until the scan finishes (query param)
+
+    Returns:
+        202 with the job status, or 201 with found networks when waiting
+        (400 if the backend has no such interface)
+    """
+    data = request.get_json(silent=True) or {}
+    interface = data.get('interface') or request.args.get('interface')
+    jobs = current_app.extensions['scan_jobs']
+    try:
+        job, coalesced = jobs.submit(interface)
+    except ScanQueueFull as e:
+        return scan_queue_full(e)
+
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        if jobs.wait(job, current_app.config['SCAN_WAIT_TIMEOUT']):
+            if job.status == FAILED:
+                status = 400 if isinstance(job.exception, UnknownInterface) else 500
+                return jsonify({"job_id": job.id, "error": job.error}), status
+            return jsonify({
+                "job_id": job.id,
+                "scan_id": job.id,
+                "found": len(job.networks),
+                "networks": job.networks
+            }), 201
+
+    body = job.to_dict(include_networks=False)
+    body["coalesced"] = coalesced
+    body["status_url"] = url_for('networks.scan_status', job_id=job.id)
+    return jsonify(body), 202
+
+
+@network_bp.route('/scan/<job_id>', methods=['GET'])
+@timed_route
+@require_auth
+def scan_status(job_id):
+    """
+    Get the status of a scan job
+
+    Args:
+        job_id: Job ID returned by POST /api/networks/scan
+
+    Returns:
+        JSON job object (with networks once completed) or 404
+    """
+    job = current_app.extensions['scan_jobs'].get(job_id)
+    if not job:
+        return jsonify({"error": "Scan job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@network_bp.route('/ingest', methods=['POST'])
+@timed_route
+@require_auth(scope=SCAN)
+@rate_limited(SCAN)
+def ingest_capture_file():
+    """
+    Import the access points of monitor-mode captures (pcap/pcapng)
+
+    The files must already be in CAPTURE_DIR; they are parsed by a pool of
+    CAPTURE_WORKERS processes, the imported networks are audited in the
+    same job and the job is reported through the same status endpoint as
+    scans.
+
+    JSON body:
+        file: Capture file name relative to CAPTURE_DIR
+        files: List of capture file names (instead of file)
+        wait: If true, block until the import finishes (query param)
+
     Returns:
-        JSON response with found networks
+        202 with the job status, or 201 with the import summary when waiting
     """
-    # Try real scan first, fallback to simulated
-    networks_data = real_scan()
-    saved = save_networks_to_db(db, Network, networks_data)
-    return jsonify({"found": len(saved), "networks": saved}), 201
+    data = request.get_json(silent=True) or {}
+    names = data.get('files') or [data.get('file') or request.args.get('file')]
+    if not isinstance(names, list):
+        return jsonify({"error": "files must be a list"}), 400
+    if not all(name is None or isinstance(name, str) for name in names):
+        return jsonify({"error": "file names must be strings"}), 400
+    try:
+        paths = sorted({resolve_capture_path(current_app.config['CAPTURE_DIR'], name)
+                        for name in names})
+    except CaptureError as e:
+        return jsonify({"error": str(e)}), 400
+    workers = current_app.config['CAPTURE_WORKERS']
+    rules = current_app.extensions['audit_rules']
+
+    def run(job):
+        return ingest_captures(db, Network, paths, scan_id=job.id, workers=workers,
+                               rules=rules)
+
+    jobs = current_app.extensions['scan_jobs']
+    try:
+        job, coalesced = jobs.submit("capture:" + ",".join(paths), run_fn=run)
+    except ScanQueueFull as e:
+        return scan_queue_full(e)
+
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        if jobs.wait(job, current_app.config['SCAN_WAIT_TIMEOUT']):
+            if job.status == FAILED:
+                return jsonify({"job_id": job.id, "error": job.error}), 500
+            return jsonify({
+                "job_id": job.id,
+                "scan_id": job.id,
+                "found": len(job.networks),
+                "summary": job.summary
+            }), 201
+
+    body = job.to_dict(include_networks=False)
+    body["coalesced"] = coalesced
+    body["status_url"] = url_for('networks.scan_status', job_id=job.id)
+    return jsonify(body), 202
 
 
 @network_bp.route('', methods=['GET'])
+@timed_route
 @require_auth
+@conditional_get('network')
+@cached_response('networks', tables=('network',))
 def list_networks():
     """
-    List all scanned networks from database
-    
+    List scanned networks from database
+
+    Query params (all optional):
+        encryption, channel: Comma separated values to match
+        min_signal: Minimum RSSI in dBm
+        since, until: discovered_at range (ISO 8601)
+        sort: discovered_at, last_seen, signal or channel ('-' prefix for descending)
+        fields: Comma separated list of fields to return
+        limit, cursor: Keyset pagination; the next page's cursor is sent
+            in the X-Next-Cursor header
+
     Returns:
         JSON array of network objects
     """
-    nets = Network.query.all()
-    return jsonify([n.to_dict() for n in nets])
+    try:
+        nets, next_cursor = list_networks_page(
+            db, request.args,
+            default_limit=current_app.config['API_PAGE_SIZE'],
+            max_limit=current_app.config['API_MAX_PAGE_SIZE']
+        )
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = json_response(nets)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@network_bp.route('/changes', methods=['GET'])
+@timed_route
+@require_auth
+@conditional_get('network')
+@cached_response('networks', tables=('network',))
+def list_changes():
+    """
+    List changes detected between consecutive scans
+
+    Query params (all optional):
+        since, until: Change time range (ISO 8601)
+        kind: Comma separated kinds (appeared, disappeared, signal,
+            encryption, channel, ssid)
+        bssid, interface: Only changes of this network / interface
+        fields: Comma separated list of fields to return
+        limit, cursor: Keyset pagination; the next page's cursor is sent
+            in the X-Next-Cursor header
+
+    Returns:
+        JSON array of change objects, oldest first
+    """
+    try:
+        changes, next_cursor = list_changes_page(
+            db, request.args,
+            default_limit=current_app.config['API_PAGE_SIZE'],
+            max_limit=current_app.config['API_MAX_PAGE_SIZE']
+        )
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = json_response(changes)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@network_bp.route('/rogue', methods=['GET'])
+@timed_route
+@require_auth
+def rogue_networks():
+    """
+    List access points flagged as possible rogue APs / evil twins
+
+    Served from the in-memory SSID index kept up to date by every scan
+    (rebuilt first when other workers wrote networks).
+
+    Query params (all optional):
+        ssid: Only this SSID (case and Unicode width insensitive)
+        kind: Comma separated kinds (encryption_mismatch, vendor_mismatch,
+            signal_outlier, channel_change)
+
+    Returns:
+        JSON array of findings (bssid, ssid, kinds, details, group_size)
+    """
+    detector = current_detector(db)
+    if detector is None:
+        return jsonify({"error": "Rogue AP detection is disabled"}), 404
+    kinds = [k for k in request.args.get('kind', '').split(',') if k]
+    return jsonify(detector.report(ssid=request.args.get('ssid'), kinds=kinds))
 
 
 @network_bp.route('/<network_id>', methods=['GET'])
+@timed_route
 @require_auth
+@conditional_get('network')
+@cached_response('network:{network_id}', tables=('network',))
 def get_network(network_id):
     """
     Get a specific network by ID
@@ -50,7 +272,41 @@ def get_network(network_id):
     Returns:
         JSON network object or 404
     """
-    net = Network.query.filter_by(id=network_id).first()
-    if not net:
+    body = get_network_json(db, network_id)
+    if body is None:
         return jsonify({"error": "Network not found"}), 404
-    return jsonify(net.to_dict())
+    return json_response(body)
+
+
+@network_bp.route('/history/<bssid>', methods=['GET'])
+@timed_route
+@require_auth
+def network_history(bssid):
+    """
+    Get the RSSI/channel history of a network
+
+    Args:
+        bssid: Network BSSID
+
+    Query params:
+        hours: Look-back window in hours (default: 24, at most MAX_HISTORY_HOURS)
+        limit: Maximum number of observations, newest kept (optional, 0 = all)
+
+    Returns:
+        JSON object with observations ordered oldest to newest
+    """
+    try:
+        hours = float(request.args.get('hours', 24))
+    except ValueError:
+        return jsonify({"error": "hours must be a number"}), 400
+    if not 0 < hours <= MAX_HISTORY_HOURS:
+        return jsonify({"error": f"hours must be between 0 and {MAX_HISTORY_HOURS}"}), 400
+    try:
+        limit = int(request.args.get('limit', 0))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 0:
+        return jsonify({"error": "limit must not be negative"}), 400
+
+    observations = get_signal_history(db, bssid, hours=hours, limit=limit)
+    return jsonify({"bssid": bssid, "hours": hours, "observations": observations})
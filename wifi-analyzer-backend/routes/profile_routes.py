@@ -0,0 +1,86 @@
+"""
+Profile Routes
+Download the request profiles captured by the profiling middleware
+"""
+from flask import Blueprint, jsonify, current_app
+from services.profiler import current_profiler
+from services.token_registry import ADMIN
+from auth import require_auth
+
+profile_bp = Blueprint('profiles', __name__, url_prefix='/api/profiles')
+
+
+def _find(profile_id):
+    profiler = current_profiler()
+    if profiler is None:
+        return None, (jsonify({"error": "Profiling is disabled"}), 404)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return None, (jsonify({"error": "Profile not found"}), 404)
+    return profile, None
+
+
+@profile_bp.route('', methods=['GET'])
+@require_auth(scope=ADMIN)
+def list_profiles():
+    """
+    List the profiles kept by this process, newest first
+
+    Returns:
+        JSON array of profile summaries (path, status, duration, SQL time)
+    """
+    profiler = current_profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    return jsonify([profile.to_dict() for profile in profiler.recent()])
+
+
+@profile_bp.route('/<profile_id>', methods=['GET'])
+@require_auth(scope=ADMIN)
+def get_profile(profile_id):
+    """
+    Get one profile
+
+    Returns:
+        JSON summary with the SQL statements grouped by text (slowest
+        first) and the heaviest functions by cumulative time, or 404
+    """
+    profile, error = _find(profile_id)
+    if error:
+        return error
+    return jsonify(profile.to_dict(detail=True))
+
+
+@profile_bp.route('/<profile_id>/pstats', methods=['GET'])
+@require_auth(scope=ADMIN)
+def download_pstats(profile_id):
+    """
+    Download the cProfile data (load with pstats.Stats or snakeviz)
+
+    Returns:
+        application/octet-stream attachment, or 404
+    """
+    profile, error = _find(profile_id)
+    if error:
+        return error
+    return current_app.response_class(
+        profile.pstats_bytes(), mimetype='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename=profile-{profile.id}.pstats'})
+
+
+@profile_bp.route('/<profile_id>/collapsed', methods=['GET'])
+@require_auth(scope=ADMIN)
+def download_collapsed(profile_id):
+    """
+    Download the stack samples as collapsed stacks (flamegraph.pl,
+    speedscope)
+
+    Returns:
+        text/plain attachment, or 404
+    """
+    profile, error = _find(profile_id)
+    if error:
+        return error
+    return current_app.response_class(
+        profile.collapsed(), mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename=profile-{profile.id}.folded'})
@@ -0,0 +1,42 @@
+"""
+Scheduler Routes
+State and control of the continuous scan scheduler
+"""
+from flask import Blueprint, jsonify, current_app
+from services.token_registry import ADMIN
+from auth import require_auth
+
+scheduler_bp = Blueprint('scheduler', __name__, url_prefix='/api/scheduler')
+
+
+@scheduler_bp.route('', methods=['GET'])
+@require_auth
+def scheduler_state():
+    """
+    Get the scheduler state
+
+    Returns:
+        JSON with the interval bounds and, per interface, the current
+        interval, next run, run/failure/skip counts, duty cycle and the
+        timings (queue and scan seconds), found count and churn of the
+        last run
+    """
+    return jsonify(current_app.extensions['scan_scheduler'].to_dict())
+
+
+@scheduler_bp.route('/start', methods=['POST'])
+@require_auth(scope=ADMIN)
+def start_scheduler():
+    """Start continuous scanning (200 if already running, 201 if started)"""
+    scheduler = current_app.extensions['scan_scheduler']
+    started = scheduler.start()
+    return jsonify(scheduler.to_dict()), 201 if started else 200
+
+
+@scheduler_bp.route('/stop', methods=['POST'])
+@require_auth(scope=ADMIN)
+def stop_scheduler():
+    """Stop continuous scanning; a scan already in flight still completes"""
+    scheduler = current_app.extensions['scan_scheduler']
+    scheduler.stop(wait=False)
+    return jsonify(scheduler.to_dict())
@@ -0,0 +1,72 @@
+"""
+Stats Routes
+Precomputed dashboard aggregates
+"""
+from flask import Blueprint, jsonify, request, current_app
+from models import db
+from services.stats_service import get_stats, MAX_STATS_HOURS
+from services.response_cache import cached_response
+from auth import require_auth
+
+stats_bp = Blueprint('stats', __name__, url_prefix='/api/stats')
+
+
+@stats_bp.route('', methods=['GET'])
+@require_auth
+@cached_response('networks', 'audits', tables=('network', 'audit'))
+def stats():
+    """
+    Get the dashboard summary
+
+    Served from counters maintained when networks and audits are written,
+    so the cost does not grow with the number of stored rows.
+
+    Query params:
+        hours: Length of the per-hour discovery histogram (default 24)
+
+    Returns:
+        JSON network counts by encryption, channel and security class,
+        audit counts by risk level and discoveries per hour
+    """
+    try:
+        hours = int(request.args.get('hours', 24))
+    except ValueError:
+        hours = 0
+    if not 1 <= hours <= MAX_STATS_HOURS:
+        return jsonify({"error": f"hours must be an integer from 1 to {MAX_STATS_HOURS}"}), 400
+    return jsonify(get_stats(db, hours))
+
+
+@stats_bp.route('/cache', methods=['GET'])
+@require_auth
+def cache_stats():
+    """
+    Get the response cache counters
+
+    Returns:
+        JSON hits, misses, hit ratio, expired and stale lookups, evictions
+        and invalidations of this process, or 404 when caching is off
+    """
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        return jsonify({"error": "Response caching is disabled"}), 404
+    return jsonify(cache.to_dict())
+
+
+@stats_bp.route('/limits', methods=['GET'])
+@require_auth
+def limit_stats():
+    """
+    Get the rate limiter and scan admission counters
+
+    Returns:
+        JSON with the rate limits and allowed/limited requests per
+        endpoint class (null when rate limiting is off), and the scan
+        queue depth, capacity and admitted/coalesced/rejected scans of
+        this process
+    """
+    limiter = current_app.extensions.get('rate_limiter')
+    return jsonify({
+        "rate_limiter": limiter.to_dict() if limiter is not None else None,
+        "scan_queue": current_app.extensions['scan_jobs'].stats(),
+    })
@@ -0,0 +1,260 @@
+"""
+Audit Service
+Runs rule-set audits for one or many networks and stores them as Audit
+rows with structured columns plus one AuditFinding row per fired rule
+"""
+import datetime
+import json
+import uuid
+from sqlalchemy import select, insert, update, func, bindparam
+from models import Network, Audit, AuditFinding
+from services.rule_engine import default_rule_set
+from services.stats_service import apply_deltas, audit_deltas, version_deltas
+from services.response_cache import invalidate
+from services.event_bus import current_bus, AUDIT_COMPLETED, AUDIT_BATCH
+from services.metrics import timed_write
+from services.db_tuning import begin_write, write_engine
+
+# Networks read and audit rows inserted per round trip
+AUDIT_BATCH_SIZE = 5000
+
+# Legacy audits converted per transaction by backfill_audit_columns()
+AUDIT_BACKFILL_BATCH = 1000
+
+RISK_LEVELS = ("low", "medium", "high")
+
+
+def ssid_context(db, ssids=None):
+    """
+    Load the evil-twin context of the rule engine from the database
+
+    Args:
+        db: SQLAlchemy database instance
+        ssids: Optional SSIDs to restrict the lookup to
+
+    Returns:
+        dict: {lowercase ssid: distinct encryption count} for SSIDs
+        advertised with more than one encryption
+    """
+    table = Network.__table__
+    ssid = func.lower(table.c.ssid)
+    query = select(ssid, func.count(func.distinct(func.lower(table.c.encryption)))) \
+        .where(table.c.ssid.isnot(None)).group_by(ssid) \
+        .having(func.count(func.distinct(func.lower(table.c.encryption))) > 1)
+    if ssids is not None:
+        query = query.where(ssid.in_([s.lower() for s in ssids if s]))
+    return dict(db.session.execute(query).all())
+
+
+def finding_rows(audit_id, outcome):
+    """AuditFinding rows (as dictionaries) for the rules of an Outcome"""
+    return [
+        {
+            "audit_id": audit_id,
+            "position": position,
+            "rule_id": rule["id"],
+            "severity": rule["severity"],
+            "message": rule["message"],
+        }
+        for position, rule in enumerate(outcome.rules)
+    ]
+
+
+@timed_write('audit', rows=lambda result: 1)
+def record_audit(db, network, rules=None):
+    """
+    Audit one network and store the result
+
+    Args:
+        db: SQLAlchemy database instance
+        network: Network model object
+        rules: Compiled RuleSet (default: the bundled rules)
+
+    Returns:
+        tuple: (Audit, result dictionary)
+    """
+    rules = rules or default_rule_set()
+    begin_write(db)
+    context = ssid_context(db, [network.ssid]) if network.ssid else None
+    outcome = rules.outcome(network, context)
+    result = outcome.result(network.signal)
+
+    audit = Audit(
+        id=str(uuid.uuid4()),
+        network_bssid=network.bssid,
+        started_at=datetime.datetime.utcnow(),
+        result=result,
+        rule_set=rules.version
+    )
+    audit.findings = [AuditFinding(**row) for row in finding_rows(audit.id, outcome)]
+    db.session.add(audit)
+    apply_deltas(db, audit_deltas({outcome.risk_level: 1}) + version_deltas('audit'))
+    db.session.commit()
+    invalidate('audits')
+
+    bus = current_bus()
+    if bus is not None:
+        bus.publish(AUDIT_COMPLETED, {
+            "audit_id": audit.id,
+            "bssid": network.bssid,
+            "risk_level": outcome.risk_level,
+            "rule_set": rules.version,
+            "findings": list(outcome.findings),
+        })
+    return audit, result
+
+
+@timed_write('audit', rows=lambda summary: summary["audited"])
+def audit_networks(db, conditions=(), bssids=None, rules=None, batch_size=AUDIT_BATCH_SIZE):
+    """
+    Audit every network matching `conditions` and store the results
+
+    Networks are read as plain rows in batches; each row is evaluated by
+    the compiled rule set, whose outcomes carry their result JSON so only
+    the signal value is formatted per row, and each batch is inserted with
+    one executemany. All batches share one transaction and one started_at.
+
+    Args:
+        db: SQLAlchemy database instance
+        conditions: Network filter conditions (see query_service.network_conditions)
+        bssids: Optional list of BSSIDs to restrict the audit to
+        rules: Compiled RuleSet (default: the bundled rules)
+        batch_size: Rows per read/insert round trip
+
+    Returns:
+        dict: Summary with audited count, counts per risk level and started_at
+    """
+    table = Network.__table__
+    rules = rules or default_rule_set()
+    begin_write(db)
+    context = ssid_context(db)
+    query = select(
+        table.c.bssid, table.c.ssid, table.c.channel, table.c.signal, table.c.encryption
+    ).order_by(table.c.bssid)
+    conditions = list(conditions)
+    if bssids is not None:
+        conditions.append(table.c.bssid.in_(bssids))
+    if conditions:
+        query = query.where(*conditions)
+
+    started_at = datetime.datetime.utcnow()
+    insert_audits = insert(Audit.__table__)
+    insert_findings = insert(AuditFinding.__table__)
+    counts = dict.fromkeys(RISK_LEVELS, 0)
+    audited = 0
+
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for batch in result.partitions():
+        values = []
+        findings = []
+        for row in batch:
+            outcome = rules.outcome(row._asdict(), context)
+            counts[outcome.risk_level] += 1
+            audit_id = str(uuid.uuid4())
+            values.append({
+                "id": audit_id,
+                "network_bssid": row.bssid,
+                "started_at": started_at,
+                "result_json": outcome.result_json(row.signal),
+                "rule_set": rules.version,
+                "risk_level": outcome.risk_level,
+                "weak_cipher": outcome.flags.get("weak_cipher"),
+                "open_network": outcome.flags.get("open_network"),
+                "signal_strength": row.signal,
+            })
+            findings.extend(finding_rows(audit_id, outcome))
+        db.session.execute(insert_audits, values)
+        if findings:
+            db.session.execute(insert_findings, findings)
+        audited += len(batch)
+    apply_deltas(db, audit_deltas(counts) + version_deltas('audit'))
+    db.session.commit()
+    if audited:
+        invalidate('audits')
+
+    summary = {
+        "audited": audited,
+        "risk_levels": counts,
+        "started_at": started_at.isoformat() + "Z",
+        "rule_set": rules.version,
+    }
+    # One summary event rather than one per audit
+    bus = current_bus()
+    if bus is not None and audited:
+        bus.publish(AUDIT_BATCH, summary)
+    return summary
+
+
+def _legacy_findings(audit_id, result, rules_by_message):
+    """Findings of a pre-rule-engine result, matched to rules by message"""
+    rows = []
+    for position, message in enumerate(result.get("details") or []):
+        rule = rules_by_message.get(message)
+        rows.append({
+            "audit_id": audit_id,
+            "position": position,
+            "rule_id": rule["id"] if rule else "legacy",
+            "severity": rule["severity"] if rule else None,
+            "message": message,
+        })
+    return rows
+
+
+def backfill_audit_columns(engine, batch_size=AUDIT_BACKFILL_BATCH):
+    """
+    Fill the structured columns and findings of audits stored before they
+    existed, decoding their result_json
+
+    Runs in batches of batch_size audits, each in its own transaction, so
+    large tables are converted without one long write lock; audits are
+    walked in id order, so an interrupted backfill resumes where it left
+    off on the next run.
+
+    Args:
+        engine: SQLAlchemy engine
+        batch_size: Audits converted per transaction
+
+    Returns:
+        int: Number of audits converted
+    """
+    table = Audit.__table__
+    rules_by_message = {r["message"]: r for r in default_rule_set().rules}
+    pending = select(table.c.id, table.c.result_json).where(
+        table.c.risk_level.is_(None), table.c.result_json.isnot(None)
+    ).order_by(table.c.id).limit(batch_size)
+    set_columns = update(table).where(table.c.id == bindparam("audit_id")).values(
+        risk_level=bindparam("risk"),
+        weak_cipher=bindparam("weak"),
+        open_network=bindparam("open"),
+        signal_strength=bindparam("signal"),
+    )
+    converted = 0
+    last_id = ""
+    while True:
+        with write_engine(engine).begin() as conn:
+            rows = conn.execute(pending.where(table.c.id > last_id)).all()
+            if not rows:
+                return converted
+            updates = []
+            findings = []
+            for audit_id, blob in rows:
+                try:
+                    result = json.loads(blob)
+                except ValueError:
+                    result = None
+                if not isinstance(result, dict):
+                    result = {}
+                signal = result.get("signal_strength")
+                updates.append({
+                    "audit_id": audit_id,
+                    "risk": result.get("risk_level") or "unknown",
+                    "weak": result.get("weak_cipher"),
+                    "open": result.get("open_network"),
+                    "signal": signal if isinstance(signal, int) else None,
+                })
+                findings.extend(_legacy_findings(audit_id, result, rules_by_message))
+            conn.execute(set_columns, updates)
+            if findings:
+                conn.execute(insert(AuditFinding.__table__), findings)
+            converted += len(rows)
+            last_id = rows[-1].id
@@ -0,0 +1,177 @@
+"""
+Capture Ingest Service
+Imports the access points seen in offline monitor-mode captures
+(pcap/pcapng) into the database
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from services.audit_service import audit_networks
+from services.pcap_parser import CaptureError, CaptureAggregate, CaptureReader, aggregate_range
+from services.scan_service import save_networks_to_db, UPSERT_CHUNK_SIZE
+
+CAPTURE_EXTENSIONS = ('.pcap', '.pcapng', '.cap')
+
+# Files larger than this are split into byte ranges parsed in parallel
+SHARD_BYTES = 256 * 1024 * 1024
+
+
+def resolve_capture_path(capture_dir, name):
+    """
+    Resolve a capture file name inside the configured capture directory
+
+    Args:
+        capture_dir: CAPTURE_DIR setting
+        name: File name (or relative path) below capture_dir
+
+    Returns:
+        str: Absolute path of an existing capture file
+
+    Raises:
+        CaptureError: If the name escapes capture_dir, has an unknown
+            extension or does not exist
+    """
+    if not name:
+        raise CaptureError("file is required")
+    root = os.path.realpath(capture_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise CaptureError("file must be inside the capture directory")
+    if not path.lower().endswith(CAPTURE_EXTENSIONS):
+        raise CaptureError(f"file must be one of: {', '.join(CAPTURE_EXTENSIONS)}")
+    if not os.path.isfile(path):
+        raise CaptureError(f"Capture file not found: {name}")
+    return path
+
+
+def plan_shards(paths, workers, shard_bytes=SHARD_BYTES):
+    """
+    Split capture files into parse tasks
+
+    Every file is one task, except files larger than shard_bytes which are
+    cut at record boundaries into ranges of roughly shard_bytes, and into
+    at least `workers` ranges when there are fewer files than workers.
+
+    Returns:
+        list: (path, start, stop) tuples; start/stop None for whole files
+    """
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        parts = -(-size // shard_bytes)
+        if len(paths) < workers:
+            parts = max(parts, workers // len(paths))
+        if parts <= 1:
+            tasks.append((path, None, None))
+            continue
+        with CaptureReader(path) as reader:
+            tasks.extend((path, start, stop) for start, stop in reader.split(parts))
+    return tasks
+
+
+def _task_bytes(task):
+    path, start, stop = task
+    if start is None:
+        return os.path.getsize(path)
+    return stop - start
+
+
+def aggregate_captures(paths, workers=1, shard_bytes=SHARD_BYTES, progress=None):
+    """
+    Aggregate capture files, in parallel over a process pool
+
+    Each task returns a picklable CaptureAggregate; they are merged in
+    task order in the parent, so the result does not depend on which
+    worker finished first.
+
+    Args:
+        paths: pcap or pcapng file paths
+        workers: Worker processes (1 parses in this process)
+        shard_bytes: Target size of a byte-range task
+        progress: Optional callable(bytes_done, bytes_total) called as
+            tasks complete
+
+    Returns:
+        tuple: (CaptureAggregate, elapsed seconds)
+    """
+    started = time.perf_counter()
+    tasks = plan_shards(paths, workers, shard_bytes)
+    total = sum(_task_bytes(t) for t in tasks)
+    results = [None] * len(tasks)
+    done = 0
+
+    if workers <= 1 or len(tasks) == 1:
+        for i, task in enumerate(tasks):
+            results[i] = aggregate_range(*task)
+            done += _task_bytes(task)
+            if progress:
+                progress(done, total)
+    else:
+        # Imports run on scan job threads, where forking is unsafe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 mp_context=context) as pool:
+            futures = {pool.submit(aggregate_range, *t): i for i, t in enumerate(tasks)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += _task_bytes(tasks[i])
+                if progress:
+                    progress(done, total)
+
+    agg = CaptureAggregate()
+    for result in results:
+        agg.merge(result)
+    return agg, time.perf_counter() - started
+
+
+def ingest_captures(db, Network, paths, scan_id=None, workers=1,
+                    batch_size=UPSERT_CHUNK_SIZE, progress=None, rules=None):
+    """
+    Aggregate capture files, upsert their access points and audit them
+
+    Parsing is sharded over `workers` processes; the merged per-BSSID
+    aggregate then goes through a single batched writer, so only one row
+    per access point reaches the database, in batches of batch_size. The
+    imported access points are then audited with the batch auditor, one
+    transaction per batch_size BSSIDs.
+
+    Args:
+        db: SQLAlchemy database instance
+        Network: Network model class
+        paths: pcap or pcapng file paths
+        scan_id: Optional id recorded with the signal observations
+        workers: Worker processes used for parsing
+        batch_size: Networks per upsert statement
+        progress: Optional callable(bytes_done, bytes_total)
+        rules: Compiled audit RuleSet (default: the bundled rules)
+
+    Returns:
+        tuple: (saved network dictionaries, summary dictionary)
+    """
+    agg, elapsed = aggregate_captures(paths, workers=workers, progress=progress)
+    networks = agg.networks()
+    saved = save_networks_to_db(db, Network, networks, chunk_size=batch_size,
+                                scan_id=scan_id)
+    bssids = [n["bssid"] for n in networks]
+    audited = 0
+    risk_levels = {}
+    for start in range(0, len(bssids), batch_size):
+        audit = audit_networks(db, bssids=bssids[start:start + batch_size], rules=rules)
+        audited += audit["audited"]
+        for level, count in audit["risk_levels"].items():
+            risk_levels[level] = risk_levels.get(level, 0) + count
+    summary = {
+        "files": [os.path.basename(p) for p in paths],
+        "bytes": agg.bytes,
+        "frames": agg.frames,
+        "management_frames": agg.management,
+        "networks": len(networks),
+        "workers": workers,
+        "parse_seconds": round(elapsed, 3),
+        "frames_per_second": round(agg.frames / elapsed) if elapsed else None,
+        "audited": audited,
+        "risk_levels": risk_levels,
+    }
+    return saved, summary
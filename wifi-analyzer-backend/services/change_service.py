@@ -0,0 +1,227 @@
+"""
+Change Detection Service
+Diffs each scan against the last known state of its interface and
+persists only what changed
+
+Per interface, an in-memory index keyed by BSSID holds the last stored
+state of every network the interface can see. A new scan is compared
+against it in one pass: BSSIDs that appeared, disappeared (missing from
+CHANGE_MISSED_SCANS consecutive scans), moved by at least
+CHANGE_SIGNAL_DELTA dB or changed encryption, channel or SSID are written
+through save_networks_to_db together with one NetworkChange row each.
+Unchanged networks are not rewritten; their last_seen is refreshed at
+most once per CHANGE_TOUCH_INTERVAL seconds with a single UPDATE.
+"""
+import datetime
+import threading
+from sqlalchemy import select, insert, update
+from models import Network, NetworkChange
+from services.scan_service import save_networks_to_db, _format_timestamp
+from services.stats_service import apply_deltas, version_deltas
+from services.response_cache import invalidate
+from services.rogue_detector import current_detector, write_version
+from services.metrics import timed_write
+from services.db_tuning import begin_write
+
+APPEARED = 'appeared'
+DISAPPEARED = 'disappeared'
+SIGNAL = 'signal'
+ENCRYPTION = 'encryption'
+CHANNEL = 'channel'
+SSID = 'ssid'
+
+CHANGE_KINDS = (APPEARED, DISAPPEARED, SIGNAL, ENCRYPTION, CHANNEL, SSID)
+
+# BSSIDs per IN (...) list when warming an index or touching last_seen
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def diff_network(old, new, signal_delta):
+    """
+    Changes between the stored and the scanned state of one network
+
+    Returns:
+        list: (kind, old value, new value) tuples
+    """
+    changes = []
+    old_signal, new_signal = old.get("signal"), new.get("signal")
+    if old_signal is None or new_signal is None:
+        if old_signal != new_signal:
+            changes.append((SIGNAL, old_signal, new_signal))
+    elif abs(new_signal - old_signal) >= signal_delta:
+        changes.append((SIGNAL, old_signal, new_signal))
+    for kind in (ENCRYPTION, CHANNEL, SSID):
+        if old.get(kind) != new.get(kind):
+            changes.append((kind, old.get(kind), new.get(kind)))
+    return changes
+
+
+class ScanIndex:
+    """Last known state of the networks one interface sees"""
+
+    def __init__(self):
+        self.entries = {}   # bssid -> stored network dictionary
+        self.seen_at = {}   # bssid -> last_seen as stored
+        self.missed = {}    # bssid -> consecutive scans it was absent from
+        self.present = set()
+        self.lock = threading.Lock()
+
+
+class ChangeTracker:
+    """Per-interface scan diffing in front of save_networks_to_db"""
+
+    def __init__(self, signal_delta=5, missed_scans=2, touch_interval=300):
+        """
+        Args:
+            signal_delta: Smallest RSSI move (dB) that is stored
+            missed_scans: Consecutive scans a BSSID must be missing from
+                before it is reported as disappeared
+            touch_interval: Seconds between last_seen refreshes of
+                unchanged networks
+        """
+        self.signal_delta = signal_delta
+        self.missed_scans = missed_scans
+        self.touch_interval = datetime.timedelta(seconds=touch_interval)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, interface):
+        with self._lock:
+            index = self._indexes.get(interface)
+            if index is None:
+                index = self._indexes[interface] = ScanIndex()
+            return index
+
+    def _warm(self, db, index, bssids):
+        """Load the stored state of BSSIDs the index has not seen yet"""
+        table = Network.__table__
+        for start in range(0, len(bssids), LOOKUP_CHUNK_SIZE):
+            rows = db.session.execute(select(
+                table.c.id, table.c.ssid, table.c.bssid, table.c.channel, table.c.signal,
+                table.c.encryption, table.c.discovered_at, table.c.last_seen
+            ).where(table.c.bssid.in_(bssids[start:start + LOOKUP_CHUNK_SIZE])))
+            for row in rows:
+                entry = row._asdict()
+                index.seen_at[row.bssid] = row.last_seen
+                entry["discovered_at"] = _format_timestamp(row.discovered_at)
+                entry["last_seen"] = _format_timestamp(row.last_seen)
+                index.entries[row.bssid] = entry
+                index.present.add(row.bssid)
+
+    @timed_write('network_change', rows=lambda result: len(result[1]))
+    def save(self, db, networks_data, interface=None, scan_id=None):
+        """
+        Store the changes of one scan and commit
+
+        Args:
+            db: SQLAlchemy database instance
+            networks_data: List of network dictionaries from the scanner
+            interface: Interface the scan came from (keys the index)
+            scan_id: Scan identifier recorded on changes and observations
+
+        Returns:
+            tuple: (network dictionaries of the whole scan, list of change
+            dictionaries)
+        """
+        unique = {n["bssid"]: n for n in networks_data}
+        index = self.index(interface)
+        with index.lock:
+            # Holds the write lock from the warm-up reads to the commit
+            begin_write(db)
+            now = datetime.datetime.utcnow()
+            unknown = [b for b in unique if b not in index.entries]
+            if unknown:
+                self._warm(db, index, unknown)
+
+            changes = []
+            write = []
+            touch = []
+            for bssid, network in unique.items():
+                old = index.entries.get(bssid)
+                if old is None or bssid not in index.present:
+                    changes.append((bssid, APPEARED, None, network.get("ssid")))
+                    if old is not None:
+                        changes.extend((bssid,) + c for c in diff_network(old, network, self.signal_delta))
+                    write.append(network)
+                    continue
+                found = diff_network(old, network, self.signal_delta)
+                if found:
+                    changes.extend((bssid,) + c for c in found)
+                    write.append(network)
+                elif now - index.seen_at.get(bssid, now) >= self.touch_interval:
+                    touch.append(bssid)
+
+            gone = []
+            for bssid in index.present.difference(unique):
+                missed = index.missed.get(bssid, 0) + 1
+                if missed >= self.missed_scans:
+                    gone.append(bssid)
+                    changes.append((bssid, DISAPPEARED, index.entries[bssid].get("ssid"), None))
+                else:
+                    index.missed[bssid] = missed
+
+            change_rows = [
+                {"ts": now, "scan_id": scan_id, "interface": interface, "bssid": bssid,
+                 "kind": kind, "old_value": _text(old), "new_value": _text(new)}
+                for bssid, kind, old, new in changes
+            ]
+            if change_rows:
+                db.session.execute(insert(NetworkChange.__table__), change_rows)
+            table = Network.__table__
+            for start in range(0, len(touch), LOOKUP_CHUNK_SIZE):
+                db.session.execute(update(table).where(
+                    table.c.bssid.in_(touch[start:start + LOOKUP_CHUNK_SIZE])
+                ).values(last_seen=now))
+            # Commits the change rows and touches along with the upsert
+            # (which also bumps the network table version)
+            version = None
+            if not write and (change_rows or touch):
+                apply_deltas(db, version_deltas('network'))
+                version = write_version(db)
+            saved = save_networks_to_db(db, Network, write, scan_id=scan_id)
+            if not write:
+                db.session.commit()
+                if change_rows or touch:
+                    invalidate('networks', *(f'network:{index.entries[b]["id"]}' for b in touch))
+                    # Nothing the rogue index holds changed; keep it in step
+                    detector = current_detector(db, refresh=False)
+                    if detector is not None:
+                        detector.observe([], version)
+            else:
+                invalidate(*(f'network:{index.entries[b]["id"]}' for b in touch))
+
+            # The index only moves forward once the transaction committed
+            for entry in saved:
+                index.entries[entry["bssid"]] = entry
+                index.seen_at[entry["bssid"]] = now
+            for bssid in touch:
+                index.entries[bssid]["last_seen"] = _format_timestamp(now)
+                index.seen_at[bssid] = now
+            for bssid in unique:
+                index.missed.pop(bssid, None)
+            index.present.update(unique)
+            for bssid in gone:
+                index.present.discard(bssid)
+                index.missed.pop(bssid, None)
+
+            return [index.entries[b] for b in unique], change_rows
+
+
+def init_change_tracker(app):
+    """
+    Attach a ChangeTracker to `app` as app.extensions['change_tracker']
+
+    Returns:
+        ChangeTracker
+    """
+    tracker = ChangeTracker(
+        signal_delta=app.config['CHANGE_SIGNAL_DELTA'],
+        missed_scans=app.config['CHANGE_MISSED_SCANS'],
+        touch_interval=app.config['CHANGE_TOUCH_INTERVAL'],
+    )
+    app.extensions['change_tracker'] = tracker
+    return tracker
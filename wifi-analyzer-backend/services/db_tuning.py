@@ -0,0 +1,133 @@
+"""
+SQLite Tuning
+Production connection profile for file-backed SQLite databases
+
+With SQLITE_TUNING enabled every new connection is switched to WAL
+journaling (readers no longer block the writer and vice versa) with
+synchronous=NORMAL, waits up to SQLITE_BUSY_TIMEOUT for the write lock
+instead of failing with "database is locked", and gets a larger page
+cache and a memory-mapped read path. Each worker process keeps a bounded
+pool of DB_POOL_SIZE (+ DB_MAX_OVERFLOW) connections shared by its
+request threads and background scans.
+
+The profile also takes transaction control away from pysqlite, which
+sends no BEGIN before reads and a deferred BEGIN before the first write,
+so a read-then-write path reads outside its transaction. SQLAlchemy now
+emits BEGIN itself: plain BEGIN for readers and BEGIN IMMEDIATE for
+transactions opened through begin_write(), which take the write lock
+before their first read. Counter deltas, change diffs and other
+read-modify-write paths therefore see every committed write and cannot
+interleave with another worker's.
+
+In-memory databases and other dialects are left untouched.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+# Execution option (and connection info key) of write transactions
+WRITE_OPTION = 'sqlite_write'
+
+
+def is_sqlite_file(uri):
+    """True for a SQLite URI that names a database file"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_pragmas(config):
+    """
+    PRAGMA statements run on every new connection
+
+    Returns:
+        list: (name, value) pairs
+    """
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        # Negative sizes are KiB rather than pages
+        ('cache_size', -int(config['SQLITE_CACHE_SIZE'])),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def _disable_pysqlite_begin(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+def _begin(conn):
+    write = bool(conn.get_execution_options().get(WRITE_OPTION))
+    conn.exec_driver_sql('BEGIN IMMEDIATE' if write else 'BEGIN')
+    conn.info[WRITE_OPTION] = write
+
+
+def begin_write(db):
+    """
+    Open the session's transaction as a write transaction
+
+    Under the SQLite profile the transaction starts with BEGIN IMMEDIATE.
+    A read-only transaction already open on the session is committed
+    first, as a write on its older snapshot could fail; an open write
+    transaction is joined. Without the profile this does nothing.
+    """
+    if not event.contains(db.engine, 'begin', _begin):
+        return
+    session = db.session()
+    if session.in_transaction():
+        if session.connection().info.get(WRITE_OPTION):
+            return
+        session.commit()
+    session.connection(execution_options={WRITE_OPTION: True})
+
+
+def write_engine(engine):
+    """`engine` for Core write transactions (BEGIN IMMEDIATE under the profile)"""
+    return engine.execution_options(**{WRITE_OPTION: True})
+
+
+def init_database(app):
+    """
+    Bind `db` to `app`, applying the SQLite profile when SQLITE_TUNING is
+    set and the database is a SQLite file
+
+    Pool settings have to be in SQLALCHEMY_ENGINE_OPTIONS before the
+    engine is created; the pragmas are installed as a connect listener
+    right after, before the first connection is opened.
+
+    Returns:
+        bool: True if the profile was applied
+    """
+    tuned = app.config.get('SQLITE_TUNING') and \
+        is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI'])
+    if tuned:
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+        connect_args = options.setdefault('connect_args', {})
+        # Scan jobs and the scheduler use pooled connections off the
+        # request thread; the pool hands a connection to one thread at a time
+        connect_args.setdefault('check_same_thread', False)
+        connect_args.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT'] / 1000)
+
+    db.init_app(app)
+
+    if tuned:
+        with app.app_context():
+            event.listen(db.engine, 'connect', _pragma_listener(sqlite_pragmas(app.config)))
+            event.listen(db.engine, 'connect', _disable_pysqlite_begin)
+            event.listen(db.engine, 'begin', _begin)
+    return bool(tuned)
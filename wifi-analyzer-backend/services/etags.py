@@ -0,0 +1,45 @@
+"""
+Conditional GET
+Strong ETags for the read endpoints from the table write counters
+
+Every transaction writing networks or audits bumps its table's version
+counter (stats_service.TABLE_VERSION). A response's ETag is a hash of the
+versions of the tables it reads plus its path and query string, so it is
+known after one primary key read: a matching If-None-Match is answered
+with 304 before the view queries or serializes anything.
+"""
+import functools
+import hashlib
+from flask import current_app, request
+from services.response_cache import request_key, request_table_versions
+
+
+def table_etag(tables):
+    """ETag value (unquoted) of the current request over `tables`"""
+    versions = request_table_versions(tables)
+    tag = f"{','.join(map(str, versions))}|{request_key()}"
+    return hashlib.blake2b(tag.encode(), digest_size=12).hexdigest()
+
+
+def conditional_get(*tables):
+    """
+    Answer If-None-Match for a GET view reading `tables`
+
+    200 responses get the ETag and `Cache-Control: private, no-cache`, so
+    browsers revalidate every poll instead of re-downloading.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = table_etag(tables)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,304 @@
+"""
+Live Event Bus
+In-process publish/subscribe for the GET /api/events server-sent events
+feed (new networks, RSSI changes, completed audits)
+
+Every subscriber owns a bounded queue: when a client reads slower than
+events arrive, its oldest undelivered events are discarded and it is told
+how many it missed, so a slow browser never blocks the scan or audit
+transaction that published them. Events are encoded once per publish, not
+once per subscriber.
+
+With several server processes (gunicorn workers) the SocketBroker relays
+events between them over Unix datagram sockets in a shared directory: a
+worker binds a socket only while it has subscribers, and publishers send
+each batch to every bound socket. It stands in for an external broker
+(e.g. Redis pub/sub) on a single host.
+"""
+import collections
+import json
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from flask import current_app, has_app_context
+
+NETWORK_NEW = 'network.new'
+NETWORK_SIGNAL = 'network.signal'
+AUDIT_COMPLETED = 'audit.completed'
+AUDIT_BATCH = 'audit.batch'
+ROGUE_DETECTED = 'rogue.detected'
+OVERFLOW = 'overflow'
+
+EVENT_TYPES = (NETWORK_NEW, NETWORK_SIGNAL, AUDIT_COMPLETED, AUDIT_BATCH, ROGUE_DETECTED)
+
+# Largest datagram a SocketBroker sends; bigger batches are split
+MAX_DATAGRAM_BYTES = 60000
+
+
+def encode_event(event_type, data):
+    """Render one event as a server-sent events frame"""
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """A subscriber's bounded queue of encoded events"""
+
+    def __init__(self, maxsize, types=None):
+        self.types = frozenset(types) if types else None
+        self.dropped = 0
+        self._queue = collections.deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+
+    def put(self, event_type, frame):
+        if self.types is not None and event_type not in self.types:
+            return
+        with self._ready:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1  # the deque discards the oldest frame
+            self._queue.append(frame)
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait for events and take everything queued
+
+        Returns:
+            list: Encoded frames, preceded by an overflow event when frames
+            were dropped since the last call; empty on timeout
+        """
+        with self._ready:
+            if not self._queue:
+                self._ready.wait(timeout)
+            frames = list(self._queue)
+            self._queue.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            frames.insert(0, encode_event(OVERFLOW, {"dropped": dropped}))
+        return frames
+
+
+class LocalBroker:
+    """Delivers events to the subscribers of this process only"""
+
+    def open(self, deliver):
+        pass
+
+    def close(self):
+        pass
+
+    def has_peers(self):
+        return False
+
+    def send(self, frames):
+        pass
+
+
+class SocketBroker:
+    """
+    Relays events between processes through Unix datagram sockets
+
+    Delivery to other processes is best effort: a peer whose socket buffer
+    is full misses the batch, just like a full subscriber queue.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = None
+        self._sock = None
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        self._out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._out.setblocking(False)
+
+    def open(self, deliver):
+        """Bind this process's socket and start relaying to `deliver`"""
+        if self._sock is not None:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(path)
+        self._sock, self.path = sock, path
+        self._thread = threading.Thread(target=self._receive, args=(sock, deliver),
+                                        name='event-broker', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        sock, path = self._sock, self.path
+        self._sock = self.path = None
+        if sock is not None:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # wakes the receive thread
+            except OSError:
+                pass
+            sock.close()
+
+    def _peers(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        own = os.path.basename(self.path) if self.path else None
+        return [os.path.join(self.directory, n) for n in names
+                if n.endswith('.sock') and n != own]
+
+    def has_peers(self):
+        return bool(self._peers())
+
+    def send(self, frames):
+        peers = self._peers()
+        if not peers:
+            return
+        for datagram in self._datagrams(frames):
+            for peer in peers:
+                try:
+                    self._out.sendto(datagram, peer)
+                except BlockingIOError:
+                    pass  # peer is behind; it misses this batch
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a process that exited without closing
+                    try:
+                        os.unlink(peer)
+                    except FileNotFoundError:
+                        pass
+
+    @staticmethod
+    def _datagrams(frames):
+        batch, size = [], 0
+        for event_type, frame in frames:
+            line = f"{event_type}\t{frame}".encode()
+            if batch and size + len(line) > MAX_DATAGRAM_BYTES:
+                yield b"\0".join(batch)
+                batch, size = [], 0
+            batch.append(line)
+            size += len(line) + 1
+        if batch:
+            yield b"\0".join(batch)
+
+    @staticmethod
+    def _receive(sock, deliver):
+        while True:
+            try:
+                datagram = sock.recv(MAX_DATAGRAM_BYTES * 2)
+            except OSError:
+                return
+            if not datagram:
+                return
+            frames = []
+            for line in datagram.split(b"\0"):
+                event_type, _, frame = line.decode().partition("\t")
+                frames.append((event_type, frame))
+            deliver(frames)
+
+
+class EventBus:
+    """Fan-out of encoded events to bounded subscriber queues"""
+
+    def __init__(self, queue_size=256, max_subscribers=100, broker=None,
+                 min_signal_change=1):
+        """
+        Args:
+            queue_size: Events buffered per subscriber before the oldest
+                are dropped
+            max_subscribers: Concurrent subscribers allowed in this process
+            broker: LocalBroker (default) or SocketBroker
+            min_signal_change: Smallest RSSI change (dB) published as a
+                network.signal event
+        """
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.min_signal_change = min_signal_change
+        self.broker = broker or LocalBroker()
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self, types=None):
+        """
+        Register a subscriber
+
+        Args:
+            types: Optional event types to receive (default: all)
+
+        Returns:
+            Subscription, or None when max_subscribers is reached
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self.queue_size, types)
+            self._subscribers.append(subscription)
+            if len(self._subscribers) == 1:
+                self.broker.open(self._deliver)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                if not self._subscribers:
+                    self.broker.close()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def listening(self):
+        """True if a published event would reach any subscriber"""
+        return bool(self._subscribers) or self.broker.has_peers()
+
+    def publish(self, event_type, data):
+        self.publish_many([(event_type, data)])
+
+    def publish_many(self, events):
+        """
+        Publish (event type, data) pairs
+
+        Never blocks on subscribers: full queues drop their oldest events.
+        """
+        frames = [(event_type, encode_event(event_type, data)) for event_type, data in events]
+        if not frames:
+            return
+        self._deliver(frames)
+        self.broker.send(frames)
+
+    def _deliver(self, frames):
+        for subscription in list(self._subscribers):
+            for event_type, frame in frames:
+                subscription.put(event_type, frame)
+
+
+def current_bus():
+    """The app's EventBus if it is listening, else None (cheap to call)"""
+    if not has_app_context():
+        return None
+    bus = current_app.extensions.get('events')
+    if bus is None or not bus.listening():
+        return None
+    return bus
+
+
+def init_event_bus(app):
+    """
+    Attach an EventBus to `app` as app.extensions['events']
+
+    EVENT_BROKER selects 'local' (single process) or 'socket' (relay
+    between the processes sharing EVENT_BROKER_DIR).
+
+    Returns:
+        EventBus
+    """
+    if app.config['EVENT_BROKER'] == 'socket':
+        directory = app.config['EVENT_BROKER_DIR'] or \
+            os.path.join(tempfile.gettempdir(), 'wifi-analyzer-events')
+        broker = SocketBroker(directory)
+    else:
+        broker = LocalBroker()
+    bus = EventBus(app.config['EVENT_QUEUE_SIZE'], app.config['EVENT_MAX_CLIENTS'], broker,
+                   app.config['EVENT_SIGNAL_DELTA'])
+    app.extensions['events'] = bus
+    return bus
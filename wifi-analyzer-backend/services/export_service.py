@@ -0,0 +1,175 @@
+"""
+Audit Export Service
+Streams audit exports chunk by chunk so memory stays flat regardless of
+how many audits are stored
+"""
+import csv
+import datetime
+import io
+import itertools
+import json
+import zlib
+from sqlalchemy import select
+from models import Audit, AuditFinding
+
+# Rows fetched per database round trip
+EXPORT_YIELD_PER = 1000
+
+# Approximate number of characters buffered before a chunk is emitted
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+CSV_HEADER = ['Audit ID', 'Network BSSID', 'Started At', 'Risk Level', 'Details']
+
+
+def _iter_audit_rows(db, since=None, until=None):
+    """Yield raw (id, network_bssid, started_at, result_json, rule_set) rows in started_at order"""
+    table = Audit.__table__
+    query = select(
+        table.c.id, table.c.network_bssid, table.c.started_at, table.c.result_json,
+        table.c.rule_set
+    ).order_by(table.c.started_at, table.c.id)
+    if since:
+        query = query.where(table.c.started_at >= since)
+    if until:
+        query = query.where(table.c.started_at < until)
+
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_YIELD_PER))
+    for row in result:
+        yield row
+
+
+def _iter_audit_summaries(db, since=None, until=None):
+    """
+    Yield (id, network_bssid, started_at, risk_level, [finding messages])
+    in started_at order
+
+    Reads the structured columns joined to the findings table, one row per
+    finding, and regroups consecutive rows per audit, so no result blob is
+    decoded.
+    """
+    audit = Audit.__table__
+    finding = AuditFinding.__table__
+    query = select(
+        audit.c.id, audit.c.network_bssid, audit.c.started_at, audit.c.risk_level,
+        finding.c.message
+    ).select_from(
+        audit.outerjoin(finding, finding.c.audit_id == audit.c.id)
+    ).order_by(audit.c.started_at, audit.c.id, finding.c.position)
+    if since:
+        query = query.where(audit.c.started_at >= since)
+    if until:
+        query = query.where(audit.c.started_at < until)
+
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_YIELD_PER))
+    for _, rows in itertools.groupby(result, key=lambda row: row.id):
+        first = next(rows)
+        messages = [first.message] if first.message is not None else []
+        messages.extend(row.message for row in rows if row.message is not None)
+        yield first.id, first.network_bssid, first.started_at, first.risk_level, messages
+
+
+def _buffered(pieces):
+    """Join small string pieces into chunks of roughly EXPORT_CHUNK_SIZE"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _audit_json(row):
+    """
+    Encode one audit like Audit.to_dict(), embedding the stored result
+    JSON verbatim instead of decoding and re-encoding it
+    """
+    started_at = row.started_at.isoformat() + "Z" if row.started_at else None
+    return '{"id": %s, "network_bssid": %s, "started_at": %s, "result": %s, "rule_set": %s}' % (
+        json.dumps(row.id),
+        json.dumps(row.network_bssid),
+        json.dumps(started_at),
+        row.result_json or 'null',
+        json.dumps(row.rule_set)
+    )
+
+
+def iter_audits_csv(db, since=None, until=None):
+    """
+    Stream audits as CSV
+
+    Yields:
+        str: CSV text chunks, starting with the header row
+    """
+    def pieces():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(CSV_HEADER)
+        for audit_id, bssid, started_at, risk_level, messages in \
+                _iter_audit_summaries(db, since, until):
+            writer.writerow([
+                audit_id,
+                bssid,
+                started_at.isoformat() if started_at else '',
+                risk_level or 'unknown',
+                '; '.join(messages)
+            ])
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+        tail = output.getvalue()
+        if tail:
+            yield tail
+
+    return _buffered(pieces())
+
+
+def iter_audits_ndjson(db, since=None, until=None):
+    """
+    Stream audits as newline-delimited JSON, one audit per line
+
+    Yields:
+        str: NDJSON text chunks
+    """
+    return _buffered(_audit_json(row) + '\n' for row in _iter_audit_rows(db, since, until))
+
+
+def iter_audits_json(db, since=None, until=None):
+    """
+    Stream audits as a single JSON document
+
+    The document has the same keys as the original in-memory export;
+    total_audits is written last since it is counted while streaming.
+
+    Yields:
+        str: JSON text chunks
+    """
+    def pieces():
+        export_date = datetime.datetime.utcnow().isoformat() + "Z"
+        yield '{"export_date": %s, "audits": [' % json.dumps(export_date)
+        total = 0
+        for row in _iter_audit_rows(db, since, until):
+            yield (', ' if total else '') + _audit_json(row)
+            total += 1
+        yield '], "total_audits": %d}' % total
+
+    return _buffered(pieces())
+
+
+def gzip_stream(chunks):
+    """
+    Compress a stream of text chunks into a gzip stream on the fly
+
+    Yields:
+        bytes: gzip-encoded chunks
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,295 @@
+"""
+Metrics
+Prometheus text exposition of request, scan and database timings
+
+With METRICS_ENABLED the app gets a MetricsRegistry holding:
+
+    wifi_http_request_duration_seconds  histogram per endpoint, method, status
+    wifi_scan_duration_seconds          histogram per scanner backend
+    wifi_scan_access_points             histogram of APs found per backend
+    wifi_db_write_duration_seconds      histogram per write operation
+    wifi_db_commit_duration_seconds     histogram of session commits (flush + COMMIT)
+    wifi_rows_written_total             counter per table (rate() gives rows/sec)
+
+plus the response cache, scan queue and rate limiter counters, read when
+GET /metrics is scraped. Views, scanners and the save paths are wrapped
+with the timed_* decorators below; in a process where no app enabled
+metrics they cost one global flag check per call. The registry is per process: under gunicorn
+scrape every worker, or run the metrics on a single worker.
+"""
+import bisect
+import functools
+import threading
+import time
+from flask import current_app, has_app_context, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SCAN_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COMMIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# Set once any app of the process enables metrics, so that the decorators
+# skip the app lookup entirely otherwise
+_enabled = False
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name + _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Histogram with fixed upper bounds and labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._series = {}  # labels -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.bounds) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                cumulative += count
+                yield (self.name + '_bucket' +
+                       _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative)
+            yield self.name + '_sum' + _labels(self.labelnames, labels), total
+            yield self.name + '_count' + _labels(self.labelnames, labels), cumulative
+
+
+class MetricsRegistry:
+    """The metrics of one process plus collectors read at scrape time"""
+
+    def __init__(self):
+        self.requests = Histogram(
+            'wifi_http_request_duration_seconds', 'API request latency',
+            ('endpoint', 'method', 'status'))
+        self.scans = Histogram(
+            'wifi_scan_duration_seconds', 'Scanner backend run time',
+            ('backend',), SCAN_BUCKETS)
+        self.access_points = Histogram(
+            'wifi_scan_access_points', 'Access points returned per scan',
+            ('backend',), COUNT_BUCKETS)
+        self.writes = Histogram(
+            'wifi_db_write_duration_seconds', 'Duration of the save and audit write paths',
+            ('operation',), LATENCY_BUCKETS)
+        self.commits = Histogram(
+            'wifi_db_commit_duration_seconds', 'Session commit latency (flush + COMMIT)',
+            (), COMMIT_BUCKETS)
+        self.rows = Counter(
+            'wifi_rows_written_total', 'Rows written by the save and audit paths', ('table',))
+        self.scan_errors = Counter(
+            'wifi_scan_errors_total', 'Scanner backend runs that raised', ('backend',))
+        self.metrics = [self.requests, self.scans, self.access_points, self.writes,
+                        self.commits, self.rows, self.scan_errors]
+        self.collectors = []
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning (name, type, help, samples) tuples,
+        samples being (labels dict, value) pairs, read on every render
+        """
+        self.collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {_number(value)}" for name, value in metric.samples())
+        for collect in self.collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labels, labels.values())} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def current_metrics():
+    """The app's MetricsRegistry, or None outside an app or when disabled"""
+    if not _enabled or not has_app_context():
+        return None
+    return current_app.extensions.get('metrics')
+
+
+def timed_route(view):
+    """Record the latency and status of a view (goes right below @route)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        metrics = current_app.extensions.get('metrics') if _enabled else None
+        if metrics is None:
+            return view(*args, **kwargs)
+        started = time.perf_counter()
+        response = current_app.make_response(view(*args, **kwargs))
+        # Streamed responses are timed to the start of the body
+        metrics.requests.observe(time.perf_counter() - started, request.endpoint,
+                                 request.method, str(response.status_code))
+        return response
+    return wrapper
+
+
+def timed_scan(scan):
+    """Record run time and AP count of a Scanner method per backend"""
+    @functools.wraps(scan)
+    def wrapper(self, *args, **kwargs):
+        metrics = current_metrics()
+        if metrics is None:
+            return scan(self, *args, **kwargs)
+        backend = self.name or type(self).__name__
+        started = time.perf_counter()
+        try:
+            networks = scan(self, *args, **kwargs)
+        except Exception:
+            metrics.scan_errors.inc(1, backend)
+            raise
+        metrics.scans.observe(time.perf_counter() - started, backend)
+        metrics.access_points.observe(len(networks), backend)
+        return networks
+    return wrapper
+
+
+def timed_write(table, rows=len):
+    """
+    Record the duration of a write path and the rows it wrote
+
+    Args:
+        table: Table label of wifi_rows_written_total
+        rows: Callable(return value) giving the number of rows written
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = current_metrics()
+            if metrics is None:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            metrics.writes.observe(time.perf_counter() - started, fn.__qualname__)
+            metrics.rows.inc(rows(result), table)
+            return result
+        return wrapper
+    return decorator
+
+
+def _before_commit(session):
+    if current_metrics() is not None:
+        session.info['metrics_commit_started'] = time.perf_counter()
+
+
+def _after_commit(session):
+    started = session.info.pop('metrics_commit_started', None)
+    metrics = current_metrics()
+    if started is not None and metrics is not None:
+        metrics.commits.observe(time.perf_counter() - started)
+
+
+def _app_collector(app):
+    def collect():
+        cache = app.extensions.get('response_cache')
+        if cache is not None:
+            stats = cache.to_dict()
+            yield 'wifi_cache_entries', 'gauge', 'Cached responses', [({}, stats['entries'])]
+            for key in ('hits', 'misses', 'expired', 'stale', 'evictions', 'invalidations'):
+                yield (f'wifi_cache_{key}_total', 'counter', f'Response cache {key}',
+                       [({}, stats[key])])
+        jobs = app.extensions.get('scan_jobs')
+        if jobs is not None:
+            stats = jobs.stats()
+            yield 'wifi_scan_queue_depth', 'gauge', 'Scan jobs pending', [
+                ({'state': 'queued'}, stats['queued']), ({'state': 'running'}, stats['running'])]
+            yield 'wifi_scan_requests_total', 'counter', 'Scan requests by admission outcome', [
+                ({'outcome': key}, stats[key]) for key in ('admitted', 'coalesced', 'rejected')]
+        limiter = app.extensions.get('rate_limiter')
+        if limiter is not None:
+            yield 'wifi_rate_limited_total', 'counter', 'Requests over their rate limit', [
+                ({'class': cls}, count) for cls, count in limiter.limited.items()]
+    return collect
+
+
+def init_metrics(app):
+    """
+    Attach a MetricsRegistry to `app` as app.extensions['metrics'] when
+    METRICS_ENABLED is set
+
+    Returns:
+        MetricsRegistry or None
+    """
+    global _enabled
+    if not app.config.get('METRICS_ENABLED'):
+        return None
+    _enabled = True
+    from sqlalchemy import event
+    from models import db
+
+    registry = MetricsRegistry()
+    registry.add_collector(_app_collector(app))
+    # db.session is shared by every app of the process; the listeners look
+    # up the registry of the app in context
+    if not event.contains(db.session, 'before_commit', _before_commit):
+        event.listen(db.session, 'before_commit', _before_commit)
+        event.listen(db.session, 'after_commit', _after_commit)
+    app.extensions['metrics'] = registry
+    return registry
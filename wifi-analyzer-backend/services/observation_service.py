@@ -0,0 +1,80 @@
+"""
+Observation Service
+Append-only time series of per-scan RSSI/channel readings
+"""
+import datetime
+from sqlalchemy import insert, select
+from models import Observation
+
+# Longest look-back window of the history query (ten years)
+MAX_HISTORY_HOURS = 10 * 366 * 24
+
+
+def record_observations(db, scan_id, networks_data, observed_at=None):
+    """
+    Append one observation per network to the time-series table
+
+    The rows are added to the current session transaction with a single
+    executemany; the caller is responsible for committing.
+
+    Args:
+        db: SQLAlchemy database instance
+        scan_id: Identifier shared by every reading of this scan
+        networks_data: Iterable of network dictionaries
+        observed_at: Timestamp of the scan (default: now)
+
+    Returns:
+        int: Number of observations written
+    """
+    ts = observed_at or datetime.datetime.utcnow()
+    rows = [
+        {
+            "bssid": n["bssid"],
+            "ts": ts,
+            "signal": n.get("signal"),
+            "channel": n.get("channel"),
+            "scan_id": scan_id
+        }
+        for n in networks_data
+    ]
+    if rows:
+        db.session.execute(insert(Observation.__table__), rows)
+    return len(rows)
+
+
+def get_signal_history(db, bssid, hours=24, limit=None):
+    """
+    Get the RSSI history of one access point
+
+    Served as a range scan on the (bssid, ts) index, selecting only the
+    columns returned to the client.
+
+    Args:
+        db: SQLAlchemy database instance
+        bssid: Access point BSSID
+        hours: How far back to look
+        limit: Maximum number of observations (newest first) or None
+
+    Returns:
+        list: Observation dictionaries ordered oldest to newest
+    """
+    table = Observation.__table__
+    since = datetime.datetime.utcnow() - datetime.timedelta(hours=hours)
+    query = (
+        select(table.c.ts, table.c.signal, table.c.channel, table.c.scan_id)
+        .where(table.c.bssid == bssid, table.c.ts >= since)
+        .order_by(table.c.ts.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+
+    rows = db.session.execute(query).all()
+    return [
+        {
+            "ts": row.ts.isoformat() + "Z",
+            "signal": row.signal,
+            "channel": row.channel,
+            "scan_id": row.scan_id
+        }
+        for row in reversed(rows)
+    ]
@@ -0,0 +1,620 @@
+"""
+Capture Parser
+Extracts access points from 802.11 beacon and probe-response frames in
+monitor-mode captures (pcap or pcapng, radiotap or raw 802.11 link types)
+
+The file is memory-mapped and walked record by record without copying
+packet data. Per frame the hot loop only reads the radiotap signal byte
+and the 6-byte BSSID, appending the signal to a per-BSSID buffer; the
+information elements (SSID, DS channel, RSN/WPA) are parsed through a
+memoryview the first time a BSSID is seen as a beacon and as a probe
+response, and the radiotap layout is only re-parsed when the header
+length or present flags change. Signal buffers are folded into running statistics after every
+window of WINDOW_BYTES, so memory stays bounded by the number of BSSIDs.
+"""
+import mmap
+import os
+import struct
+import time
+
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_IEEE802_11_RADIOTAP = 127
+SUPPORTED_LINKTYPES = (LINKTYPE_IEEE802_11, LINKTYPE_IEEE802_11_RADIOTAP)
+
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': '<',  # little endian, microseconds
+    b'\xa1\xb2\xc3\xd4': '>',  # big endian, microseconds
+    b'\x4d\x3c\xb2\xa1': '<',  # little endian, nanoseconds
+    b'\xa1\xb2\x3c\x4d': '>',  # big endian, nanoseconds
+}
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 1
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+# Block types accepted when re-synchronising on a pcapng block boundary
+PCAPNG_BLOCK_TYPES = (PCAPNG_SHB, PCAPNG_IDB, 2, PCAPNG_SPB, 4, 5, PCAPNG_EPB)
+
+# Consecutive well-formed records required to accept a resync candidate
+RESYNC_CHAIN = 4
+# Largest record accepted when snaplen is missing from the pcap header
+MAX_RECORD_BYTES = 262144
+
+FC_BEACON = 0x80
+FC_PROBE_RESPONSE = 0x50
+# 802.11 management header: frame control through sequence control
+MGMT_HEADER_BYTES = 24
+
+# Bytes of capture processed between folds of the signal buffers
+WINDOW_BYTES = 64 * 1024 * 1024
+
+# Radiotap fields up to antenna signal: (alignment, size) by present bit
+_RADIOTAP_FIELDS = [(8, 8), (1, 1), (1, 1), (2, 4), (2, 2), (1, 1)]
+
+# Frames without a radiotap dBm field read the radiotap pad byte, which is
+# always zero; 0 dBm is therefore treated as "no reading"
+_NO_SIGNAL = 0x00
+_PAD_OFFSET = 1
+# Maps a two's complement byte to offset binary so min()/max()/sum() work
+# directly on the buffer: value = byte - 128
+_OFFSET_BINARY = bytes((i + 128) & 0xFF for i in range(256))
+
+
+class CaptureError(ValueError):
+    """Raised for unreadable or unsupported capture files"""
+
+
+def radiotap_layout(buf, p):
+    """
+    Locate the fields of the radiotap header starting at `p`
+
+    Returns:
+        tuple: (header length, offset of dBm signal relative to `p` or 0
+        if absent, FCS present flag, frequency MHz or None)
+    """
+    length = buf[p + 2] | buf[p + 3] << 8
+    present = struct.unpack_from('<I', buf, p + 4)[0]
+    offset = 8
+    word = present
+    while word & 0x80000000:
+        word = struct.unpack_from('<I', buf, p + offset)[0]
+        offset += 4
+
+    signal_offset = 0
+    freq = None
+    has_fcs = False
+    for bit, (align, size) in enumerate(_RADIOTAP_FIELDS):
+        if not present & (1 << bit):
+            continue
+        offset = (offset + align - 1) & ~(align - 1)
+        if offset + size > length:
+            break
+        if bit == 1:
+            has_fcs = bool(buf[p + offset] & 0x10)
+        elif bit == 3:
+            freq = buf[p + offset] | buf[p + offset + 1] << 8
+        elif bit == 5:
+            signal_offset = offset
+        offset += size
+    return length, signal_offset, has_fcs, freq
+
+
+def parse_management(frame):
+    """
+    Parse a beacon or probe response (802.11 header onwards)
+
+    Args:
+        frame: bytes or memoryview of the frame, without FCS
+
+    Returns:
+        dict with ssid, bssid, channel, privacy, rsn, rsn_akms and wpa,
+        or None for other frame types
+    """
+    if len(frame) < 36:
+        return None
+    fc = frame[0]
+    if fc != FC_BEACON and fc != FC_PROBE_RESPONSE:
+        return None
+
+    bssid = bytes(frame[16:22]).hex(':').upper()
+    privacy = bool(frame[34] & 0x10)
+    ssid = None
+    channel = 0
+    rsn = wpa = False
+    rsn_akms = set()
+
+    pos = 36
+    end = len(frame)
+    while pos + 2 <= end:
+        ie_id = frame[pos]
+        ie_len = frame[pos + 1]
+        body = frame[pos + 2:pos + 2 + ie_len]
+        pos += 2 + ie_len
+        if len(body) < ie_len:
+            break
+        if ie_id == 0:
+            raw = bytes(body)
+            ssid = raw.decode('utf-8', errors='replace') if raw.strip(b'\x00') else ''
+        elif ie_id == 3 and ie_len >= 1:
+            channel = body[0]
+        elif ie_id == 48:
+            rsn = True
+            rsn_akms.update(_rsn_akms(body))
+        elif ie_id == 221 and bytes(body[:4]) == b'\x00\x50\xf2\x01':
+            wpa = True
+
+    return {
+        "ssid": ssid,
+        "bssid": bssid,
+        "channel": channel,
+        "privacy": privacy,
+        "rsn": rsn,
+        "rsn_akms": rsn_akms,
+        "wpa": wpa,
+    }
+
+
+def _rsn_akms(body):
+    """AKM suite types listed in an RSN element body"""
+    try:
+        pos = 6  # version + group cipher
+        pairwise = body[pos] | body[pos + 1] << 8
+        pos += 2 + 4 * pairwise
+        count = body[pos] | body[pos + 1] << 8
+        pos += 2
+        return [body[pos + 4 * i + 3] for i in range(count)]
+    except IndexError:
+        return []
+
+
+class CaptureAggregate:
+    """
+    Per-BSSID summary of the management frames of one or more captures
+
+    Aggregates from different files or byte ranges can be combined with
+    merge(); the object only holds plain dicts and lists so it can be
+    pickled between processes.
+    """
+
+    def __init__(self):
+        self.frames = 0      # records read
+        self.management = 0  # beacons + probe responses
+        self.bytes = 0
+        # bssid bytes -> [frames, signal count, signal sum, min, max]
+        self.stats = {}
+        # bssid bytes -> parsed info of the first beacon / probe response
+        self.beacon_info = {}
+        self.probe_info = {}
+
+    def fold(self, pending, signals=True):
+        """
+        Fold raw signal buffers ({bssid: bytearray}) into the statistics
+
+        Args:
+            pending: Buffers filled by the scan loop; cleared afterwards
+            signals: False when the capture has no radiotap header, so the
+                buffered bytes carry no signal readings
+        """
+        stats = self.stats
+        for key, raw in pending.items():
+            if signals:
+                values = raw.translate(_OFFSET_BINARY, bytes((_NO_SIGNAL,)))
+            else:
+                values = b''
+            count = len(values)
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0, 0, 0, None, None]
+            entry[0] += len(raw)
+            self.frames += len(raw)
+            self.management += len(raw)
+            if count:
+                low = min(values) - 128
+                high = max(values) - 128
+                entry[1] += count
+                entry[2] += sum(values) - 128 * count
+                entry[3] = low if entry[3] is None else min(entry[3], low)
+                entry[4] = high if entry[4] is None else max(entry[4], high)
+        pending.clear()
+
+    def merge(self, other):
+        """Add another aggregate into this one"""
+        self.frames += other.frames
+        self.management += other.management
+        self.bytes += other.bytes
+        for key, (frames, count, total, low, high) in other.stats.items():
+            entry = self.stats.get(key)
+            if entry is None:
+                self.stats[key] = [frames, count, total, low, high]
+                continue
+            entry[0] += frames
+            entry[1] += count
+            entry[2] += total
+            if low is not None:
+                entry[3] = low if entry[3] is None else min(entry[3], low)
+                entry[4] = high if entry[4] is None else max(entry[4], high)
+        for key, info in other.beacon_info.items():
+            self.beacon_info.setdefault(key, info)
+        for key, info in other.probe_info.items():
+            self.probe_info.setdefault(key, info)
+        return self
+
+    def networks(self):
+        """
+        Summarise as network dictionaries ready for save_networks_to_db
+
+        The signal is the mean RSSI over all frames of the BSSID; SSID and
+        security come from its first beacon, with the SSID of a probe
+        response filling in hidden beacons.
+        """
+        from services.scanners import classify_encryption, freq_to_channel
+
+        networks = []
+        for key, (frames, count, total, low, high) in self.stats.items():
+            beacon = self.beacon_info.get(key)
+            probe = self.probe_info.get(key)
+            info = beacon or probe
+            if info is None:
+                continue
+            ssid = (beacon and beacon["ssid"]) or (probe and probe["ssid"]) or "Hidden Network"
+            channel = info["channel"] or (freq_to_channel(info["freq"]) if info["freq"] else 0)
+            networks.append({
+                "ssid": ssid,
+                "bssid": info["bssid"],
+                "channel": channel,
+                "signal": round(total / count) if count else None,
+                "encryption": classify_encryption(info["privacy"], info["rsn"],
+                                                  info["rsn_akms"], info["wpa"]),
+                "frames": frames,
+                "signal_min": low,
+                "signal_max": high,
+            })
+        return networks
+
+
+class CaptureReader:
+    """Memory-mapped reader for a pcap or pcapng capture file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        if self.size == 0:
+            self._file.close()
+            raise CaptureError("Empty capture file")
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self.buf[:4]
+        if magic in PCAP_MAGIC:
+            self.format = 'pcap'
+            self.endian = PCAP_MAGIC[magic]
+            if self.size < 24:
+                raise CaptureError("Truncated pcap header")
+            self.snaplen = struct.unpack_from(self.endian + 'I', self.buf, 16)[0] or MAX_RECORD_BYTES
+            self.linktype = struct.unpack_from(self.endian + 'I', self.buf, 20)[0] & 0xFFFF
+            self.data_start = 24
+        elif struct.unpack_from('<I', self.buf, 0)[0] == PCAPNG_SHB:
+            self.format = 'pcapng'
+            bom = self.buf[8:12]
+            self.endian = '<' if bom == b'\x4d\x3c\x2b\x1a' else '>'
+            self.linktype = None
+            self.data_start = 0
+            self._read_preamble()
+        else:
+            self.close()
+            raise CaptureError("Not a pcap or pcapng file")
+
+    def _read_preamble(self):
+        """Read the pcapng control blocks before the first packet, so byte
+        ranges starting mid-file know the link type"""
+        pos = 0
+        block = struct.Struct(self.endian + 'II').unpack_from
+        while pos + 12 <= self.size:
+            btype, blen = block(self.buf, pos)
+            if btype in (PCAPNG_EPB, PCAPNG_SPB) or blen < 12:
+                break
+            self._pcapng_control_block(btype, pos)
+            block = struct.Struct(self.endian + 'II').unpack_from
+            pos += blen
+
+    def close(self):
+        if getattr(self, 'buf', None) is not None:
+            self.buf.close()
+            self.buf = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_boundary(self, offset):
+        """
+        Find the first record (pcap) or block (pcapng) starting at or after
+        `offset`
+
+        Records carry no sync marker, so a candidate is accepted once
+        RESYNC_CHAIN consecutive well-formed records follow from it.
+
+        Returns:
+            int: Byte offset, or the file size if none is found
+        """
+        valid = self._valid_pcap_record if self.format == 'pcap' else self._valid_pcapng_block
+        for pos in range(max(offset, self.data_start), self.size):
+            nxt = pos
+            for _ in range(RESYNC_CHAIN):
+                if nxt == self.size:
+                    break
+                nxt = valid(nxt)
+                if nxt is None:
+                    break
+            else:
+                return pos
+            if nxt == self.size:
+                return pos
+        return self.size
+
+    def _valid_pcap_record(self, pos):
+        """Offset of the next record if a plausible header starts at `pos`"""
+        if pos + 16 > self.size:
+            return None
+        _, frac, incl, orig = struct.unpack_from(self.endian + 'IIII', self.buf, pos)
+        if frac >= 1000000000 or incl > self.snaplen or incl > orig or incl < 10:
+            return None
+        end = pos + 16 + incl
+        return end if end <= self.size else None
+
+    def _valid_pcapng_block(self, pos):
+        """Offset of the next block if a well-formed block starts at `pos`"""
+        if pos + 12 > self.size:
+            return None
+        btype, blen = struct.unpack_from(self.endian + 'II', self.buf, pos)
+        end = pos + blen
+        if btype not in PCAPNG_BLOCK_TYPES or blen < 12 or blen % 4 or end > self.size:
+            return None
+        if struct.unpack_from(self.endian + 'I', self.buf, end - 4)[0] != blen:
+            return None
+        return end
+
+    def split(self, parts):
+        """
+        Split the capture into up to `parts` byte ranges at record boundaries
+
+        Returns:
+            list: (start, stop) tuples covering every record exactly once
+        """
+        span = (self.size - self.data_start) // max(parts, 1)
+        starts = [self.data_start]
+        for i in range(1, parts):
+            start = self.record_boundary(self.data_start + i * span)
+            if starts[-1] < start < self.size:
+                starts.append(start)
+        return list(zip(starts, starts[1:] + [self.size]))
+
+    def aggregate(self, start=None, stop=None, aggregate=None, progress=None):
+        """
+        Aggregate the records whose header starts in [start, stop)
+
+        Args:
+            start: Byte offset of a record boundary (default: first record)
+            stop: Byte offset to stop at (default: end of file)
+            aggregate: CaptureAggregate to add to (default: a new one)
+            progress: Optional callable(bytes_done, bytes_total) called
+                after every window
+
+        Returns:
+            CaptureAggregate
+        """
+        agg = aggregate if aggregate is not None else CaptureAggregate()
+        pos = self.data_start if start is None else max(start, self.data_start)
+        stop = self.size if stop is None else min(stop, self.size)
+        begin = pos
+        scan = self._scan_pcap if self.format == 'pcap' else self._scan_pcapng
+        pending = {}
+        while pos < stop:
+            window_end = min(pos + WINDOW_BYTES, stop)
+            pos = scan(pos, window_end, agg, pending)
+            agg.fold(pending, self.linktype == LINKTYPE_IEEE802_11_RADIOTAP)
+            if progress:
+                progress(pos - begin, stop - begin)
+        agg.bytes += pos - begin
+        return agg
+
+    def _first_sight(self, agg, fc, key, q, end, layout):
+        """Parse the information elements of the first frame of a BSSID"""
+        rt, so, has_fcs, freq = layout
+        if has_fcs:
+            end -= 4
+        frame = parse_management(memoryview(self.buf)[q:end])
+        if frame is None:
+            return
+        frame["freq"] = freq
+        table = agg.beacon_info if fc == FC_BEACON else agg.probe_info
+        table.setdefault(key, frame)
+
+    def _layout(self, buf, p):
+        """Radiotap layout at `p`, pointing frames without a signal at a zero byte"""
+        if self.linktype != LINKTYPE_IEEE802_11_RADIOTAP:
+            return (0, 0, False, None)
+        layout = radiotap_layout(buf, p)
+        if not layout[1]:
+            layout = (layout[0], _PAD_OFFSET) + layout[2:]
+        return layout
+
+    def _scan_pcap(self, pos, stop, agg, pending):
+        """Hot loop over classic pcap records; returns the next record offset"""
+        buf = self.buf
+        size = self.size
+        unpack = struct.Struct(self.endian + 'I').unpack_from
+        if self.linktype not in SUPPORTED_LINKTYPES:
+            raise CaptureError(f"Unsupported link type {self.linktype}")
+        # Radiotap length and first present word; empty for raw 802.11
+        hl = 8 if self.linktype == LINKTYPE_IEEE802_11_RADIOTAP else 2
+        beacons = agg.beacon_info
+        probes = agg.probe_info
+        header = None
+        layout = None
+        rt = so = 0
+        other = 0
+        limit = min(stop, size - 16)
+        while pos < limit:
+            p = pos + 16
+            end = p + unpack(buf, pos + 8)[0]
+            if end > size:
+                break  # truncated final record
+            pos = end
+            if end - p < hl:
+                other += 1  # shorter than its radiotap header
+                continue
+            h = buf[p + 2:p + hl]
+            if h != header:
+                header = h
+                layout = self._layout(buf, p)
+                rt, so = layout[0], layout[1]
+            q = p + rt
+            if end - q < MGMT_HEADER_BYTES:
+                other += 1  # snaplen-truncated or radiotap-only record
+                continue
+            fc = buf[q]
+            if fc == FC_BEACON:
+                key = buf[q + 16:q + 22]
+                try:
+                    pending[key].append(buf[p + so])
+                except KeyError:
+                    pending[key] = bytearray((buf[p + so],))
+                if key not in beacons:
+                    self._first_sight(agg, fc, key, q, end, layout)
+            elif fc == FC_PROBE_RESPONSE:
+                key = buf[q + 16:q + 22]
+                try:
+                    pending[key].append(buf[p + so])
+                except KeyError:
+                    pending[key] = bytearray((buf[p + so],))
+                if key not in probes:
+                    self._first_sight(agg, fc, key, q, end, layout)
+            else:
+                other += 1
+        agg.frames += other
+        # Past the end of the range, or only a truncated record remains
+        return pos if pos >= stop else size
+
+    def _scan_pcapng(self, pos, stop, agg, pending):
+        """Hot loop over pcapng blocks; returns the next block offset"""
+        buf = self.buf
+        size = self.size
+        block = struct.Struct(self.endian + 'II').unpack_from
+        hl = 8 if self.linktype == LINKTYPE_IEEE802_11_RADIOTAP else 2
+        beacons = agg.beacon_info
+        probes = agg.probe_info
+        header = None
+        layout = None
+        rt = so = 0
+        other = 0
+        limit = min(stop, size - 12)
+        while pos < limit:
+            btype, blen = block(buf, pos)
+            if blen < 12 or pos + blen > size:
+                pos = size  # corrupt or truncated block
+                break
+            if btype == PCAPNG_EPB:
+                p = pos + 28
+                end = min(p + block(buf, pos + 20)[0], pos + blen - 4)
+            elif btype == PCAPNG_SPB:
+                p = pos + 12
+                end = pos + blen - 4
+            else:
+                self._pcapng_control_block(btype, pos)
+                hl = 8 if self.linktype == LINKTYPE_IEEE802_11_RADIOTAP else 2
+                header = None
+                block = struct.Struct(self.endian + 'II').unpack_from
+                pos += blen
+                continue
+            pos += blen
+            if end - p < hl:
+                other += 1  # shorter than its radiotap header
+                continue
+            h = buf[p + 2:p + hl]
+            if h != header:
+                header = h
+                layout = self._layout(buf, p)
+                rt, so = layout[0], layout[1]
+            q = p + rt
+            if end - q < MGMT_HEADER_BYTES:
+                other += 1  # snaplen-truncated or radiotap-only record
+                continue
+            fc = buf[q]
+            if fc == FC_BEACON:
+                key = buf[q + 16:q + 22]
+                try:
+                    pending[key].append(buf[p + so])
+                except KeyError:
+                    pending[key] = bytearray((buf[p + so],))
+                if key not in beacons:
+                    self._first_sight(agg, fc, key, q, end, layout)
+            elif fc == FC_PROBE_RESPONSE:
+                key = buf[q + 16:q + 22]
+                try:
+                    pending[key].append(buf[p + so])
+                except KeyError:
+                    pending[key] = bytearray((buf[p + so],))
+                if key not in probes:
+                    self._first_sight(agg, fc, key, q, end, layout)
+            else:
+                other += 1
+        agg.frames += other
+        # Past the end of the range, or only a truncated record remains
+        return pos if pos >= stop else size
+
+    def _pcapng_control_block(self, btype, pos):
+        """Handle section header and interface description blocks"""
+        if btype == PCAPNG_SHB:
+            bom = self.buf[pos + 8:pos + 12]
+            self.endian = '<' if bom == b'\x4d\x3c\x2b\x1a' else '>'
+        elif btype == PCAPNG_IDB:
+            linktype = struct.unpack_from(self.endian + 'H', self.buf, pos + 8)[0]
+            if linktype not in SUPPORTED_LINKTYPES:
+                raise CaptureError(f"Unsupported link type {linktype}")
+            if self.linktype is not None and linktype != self.linktype:
+                raise CaptureError("Captures mixing link types are not supported")
+            self.linktype = linktype
+
+
+def scan_capture(path, progress=None):
+    """
+    Aggregate a whole capture file
+
+    Args:
+        path: pcap or pcapng file path
+        progress: Optional callable(bytes_done, bytes_total)
+
+    Returns:
+        tuple: (CaptureAggregate, elapsed seconds)
+    """
+    started = time.perf_counter()
+    with CaptureReader(path) as reader:
+        agg = reader.aggregate(progress=progress)
+    return agg, time.perf_counter() - started
+
+
+def aggregate_range(path, start=None, stop=None):
+    """
+    Aggregate the records of `path` in [start, stop)
+
+    Module-level so it can be submitted to a process pool; this module
+    only imports the standard library, keeping worker start-up cheap.
+    """
+    with CaptureReader(path) as reader:
+        return reader.aggregate(start, stop)
+
+
+def read_capture_networks(path):
+    """
+    Read a capture file and summarise the access points seen in it
+
+    Args:
+        path: pcap or pcapng file path
+
+    Returns:
+        list: Network dictionaries (mean signal per BSSID)
+    """
+    agg, _ = scan_capture(path)
+    return agg.networks()
@@ -0,0 +1,339 @@
+"""
+Request Profiler
+Opt-in per-request profiling for production troubleshooting
+
+With PROFILING_ENABLED the WSGI app is wrapped in ProfilingMiddleware. A
+request is profiled when it carries the PROFILE_HEADER (X-Profile: 1)
+together with an admin token, or when it is picked by PROFILE_SAMPLE_RATE.
+For a profiled request the middleware records, on the request thread:
+
+- a cProfile of the whole request, body streaming included (downloadable
+  as a .pstats file for pstats, snakeviz, ...)
+- wall-clock stack samples every PROFILE_SAMPLE_INTERVAL seconds taken by
+  a helper thread, as collapsed stacks for flamegraph.pl or speedscope
+- every SQL statement with its duration, through SQLAlchemy cursor events
+
+The last PROFILE_HISTORY profiles are kept in memory (a ring buffer per
+process) and served under /api/profiles; the response of a profiled
+request carries their id in X-Profile-Id. Work done off the request
+thread (scan jobs) is not captured.
+"""
+import collections
+import cProfile
+import datetime
+import io
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+
+from sqlalchemy import event
+
+from services.token_registry import ADMIN
+
+# Statement text kept per SQL timing
+MAX_STATEMENT_LENGTH = 500
+
+_local = threading.local()
+
+
+def _iso(value):
+    return value.isoformat() + "Z" if value else None
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id, interval=0.005):
+        super().__init__(daemon=True, name='profile-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profile:
+    """Data captured for one request"""
+
+    def __init__(self, method, path, query, trigger):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.query = query
+        self.trigger = trigger
+        self.started_at = datetime.datetime.utcnow()
+        self.status = None
+        self.duration = None
+        self.statements = []  # (statement, seconds)
+        self.dropped_statements = 0
+        self.stats = None      # pstats.Stats
+        self.stacks = None     # collapsed stack -> samples
+        self.max_statements = None
+        self._cprofile = None
+        self._sampler = None
+        self._clock = None
+
+    @property
+    def sql_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def pstats_bytes(self):
+        """The cProfile data in the format written by pstats.dump_stats"""
+        return marshal.dumps(self.stats.stats)
+
+    def collapsed(self):
+        """Collapsed stacks ('frame;frame;frame count' lines)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=25, sort='cumulative'):
+        """The `limit` heaviest functions as pstats prints them"""
+        stats = self.stats
+        stats.sort_stats(sort)
+        rows = []
+        for func in stats.fcn_list[:limit]:
+            calls, primitive, own, cumulative, _ = stats.stats[func]
+            rows.append({
+                "function": pstats.func_std_string(func),
+                "calls": calls,
+                "own_seconds": round(own, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            })
+        return rows
+
+    def to_dict(self, detail=False):
+        data = {
+            "profile_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "trigger": self.trigger,
+            "status": self.status,
+            "started_at": _iso(self.started_at),
+            "duration_seconds": round(self.duration, 6) if self.duration is not None else None,
+            "sql_statements": len(self.statements) + self.dropped_statements,
+            "sql_seconds": round(self.sql_seconds, 6),
+            "samples": sum(self.stacks.values()) if self.stacks is not None else None,
+        }
+        if detail:
+            by_statement = {}
+            for statement, seconds in self.statements:
+                count, total = by_statement.get(statement, (0, 0.0))
+                by_statement[statement] = (count + 1, total + seconds)
+            data["sql"] = [
+                {"statement": statement, "count": count, "total_seconds": round(total, 6)}
+                for statement, (count, total) in sorted(by_statement.items(),
+                                                        key=lambda item: -item[1][1])
+            ]
+            data["dropped_statements"] = self.dropped_statements
+            data["top_functions"] = self.top_functions() if self.stats else []
+        return data
+
+
+class Profiler:
+    """Decides which requests to profile and keeps the recent profiles"""
+
+    def __init__(self, tokens=None, header='X-Profile', sample_rate=0.0, history=20,
+                 sample_interval=0.005, max_statements=1000, exclude=('/api/profiles',)):
+        """
+        Args:
+            tokens: TokenRegistry checked for an admin token when the
+                header is present (None: the header alone is enough)
+            header: Request header asking for a profile
+            sample_rate: Share of all other requests profiled (0.0 to 1.0)
+            history: Number of profiles kept
+            sample_interval: Seconds between stack samples
+            max_statements: SQL timings kept per profile
+            exclude: Path prefixes never profiled
+        """
+        self.tokens = tokens
+        self.header_key = 'HTTP_' + header.upper().replace('-', '_')
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        self.max_statements = max_statements
+        self.exclude = tuple(exclude)
+        self.profiles = collections.deque(maxlen=history)
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def trigger(self, environ):
+        """'header', 'sample' or None for a WSGI request"""
+        if environ.get('PATH_INFO', '').startswith(self.exclude):
+            return None
+        if environ.get(self.header_key, '').lower() in ('1', 'true', 'yes') and \
+                self._authorized(environ):
+            return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def _authorized(self, environ):
+        if self.tokens is None:
+            return True
+        scheme, _, token = environ.get('HTTP_AUTHORIZATION', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return False
+        client = self.tokens.verify(token.strip())
+        return client is not None and client.allows(ADMIN)
+
+    def start(self, environ, trigger):
+        """Begin profiling the current thread; returns the Profile or None"""
+        profile = Profile(environ.get('REQUEST_METHOD'), environ.get('PATH_INFO'),
+                          environ.get('QUERY_STRING', ''), trigger)
+        profile._cprofile = cProfile.Profile()
+        try:
+            profile._cprofile.enable()
+        except ValueError:
+            # Another profiler owns the interpreter (Python 3.12+ allows
+            # one cProfile at a time)
+            with self._lock:
+                self.skipped += 1
+            return None
+        profile._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        profile._sampler.start()
+        profile._clock = time.perf_counter()
+        profile.max_statements = self.max_statements
+        _local.profile = profile
+        return profile
+
+    def finish(self, profile):
+        """Stop profiling and store the result"""
+        profile.duration = time.perf_counter() - profile._clock
+        profile._cprofile.disable()
+        _local.profile = None
+        profile._sampler.stop()
+        profile.stats = pstats.Stats(profile._cprofile, stream=io.StringIO())
+        profile.stacks = profile._sampler.stacks
+        profile._cprofile = profile._sampler = None
+        with self._lock:
+            self.profiles.append(profile)
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self.profiles:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+    def recent(self):
+        """Stored profiles, newest first"""
+        with self._lock:
+            return list(reversed(self.profiles))
+
+
+class _ProfiledBody:
+    """Response iterable that ends the profile once the body is sent"""
+
+    def __init__(self, body, profiler, profile):
+        self.body = body
+        self.profiler = profiler
+        self.profile = profile
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.profiler.finish(self.profile)
+
+
+class ProfilingMiddleware:
+    """WSGI middleware profiling the requests picked by a Profiler"""
+
+    def __init__(self, wsgi_app, profiler):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        trigger = self.profiler.trigger(environ)
+        profile = self.profiler.start(environ, trigger) if trigger else None
+        if profile is None:
+            return self.wsgi_app(environ, start_response)
+
+        def start_profiled_response(status, headers, exc_info=None):
+            profile.status = int(status.split(' ', 1)[0])
+            headers.append(('X-Profile-Id', profile.id))
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.wsgi_app(environ, start_profiled_response)
+        except BaseException:
+            self.profiler.finish(profile)
+            raise
+        return _ProfiledBody(body, self.profiler, profile)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'profile', None) is not None:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = getattr(_local, 'profile', None)
+    started = conn.info.get('profile_query_start')
+    if profile is None or not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    if len(profile.statements) < profile.max_statements:
+        profile.statements.append((statement[:MAX_STATEMENT_LENGTH], seconds))
+    else:
+        profile.dropped_statements += 1
+
+
+def current_profiler():
+    """The app's Profiler (for the routes), or None when disabled"""
+    from flask import current_app
+    return current_app.extensions.get('profiler')
+
+
+def init_profiler(app):
+    """
+    Wrap app.wsgi_app in ProfilingMiddleware and attach the Profiler as
+    app.extensions['profiler'] when PROFILING_ENABLED is set
+
+    Returns:
+        Profiler or None
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return None
+    from models import db
+
+    profiler = Profiler(
+        tokens=app.extensions.get('tokens'),
+        header=app.config['PROFILE_HEADER'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        history=app.config['PROFILE_HISTORY'],
+        sample_interval=app.config['PROFILE_SAMPLE_INTERVAL'],
+        max_statements=app.config['PROFILE_MAX_STATEMENTS'],
+    )
+    with app.app_context():
+        engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, profiler)
+    app.extensions['profiler'] = profiler
+    return profiler
@@ -0,0 +1,405 @@
+"""
+List Query Service
+Keyset pagination, filtering, sorting and field projection for the
+network and audit list endpoints
+"""
+import base64
+import binascii
+import datetime
+import json
+from sqlalchemy import select, and_, or_, func
+from models import Network, Audit, AuditFinding, NetworkChange
+from services.serialization import RowEncoder, embed, VALUE, TIME, RAW_JSON
+
+
+class QueryError(ValueError):
+    """Raised when list query parameters are invalid"""
+
+
+# Public field name -> (column, serialization kind)
+NETWORK_FIELDS = {
+    "id": (Network.__table__.c.id, VALUE),
+    "ssid": (Network.__table__.c.ssid, VALUE),
+    "bssid": (Network.__table__.c.bssid, VALUE),
+    "channel": (Network.__table__.c.channel, VALUE),
+    "signal": (Network.__table__.c.signal, VALUE),
+    "encryption": (Network.__table__.c.encryption, VALUE),
+    "discovered_at": (Network.__table__.c.discovered_at, TIME),
+    "last_seen": (Network.__table__.c.last_seen, TIME),
+}
+
+AUDIT_FIELDS = {
+    "id": (Audit.__table__.c.id, VALUE),
+    "network_bssid": (Audit.__table__.c.network_bssid, VALUE),
+    "started_at": (Audit.__table__.c.started_at, TIME),
+    "result": (Audit.__table__.c.result_json, RAW_JSON),
+    "rule_set": (Audit.__table__.c.rule_set, VALUE),
+    "risk_level": (Audit.__table__.c.risk_level, VALUE),
+    "weak_cipher": (Audit.__table__.c.weak_cipher, VALUE),
+    "open_network": (Audit.__table__.c.open_network, VALUE),
+    "signal_strength": (Audit.__table__.c.signal_strength, VALUE),
+}
+
+CHANGE_FIELDS = {
+    "id": (NetworkChange.__table__.c.id, VALUE),
+    "ts": (NetworkChange.__table__.c.ts, TIME),
+    "scan_id": (NetworkChange.__table__.c.scan_id, VALUE),
+    "interface": (NetworkChange.__table__.c.interface, VALUE),
+    "bssid": (NetworkChange.__table__.c.bssid, VALUE),
+    "kind": (NetworkChange.__table__.c.kind, VALUE),
+    "old_value": (NetworkChange.__table__.c.old_value, VALUE),
+    "new_value": (NetworkChange.__table__.c.new_value, VALUE),
+}
+
+# Sort name -> (sort expression, is datetime). Nullable integer columns are
+# coalesced so that keyset comparisons never see NULL.
+NETWORK_SORTS = {
+    "discovered_at": (Network.__table__.c.discovered_at, True),
+    "last_seen": (Network.__table__.c.last_seen, True),
+    "signal": (func.coalesce(Network.__table__.c.signal, -1000), False),
+    "channel": (func.coalesce(Network.__table__.c.channel, 0), False),
+}
+
+AUDIT_SORTS = {
+    "started_at": (Audit.__table__.c.started_at, True),
+}
+
+CHANGE_SORTS = {
+    "ts": (NetworkChange.__table__.c.ts, True),
+}
+
+
+def parse_time(value, name):
+    """
+    Parse an ISO 8601 query parameter into a naive UTC datetime
+
+    Args:
+        value: Raw parameter value (may end in 'Z') or None
+        name: Parameter name used in error messages
+
+    Returns:
+        datetime or None
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise QueryError(f"{name} must be an ISO 8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_int(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+
+def _parse_list(args, name):
+    value = args.get(name)
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_fields(args, available):
+    names = _parse_list(args, "fields")
+    if not names:
+        return list(available)
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _parse_sort(args, sorts, default):
+    value = args.get("sort") or default
+    descending = value.startswith("-")
+    name = value.lstrip("-")
+    if name not in sorts:
+        raise QueryError(f"sort must be one of: {', '.join(sorts)} (prefix '-' for descending)")
+    return name, descending
+
+
+def encode_cursor(sort_name, value, row_id):
+    """Build an opaque cursor pointing just past (value, row_id)"""
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_name, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _is_scalar(value, kind):
+    # JSON true/false decode to bool, which is an int subclass
+    return isinstance(value, kind) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor, sort_name, is_datetime, value_type=int, id_type=int):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor from the X-Next-Cursor header
+        sort_name: Sort the cursor has to belong to
+        is_datetime: The sort value is a datetime (stored as ISO 8601)
+        value_type: Python type of any other sort value
+        id_type: Python type of the row id
+
+    Returns:
+        tuple: (sort value, row id)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if is_datetime and value is not None:
+            value = datetime.datetime.fromisoformat(value)
+    except (ValueError, TypeError, binascii.Error):
+        raise QueryError("Invalid cursor")
+    if name != sort_name:
+        raise QueryError("Cursor does not match the requested sort")
+    if not (value is None or is_datetime or _is_scalar(value, value_type)) \
+            or not _is_scalar(row_id, id_type):
+        raise QueryError("Invalid cursor")
+    return value, row_id
+
+
+def _encoder(fields, names):
+    return RowEncoder([(n, fields[n][1]) for n in names])
+
+
+def _page(db, table, conditions, args, fields, sorts, default_sort,
+          default_limit, max_limit):
+    """
+    Run a keyset-paginated, projected query
+
+    Returns:
+        tuple: (JSON array of the rows as bytes, next cursor or None)
+    """
+    names = _parse_fields(args, fields)
+    sort_name, descending = _parse_sort(args, sorts, default_sort)
+    sort_expr, is_datetime = sorts[sort_name]
+    id_col = table.c.id
+
+    cursor = args.get("cursor")
+    limit = _parse_int(args, "limit")
+    if limit is not None and limit <= 0:
+        raise QueryError("limit must be positive")
+    limit = min(limit or default_limit, max_limit)
+
+    conditions = list(conditions)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_name, is_datetime,
+                                       sort_expr.type.python_type, id_col.type.python_type)
+        if descending:
+            conditions.append(or_(sort_expr < value, and_(sort_expr == value, id_col < last_id)))
+        else:
+            conditions.append(or_(sort_expr > value, and_(sort_expr == value, id_col > last_id)))
+
+    columns = [fields[n][0].label(n) for n in names]
+    query = select(*columns, id_col.label("_id"), sort_expr.label("_sort"))
+    if conditions:
+        query = query.where(and_(*conditions))
+    if descending:
+        query = query.order_by(sort_expr.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_expr, id_col)
+    query = query.limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_name, last._sort, last._id)
+
+    return _encoder(fields, names).encode_many(rows), next_cursor
+
+
+def network_conditions(args):
+    """
+    Build the WHERE conditions of the network filters
+
+    Args:
+        args: Mapping with optional encryption, channel, min_signal,
+            since and until values (see list_networks_page)
+
+    Returns:
+        list: SQLAlchemy conditions
+    """
+    table = Network.__table__
+    conditions = []
+
+    encryptions = _parse_list(args, "encryption")
+    if encryptions:
+        conditions.append(func.lower(table.c.encryption).in_([e.lower() for e in encryptions]))
+    channels = _parse_list(args, "channel")
+    if channels:
+        try:
+            conditions.append(table.c.channel.in_([int(c) for c in channels]))
+        except ValueError:
+            raise QueryError("channel must be a comma separated list of integers")
+    min_signal = _parse_int(args, "min_signal")
+    if min_signal is not None:
+        conditions.append(table.c.signal >= min_signal)
+    since = parse_time(args.get("since"), "since")
+    if since:
+        conditions.append(table.c.discovered_at >= since)
+    until = parse_time(args.get("until"), "until")
+    if until:
+        conditions.append(table.c.discovered_at < until)
+    return conditions
+
+
+def list_networks_page(db, args, default_limit=100, max_limit=1000):
+    """
+    List networks for GET /api/networks
+
+    Query params (all optional):
+        encryption: Comma separated encryption types (case-insensitive)
+        channel: Comma separated channel numbers
+        min_signal: Minimum RSSI in dBm
+        since/until: discovered_at range, ISO 8601
+        sort: discovered_at, last_seen, signal or channel; '-' for descending
+        fields: Comma separated subset of NETWORK_FIELDS
+        limit/cursor: Keyset pagination
+
+    Returns:
+        tuple: (JSON array of networks as bytes, next cursor or None)
+    """
+    conditions = network_conditions(args)
+    return _page(db, Network.__table__, conditions, args, NETWORK_FIELDS, NETWORK_SORTS,
+                 "discovered_at", default_limit, max_limit)
+
+
+def list_audits_page(db, args, default_limit=100, max_limit=1000):
+    """
+    List audits for GET /api/audits
+
+    Query params (all optional):
+        risk_level: Comma separated risk levels
+        finding: Comma separated rule ids; audits where any of them fired
+        bssid: Only audits of this network
+        since/until: started_at range, ISO 8601
+        sort: started_at; '-' for descending
+        fields: Comma separated subset of AUDIT_FIELDS
+        limit/cursor: Keyset pagination
+
+    Returns:
+        tuple: (JSON array of audits as bytes, next cursor or None)
+    """
+    table = Audit.__table__
+    conditions = []
+
+    risk_levels = _parse_list(args, "risk_level")
+    if risk_levels:
+        conditions.append(table.c.risk_level.in_([r.lower() for r in risk_levels]))
+    findings = _parse_list(args, "finding")
+    if findings:
+        finding = AuditFinding.__table__
+        conditions.append(select(finding.c.id).where(
+            finding.c.audit_id == table.c.id, finding.c.rule_id.in_(findings)
+        ).exists())
+    bssid = args.get("bssid")
+    if bssid:
+        conditions.append(table.c.network_bssid == bssid)
+    since = parse_time(args.get("since"), "since")
+    if since:
+        conditions.append(table.c.started_at >= since)
+    until = parse_time(args.get("until"), "until")
+    if until:
+        conditions.append(table.c.started_at < until)
+
+    return _page(db, table, conditions, args, AUDIT_FIELDS, AUDIT_SORTS,
+                 "started_at", default_limit, max_limit)
+
+
+def list_changes_page(db, args, default_limit=100, max_limit=1000):
+    """
+    List detected scan changes for GET /api/networks/changes
+
+    Query params (all optional):
+        since/until: Change time range, ISO 8601
+        kind: Comma separated change kinds (appeared, disappeared, signal,
+            encryption, channel, ssid)
+        bssid: Only changes of this network
+        interface: Only changes seen by this interface
+        sort: ts; '-' for descending (default: oldest first)
+        fields: Comma separated subset of CHANGE_FIELDS
+        limit/cursor: Keyset pagination
+
+    Returns:
+        tuple: (JSON array of changes as bytes, next cursor or None)
+    """
+    table = NetworkChange.__table__
+    conditions = []
+
+    since = parse_time(args.get("since"), "since")
+    if since:
+        conditions.append(table.c.ts >= since)
+    until = parse_time(args.get("until"), "until")
+    if until:
+        conditions.append(table.c.ts < until)
+    kinds = _parse_list(args, "kind")
+    if kinds:
+        conditions.append(table.c.kind.in_(kinds))
+    bssid = args.get("bssid")
+    if bssid:
+        conditions.append(table.c.bssid == bssid)
+    interface = args.get("interface")
+    if interface:
+        conditions.append(table.c.interface == interface)
+
+    return _page(db, table, conditions, args, CHANGE_FIELDS, CHANGE_SORTS,
+                 "ts", default_limit, max_limit)
+
+
+# Fields of the single-object endpoints, as Network/Audit.to_dict() return them
+AUDIT_DETAIL_FIELDS = ("id", "network_bssid", "started_at", "result", "rule_set")
+
+FINDING_FIELDS = {
+    "rule_id": (AuditFinding.__table__.c.rule_id, VALUE),
+    "severity": (AuditFinding.__table__.c.severity, VALUE),
+    "message": (AuditFinding.__table__.c.message, VALUE),
+}
+
+
+def get_network_json(db, network_id):
+    """
+    Encode one network for GET /api/networks/<id>
+
+    Returns:
+        bytes: JSON object, or None if there is no such network
+    """
+    table = Network.__table__
+    row = db.session.execute(
+        select(*(column for column, _ in NETWORK_FIELDS.values())).where(table.c.id == network_id)
+    ).first()
+    return None if row is None else _encoder(NETWORK_FIELDS, NETWORK_FIELDS).encode(row)
+
+
+def get_audit_json(db, audit_id):
+    """
+    Encode one audit with its findings for GET /api/audits/<id>
+
+    Returns:
+        bytes: JSON object, or None if there is no such audit
+    """
+    table = Audit.__table__
+    row = db.session.execute(
+        select(*(AUDIT_FIELDS[n][0] for n in AUDIT_DETAIL_FIELDS)).where(table.c.id == audit_id)
+    ).first()
+    if row is None:
+        return None
+    finding = AuditFinding.__table__
+    findings = db.session.execute(
+        select(*(column for column, _ in FINDING_FIELDS.values()))
+        .where(finding.c.audit_id == audit_id).order_by(finding.c.position)
+    ).all()
+    return embed(_encoder(AUDIT_FIELDS, AUDIT_DETAIL_FIELDS).encode(row), "findings",
+                 _encoder(FINDING_FIELDS, FINDING_FIELDS).encode_many(findings))
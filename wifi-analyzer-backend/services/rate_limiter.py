@@ -0,0 +1,221 @@
+"""
+Rate Limiter
+Token buckets per API token and endpoint class
+
+Every (token name, endpoint class) pair has a bucket holding up to N
+requests that refills at N per period, so a client may burst its whole
+allowance and then continues at the sustained rate. The limit is the
+token's own rate_limit from the registry file, or the RATE_LIMIT_<CLASS>
+default of the class. Endpoint classes are the scopes of the limited
+endpoints: 'scan' (scans and capture imports) and 'audit' (running
+audits).
+
+The 'memory' store keeps the buckets of one process. The 'sqlite' store
+shares them between the processes of one host (gunicorn workers) through
+a small SQLite file, standing in for a shared store such as Redis.
+"""
+import functools
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app, jsonify
+from auth import current_token
+from services.token_registry import SCAN, AUDIT, parse_rate_limit
+
+LIMITED_CLASSES = (SCAN, AUDIT)
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBuckets:
+    """Process-local buckets"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        """
+        Take one request from the bucket `key`
+
+        Args:
+            key: Bucket key
+            capacity: Bucket size (burst)
+            rate: Refill in requests per second
+            now: Current time (time.time())
+
+        Returns:
+            float: 0.0 if allowed, else seconds until a request is available
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SqliteBuckets:
+    """Buckets in a SQLite file shared between processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute("CREATE TABLE IF NOT EXISTS rate_bucket ("
+                                "key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now):
+        conn = self._connect()
+        # The write lock is taken up front so that two workers cannot both
+        # spend the last request of a bucket
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_bucket WHERE key = ?",
+                               (key,)).fetchone()
+            tokens = _refill(*(row or (capacity, now)), now, capacity, rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute("INSERT OR REPLACE INTO rate_bucket VALUES (?, ?, ?)",
+                         (key, tokens, now))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return wait
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM rate_bucket").fetchone()[0]
+
+
+class RateLimiter:
+    """Token bucket limits per API token and endpoint class"""
+
+    def __init__(self, store, defaults=None):
+        """
+        Args:
+            store: MemoryBuckets or SqliteBuckets
+            defaults: Endpoint class -> (requests, period seconds) for
+                tokens without their own rate_limit; classes missing here
+                are unlimited for them
+        """
+        self.store = store
+        self.defaults = dict(defaults or {})
+        self.allowed = {}
+        self.limited = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, token, endpoint_class):
+        """(requests, period) applying to `token`, or None"""
+        if token is not None and token.rate_limit:
+            return token.rate_limit
+        return self.defaults.get(endpoint_class)
+
+    def check(self, token, endpoint_class, now=None):
+        """
+        Count one request of `token` against `endpoint_class`
+
+        Returns:
+            float: 0.0 if allowed, else seconds to wait before retrying
+        """
+        limit = self.limit_for(token, endpoint_class)
+        wait = 0.0
+        if limit is not None:
+            requests, period = limit
+            key = f"{token.name if token else '-'}:{endpoint_class}"
+            wait = self.store.take(key, requests, requests / period,
+                                   time.time() if now is None else now)
+        counters = self.limited if wait else self.allowed
+        with self._lock:
+            counters[endpoint_class] = counters.get(endpoint_class, 0) + 1
+        return wait
+
+    def to_dict(self):
+        return {
+            "backend": type(self.store).__name__,
+            "buckets": len(self.store),
+            "limits": {cls: {"requests": requests, "period": period}
+                       for cls, (requests, period) in self.defaults.items()},
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+        }
+
+
+def rate_limited(endpoint_class):
+    """
+    Apply the `endpoint_class` limit of the authenticated token to a view
+
+    Goes below require_auth. Requests over the limit get 429 with a
+    Retry-After header.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is not None:
+                wait = limiter.check(current_token(), endpoint_class)
+                if wait:
+                    retry_after = max(1, math.ceil(wait))
+                    response = jsonify({
+                        "error": f"Rate limit exceeded for {endpoint_class} requests",
+                        "retry_after": retry_after,
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_rate_limiter(app):
+    """
+    Attach a RateLimiter to `app` as app.extensions['rate_limiter']
+
+    RATE_LIMIT_BACKEND selects 'memory' (per process), 'sqlite' (shared
+    through RATE_LIMIT_PATH) or 'none'.
+
+    Returns:
+        RateLimiter or None
+    """
+    backend = app.config['RATE_LIMIT_BACKEND']
+    if backend == 'none':
+        return None
+    if backend == 'sqlite':
+        path = app.config['RATE_LIMIT_PATH'] or \
+            os.path.join(tempfile.gettempdir(), 'wifi-analyzer-ratelimit.db')
+        store = SqliteBuckets(path)
+    else:
+        store = MemoryBuckets()
+    defaults = {}
+    for endpoint_class in LIMITED_CLASSES:
+        limit = parse_rate_limit(app.config[f'RATE_LIMIT_{endpoint_class.upper()}'])
+        if limit is not None:
+            defaults[endpoint_class] = limit
+    limiter = RateLimiter(store, defaults)
+    app.extensions['rate_limiter'] = limiter
+    return limiter
@@ -0,0 +1,339 @@
+"""
+Response Cache
+Bounded LRU/TTL cache for the hot read endpoints
+
+Cached responses are keyed by path and query string and carry tags naming
+the data they were built from ('networks' for any network listing,
+'network:<id>' for one network, 'audits', 'audit:<id>'). Every tag has a
+version; an entry remembers the versions it was built under and is stale
+as soon as any of them moved. The scan-save and audit-write paths bump
+exactly the tags they touched after their commit, so a scan invalidates
+network listings and the networks it rewrote, while audit details and the
+other networks stay cached until their TTL runs out.
+
+Views pass the tables they read: the entry then also records their write
+counters (the values a table ETag, services/etags.py, hashes), read once
+per request, and only a match is a hit. A cached body can therefore
+never be served under an ETag of newer data, whichever process committed
+the write and even before its invalidate() ran.
+
+The 'memory' store is a per-process OrderedDict LRU. Its tag versions
+only see the invalidations of its own process, but every cached view also
+checks the table write counters in the database, so a write by another
+gunicorn worker still makes its entries stale. The 'sqlite' store keeps
+entries and tag versions in a SQLite file shared by the processes of one
+host, so the workers also share their entries; it stands in for an
+external cache such as Redis or memcached.
+"""
+import collections
+import functools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app, g, has_app_context, request
+
+# Response headers stored with a cached body
+CACHED_HEADERS = ('Content-Type', 'X-Next-Cursor')
+
+
+class MemoryStore:
+    """Process-local LRU of cache entries plus the tag versions"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The (expires, tags, versions, value) entry of `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def versions(self, tags):
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteStore:
+    """
+    Cache entries and tag versions in a SQLite file shared between
+    processes
+
+    Recency is tracked with a last-used time that a hit refreshes at most
+    once per second, so reads rarely write.
+    """
+
+    def __init__(self, path, max_entries=1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entry ("
+                         "key TEXT PRIMARY KEY, expires REAL, tags TEXT, "
+                         "body BLOB, headers TEXT, used REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entry_used ON cache_entry (used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_version ("
+                         "tag TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute("SELECT expires, tags, body, headers, used FROM cache_entry "
+                           "WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        expires, tags, body, headers, used = row
+        now = time.time()
+        if now - used >= 1:
+            conn.execute("UPDATE cache_entry SET used = ? WHERE key = ?", (now, key))
+        tags, versions = json.loads(tags)
+        return expires, tuple(tags), tuple(versions), (bytes(body), json.loads(headers))
+
+    def set(self, key, entry):
+        expires, tags, versions, (body, headers) = entry
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO cache_entry VALUES (?, ?, ?, ?, ?, ?)",
+                     (key, expires, json.dumps([tags, versions]), body,
+                      json.dumps(headers), time.time()))
+        excess = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM cache_entry WHERE key IN "
+                         "(SELECT key FROM cache_entry ORDER BY used LIMIT ?)", (excess,))
+            self.evictions += excess
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+
+    def versions(self, tags):
+        found = dict(self._connect().execute(
+            f"SELECT tag, version FROM cache_version WHERE tag IN ({','.join('?' * len(tags))})",
+            tuple(tags)).fetchall()) if tags else {}
+        return tuple(found.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        self._connect().executemany(
+            "INSERT INTO cache_version VALUES (?, 1) "
+            "ON CONFLICT(tag) DO UPDATE SET version = version + 1", [(t,) for t in tags])
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache_entry")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+
+class ResponseCache:
+    """Tag-versioned TTL cache of response bodies with hit/miss counters"""
+
+    def __init__(self, store, ttl=30):
+        """
+        Args:
+            store: MemoryStore or SqliteStore
+            ttl: Seconds an entry is served at most
+        """
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def get(self, key, tags, table_versions=()):
+        """
+        The cached value of `key`, or None when missing, expired or built
+        under an older version of one of its tags or other table versions
+        """
+        entry = self.store.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, _, versions, value = entry
+        if expires <= time.time():
+            self.expired += 1
+        elif versions != self.store.versions(tags) + tuple(table_versions):
+            self.stale += 1
+        else:
+            self.hits += 1
+            return value
+        self.misses += 1
+        self.store.delete(key)
+        return None
+
+    def versions(self, tags):
+        """Current versions of `tags`; read them before building a value"""
+        return self.store.versions(tags)
+
+    def set(self, key, tags, versions, value):
+        """Store `value` as built under `versions` of `tags`"""
+        self.store.set(key, (time.time() + self.ttl, tuple(tags), tuple(versions), value))
+
+    def invalidate(self, tags):
+        """Make every entry tagged with any of `tags` stale"""
+        tags = list(tags)
+        if tags:
+            self.store.bump(tags)
+            self.invalidations += 1
+
+    def clear(self):
+        self.store.clear()
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.store).__name__,
+            "entries": len(self.store),
+            "max_entries": self.store.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "stale": self.stale,
+            "evictions": self.store.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def current_cache():
+    """The app's ResponseCache, or None outside an app or when disabled"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('response_cache')
+
+
+def invalidate(*tags):
+    """Bump `tags` in the app's cache, if any (call after the commit)"""
+    cache = current_cache()
+    if cache is not None:
+        cache.invalidate(tags)
+
+
+def request_table_versions(tables):
+    """
+    Write counters of `tables` (stats_service.table_versions), read once
+    per request so the ETag and the cache check see the same values
+    """
+    from models import db
+    from services.stats_service import table_versions
+    tables = tuple(tables)
+    found = g.setdefault('table_versions', {})
+    if tables not in found:
+        found[tables] = table_versions(db, tables)
+    return found[tables]
+
+
+def request_key():
+    """Cache key of the current request: path plus sorted query string"""
+    args = sorted(request.args.items(multi=True))
+    return request.path + '?' + '&'.join(f'{k}={v}' for k, v in args)
+
+
+def cached_response(*tags, tables=()):
+    """
+    Serve a GET view from the response cache
+
+    Args:
+        tags: Tags of the response; '{name}' is filled in from the view
+            arguments (e.g. 'network:{network_id}')
+        tables: Tables whose write counters the entry must match (those
+            of the view's conditional_get)
+
+    Only 200 responses are stored. Responses carry an X-Cache header
+    (HIT or MISS).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_cache()
+            if cache is None:
+                return view(*args, **kwargs)
+            entry_tags = tuple(tag.format(**kwargs) for tag in tags)
+            key = request_key()
+            current = request_table_versions(tables) if tables else ()
+            value = cache.get(key, entry_tags, current)
+            if value is not None:
+                body, headers = value
+                response = current_app.response_class(body, headers=headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            # A write committing while the view runs leaves the entry stale
+            versions = cache.versions(entry_tags) + current
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+                cache.set(key, entry_tags, versions, (response.get_data(), headers))
+                response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def init_response_cache(app):
+    """
+    Attach a ResponseCache to `app` as app.extensions['response_cache']
+
+    CACHE_BACKEND selects 'memory' (per process), 'sqlite' (shared through
+    CACHE_PATH) or 'none'.
+
+    Returns:
+        ResponseCache or None
+    """
+    backend = app.config['CACHE_BACKEND']
+    if backend == 'none':
+        return None
+    max_entries = app.config['CACHE_MAX_ENTRIES']
+    if backend == 'sqlite':
+        path = app.config['CACHE_PATH'] or \
+            os.path.join(tempfile.gettempdir(), 'wifi-analyzer-cache.db')
+        store = SqliteStore(path, max_entries)
+    else:
+        store = MemoryStore(max_entries)
+    cache = ResponseCache(store, ttl=app.config['CACHE_TTL'])
+    app.extensions['response_cache'] = cache
+    return cache
@@ -0,0 +1,424 @@
+"""
+Rogue AP Detector
+Cross-network evil-twin checks over an in-memory SSID index
+
+Networks are grouped by normalized SSID (an SSID -> {BSSID: state} index
+plus a BSSID -> SSID reverse map). Within a group an access point is
+flagged when:
+
+- encryption_mismatch: its security class (open, wep, wpa, wpa2, wpa3)
+  differs from the one the group's other access points agree on
+- vendor_mismatch: its vendor (resolved through an OUI prefix trie, or the
+  raw OUI when no registry is loaded) differs from the group's vendor, or
+  its BSSID is locally administered while the others are not
+- signal_outlier: it is ROGUE_SIGNAL_MARGIN dB louder than the group median
+- channel_change: a known BSSID reappeared on another channel (cloned
+  BSSID)
+
+The index is built from the network table and then maintained from the
+rows each scan writes, so a scan only re-checks the SSID groups it
+touched. It remembers the network table version it reflects: a write
+that moves the version by one is applied incrementally, while a larger
+jump means another process (gunicorn worker) wrote networks in between,
+and the index is rebuilt on next use.
+"""
+import collections
+import re
+import statistics
+import threading
+import unicodedata
+from sqlalchemy import select
+
+ENCRYPTION_MISMATCH = 'encryption_mismatch'
+VENDOR_MISMATCH = 'vendor_mismatch'
+SIGNAL_OUTLIER = 'signal_outlier'
+CHANNEL_CHANGE = 'channel_change'
+
+SECURITY_RANK = {"open": 0, "wep": 1, "wpa": 2, "wpa2": 3, "wpa3": 4}
+
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+_HEX = re.compile(r'[^0-9A-F]')
+_MANUF_LINE = re.compile(r'^([0-9A-Fa-f]{2}(?:[:\-.]?[0-9A-Fa-f]{2}){2,5})(?:/(\d+))?\s+(.+)$')
+_IEEE_LINE = re.compile(r'^([0-9A-Fa-f]{2}-[0-9A-Fa-f]{2}-[0-9A-Fa-f]{2})\s+\(hex\)\s+(.+)$')
+
+
+def normalize_ssid(ssid):
+    """
+    Grouping key of an SSID: NFKC-folded, case-folded, without zero-width
+    characters or surrounding whitespace (None for hidden networks)
+    """
+    if not ssid:
+        return None
+    key = unicodedata.normalize('NFKC', ssid).translate(_INVISIBLE).strip().casefold()
+    if not key or key == 'hidden network':
+        return None
+    return key
+
+
+def security_class(encryption):
+    """Map an encryption string to open, wep, wpa, wpa2, wpa3 or None"""
+    value = (encryption or '').upper()
+    if 'WPA3' in value or 'SAE' in value:
+        return 'wpa3'
+    if 'WPA2' in value or 'RSN' in value:
+        return 'wpa2'
+    if 'WPA' in value:
+        return 'wpa'
+    if 'WEP' in value:
+        return 'wep'
+    if not value or 'OPEN' in value or value == 'NONE':
+        return 'open'
+    return None
+
+
+def locally_administered(bssid):
+    """True if the BSSID has the locally administered bit set"""
+    try:
+        return bool(int(bssid[:2], 16) & 0x02)
+    except (TypeError, ValueError):
+        return False
+
+
+class OuiTrie:
+    """
+    Longest-prefix vendor lookup over BSSID nibbles
+
+    Handles the 24-bit OUI as well as the 28/36-bit MA-M/MA-S blocks of
+    the registries.
+    """
+
+    def __init__(self):
+        self._root = {}
+        self.size = 0
+
+    def insert(self, prefix, vendor, bits=None):
+        """
+        Args:
+            prefix: Hex prefix in any common notation (00:1B:C5, 00-1B-C5, 001BC5)
+            vendor: Vendor name
+            bits: Prefix length in bits (default: all given digits)
+        """
+        digits = _HEX.sub('', prefix.upper())
+        if bits:
+            digits = digits[:int(bits) // 4]
+        node = self._root
+        for digit in digits:
+            node = node.setdefault(digit, {})
+        if None not in node:
+            self.size += 1
+        node[None] = vendor
+
+    def lookup(self, bssid):
+        """Vendor of the longest matching prefix, or None"""
+        node = self._root
+        vendor = None
+        for digit in _HEX.sub('', (bssid or '').upper()):
+            node = node.get(digit)
+            if node is None:
+                break
+            vendor = node.get(None, vendor)
+        return vendor
+
+    @classmethod
+    def load(cls, path):
+        """
+        Build a trie from a Wireshark `manuf` file or the IEEE oui.txt
+
+        Lines that match neither format are ignored.
+        """
+        trie = cls()
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                match = _IEEE_LINE.match(line)
+                if match:
+                    trie.insert(match.group(1), match.group(2).strip())
+                    continue
+                match = _MANUF_LINE.match(line)
+                if match:
+                    vendor = match.group(3).split('\t')[-1].strip()
+                    trie.insert(match.group(1), vendor, match.group(2))
+        return trie
+
+
+class AccessPoint:
+    """Indexed state of one BSSID"""
+
+    __slots__ = ('bssid', 'ssid', 'key', 'security', 'channel', 'signal', 'vendor', 'local')
+
+    def __init__(self, network, key, vendor):
+        self.bssid = network["bssid"]
+        self.ssid = network.get("ssid")
+        self.key = key
+        self.security = security_class(network.get("encryption"))
+        self.channel = network.get("channel")
+        self.signal = network.get("signal")
+        self.vendor = vendor
+        self.local = locally_administered(self.bssid)
+
+
+def _consensus(values):
+    """The value most group members share, or None without a clear majority"""
+    counts = collections.Counter(v for v in values if v is not None)
+    if len(counts) < 2:
+        return None
+    (top, top_count), (_, second) = counts.most_common(2)
+    return top if top_count > second else None
+
+
+class RogueDetector:
+    """Incrementally maintained SSID index with evil-twin checks"""
+
+    def __init__(self, oui_trie=None, signal_margin=20):
+        """
+        Args:
+            oui_trie: OuiTrie resolving vendors (default: compare raw OUIs)
+            signal_margin: dB above the group median that makes an AP an
+                outlier
+        """
+        self.oui_trie = oui_trie
+        self.signal_margin = signal_margin
+        self.groups = {}     # ssid key -> {bssid: AccessPoint}
+        self.by_bssid = {}   # bssid -> AccessPoint
+        self.findings = {}   # bssid -> finding dictionary
+        self.loaded = False
+        self.version = None  # network table version the index reflects
+        self._moved = {}     # bssid -> (old channel, new channel), until checked
+        self._lock = threading.Lock()
+
+    def vendor(self, bssid):
+        if self.oui_trie is not None:
+            found = self.oui_trie.lookup(bssid)
+            if found:
+                return found
+        return (bssid or '')[:8].upper() or None
+
+    def load(self, db, version=None):
+        """
+        (Re)build the index from the network table
+
+        Args:
+            db: SQLAlchemy database instance
+            version: Network table version the rows reflect (default: read it)
+        """
+        from models import Network
+        table = Network.__table__
+        with self._lock:
+            if version is None:
+                version = network_version(db)
+            if self.loaded and version == self.version:
+                return
+            self.groups, self.by_bssid, self.findings, self._moved = {}, {}, {}, {}
+            rows = db.session.execute(select(
+                table.c.bssid, table.c.ssid, table.c.channel, table.c.signal, table.c.encryption
+            ).execution_options(yield_per=10000))
+            for row in rows:
+                self._index(row._asdict())
+            self._check(set(self.groups))
+            self._moved.clear()
+            self.version = version
+            self.loaded = True
+
+    def refresh(self, db):
+        """Rebuild the index if the network table moved past its version"""
+        version = network_version(db)
+        if version != self.version:
+            self.load(db, version)
+
+    def _index(self, network):
+        """Insert or move one network; returns the group keys it touched"""
+        bssid = network["bssid"]
+        key = normalize_ssid(network.get("ssid"))
+        old = self.by_bssid.get(bssid)
+        touched = set()
+        if old is not None:
+            if old.channel is not None and network.get("channel") is not None and \
+                    old.channel != network.get("channel"):
+                self._moved[bssid] = (old.channel, network.get("channel"))
+            if old.key is not None:
+                group = self.groups.get(old.key)
+                if group is not None:
+                    group.pop(bssid, None)
+                    if not group:
+                        del self.groups[old.key]
+                touched.add(old.key)
+        ap = AccessPoint(network, key, self.vendor(bssid))
+        self.by_bssid[bssid] = ap
+        if key is not None:
+            self.groups.setdefault(key, {})[bssid] = ap
+            touched.add(key)
+        if key is None or old is None or old.key != key:
+            self.findings.pop(bssid, None)
+        return touched
+
+    def _check_group(self, key):
+        group = self.groups.get(key, {})
+        for bssid in group:
+            self.findings.pop(bssid, None)
+        aps = list(group.values())
+
+        flagged = collections.defaultdict(list)
+        if len(aps) >= 2:
+            security = _consensus(ap.security for ap in aps)
+            if security is None:
+                classes = {ap.security for ap in aps if ap.security}
+                if len(classes) > 1:
+                    # No majority: the weaker variants are the suspects
+                    security = max(classes, key=SECURITY_RANK.get)
+            for ap in aps:
+                if security and ap.security and ap.security != security:
+                    flagged[ap.bssid].append(
+                        (ENCRYPTION_MISMATCH, f"{ap.security} while the SSID uses {security}"))
+
+            vendor = _consensus(ap.vendor for ap in aps)
+            local = _consensus(ap.local for ap in aps)
+            for ap in aps:
+                if vendor and ap.vendor != vendor:
+                    flagged[ap.bssid].append(
+                        (VENDOR_MISMATCH, f"vendor {ap.vendor} while the SSID uses {vendor}"))
+                elif local is False and ap.local:
+                    flagged[ap.bssid].append(
+                        (VENDOR_MISMATCH, "locally administered BSSID"))
+
+            signals = [ap.signal for ap in aps if ap.signal is not None]
+            if len(signals) >= 3:
+                median = statistics.median(signals)
+                for ap in aps:
+                    if ap.signal is not None and ap.signal - median >= self.signal_margin:
+                        flagged[ap.bssid].append(
+                            (SIGNAL_OUTLIER, f"{ap.signal} dBm vs group median {median:g} dBm"))
+
+        for ap in aps:
+            moved = self._moved.pop(ap.bssid, None)
+            if moved:
+                flagged[ap.bssid].append(
+                    (CHANNEL_CHANGE, f"moved from channel {moved[0]} to {moved[1]}"))
+
+        for bssid, reasons in flagged.items():
+            ap = group[bssid]
+            self.findings[bssid] = {
+                "bssid": bssid,
+                "ssid": ap.ssid,
+                "kinds": [kind for kind, _ in reasons],
+                "details": [detail for _, detail in reasons],
+                "group_size": len(aps),
+            }
+        return [self.findings[b] for b in flagged]
+
+    def _check(self, keys):
+        found = []
+        for key in keys:
+            found.extend(self._check_group(key))
+        return found
+
+    def observe(self, networks, version=None):
+        """
+        Update the index with written networks and re-check their groups
+
+        Args:
+            networks: Network dictionaries (bssid, ssid, channel, signal,
+                encryption) as stored
+            version: Network table version of the write (see
+                write_version); advances the index version when it
+                directly follows it
+
+        Returns:
+            list: Findings of the touched groups that are new or changed
+        """
+        with self._lock:
+            before = {}
+            touched = set()
+            for network in networks:
+                for key in self._index(network):
+                    touched.add(key)
+            for key in touched:
+                for bssid in self.groups.get(key, {}):
+                    before[bssid] = self.findings.get(bssid)
+            self._moved = {b: m for b, m in self._moved.items()
+                           if self.by_bssid[b].key is not None}
+            found = self._check(touched)
+            if version is not None and self.version is not None and version == self.version + 1:
+                self.version = version
+            return [f for f in found if before.get(f["bssid"]) != f]
+
+    def report(self, ssid=None, kinds=None):
+        """
+        Current findings
+
+        Args:
+            ssid: Only this SSID (matched normalized)
+            kinds: Only findings with any of these kinds
+
+        Returns:
+            list: Finding dictionaries sorted by SSID and BSSID
+        """
+        with self._lock:
+            findings = list(self.findings.values())
+        if ssid is not None:
+            key = normalize_ssid(ssid)
+            findings = [f for f in findings if normalize_ssid(f["ssid"]) == key]
+        if kinds:
+            findings = [f for f in findings if set(kinds) & set(f["kinds"])]
+        return sorted(findings, key=lambda f: (normalize_ssid(f["ssid"]) or '', f["bssid"]))
+
+
+def network_version(db):
+    """Current write counter of the network table"""
+    from services.stats_service import table_versions
+    return table_versions(db, ('network',))[0]
+
+
+def _app_detector():
+    from flask import current_app, has_app_context
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('rogue_detector')
+
+
+def current_detector(db, refresh=True):
+    """
+    The app's RogueDetector, or None if disabled
+
+    Args:
+        db: SQLAlchemy database instance
+        refresh: Rebuild the index when other processes wrote networks
+            since it was last updated (False: only load it on first use,
+            for the write path that is about to observe its own rows)
+    """
+    detector = _app_detector()
+    if detector is None:
+        return None
+    if refresh:
+        detector.refresh(db)
+    elif not detector.loaded:
+        detector.load(db)
+    return detector
+
+
+def write_version(db):
+    """
+    Network table version of the write in progress, read inside its
+    transaction after the version bump; None when detection is disabled
+    """
+    if _app_detector() is None:
+        return None
+    return network_version(db)
+
+
+def init_rogue_detector(app):
+    """
+    Attach a RogueDetector to `app` as app.extensions['rogue_detector']
+    when ROGUE_DETECTION is enabled
+
+    Returns:
+        RogueDetector or None
+    """
+    if not app.config['ROGUE_DETECTION']:
+        return None
+    path = app.config['OUI_FILE']
+    detector = RogueDetector(OuiTrie.load(path) if path else None,
+                             signal_margin=app.config['ROGUE_SIGNAL_MARGIN'])
+    app.extensions['rogue_detector'] = detector
+    return detector
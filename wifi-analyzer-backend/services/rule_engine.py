@@ -0,0 +1,312 @@
+"""
+Audit Rule Engine
+Declarative security rules (JSON or YAML) compiled into per-field
+dispatch tables
+
+A rule fires when all of its `when` conditions hold. At compile time every
+distinct condition gets a bit, grouped by the network field it reads. When
+a network is evaluated, each field value is looked up in a per-field cache
+mapping value -> bitmask of the conditions it satisfies, so the cost per
+network is one dict lookup per field regardless of the number of rules.
+The OR of those masks identifies the outcome (fired rules, risk level,
+details), which is computed once per distinct mask and reused.
+"""
+import functools
+import json
+import os
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules', 'default.json'
+)
+
+# Severity -> rank; the audit risk level is the highest severity that fired
+SEVERITIES = {"info": 0, "low": 1, "medium": 2, "high": 3}
+RISK_BY_RANK = {0: "low", 1: "low", 2: "medium", 3: "high"}
+
+# Fields rules may test; see network_fields()
+FIELDS = (
+    "ssid", "bssid", "channel", "signal", "encryption",
+    "oui", "hidden", "band", "ssid_encryptions",
+)
+
+# Value-mask caches are reset beyond this many distinct values per field
+MASK_CACHE_SIZE = 10000
+
+
+def _compare(fn):
+    def check(value, expected):
+        return value is not None and fn(value, expected)
+    return check
+
+
+OPERATORS = {
+    "eq": lambda value, expected: value == expected,
+    "ne": lambda value, expected: value != expected,
+    "in": lambda value, expected: value in expected,
+    "not_in": lambda value, expected: value not in expected,
+    "contains": _compare(lambda value, expected: expected in value),
+    "not_contains": lambda value, expected: value is None or expected not in value,
+    "prefix": _compare(lambda value, expected: value.startswith(expected)),
+    "lt": _compare(lambda value, expected: value < expected),
+    "le": _compare(lambda value, expected: value <= expected),
+    "gt": _compare(lambda value, expected: value > expected),
+    "ge": _compare(lambda value, expected: value >= expected),
+}
+
+
+class RuleError(ValueError):
+    """Raised for invalid rule files"""
+
+
+def _normalize(value):
+    """Rules and field values compare strings case-insensitively"""
+    if isinstance(value, str):
+        return value.lower()
+    if isinstance(value, list):
+        return frozenset(_normalize(v) for v in value)
+    return value
+
+
+def _get(network, name):
+    if isinstance(network, dict):
+        return network.get(name)
+    return getattr(network, name, None)
+
+
+def network_fields(network, context=None):
+    """
+    Derive the rule fields of a network
+
+    Args:
+        network: Network model object or dictionary
+        context: Optional {lowercase ssid: number of distinct encryptions
+            advertised under that SSID}, see build_context()
+
+    Returns:
+        dict: Field name -> normalized value
+    """
+    ssid = _normalize(_get(network, "ssid"))
+    bssid = _normalize(_get(network, "bssid"))
+    channel = _get(network, "channel")
+    hidden = not ssid or ssid == "hidden network"
+    if channel and 1 <= channel <= 14:
+        band = "2.4"
+    elif channel and channel >= 32:
+        band = "5"
+    else:
+        band = None
+    return {
+        "ssid": ssid,
+        "bssid": bssid,
+        "channel": channel,
+        "signal": _get(network, "signal"),
+        "encryption": _normalize(_get(network, "encryption")),
+        "oui": bssid[:8] if bssid else None,
+        "hidden": hidden,
+        "band": band,
+        "ssid_encryptions": (context or {}).get(ssid, 1) if not hidden else 1,
+    }
+
+
+def build_context(networks):
+    """
+    Count the distinct encryptions advertised under each SSID
+
+    Args:
+        networks: Iterable of network objects or dictionaries
+
+    Returns:
+        dict: {lowercase ssid: count}, only SSIDs with more than one
+    """
+    seen = {}
+    for network in networks:
+        ssid = _normalize(_get(network, "ssid"))
+        if ssid:
+            seen.setdefault(ssid, set()).add(_normalize(_get(network, "encryption")))
+    return {ssid: len(encryptions) for ssid, encryptions in seen.items() if len(encryptions) > 1}
+
+
+class Outcome:
+    """Result of the rules fired by one combination of conditions"""
+
+    _SIGNAL = "\x00signal\x00"
+
+    def __init__(self, rules, flag_names):
+        self.rules = rules
+        rank = max((SEVERITIES[r["severity"]] for r in rules), default=0)
+        self.risk_level = RISK_BY_RANK[rank]
+        flags = dict.fromkeys(flag_names, False)
+        for rule in rules:
+            for flag in rule["flags"]:
+                flags[flag] = True
+        self.flags = flags
+        self.details = [r["message"] for r in rules]
+        self.findings = [r["id"] for r in rules]
+        # JSON text around the signal value, so batch audits only format
+        # one number per network
+        text = json.dumps(self.result(self._SIGNAL))
+        self.json_prefix, self.json_suffix = text.split(json.dumps(self._SIGNAL))
+
+    def result(self, signal):
+        result = dict(self.flags)
+        result["signal_strength"] = signal
+        result["risk_level"] = self.risk_level
+        result["details"] = list(self.details)
+        result["findings"] = list(self.findings)
+        return result
+
+    def result_json(self, signal):
+        return self.json_prefix + json.dumps(signal) + self.json_suffix
+
+
+class RuleSet:
+    """A compiled, versioned set of audit rules"""
+
+    def __init__(self, version, rules):
+        """
+        Args:
+            version: Rule set version stored on every audit it produces
+            rules: List of rule dictionaries (id, severity, message, when,
+                optional flags)
+        """
+        if not version:
+            raise RuleError("Rule set version is required")
+        self.version = str(version)
+        self.rules = []
+        self.flag_names = []
+        self._conditions = {}  # field -> [(bit, operator, value)]
+        self._masks = {}       # field -> {value: bitmask}
+        self._outcomes = {}    # condition bitmask -> Outcome
+        bits = {}
+
+        ids = set()
+        for rule in rules:
+            rule_id = rule.get("id")
+            if not rule_id or rule_id in ids:
+                raise RuleError(f"Rule ids must be present and unique: {rule_id!r}")
+            ids.add(rule_id)
+            severity = rule.get("severity", "medium")
+            if severity not in SEVERITIES:
+                raise RuleError(f"{rule_id}: severity must be one of {', '.join(SEVERITIES)}")
+            conditions = rule.get("when")
+            if not conditions:
+                raise RuleError(f"{rule_id}: at least one condition is required")
+
+            mask = 0
+            for condition in conditions:
+                field, op = condition.get("field"), condition.get("op", "eq")
+                if field not in FIELDS:
+                    raise RuleError(f"{rule_id}: unknown field {field!r}")
+                if op not in OPERATORS:
+                    raise RuleError(f"{rule_id}: unknown operator {op!r}")
+                value = _normalize(condition.get("value"))
+                if op in ("in", "not_in") and not isinstance(value, frozenset):
+                    raise RuleError(f"{rule_id}: {op} needs a list value")
+                key = (field, op, value)
+                if key not in bits:
+                    bits[key] = 1 << len(bits)
+                    self._conditions.setdefault(field, []).append(
+                        (bits[key], OPERATORS[op], value))
+                mask |= bits[key]
+
+            flags = list(rule.get("flags", []))
+            for flag in flags:
+                if flag not in self.flag_names:
+                    self.flag_names.append(flag)
+            self.rules.append({
+                "id": rule_id,
+                "severity": severity,
+                "message": rule.get("message", rule_id),
+                "flags": flags,
+                "mask": mask,
+            })
+
+        self.fields = tuple(self._conditions)
+        for field in self.fields:
+            self._masks[field] = {}
+
+    def condition_mask(self, fields):
+        """Bitmask of the conditions satisfied by derived network fields"""
+        mask = 0
+        for field in self.fields:
+            value = fields[field]
+            cache = self._masks[field]
+            try:
+                mask |= cache[value]
+            except KeyError:
+                value_mask = 0
+                for bit, check, expected in self._conditions[field]:
+                    try:
+                        if check(value, expected):
+                            value_mask |= bit
+                    except TypeError:
+                        pass  # e.g. comparing a string field to a number
+                if len(cache) >= MASK_CACHE_SIZE:
+                    cache.clear()
+                cache[value] = value_mask
+                mask |= value_mask
+        return mask
+
+    def outcome(self, network, context=None):
+        """Evaluate a network and return its (cached) Outcome"""
+        mask = self.condition_mask(network_fields(network, context))
+        outcome = self._outcomes.get(mask)
+        if outcome is None:
+            fired = [r for r in self.rules if r["mask"] & mask == r["mask"]]
+            outcome = self._outcomes[mask] = Outcome(fired, self.flag_names)
+        return outcome
+
+    def evaluate(self, network, context=None):
+        """
+        Audit one network
+
+        Returns:
+            dict: Flags (e.g. open_network, weak_cipher), signal_strength,
+            risk_level, details (messages) and findings (rule ids)
+        """
+        return self.outcome(network, context).result(_get(network, "signal"))
+
+
+def load_rule_set(path=None):
+    """
+    Load and compile a rule file
+
+    Args:
+        path: .json, .yaml or .yml file (default: rules/default.json)
+
+    Returns:
+        RuleSet
+    """
+    path = path or DEFAULT_RULES_PATH
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuleError("PyYAML is required for YAML rule files")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise RuleError(f"{path}: expected an object with a 'rules' list")
+    return RuleSet(data.get("version"), data["rules"])
+
+
+@functools.lru_cache(maxsize=1)
+def default_rule_set():
+    """The bundled rule set, compiled once per process"""
+    return load_rule_set(DEFAULT_RULES_PATH)
+
+
+def init_audit_rules(app):
+    """
+    Compile the AUDIT_RULES file once and attach it as
+    app.extensions['audit_rules']
+
+    Returns:
+        RuleSet
+    """
+    path = app.config.get('AUDIT_RULES')
+    rules = load_rule_set(path) if path else default_rule_set()
+    app.extensions['audit_rules'] = rules
+    return rules
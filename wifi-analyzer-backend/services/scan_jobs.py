@@ -0,0 +1,348 @@
+"""
+Scan Job Service
+Runs WiFi scans and capture imports in a bounded background thread pool
+so that POST /api/networks/scan and /api/networks/ingest return
+immediately
+
+Jobs run in the process that accepted them. Their state is also written
+to the scan_job table on every status change, so with several worker
+processes a job can be polled through whichever worker answers.
+"""
+import datetime
+import json
+import logging
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class ScanQueueFull(Exception):
+    """Raised when a new scan would exceed the scan queue capacity"""
+
+    def __init__(self, retry_after):
+        super().__init__("Scan queue is full")
+        self.retry_after = retry_after
+
+
+def _iso(value):
+    return value.isoformat() + "Z" if value else None
+
+
+class ScanJob:
+    """State of one background scan"""
+
+    def __init__(self, interface, run_fn=None):
+        self.id = str(uuid.uuid4())
+        self.interface = interface
+        self.run_fn = run_fn
+        self.summary = None
+        self.status = QUEUED
+        self.created_at = datetime.datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.networks = None
+        self.error = None
+        self.exception = None  # what a failed job raised
+        self.done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self, include_networks=True):
+        data = {
+            "job_id": self.id,
+            "interface": self.interface,
+            "status": self.status,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+        }
+        if self.status == COMPLETED:
+            data["found"] = len(self.networks)
+            if include_networks:
+                data["networks"] = self.networks
+        if self.summary:
+            data["summary"] = self.summary
+        if self.error:
+            data["error"] = self.error
+        return data
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild a job stored by another process from its scan_job row"""
+        job = cls(record.interface)
+        job.id = record.id
+        job.status = record.status
+        job.created_at = record.created_at
+        job.started_at = record.started_at
+        job.finished_at = record.finished_at
+        job.error = record.error
+        job.summary = json.loads(record.summary_json) if record.summary_json else None
+        job.networks = json.loads(record.networks_json) if record.networks_json else None
+        if job.finished:
+            job.done.set()
+        return job
+
+
+class JobStore:
+    """
+    Shared scan job state in the scan_job table
+
+    Each status change replaces the job's row; finished rows beyond the
+    `history` most recent jobs are deleted.
+    """
+
+    def __init__(self, app, history=100):
+        self.app = app
+        self.history = history
+
+    def save(self, job):
+        from models import db, ScanJobRecord
+        from services.db_tuning import write_engine
+        table = ScanJobRecord.__table__
+        row = {
+            "interface": job.interface,
+            "status": job.status,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "error": job.error,
+            "summary_json": json.dumps(job.summary) if job.summary else None,
+            "networks_json": json.dumps(job.networks) if job.status == COMPLETED else None,
+        }
+        with self.app.app_context(), write_engine(db.engine).begin() as conn:
+            if not conn.execute(table.update().where(table.c.id == job.id), row).rowcount:
+                conn.execute(table.insert(), dict(row, id=job.id))
+            if job.finished:
+                recent = select(table.c.id).order_by(table.c.created_at.desc()).limit(self.history)
+                conn.execute(table.delete().where(
+                    table.c.finished_at.isnot(None), table.c.id.notin_(recent.scalar_subquery())
+                ))
+
+    def load(self, job_id):
+        """Job `job_id` as last stored by any process, or None"""
+        from models import db, ScanJobRecord
+        with self.app.app_context(), db.engine.connect() as conn:
+            record = conn.execute(
+                select(ScanJobRecord.__table__).where(ScanJobRecord.__table__.c.id == job_id)
+            ).first()
+        return ScanJob.from_record(record) if record else None
+
+
+class ScanJobManager:
+    """
+    Queue scans on a bounded executor and track their results
+
+    At most one job is in flight per interface: a scan requested while
+    another one for the same interface is queued or running is coalesced
+    into it, so concurrent requests share a single radio scan.
+
+    Admission control: with max_pending set, a request that would add a
+    new job while max_pending jobs are already queued or running is
+    rejected with ScanQueueFull, carrying an estimate of when a slot frees
+    up (from the average job duration), instead of growing the backlog.
+    """
+
+    def __init__(self, app, scan_fn, save_fn, max_workers=2, history=100, max_pending=None,
+                 store=None):
+        """
+        Args:
+            app: Flask app; jobs run inside its application context
+            scan_fn: Callable(interface) returning network dictionaries
+            save_fn: Callable(networks, scan_id, interface) persisting
+                them and returning the saved network dictionaries
+            max_workers: Number of scans that may run concurrently
+            history: Number of finished jobs kept for status lookups
+            max_pending: Maximum number of queued and running jobs
+                (None for no limit)
+            store: Optional JobStore sharing job state with other processes
+        """
+        self.app = app
+        self.scan_fn = scan_fn
+        self.save_fn = save_fn
+        self.history = history
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.store = store
+        self.admitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.peak_pending = 0
+        self._avg_seconds = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='scan-job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._active = {}  # interface -> in-flight job
+
+    def submit(self, interface=None, run_fn=None, admission=True):
+        """
+        Queue a scan of `interface` (None for the default interface)
+
+        Args:
+            interface: Interface name; also the coalescing key
+            run_fn: Optional callable(job) returning (saved networks,
+                summary dict) that replaces the scan + save steps, used
+                for capture imports
+            admission: Apply the max_pending limit (the scheduler, whose
+                load is bounded by its interfaces, bypasses it)
+
+        Returns:
+            tuple: (ScanJob, coalesced) where coalesced is True when an
+            in-flight job for the same interface was reused
+
+        Raises:
+            ScanQueueFull: If admission applies and the queue is full
+        """
+        with self._lock:
+            active = self._active.get(interface)
+            if active is not None:
+                self.coalesced += 1
+                return active, True
+            if admission and self.max_pending is not None and \
+                    len(self._active) >= self.max_pending:
+                self.rejected += 1
+                raise ScanQueueFull(self._retry_after())
+            job = ScanJob(interface, run_fn)
+            self._jobs[job.id] = job
+            self._active[interface] = job
+            self.admitted += 1
+            self.peak_pending = max(self.peak_pending, len(self._active))
+            self._trim()
+        self._store(job)
+        self._executor.submit(self._run, job)
+        return job, False
+
+    def get(self, job_id):
+        """Get a job by id, or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def wait(self, job, timeout=None):
+        """Block until `job` finishes; returns False on timeout"""
+        return job.done.wait(timeout)
+
+    def _retry_after(self):
+        """Seconds until a queue slot is likely free (lock held)"""
+        if self._avg_seconds is None:
+            return 1
+        # Jobs ahead that have to finish before a slot frees up, run
+        # max_workers at a time
+        waves = (len(self._active) - self.max_pending) // self.max_workers + 1
+        return max(1, math.ceil(waves * self._avg_seconds))
+
+    def stats(self):
+        """Queue depth and admission counters"""
+        with self._lock:
+            running = sum(1 for job in self._active.values() if job.status == RUNNING)
+            return {
+                "queued": len(self._active) - running,
+                "running": running,
+                "capacity": self.max_pending,
+                "workers": self.max_workers,
+                "peak_pending": self.peak_pending,
+                "admitted": self.admitted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "avg_job_seconds": None if self._avg_seconds is None
+                else round(self._avg_seconds, 3),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _store(self, job):
+        if self.store is None:
+            return
+        try:
+            self.store.save(job)
+        except Exception as e:
+            # Only polling through other workers is affected
+            logger.warning("Could not store scan job %s: %s", job.id, e)
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = datetime.datetime.utcnow()
+        self._store(job)
+        try:
+            with self.app.app_context():
+                if job.run_fn:
+                    job.networks, job.summary = job.run_fn(job)
+                else:
+                    networks = self.scan_fn(job.interface)
+                    job.networks = self.save_fn(networks, job.id, job.interface)
+            job.status = COMPLETED
+        except Exception as e:
+            job.error = str(e)
+            job.exception = e
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.datetime.utcnow()
+            duration = (job.finished_at - job.started_at).total_seconds()
+            with self._lock:
+                self._avg_seconds = duration if self._avg_seconds is None \
+                    else 0.8 * self._avg_seconds + 0.2 * duration
+                if self._active.get(job.interface) is job:
+                    del self._active[job.interface]
+            self._store(job)
+            job.done.set()
+
+
+def init_scan_jobs(app, scan_fn=None):
+    """
+    Attach a ScanJobManager to `app` as app.extensions['scan_jobs']
+
+    With CHANGE_TRACKING enabled scans are saved through the app's
+    ChangeTracker, which only writes what changed since the previous scan
+    of the same interface.
+
+    Args:
+        app: Flask app instance
+        scan_fn: Callable(interface) used instead of the SCAN_BACKEND
+            scanner configured for the app
+
+    Returns:
+        ScanJobManager
+    """
+    from models import db, Network
+    from services.scan_service import save_networks_to_db
+    from services.scanners import create_scanner
+
+    tracker = app.extensions.get('change_tracker') if app.config.get('CHANGE_TRACKING') else None
+
+    def save(networks, scan_id, interface):
+        if tracker is not None:
+            return tracker.save(db, networks, interface, scan_id=scan_id)[0]
+        return save_networks_to_db(db, Network, networks, scan_id=scan_id)
+
+    manager = ScanJobManager(
+        app,
+        scan_fn or create_scanner(app.config),
+        save,
+        max_workers=app.config['SCAN_WORKERS'],
+        history=app.config['SCAN_JOB_HISTORY'],
+        max_pending=app.config['SCAN_QUEUE_SIZE'] or None,
+        store=JobStore(app, history=app.config['SCAN_JOB_HISTORY'])
+    )
+    app.extensions['scan_jobs'] = manager
+    return manager
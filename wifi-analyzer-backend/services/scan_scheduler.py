@@ -0,0 +1,243 @@
+"""
+Scan Scheduler
+Runs scans continuously per interface on an adaptive interval
+
+Each interface has its own loop thread that submits scans through the
+ScanJobManager, so scheduled scans use the configured scanner and the
+normal save path (upsert, observations, stats, live events). After every
+scan the BSSID churn (share of BSSIDs that appeared or disappeared since
+the previous scan) moves the interval: a stable environment backs off
+towards SCAN_MAX_INTERVAL, a burst of changes speeds up towards
+SCAN_MIN_INTERVAL.
+"""
+import datetime
+import threading
+import time
+
+
+def _iso(value):
+    return value.isoformat() + "Z" if value else None
+
+
+def bssid_churn(previous, current):
+    """
+    Share of BSSIDs that changed between two scans
+
+    Args:
+        previous: Set of BSSIDs of the previous scan (None for the first)
+        current: Set of BSSIDs of this scan
+
+    Returns:
+        float: |added| + |removed| over |union| (0.0 to 1.0), None for
+        the first scan
+    """
+    if previous is None:
+        return None
+    union = previous | current
+    if not union:
+        return 0.0
+    return len(previous ^ current) / len(union)
+
+
+class InterfaceState:
+    """Schedule and last-run timings of one interface"""
+
+    def __init__(self, interface, interval):
+        self.interface = interface
+        self.interval = interval
+        self.next_run = None      # monotonic time
+        self.bssids = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+        self.last = None
+        self.thread = None
+
+    def to_dict(self):
+        elapsed = time.monotonic() - self.started
+        next_in = None
+        if self.next_run is not None:
+            next_in = round(max(0.0, self.next_run - time.monotonic()), 3)
+        return {
+            "interface": self.interface,
+            "interval": round(self.interval, 3),
+            "next_run_in": next_in,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "duty_cycle": round(self.busy_seconds / elapsed, 4) if elapsed else 0.0,
+            "last_run": self.last,
+        }
+
+
+class ScanScheduler:
+    """Adaptive periodic scans of one or more interfaces"""
+
+    def __init__(self, jobs, interfaces=(None,), interval=60.0, min_interval=10.0,
+                 max_interval=600.0, churn_low=0.02, churn_high=0.2,
+                 backoff=1.5, speedup=0.5):
+        """
+        Args:
+            jobs: ScanJobManager the scans are submitted to
+            interfaces: Interfaces to scan (None is the default interface)
+            interval: Starting interval in seconds
+            min_interval, max_interval: Bounds of the adaptive interval
+            churn_low: Churn at or below which the interval grows
+            churn_high: Churn at or above which the interval shrinks
+            backoff: Factor applied to the interval when stable
+            speedup: Factor applied to the interval when churning
+        """
+        if not 0 < min_interval <= interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min <= interval <= max")
+        self.jobs = jobs
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.churn_low = churn_low
+        self.churn_high = churn_high
+        self.backoff = backoff
+        self.speedup = speedup
+        self.states = {i: InterfaceState(i, interval) for i in interfaces}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return any(s.thread is not None and s.thread.is_alive() for s in self.states.values())
+
+    def next_interval(self, interval, churn):
+        """Adapt the interval to the churn of the last scan"""
+        if churn is None:
+            return interval
+        if churn >= self.churn_high:
+            interval *= self.speedup
+        elif churn <= self.churn_low:
+            interval *= self.backoff
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def run_once(self, state, timeout=None):
+        """
+        Scan one interface, wait for the result and reschedule it
+
+        A scan already in flight for the interface (e.g. requested through
+        the API) is not duplicated: the run is counted as skipped and its
+        result is used for the churn.
+
+        Returns:
+            dict: The last_run record
+        """
+        job, coalesced = self.jobs.submit(state.interface, admission=False)
+        if coalesced:
+            state.skipped += 1
+        self.jobs.wait(job, timeout)
+
+        record = {
+            "job_id": job.id,
+            "status": job.status,
+            "coalesced": coalesced,
+            "started_at": _iso(job.started_at),
+            "finished_at": _iso(job.finished_at),
+            "queue_seconds": None,
+            "scan_seconds": None,
+            "found": None,
+            "churn": None,
+        }
+        if job.started_at:
+            record["queue_seconds"] = round((job.started_at - job.created_at).total_seconds(), 3)
+        if job.finished_at and job.started_at:
+            duration = (job.finished_at - job.started_at).total_seconds()
+            record["scan_seconds"] = round(duration, 3)
+            if not coalesced:
+                state.busy_seconds += duration
+
+        with self._lock:
+            if job.networks is not None:
+                bssids = {n["bssid"] for n in job.networks}
+                churn = bssid_churn(state.bssids, bssids)
+                state.bssids = bssids
+                state.interval = self.next_interval(state.interval, churn)
+                record["found"] = len(bssids)
+                record["churn"] = None if churn is None else round(churn, 4)
+            else:
+                record["error"] = job.error or "Scan did not finish in time"
+                state.failures += 1
+            if not coalesced:
+                state.runs += 1
+            state.last = record
+        return record
+
+    def _loop(self, state):
+        state.next_run = time.monotonic()
+        while not self._stop.is_set():
+            delay = state.next_run - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            started = time.monotonic()
+            self.run_once(state, timeout=self.max_interval)
+            # Fixed cadence from the start of the run; a scan that outlasts
+            # the interval makes the next one start right away instead of
+            # queueing the ticks it missed
+            state.next_run = max(started + state.interval, time.monotonic())
+
+    def start(self):
+        """Start one loop thread per interface (no-op if running)"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            for state in self.states.values():
+                state.started = time.monotonic()
+                state.thread = threading.Thread(
+                    target=self._loop, args=(state,), daemon=True,
+                    name=f"scan-scheduler-{state.interface or 'default'}")
+                state.thread.start()
+        return True
+
+    def stop(self, wait=True):
+        """Stop scheduling; scans already submitted still complete"""
+        self._stop.set()
+        if wait:
+            for state in self.states.values():
+                if state.thread is not None:
+                    state.thread.join()
+        for state in self.states.values():
+            state.next_run = None
+
+    def to_dict(self):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "churn_low": self.churn_low,
+            "churn_high": self.churn_high,
+            "interfaces": [s.to_dict() for s in self.states.values()],
+            "time": _iso(datetime.datetime.utcnow()),
+        }
+
+
+def init_scan_scheduler(app):
+    """
+    Attach a ScanScheduler to `app` as app.extensions['scan_scheduler']
+    and start it when SCHEDULER_ENABLED is set
+
+    Returns:
+        ScanScheduler
+    """
+    interfaces = [i.strip() for i in (app.config['SCHEDULER_INTERFACES'] or '').split(',')
+                  if i.strip()] or [None]
+    scheduler = ScanScheduler(
+        app.extensions['scan_jobs'],
+        interfaces,
+        interval=app.config['SCAN_INTERVAL'],
+        min_interval=app.config['SCAN_MIN_INTERVAL'],
+        max_interval=app.config['SCAN_MAX_INTERVAL'],
+        churn_low=app.config['SCAN_CHURN_LOW'],
+        churn_high=app.config['SCAN_CHURN_HIGH'],
+    )
+    app.extensions['scan_scheduler'] = scheduler
+    if app.config['SCHEDULER_ENABLED']:
+        scheduler.start()
+    return scheduler
@@ -1,73 +1,39 @@
 """
 WiFi Network Scanning Service
 Provides simulated and real WiFi network scanning functionality
+(see services/scanners.py for the configurable scanner backends)
 """
+import collections
 import uuid
 import datetime
-import time
+from services.observation_service import record_observations
+from services.stats_service import (
+    previous_network_keys, network_deltas, version_deltas, apply_deltas
+)
+from services.response_cache import invalidate
+from services.event_bus import current_bus, NETWORK_NEW, NETWORK_SIGNAL, ROGUE_DETECTED
+from services.rogue_detector import current_detector, write_version
+from services.metrics import timed_write
+from services.db_tuning import begin_write
 
+# Rows per INSERT ... ON CONFLICT statement when saving scan results
+UPSERT_CHUNK_SIZE = 500
 
-def real_scan():
+
+def real_scan(interface=None):
     """
     Perform real WiFi network scan using pywifi
-    
+
+    Falls back to the simulated networks when scanning fails.
+
+    Args:
+        interface: Wireless interface name (default: first interface)
+
     Returns:
         list: List of detected network dictionaries
     """
-    try:
-        import pywifi
-        from pywifi import const
-        
-        # Initialize WiFi
-        wifi = pywifi.PyWiFi()
-        iface = wifi.interfaces()[0]  # Get first wireless interface
-        
-        # Start scan
-        iface.scan()
-        time.sleep(2)  # Wait for scan to complete
-        
-        # Get scan results
-        scan_results = iface.scan_results()
-        networks = []
-        
-        for network in scan_results:
-            # Get encryption type
-            if network.akm[0] == const.AKM_TYPE_NONE:
-                encryption = "Open"
-            elif const.AKM_TYPE_WPA2PSK in network.akm:
-                encryption = "WPA2-PSK"
-            elif const.AKM_TYPE_WPAPSK in network.akm:
-                encryption = "WPA-PSK"
-            elif const.AKM_TYPE_WPA2 in network.akm:
-                encryption = "WPA2-Enterprise"
-            else:
-                encryption = "WEP"
-            
-            # Calculate channel from frequency
-            freq = getattr(network, 'freq', 0)
-            if 2412 <= freq <= 2484:
-                channel = (freq - 2412) // 5 + 1
-            elif 5170 <= freq <= 5825:
-                channel = (freq - 5000) // 5
-            else:
-                channel = 0
-            
-            networks.append({
-                "ssid": network.ssid if network.ssid else "Hidden Network",
-                "bssid": network.bssid,
-                "channel": channel,
-                "signal": network.signal,
-                "encryption": encryption
-            })
-        
-        # Remove duplicates based on BSSID
-        unique_networks = {n['bssid']: n for n in networks}.values()
-        return list(unique_networks)
-        
-    except Exception as e:
-        print(f"Real scan error: {e}")
-        # Fallback to simulated scan
-        return simulate_scan()
+    from services.scanners import PyWiFiScanner
+    return PyWiFiScanner(fallback=True).scan(interface)
 
 
 def simulate_scan():
@@ -103,63 +69,253 @@ def simulate_scan():
     return sample_networks
 
 
-def perform_security_audit(network):
+def perform_security_audit(network, rules=None, context=None):
     """
-    Perform basic security audit on a network
-    
+    Perform a security audit on a network
+
     Args:
         network: Network model object
-        
+        rules: Compiled RuleSet (default: the bundled rules)
+        context: SSID context for evil-twin rules, see
+            rule_engine.build_context()
+
     Returns:
         dict: Audit results with security findings
     """
-    result = {
-        "weak_cipher": False if network.encryption and "WPA3" in network.encryption else True,
-        "open_network": True if network.encryption and network.encryption.lower() == "open" else False,
-        "signal_strength": network.signal,
-        "risk_level": "low"
-    }
-    
-    # Determine risk level
-    if result["open_network"]:
-        result["risk_level"] = "high"
-    elif result["weak_cipher"]:
-        result["risk_level"] = "medium"
-    
-    result["details"] = []
-    if result["open_network"]:
-        result["details"].append("Network is unencrypted and vulnerable to eavesdropping")
-    if result["weak_cipher"]:
-        result["details"].append("Network uses weak encryption that may be vulnerable")
-    if network.signal > -50:
-        result["details"].append("Strong signal strength detected")
-    
-    return result
+    from services.rule_engine import default_rule_set
+    return (rules or default_rule_set()).evaluate(network, context)
+
 
+def _format_timestamp(value):
+    """Render a DateTime column the same way the model to_dict() methods do"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # SQLite RETURNING hands back the raw stored text
+        value = datetime.datetime.fromisoformat(value)
+    return value.isoformat() + "Z"
 
-def save_networks_to_db(db, Network, networks_data):
+
+def network_events(previous, networks, min_signal_change=1):
+    """
+    Live feed events for a scan: new BSSIDs and changed RSSI readings
+
+    Args:
+        previous: {bssid: (..., signal)} as read before the write
+        networks: Network dictionaries written
+        min_signal_change: Smallest RSSI change (dB) reported
+
+    Returns:
+        list: (event type, data) pairs
+    """
+    events = []
+    for n in networks:
+        old = previous.get(n["bssid"])
+        if old is None:
+            events.append((NETWORK_NEW, {
+                "id": n.get("id"), "bssid": n["bssid"], "ssid": n["ssid"], "channel": n["channel"],
+                "signal": n["signal"], "encryption": n["encryption"],
+            }))
+        elif old[2] is not None and n["signal"] is not None and \
+                abs(n["signal"] - old[2]) >= min_signal_change:
+            events.append((NETWORK_SIGNAL, {
+                "bssid": n["bssid"], "signal": n["signal"], "previous": old[2],
+            }))
+    return events
+
+
+def _after_save(db, saved, bus, events, version=None):
+    """
+    Invalidate cached responses of the committed rows and feed them to the
+    rogue detector and the live event feed
+
+    Args:
+        version: Network table version of the commit (see write_version)
+    """
+    invalidate('networks', *(f'network:{n["id"]}' for n in saved))
+    detector = current_detector(db, refresh=False)
+    if detector is not None:
+        found = detector.observe(saved, version)
+        if bus is not None:
+            events.extend((ROGUE_DETECTED, finding) for finding in found)
+    if bus is not None and events:
+        bus.publish_many(events)
+
+
+def _upsert_insert(db):
+    """
+    Get the dialect-specific INSERT construct supporting ON CONFLICT
+
+    Returns:
+        The insert() function for the bound dialect, or None if unsupported
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+
+@timed_write('network')
+def save_networks_to_db(db, Network, networks_data, chunk_size=UPSERT_CHUNK_SIZE,
+                        scan_id=None):
     """
     Save scanned networks to database
-    
+
+    Rows are upserted on BSSID in chunks with a single executemany per
+    chunk, so rescanning a site updates the existing rows (keeping their
+    id and discovered_at) instead of failing on the unique constraint.
+    The dashboard counters and the network table version (the ETag
+    source) are adjusted in the same transaction. After commit the rows
+    update the rogue AP index, and new or moved networks (and any rogue
+    findings) are published to the live event feed.
+
     Args:
         db: SQLAlchemy database instance
         Network: Network model class
         networks_data: List of network dictionaries
-        
+        chunk_size: Number of rows sent per INSERT statement
+        scan_id: When given, each reading is also appended to the
+            observation time series in the same transaction
+
     Returns:
         list: List of saved network dictionaries
     """
+    # Last occurrence of a BSSID wins, as one statement may not touch a row twice
+    unique = {n["bssid"]: n for n in networks_data}
+    if not unique:
+        return []
+
+    now = datetime.datetime.utcnow()
+    insert = _upsert_insert(db)
+    if insert is None:
+        return _save_networks_orm(db, Network, unique.values(), now, scan_id)
+
+    _begin_network_write(db, scan_id, unique.values(), now)
+
+    table = Network.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.bssid],
+        set_={
+            "ssid": stmt.excluded.ssid,
+            "channel": stmt.excluded.channel,
+            "signal": stmt.excluded.signal,
+            "encryption": stmt.excluded.encryption,
+            "last_seen": stmt.excluded.last_seen,
+        }
+    ).returning(
+        table.c.id, table.c.ssid, table.c.bssid, table.c.channel,
+        table.c.signal, table.c.encryption, table.c.discovered_at,
+        table.c.last_seen
+    )
+
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "ssid": n["ssid"],
+            "bssid": n["bssid"],
+            "channel": n["channel"],
+            "signal": n["signal"],
+            "encryption": n["encryption"],
+            "discovered_at": now,
+            "last_seen": now,
+        }
+        for n in unique.values()
+    ]
+
     saved = []
-    for n in networks_data:
-        net = Network(
-            id=str(uuid.uuid4()),
-            ssid=n["ssid"],
-            bssid=n["bssid"],
-            channel=n["channel"],
-            signal=n["signal"],
-            encryption=n["encryption"]
+    deltas = collections.Counter()
+    bus = current_bus()
+    events = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        previous = previous_network_keys(db, [row["bssid"] for row in chunk])
+        deltas = network_deltas(previous, chunk, now, deltas)
+        if bus is not None:
+            events.extend(network_events(previous, chunk, bus.min_signal_change))
+        result = db.session.execute(stmt, chunk)
+        for row in result:
+            saved.append({
+                "id": row.id,
+                "ssid": row.ssid,
+                "bssid": row.bssid,
+                "channel": row.channel,
+                "signal": row.signal,
+                "encryption": row.encryption,
+                "discovered_at": _format_timestamp(row.discovered_at),
+                "last_seen": _format_timestamp(row.last_seen)
+            })
+    apply_deltas(db, deltas)
+    version = write_version(db)
+    db.session.commit()
+    _after_save(db, saved, bus, events, version)
+    return saved
+
+
+def _begin_network_write(db, scan_id, networks, now):
+    """
+    Open the write transaction of a network save
+
+    Bumping the network table version first takes the database write lock
+    (SQLite) or the counter row lock before the previous rows are read, so
+    concurrent writers cannot both count a BSSID as new. Under the SQLite
+    profile the transaction is a BEGIN IMMEDIATE one.
+    """
+    begin_write(db)
+    apply_deltas(db, version_deltas('network'))
+    if scan_id is not None:
+        record_observations(db, scan_id, networks, observed_at=now)
+
+
+def _save_networks_orm(db, Network, networks_data, now, scan_id=None):
+    """
+    Fallback upsert for dialects without ON CONFLICT support
+
+    Args:
+        db: SQLAlchemy database instance
+        Network: Network model class
+        networks_data: Iterable of network dictionaries with unique BSSIDs
+        now: Timestamp recorded as last_seen (and discovered_at for new rows)
+        scan_id: Scan whose readings are appended to the observations
+
+    Returns:
+        list: List of saved network dictionaries
+    """
+    networks_data = list(networks_data)
+    _begin_network_write(db, scan_id, networks_data, now)
+    existing = {
+        net.bssid: net for net in Network.query.filter(
+            Network.bssid.in_([n["bssid"] for n in networks_data])
         )
-        db.session.add(net)
-        saved.append(net.to_dict())
+    }
+    previous = {
+        bssid: ('' if net.encryption is None else str(net.encryption),
+                '' if net.channel is None else str(net.channel), net.signal)
+        for bssid, net in existing.items()
+    }
+    apply_deltas(db, network_deltas(previous, networks_data, now))
+    version = write_version(db)
+
+    nets = []
+    for n in networks_data:
+        net = existing.get(n["bssid"])
+        if net is None:
+            net = Network(id=str(uuid.uuid4()), bssid=n["bssid"], discovered_at=now)
+            db.session.add(net)
+        net.ssid = n["ssid"]
+        net.channel = n["channel"]
+        net.signal = n["signal"]
+        net.encryption = n["encryption"]
+        net.last_seen = now
+        nets.append(net)
     db.session.commit()
+
+    saved = [net.to_dict() for net in nets]
+    bus = current_bus()
+    events = network_events(previous, saved, bus.min_signal_change) if bus else []
+    _after_save(db, saved, bus, events, version)
     return saved
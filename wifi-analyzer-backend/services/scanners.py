@@ -0,0 +1,434 @@
+"""
+Scanner Backends
+Registry of pluggable WiFi scanner backends selected by SCAN_BACKEND
+
+Every backend returns the same list of network dictionaries
+(ssid, bssid, channel, signal, encryption) that save_networks_to_db expects.
+"""
+import logging
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from services.metrics import timed_scan
+
+logger = logging.getLogger(__name__)
+
+SCANNERS = {}
+
+
+class UnknownInterface(ValueError):
+    """Raised when a scan names an interface the backend does not have"""
+
+
+def register_scanner(name):
+    """
+    Class decorator registering a scanner backend under `name`
+
+    Usage:
+        @register_scanner('mybackend')
+        class MyScanner(Scanner):
+            def scan(self, interface=None):
+                return [...]
+    """
+    def decorator(cls):
+        cls.name = name
+        SCANNERS[name] = cls
+        return cls
+    return decorator
+
+
+def create_scanner(config):
+    """
+    Build the scanner backend selected in the app configuration
+
+    Args:
+        config: Flask config mapping (SCAN_BACKEND and backend options)
+
+    Returns:
+        Scanner instance
+    """
+    name = config.get('SCAN_BACKEND', 'pywifi')
+    if name not in SCANNERS:
+        raise ValueError(f"Unknown scan backend '{name}'. Available: {', '.join(sorted(SCANNERS))}")
+    return SCANNERS[name].from_config(config)
+
+
+class Scanner(ABC):
+    """Base class for scanner backends"""
+
+    name = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    @abstractmethod
+    def scan(self, interface=None):
+        """
+        Scan for networks
+
+        Args:
+            interface: Wireless interface name (backends may ignore it)
+
+        Returns:
+            list: List of detected network dictionaries
+        """
+
+    @timed_scan
+    def __call__(self, interface=None):
+        return self.scan(interface)
+
+
+def freq_to_channel(freq):
+    """Convert a centre frequency in MHz to its WiFi channel number (0 if unknown)"""
+    freq = int(freq)
+    if freq == 2484:
+        return 14
+    if 2412 <= freq <= 2472:
+        return (freq - 2412) // 5 + 1
+    if 5170 <= freq <= 5825:
+        return (freq - 5000) // 5
+    if 5955 <= freq <= 7115:
+        return (freq - 5950) // 5
+    return 0
+
+
+def classify_encryption(privacy, rsn=False, rsn_akms=(), wpa=False):
+    """
+    Summarise security information into the encryption labels used by the app
+
+    Args:
+        privacy: Privacy bit of the capability field
+        rsn: Whether an RSN (WPA2/WPA3) element is present
+        rsn_akms: AKM suite types advertised in the RSN element
+            (1 = 802.1X, 2 = PSK, 8 = SAE, ...)
+        wpa: Whether a WPA (vendor specific) element is present
+
+    Returns:
+        str: Encryption label
+    """
+    if rsn:
+        if 8 in rsn_akms or 9 in rsn_akms or 24 in rsn_akms:
+            return "WPA3"
+        if 1 in rsn_akms or 3 in rsn_akms or 5 in rsn_akms:
+            return "WPA2-Enterprise"
+        return "WPA2-PSK"
+    if wpa:
+        return "WPA-PSK"
+    if privacy:
+        return "WEP"
+    return "Open"
+
+
+@register_scanner('pywifi')
+class PyWiFiScanner(Scanner):
+    """
+    Live scan through pywifi (Windows/Linux wireless APIs)
+
+    With `fallback` enabled the simulated networks are returned when there
+    is no real scanner: pywifi is missing or finds no wireless interface.
+    An unknown interface name and errors of the scan itself are raised.
+    """
+
+    def __init__(self, settle_time=2.0, fallback=True):
+        self.settle_time = settle_time
+        self.fallback = fallback
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(settle_time=config.get('SCAN_SETTLE_TIME', 2.0),
+                   fallback=config.get('SCAN_FALLBACK_SIMULATED', True))
+
+    def scan(self, interface=None):
+        try:
+            interfaces = self._interfaces()
+            if not interfaces:
+                raise RuntimeError("No wireless interface found")
+        except Exception as e:
+            if not self.fallback:
+                raise
+            logger.warning("No real scanner available (%s); returning simulated networks", e)
+            from services.scan_service import simulate_scan
+            return simulate_scan()
+
+        if interface is None:
+            iface = interfaces[0]  # Get first wireless interface
+        else:
+            iface = next((i for i in interfaces if i.name() == interface), None)
+            if iface is None:
+                raise UnknownInterface(
+                    f"Unknown interface '{interface}'. "
+                    f"Available: {', '.join(i.name() for i in interfaces)}")
+        return self._scan(iface)
+
+    def _interfaces(self):
+        import pywifi
+        return pywifi.PyWiFi().interfaces()
+
+    def _scan(self, iface):
+        from pywifi import const
+
+        # Start scan
+        iface.scan()
+        time.sleep(self.settle_time)  # Wait for scan to complete
+
+        networks = []
+        for network in iface.scan_results():
+            # Get encryption type
+            if network.akm[0] == const.AKM_TYPE_NONE:
+                encryption = "Open"
+            elif const.AKM_TYPE_WPA2PSK in network.akm:
+                encryption = "WPA2-PSK"
+            elif const.AKM_TYPE_WPAPSK in network.akm:
+                encryption = "WPA-PSK"
+            elif const.AKM_TYPE_WPA2 in network.akm:
+                encryption = "WPA2-Enterprise"
+            else:
+                encryption = "WEP"
+
+            networks.append({
+                "ssid": network.ssid if network.ssid else "Hidden Network",
+                "bssid": network.bssid,
+                "channel": freq_to_channel(getattr(network, 'freq', 0)),
+                "signal": network.signal,
+                "encryption": encryption
+            })
+
+        # Remove duplicates based on BSSID
+        return list({n['bssid']: n for n in networks}.values())
+
+
+@register_scanner('simulated')
+class SimulatedScanner(Scanner):
+    """The three fixed sample networks from simulate_scan()"""
+
+    def scan(self, interface=None):
+        from services.scan_service import simulate_scan
+        return simulate_scan()
+
+
+class SourceScanner(Scanner):
+    """Base for backends that read a saved file from SCAN_SOURCE"""
+
+    def __init__(self, path):
+        if not path:
+            raise ValueError(f"Scan backend '{self.name}' requires SCAN_SOURCE")
+        self.path = path
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('SCAN_SOURCE'))
+
+
+class FileScanner(SourceScanner):
+    """Base for backends that parse saved tool output from SCAN_SOURCE"""
+
+    def scan(self, interface=None):
+        with open(self.path, encoding='utf-8', errors='replace') as f:
+            return self.parse(f.read())
+
+    @abstractmethod
+    def parse(self, text):
+        """
+        Parse the saved tool output
+
+        Returns:
+            list: List of network dictionaries
+        """
+
+
+_IW_BSS = re.compile(r'^BSS ([0-9a-fA-F:]{17})', re.MULTILINE)
+# iw prints suite names separated by spaces; 'IEEE 802.1X' is normalised
+# to 'IEEE-802.1X' before splitting
+_IW_AKM_NAMES = {'IEEE-802.1X': 1, 'PSK': 2, 'FT/IEEE-802.1X': 3, 'FT/PSK': 4,
+                 'IEEE-802.1X/SHA-256': 5, 'PSK/SHA-256': 6, 'SAE': 8, 'FT/SAE': 9}
+
+
+@register_scanner('iw')
+class IwScanFileScanner(FileScanner):
+    """Parse the output of `iw dev <if> scan` saved to a file"""
+
+    def parse(self, text):
+        starts = [m.start() for m in _IW_BSS.finditer(text)] + [len(text)]
+        networks = {}
+        for start, end in zip(starts, starts[1:]):
+            block = text[start:end]
+            bssid = block[4:21].upper()
+            ssid = channel = signal = None
+            privacy = rsn = wpa = False
+            rsn_akms = set()
+            section = None
+            for line in block.splitlines()[1:]:
+                stripped = line.strip()
+                if line.startswith('\t') and not line.startswith('\t\t'):
+                    section = stripped.split(':', 1)[0]
+                if stripped.startswith('freq:') and channel is None:
+                    channel = freq_to_channel(float(stripped.split()[1]))
+                elif stripped.startswith('signal:'):
+                    signal = int(float(stripped.split()[1]))
+                elif stripped.startswith('SSID:'):
+                    ssid = stripped[5:].strip()
+                elif stripped.startswith('capability:'):
+                    privacy = 'Privacy' in stripped
+                elif stripped.startswith('DS Parameter set: channel'):
+                    channel = int(stripped.rsplit(' ', 1)[1])
+                elif stripped.startswith('RSN:'):
+                    rsn = True
+                elif stripped.startswith('WPA:'):
+                    wpa = True
+                if section == 'RSN' and 'Authentication suites:' in stripped:
+                    suites = stripped.split('Authentication suites:', 1)[1]
+                    suites = suites.replace('IEEE 802.1X', 'IEEE-802.1X').split()
+                    rsn_akms.update(_IW_AKM_NAMES.get(s, 0) for s in suites)
+            networks[bssid] = {
+                "ssid": ssid or "Hidden Network",
+                "bssid": bssid,
+                "channel": channel or 0,
+                "signal": signal,
+                "encryption": classify_encryption(privacy, rsn, rsn_akms, wpa)
+            }
+        return list(networks.values())
+
+
+_NMCLI_FIELD = re.compile(r'((?:\\.|[^:\\])*)(?::|$)')
+
+
+@register_scanner('nmcli')
+class NmcliFileScanner(FileScanner):
+    """
+    Parse terse nmcli output saved to a file, produced by:
+        nmcli -t -f SSID,BSSID,CHAN,SIGNAL,SECURITY dev wifi list
+    """
+
+    def parse(self, text):
+        networks = {}
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            fields = [f.replace('\\:', ':').replace('\\\\', '\\')
+                      for f in _NMCLI_FIELD.findall(line)]
+            if len(fields) < 5:
+                continue
+            ssid, bssid, chan, quality, security = fields[:5]
+            security = security.upper()
+            if 'WPA3' in security or 'SAE' in security:
+                encryption = "WPA3"
+            elif '802.1X' in security:
+                encryption = "WPA2-Enterprise"
+            elif 'WPA2' in security:
+                encryption = "WPA2-PSK"
+            elif 'WPA' in security:
+                encryption = "WPA-PSK"
+            elif 'WEP' in security:
+                encryption = "WEP"
+            else:
+                encryption = "Open"
+            bssid = bssid.upper()
+            networks[bssid] = {
+                "ssid": ssid or "Hidden Network",
+                "bssid": bssid,
+                "channel": int(chan) if chan.isdigit() else 0,
+                # nmcli reports signal quality in percent
+                "signal": int(quality) // 2 - 100 if quality.isdigit() else None,
+                "encryption": encryption
+            }
+        return list(networks.values())
+
+
+@register_scanner('pcap')
+class PcapReplayScanner(SourceScanner):
+    """Replay beacons and probe responses from a monitor-mode capture"""
+
+    def scan(self, interface=None):
+        from services.pcap_parser import read_capture_networks
+        return read_capture_networks(self.path)
+
+
+# Relative weights used by the synthetic generator
+SYNTHETIC_ENCRYPTION = [("WPA2-PSK", 58), ("WPA3", 10), ("Open", 12), ("WPA-PSK", 8),
+                        ("WPA2-Enterprise", 9), ("WEP", 3)]
+SYNTHETIC_CHANNELS = [(1, 20), (6, 24), (11, 20), (2, 2), (3, 2), (4, 1), (5, 1),
+                      (7, 1), (8, 1), (9, 2), (10, 1), (36, 5), (40, 3), (44, 4),
+                      (48, 3), (149, 4), (153, 2), (157, 3), (161, 2)]
+SYNTHETIC_OUIS = ["00:1A:2B", "3C:84:6A", "F0:9F:C2", "B0:BE:76", "00:24:D4",
+                  "AC:84:C6", "E4:95:6E", "74:DA:88", "C8:3A:35", "50:C7:BF"]
+SYNTHETIC_SSIDS = ["Home", "Office", "Guest", "Cafe", "Library", "Airport", "Hotel",
+                   "Linksys", "NETGEAR", "TP-Link", "Starbucks", "eduroam", "FreeWiFi"]
+
+
+@register_scanner('synthetic')
+class SyntheticScanner(Scanner):
+    """
+    Deterministic generator of large, realistic scan results for load tests
+
+    The set of access points (BSSID, SSID, channel, encryption, base RSSI)
+    depends only on `seed`; each call to scan() adds a few dB of per-scan
+    jitter to the RSSI, derived from the seed and the scan number.
+    """
+
+    def __init__(self, count=1000, seed=0, rate=None, hidden_ratio=0.05, jitter=3):
+        """
+        Args:
+            count: Number of access points per scan
+            seed: Seed for the access point population
+            rate: Maximum access points emitted per second (None = unthrottled)
+            hidden_ratio: Fraction of hidden SSIDs
+            jitter: Maximum RSSI change in dB between scans
+        """
+        self.count = count
+        self.seed = seed
+        self.rate = rate
+        self.hidden_ratio = hidden_ratio
+        self.jitter = jitter
+        self.scans = 0
+        self._population = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            count=config.get('SCAN_SYNTHETIC_COUNT', 1000),
+            seed=config.get('SCAN_SYNTHETIC_SEED', 0),
+            rate=config.get('SCAN_SYNTHETIC_RATE') or None
+        )
+
+    def _build_population(self):
+        rng = random.Random(self.seed)
+        encryptions, enc_weights = zip(*SYNTHETIC_ENCRYPTION)
+        channels, chan_weights = zip(*SYNTHETIC_CHANNELS)
+        population = []
+        for i in range(self.count):
+            oui = rng.choice(SYNTHETIC_OUIS)
+            bssid = "%s:%02X:%02X:%02X" % (oui, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF)
+            if rng.random() < self.hidden_ratio:
+                ssid = "Hidden Network"
+            else:
+                ssid = f"{rng.choice(SYNTHETIC_SSIDS)}-{rng.randrange(1000):03d}"
+            rssi = int(max(-95, min(-30, rng.gauss(-70, 10))))
+            population.append((ssid, bssid, rng.choices(channels, chan_weights)[0],
+                               rssi, rng.choices(encryptions, enc_weights)[0]))
+        return population
+
+    def iter_networks(self):
+        """Yield one scan's networks, throttled to `rate` per second"""
+        if self._population is None:
+            self._population = self._build_population()
+        rng = random.Random(self.seed * 1_000_003 + self.scans)
+        self.scans += 1
+        jitter = self.jitter
+        started = time.perf_counter()
+        for i, (ssid, bssid, channel, rssi, encryption) in enumerate(self._population):
+            if self.rate and i % 1000 == 0 and i:
+                ahead = i / self.rate - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+            yield {
+                "ssid": ssid,
+                "bssid": bssid,
+                "channel": channel,
+                "signal": rssi + rng.randint(-jitter, jitter),
+                "encryption": encryption
+            }
+
+    def scan(self, interface=None):
+        return list(self.iter_networks())
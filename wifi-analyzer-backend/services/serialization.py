@@ -0,0 +1,116 @@
+"""
+Serialization Service
+Encodes query rows straight to JSON bytes for the list and detail
+endpoints
+
+A RowEncoder is built once per column layout and turns raw result rows
+into JSON objects without an intermediate model object or dictionary per
+row: timestamps are rendered like the to_dict() methods
+(isoformat() + 'Z'), and columns holding stored JSON (Audit.result_json)
+are embedded verbatim instead of being decoded and re-encoded. orjson is
+used when it is installed, the standard library otherwise.
+"""
+import json
+from json.encoder import encode_basestring_ascii
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Column kinds: plain JSON value, naive UTC datetime, stored JSON text
+VALUE = None
+TIME = 'time'
+RAW_JSON = 'raw_json'
+
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z if orjson else 0
+
+
+def _encode_value(value):
+    if value is None:
+        return 'null'
+    kind = type(value)
+    if kind is str:
+        return encode_basestring_ascii(value)
+    if kind is bool:
+        return 'true' if value else 'false'
+    if kind is int or kind is float:
+        return repr(value)
+    return json.dumps(value)
+
+
+def _encode_time(value):
+    return '"' + value.isoformat() + 'Z"' if value else 'null'
+
+
+def _encode_raw(value):
+    return value or 'null'
+
+
+_ENCODERS = {VALUE: _encode_value, TIME: _encode_time, RAW_JSON: _encode_raw}
+
+
+class RowEncoder:
+    """JSON encoder for rows with a fixed column layout"""
+
+    def __init__(self, columns, use_orjson=None):
+        """
+        Args:
+            columns: (name, kind) pairs, in row order; rows may carry
+                extra trailing columns, which are ignored
+            use_orjson: Force orjson on or off (default: when installed)
+        """
+        self.names = [name for name, _ in columns]
+        self.kinds = [kind for _, kind in columns]
+        self.use_orjson = orjson is not None if use_orjson is None else use_orjson
+        if self.use_orjson and orjson is None:
+            raise RuntimeError("orjson is not installed")
+        self._encoders = [_ENCODERS[kind] for kind in self.kinds]
+        self._template = '{' + ','.join(
+            encode_basestring_ascii(name) + ':%s' for name in self.names) + '}'
+        self._raw = [i for i, kind in enumerate(self.kinds) if kind == RAW_JSON]
+        self._plain = [(i, name) for i, (name, kind) in enumerate(columns) if kind != RAW_JSON]
+
+    def _encode_orjson(self, row):
+        # orjson cannot embed pre-encoded JSON, so the stored JSON columns
+        # are spliced in after the other fields
+        body = orjson.dumps({name: row[i] for i, name in self._plain}, option=_ORJSON_OPTIONS)
+        for i in self._raw:
+            body = embed(body, self.names[i], (row[i] or 'null').encode())
+        return body
+
+    def encode(self, row):
+        """One row as a JSON object (bytes)"""
+        if self.use_orjson:
+            if not self._raw:
+                return orjson.dumps(dict(zip(self.names, row)), option=_ORJSON_OPTIONS)
+            return self._encode_orjson(row)
+        return (self._template % tuple(
+            encode(value) for encode, value in zip(self._encoders, row)
+        )).encode()
+
+    def encode_many(self, rows):
+        """Rows as a JSON array (bytes)"""
+        if self.use_orjson and not self._raw:
+            names = self.names
+            return orjson.dumps([dict(zip(names, row)) for row in rows], option=_ORJSON_OPTIONS)
+        if self.use_orjson:
+            return b'[' + b','.join(map(self._encode_orjson, rows)) + b']'
+        template = self._template
+        encoders = self._encoders
+        return ('[' + ','.join(
+            template % tuple(encode(value) for encode, value in zip(encoders, row))
+            for row in rows
+        ) + ']').encode()
+
+
+def embed(document, name, value):
+    """Append the pre-encoded JSON `value` to a JSON object as field `name`"""
+    separator = b',' if document != b'{}' else b''
+    return document[:-1] + separator + encode_basestring_ascii(name).encode() + b':' + value + b'}'
+
+
+def json_response(body, status=200):
+    """A Flask response around pre-encoded JSON bytes"""
+    return current_app.response_class(body + b'\n', status=status, mimetype='application/json')
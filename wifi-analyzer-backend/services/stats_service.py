@@ -0,0 +1,244 @@
+"""
+Dashboard Stats Service
+Summary counters (networks by encryption and channel, audits by risk
+level, discoveries per hour) maintained inside the transactions that write
+networks and audits, so GET /api/stats never scans the base tables
+"""
+import collections
+import datetime
+from sqlalchemy import select, delete, func
+from models import Network, Audit, StatCounter
+
+NETWORK_ENCRYPTION = 'network_encryption'
+NETWORK_CHANNEL = 'network_channel'
+AUDIT_RISK = 'audit_risk'
+DISCOVERED_HOUR = 'discovered_hour'
+# Write counter per table (key: table name), the source of the API ETags
+TABLE_VERSION = 'table_version'
+
+# Longest discovery histogram GET /api/stats returns
+MAX_STATS_HOURS = 24 * 31
+
+
+def hour_key(value):
+    """Counter key of the hour bucket containing `value`"""
+    return value.strftime('%Y-%m-%dT%H:00:00')
+
+
+def _key(value):
+    return '' if value is None else str(value)
+
+
+def previous_network_keys(db, bssids):
+    """
+    Read the counted attributes of networks about to be upserted
+
+    Returns:
+        dict: {bssid: (encryption key, channel key, signal)} for existing
+        rows; the signal is carried along for the live event feed
+    """
+    table = Network.__table__
+    rows = db.session.execute(
+        select(table.c.bssid, table.c.encryption, table.c.channel, table.c.signal)
+        .where(table.c.bssid.in_(bssids))
+    )
+    return {row.bssid: (_key(row.encryption), _key(row.channel), row.signal) for row in rows}
+
+
+def network_deltas(previous, networks, now, deltas=None):
+    """
+    Counter changes caused by upserting `networks`
+
+    Args:
+        previous: Result of previous_network_keys() for these networks
+        networks: Network dictionaries being written
+        now: Write time, the discovery hour of new networks
+        deltas: Counter to add to (default: a new one)
+
+    Returns:
+        collections.Counter: {(dimension, key): delta}
+    """
+    deltas = deltas if deltas is not None else collections.Counter()
+    hour = hour_key(now)
+    for network in networks:
+        encryption = _key(network.get("encryption"))
+        channel = _key(network.get("channel"))
+        old = previous.get(network["bssid"])
+        if old is None:
+            deltas[(DISCOVERED_HOUR, hour)] += 1
+        elif old[:2] == (encryption, channel):
+            continue
+        else:
+            deltas[(NETWORK_ENCRYPTION, old[0])] -= 1
+            deltas[(NETWORK_CHANNEL, old[1])] -= 1
+        deltas[(NETWORK_ENCRYPTION, encryption)] += 1
+        deltas[(NETWORK_CHANNEL, channel)] += 1
+    return deltas
+
+
+def audit_deltas(risk_counts):
+    """Counter changes for newly written audits ({risk level: count})"""
+    return collections.Counter({
+        (AUDIT_RISK, _key(risk)): count for risk, count in risk_counts.items() if count
+    })
+
+
+def version_deltas(*tables):
+    """Counter changes bumping the version of `tables` (table names)"""
+    return collections.Counter({(TABLE_VERSION, table): 1 for table in tables})
+
+
+def table_versions(db, tables):
+    """
+    Current write counters of `tables`, one primary key read
+
+    Returns:
+        tuple: Versions in the order of `tables` (0 if never written)
+    """
+    table = StatCounter.__table__
+    rows = db.session.execute(
+        select(table.c.key, table.c.count)
+        .where(table.c.dimension == TABLE_VERSION, table.c.key.in_(tables))
+    )
+    found = dict(rows.all())
+    return tuple(found.get(t, 0) for t in tables)
+
+
+def apply_deltas(db, deltas):
+    """
+    Add counter deltas within the caller's transaction (no commit)
+
+    Args:
+        db: SQLAlchemy database instance
+        deltas: {(dimension, key): delta}
+    """
+    rows = [{"dimension": d, "key": k, "count": c} for (d, k), c in deltas.items() if c]
+    if not rows:
+        return
+    from services.scan_service import _upsert_insert
+
+    table = StatCounter.__table__
+    insert = _upsert_insert(db)
+    if insert is None:
+        for row in rows:
+            counter = db.session.get(StatCounter, (row["dimension"], row["key"]))
+            if counter is None:
+                db.session.add(StatCounter(**row))
+            else:
+                counter.count += row["count"]
+        return
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.key],
+        set_={"count": table.c.count + stmt.excluded.count}
+    )
+    db.session.execute(stmt, rows)
+
+
+def rebuild_stats(db):
+    """
+    Recompute every counter from the base tables and commit
+
+    Used to build the counters for an existing database and to repair
+    drift (e.g. after rows were edited outside the API).
+    """
+    from services.db_tuning import begin_write
+    begin_write(db)
+    network = Network.__table__
+    audit = Audit.__table__
+    deltas = collections.Counter()
+    for column, dimension in ((network.c.encryption, NETWORK_ENCRYPTION),
+                              (network.c.channel, NETWORK_CHANNEL),
+                              (audit.c.risk_level, AUDIT_RISK)):
+        for value, count in db.session.execute(select(column, func.count()).group_by(column)):
+            deltas[(dimension, _key(value))] += count
+    result = db.session.execute(
+        select(network.c.discovered_at).where(network.c.discovered_at.isnot(None))
+        .execution_options(yield_per=10000)
+    )
+    for (discovered_at,) in result:
+        deltas[(DISCOVERED_HOUR, hour_key(discovered_at))] += 1
+
+    # Table versions only ever grow, so old ETags can never match again
+    table = StatCounter.__table__
+    db.session.execute(delete(table).where(table.c.dimension != TABLE_VERSION))
+    apply_deltas(db, deltas)
+    db.session.commit()
+
+
+def ensure_stats(db):
+    """Build the counters if the table is empty but data exists"""
+    table = StatCounter.__table__
+    if db.session.execute(
+        select(table.c.key).where(table.c.dimension != TABLE_VERSION).limit(1)
+    ).first():
+        return
+    has_data = db.session.execute(select(Network.__table__.c.id).limit(1)).first() or \
+        db.session.execute(select(Audit.__table__.c.id).limit(1)).first()
+    if has_data:
+        rebuild_stats(db)
+
+
+def get_stats(db, hours=24):
+    """
+    Read the dashboard summary
+
+    Reads only the counter table: a handful of rows per encryption type,
+    channel and risk level plus one row per hour of the histogram.
+
+    Args:
+        db: SQLAlchemy database instance
+        hours: Length of the per-hour discovery histogram
+
+    Returns:
+        dict: networks (total, by_encryption, by_channel, security),
+        audits (total, by_risk_level) and discoveries per hour
+    """
+    table = StatCounter.__table__
+    now = datetime.datetime.utcnow()
+    first_hour = hour_key(now - datetime.timedelta(hours=hours - 1))
+    rows = db.session.execute(
+        select(table.c.dimension, table.c.key, table.c.count).where(
+            table.c.count != 0,
+            (table.c.dimension != DISCOVERED_HOUR) | (table.c.key >= first_hour)
+        )
+    )
+    counters = collections.defaultdict(dict)
+    for dimension, key, count in rows:
+        counters[dimension][key] = count
+
+    by_encryption = {k or 'Unknown': v for k, v in counters[NETWORK_ENCRYPTION].items()}
+    by_channel = {k or 'Unknown': v for k, v in counters[NETWORK_CHANNEL].items()}
+    by_risk = {k or 'unknown': v for k, v in counters[AUDIT_RISK].items()}
+
+    # Same buckets as the dashboard cards
+    security = {"secure": 0, "vulnerable": 0, "open": 0}
+    for encryption, count in counters[NETWORK_ENCRYPTION].items():
+        upper = encryption.upper()
+        if 'WPA3' in upper:
+            security["secure"] += count
+        elif not upper or 'OPEN' in upper:
+            security["open"] += count
+        else:
+            security["vulnerable"] += count
+
+    discovered = counters[DISCOVERED_HOUR]
+    start = now.replace(minute=0, second=0, microsecond=0)
+    discoveries = []
+    for i in range(hours - 1, -1, -1):
+        key = hour_key(start - datetime.timedelta(hours=i))
+        discoveries.append({"hour": key + "Z", "count": discovered.get(key, 0)})
+
+    return {
+        "networks": {
+            "total": sum(by_encryption.values()),
+            "by_encryption": by_encryption,
+            "by_channel": by_channel,
+            "security": security,
+        },
+        "audits": {
+            "total": sum(by_risk.values()),
+            "by_risk_level": by_risk,
+        },
+        "discoveries": discoveries,
+    }
@@ -0,0 +1,249 @@
+"""
+Token Registry
+API bearer tokens with scopes, stored only as SHA-256 digests
+
+The registry file (API_TOKENS_FILE, .json or .yaml) lists one entry per
+client:
+
+    {"tokens": [
+        {"name": "sensor-lab-1", "sha256": "<hex digest of the token>",
+         "scopes": ["scan"], "rate_limit": "30/minute"},
+        {"name": "dashboard", "sha256": "...", "scopes": ["read", "audit"]}
+    ]}
+
+Scopes are read (GET endpoints), scan (scans and capture imports), audit
+(running audits) and admin (everything, including the scheduler). It is
+loaded once into a dict keyed by digest, so verifying a request costs one
+SHA-256 of the presented token, a dict lookup and a constant-time compare.
+Each process re-reads the file when its modification time changes
+(checked every API_TOKENS_RELOAD seconds), so tokens can be added or
+revoked without restarting the workers. A file that fails to load leaves
+the previous tokens in place.
+
+The legacy API_TOKEN, when set, is registered as 'default' with the admin
+scope.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+READ = 'read'
+SCAN = 'scan'
+AUDIT = 'audit'
+ADMIN = 'admin'
+
+SCOPES = (READ, SCAN, AUDIT, ADMIN)
+
+_PERIODS = {'second': 1, 'sec': 1, 's': 1, 'minute': 60, 'min': 60, 'm': 60,
+            'hour': 3600, 'h': 3600}
+_RATE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*/\s*(\d*)\s*([a-z]+)\s*$')
+_HEX_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class TokenError(ValueError):
+    """Raised when a token registry file is invalid"""
+
+
+def hash_token(token):
+    """Hex SHA-256 digest of a token, as stored in the registry file"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def parse_rate_limit(value):
+    """
+    Parse a rate limit such as '60/minute', '5/s' or '1000/15min'
+
+    Returns:
+        tuple: (requests, period in seconds), or None for no limit
+    """
+    if value in (None, ''):
+        return None
+    match = _RATE.match(str(value).lower())
+    if not match or match.group(3) not in _PERIODS:
+        raise TokenError(f"Invalid rate limit {value!r} (e.g. '60/minute')")
+    requests = float(match.group(1))
+    period = _PERIODS[match.group(3)] * int(match.group(2) or 1)
+    if requests <= 0 or period <= 0:
+        raise TokenError(f"Invalid rate limit {value!r}: requests and period must be positive")
+    return requests, float(period)
+
+
+class Token:
+    """One registered client"""
+
+    __slots__ = ('name', 'digest', 'scopes', 'rate_limit')
+
+    def __init__(self, name, digest, scopes=(READ,), rate_limit=None):
+        """
+        Args:
+            name: Client name (used in logs and rate limiter keys)
+            digest: Raw SHA-256 digest of the token
+            scopes: Granted scopes
+            rate_limit: (requests, period seconds) or None
+        """
+        self.name = name
+        self.digest = digest
+        self.scopes = frozenset(scopes)
+        self.rate_limit = rate_limit
+
+    def allows(self, scope):
+        return scope in self.scopes or ADMIN in self.scopes
+
+
+def _parse_entry(entry, source):
+    if not isinstance(entry, dict) or not entry.get('name'):
+        raise TokenError(f"{source}: every token needs a name")
+    digest = str(entry.get('sha256', '')).lower()
+    if not _HEX_DIGEST.match(digest):
+        raise TokenError(f"{source}: token {entry['name']!r} needs a hex sha256 digest")
+    scopes = entry.get('scopes', [READ])
+    unknown = set(scopes) - set(SCOPES)
+    if unknown:
+        raise TokenError(f"{source}: token {entry['name']!r} has unknown scopes "
+                         f"{', '.join(sorted(unknown))}")
+    return Token(entry['name'], bytes.fromhex(digest), scopes,
+                 parse_rate_limit(entry.get('rate_limit')))
+
+
+def load_token_file(path):
+    """
+    Read a registry file
+
+    Returns:
+        list: Token objects
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise TokenError("PyYAML is required for YAML token files")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('tokens'), list):
+        raise TokenError(f"{path}: expected an object with a 'tokens' list")
+    tokens = [_parse_entry(entry, path) for entry in data['tokens']]
+    names = [t.name for t in tokens]
+    if len(set(names)) != len(names):
+        raise TokenError(f"{path}: token names must be unique")
+    return tokens
+
+
+class TokenRegistry:
+    """In-memory digest -> Token map with file change polling"""
+
+    def __init__(self, path=None, legacy_token=None, reload_interval=5.0):
+        """
+        Args:
+            path: Registry file (optional)
+            legacy_token: Plain token registered as 'default' with the
+                admin scope (optional)
+            reload_interval: Seconds between modification time checks
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.loaded_at = None
+        self.reloads = 0
+        self.error = None
+        self._static = []
+        if legacy_token:
+            self._static.append(Token('default', hashlib.sha256(legacy_token.encode()).digest(),
+                                      (ADMIN,)))
+        self._tokens = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        # A file that does not exist yet is picked up once it is created
+        self._stamp = self._file_stamp() if path else None
+        self._install(load_token_file(path) if self._stamp else [])
+
+    def _install(self, tokens):
+        by_digest = {t.digest: t for t in self._static}
+        by_digest.update((t.digest, t) for t in tokens)
+        # Swapped in one assignment; readers never see a half-built map
+        self._tokens = by_digest
+        self.loaded_at = time.time()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self):
+        """
+        Re-read the registry file now
+
+        Returns:
+            bool: True if the new tokens are in place
+        """
+        if not self.path:
+            return False
+        try:
+            tokens = load_token_file(self.path)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+            logger.warning("Keeping the previous API tokens: %s", e)
+            return False
+        self._install(tokens)
+        self.error = None
+        self.reloads += 1
+        return True
+
+    def maybe_reload(self):
+        """Reload if the file changed (checked at most every reload_interval)"""
+        now = time.monotonic()
+        if not self.path or now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.reload_interval
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                self._stamp = stamp
+                self.reload()
+
+    def verify(self, token):
+        """
+        Look up a presented token
+
+        Returns:
+            Token or None
+        """
+        self.maybe_reload()
+        digest = hashlib.sha256(token.encode()).digest()
+        found = self._tokens.get(digest)
+        # The lookup is keyed by the digest, which reveals nothing about
+        # the stored tokens; the final comparison is constant-time anyway
+        if found is not None and hmac.compare_digest(found.digest, digest):
+            return found
+        return None
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+def init_token_registry(app):
+    """
+    Load API_TOKENS_FILE (and the legacy API_TOKEN) once and attach the
+    registry as app.extensions['tokens']
+
+    Returns:
+        TokenRegistry
+    """
+    registry = TokenRegistry(
+        app.config.get('API_TOKENS_FILE'),
+        legacy_token=app.config.get('API_TOKEN'),
+        reload_interval=app.config['API_TOKENS_RELOAD'],
+    )
+    app.extensions['tokens'] = registry
+    return registry
@@ -23,6 +23,27 @@ const api = {
         }
     },
 
+    // Fetch one page of a list endpoint; returns the rows and the cursor of
+    // the next page (null on the last page)
+    async getPage(endpoint, cursor = null) {
+        const separator = endpoint.includes('?') ? '&' : '?';
+        const url = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint;
+        try {
+            const response = await fetch(`${API_BASE_URL}${url}`, {
+                headers: this.headers
+            });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return {
+                items: await response.json(),
+                nextCursor: response.headers.get('X-Next-Cursor')
+            };
+        } catch (error) {
+            console.error('API GET Error:', error);
+            showToast('Failed to fetch data', 'error');
+            throw error;
+        }
+    },
+
     async post(endpoint, data = {}) {
         try {
             const response = await fetch(`${API_BASE_URL}${endpoint}`, {
@@ -37,6 +58,58 @@ const api = {
             showToast('Failed to send data', 'error');
             throw error;
         }
+    },
+
+    // Queue a scan job and poll it until it finishes
+    async scan(pollInterval = 1000) {
+        let job = await this.post('/api/networks/scan');
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            job = await this.get(`/api/networks/scan/${job.job_id}`);
+        }
+        if (job.status !== 'completed') {
+            showToast(job.error || 'Scan failed', 'error');
+            throw new Error(job.error || 'Scan failed');
+        }
+        return job;
+    },
+
+    // Subscribe to the server-sent events feed. EventSource cannot send the
+    // Authorization header, so the stream is read with fetch; it reconnects
+    // after errors. handlers maps event types (e.g. 'network.new') to callbacks.
+    async events(handlers, retryDelay = 5000) {
+        const types = Object.keys(handlers).filter(type => type !== 'overflow');
+        const query = types.length ? `?types=${types.join(',')}` : '';
+        const dispatch = block => {
+            let type = 'message';
+            const data = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) type = line.slice(7);
+                else if (line.startsWith('data: ')) data.push(line.slice(6));
+            });
+            if (data.length && handlers[type]) handlers[type](JSON.parse(data.join('\n')));
+        };
+        while (true) {
+            try {
+                const response = await fetch(`${API_BASE_URL}/api/events${query}`, {
+                    headers: this.headers
+                });
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += value;
+                    const blocks = buffer.split('\n\n');
+                    buffer = blocks.pop();
+                    blocks.forEach(dispatch);
+                }
+            } catch (error) {
+                console.error('Event stream error:', error);
+            }
+            await new Promise(resolve => setTimeout(resolve, retryDelay));
+        }
     }
 };
 
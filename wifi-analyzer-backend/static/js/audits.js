@@ -1,15 +1,18 @@
 // Audits Page JavaScript
 
 let allAudits = [];
+let nextCursor = null;
 let currentFilter = 'all';
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     loadAudits();
+    subscribeToEvents();
     
     // Event Listeners
     document.getElementById('refreshBtn')?.addEventListener('click', loadAudits);
     document.getElementById('exportBtn')?.addEventListener('click', exportAudits);
+    document.getElementById('loadMoreBtn')?.addEventListener('click', loadMoreAudits);
     
     // Filter buttons
     document.querySelectorAll('.filter-btn').forEach(btn => {
@@ -22,18 +25,58 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 });
 
-// Load Audits
+// Load Audits: the newest page; older pages are fetched on demand with
+// the X-Next-Cursor of the last one
+const AUDITS_ENDPOINT = '/api/audits?sort=-started_at';
+
 async function loadAudits() {
     try {
-        allAudits = await api.get('/api/audits');
+        const page = await api.getPage(AUDITS_ENDPOINT);
+        allAudits = page.items;
+        nextCursor = page.nextCursor;
         filterAudits();
         updateStats();
+        updateLoadMore();
     } catch (error) {
         console.error('Load audits error:', error);
         showToast('Failed to load audits', 'error');
     }
 }
 
+async function loadMoreAudits() {
+    if (!nextCursor) return;
+    try {
+        const page = await api.getPage(AUDITS_ENDPOINT, nextCursor);
+        const known = new Set(allAudits.map(a => a.id));
+        allAudits.push(...page.items.filter(a => !known.has(a.id)));
+        nextCursor = page.nextCursor;
+        filterAudits();
+        updateStats();
+        updateLoadMore();
+    } catch (error) {
+        console.error('Load audits error:', error);
+    }
+}
+
+function updateLoadMore() {
+    const button = document.getElementById('loadMoreBtn');
+    if (button) button.style.display = nextCursor ? '' : 'none';
+}
+
+// Live Updates: fetch single new audits, reload after batches
+function subscribeToEvents() {
+    api.events({
+        'audit.completed': async event => {
+            const audit = await api.get(`/api/audits/${event.audit_id}`);
+            allAudits.unshift(audit);
+            filterAudits();
+            updateStats();
+        },
+        'audit.batch': loadAudits,
+        'overflow': loadAudits
+    });
+}
+
 // Filter Audits
 function filterAudits() {
     let filtered = [...allAudits];
@@ -24,23 +24,41 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     if (refreshBtn) {
-        refreshBtn.addEventListener('click', loadNetworks);
+        refreshBtn.addEventListener('click', () => Promise.all([loadNetworks(), loadStats()]));
     }
 });
 
 async function initializeDashboard() {
-    await loadNetworks();
-    await loadRecentAudits();
-    updateStats();
+    await Promise.all([loadNetworks(), loadStats(), loadRecentAudits()]);
+    subscribeToEvents();
+}
+
+// Live Updates: refresh the cheap summary views, at most once a second
+let refreshTimer = null;
+function scheduleRefresh(...loaders) {
+    if (refreshTimer) return;
+    refreshTimer = setTimeout(async () => {
+        refreshTimer = null;
+        await Promise.all(loaders.map(load => load()));
+    }, 1000);
+}
+
+function subscribeToEvents() {
+    api.events({
+        'network.new': () => scheduleRefresh(loadNetworks, loadStats),
+        'audit.completed': () => scheduleRefresh(loadRecentAudits, loadStats),
+        'audit.batch': () => scheduleRefresh(loadRecentAudits, loadStats),
+        'overflow': () => scheduleRefresh(loadNetworks, loadRecentAudits, loadStats)
+    });
 }
 
 // Start Network Scan
 async function startScan() {
     showLoading();
     try {
-        const data = await api.post('/api/networks/scan');
+        const data = await api.scan();
         showToast(`Found ${data.found} networks!`, 'success');
-        await loadNetworks();
+        await Promise.all([loadNetworks(), loadStats()]);
     } catch (error) {
         console.error('Scan error:', error);
     } finally {
@@ -48,18 +66,27 @@ async function startScan() {
     }
 }
 
-// Load Networks
+// Load the most recently seen networks (the totals come from /api/stats)
 async function loadNetworks() {
     try {
-        const networks = await api.get('/api/networks');
+        const networks = await api.get('/api/networks?sort=-last_seen&limit=20');
         displayNetworks(networks);
-        updateStats(networks);
-        updateChart(networks);
     } catch (error) {
         console.error('Load networks error:', error);
     }
 }
 
+// Load Precomputed Stats
+async function loadStats() {
+    try {
+        const stats = await api.get('/api/stats');
+        updateStats(stats.networks);
+        updateChart(stats.networks.by_encryption);
+    } catch (error) {
+        console.error('Load stats error:', error);
+    }
+}
+
 // Display Networks
 function displayNetworks(networks) {
     const container = document.getElementById('networksList');
@@ -97,13 +124,7 @@ function displayNetworks(networks) {
 // View Network Details
 async function viewNetworkDetails(networkId) {
     try {
-        const networks = await api.get('/api/networks');
-        const network = networks.find(n => n.id === networkId);
-        
-        if (!network) {
-            showToast('Network not found', 'error');
-            return;
-        }
+        const network = await api.get(`/api/networks/${networkId}`);
 
         const modalBody = document.getElementById('modalBody');
         modalBody.innerHTML = `
@@ -146,7 +167,7 @@ async function startAudit(bssid) {
         const result = await api.post(`/api/audits/start/${bssid}`);
         closeModal('networkModal');
         showToast('Audit completed successfully!', 'success');
-        await loadRecentAudits();
+        await Promise.all([loadRecentAudits(), loadStats()]);
     } catch (error) {
         console.error('Audit error:', error);
     } finally {
@@ -157,7 +178,7 @@ async function startAudit(bssid) {
 // Load Recent Audits
 async function loadRecentAudits() {
     try {
-        const audits = await api.get('/api/audits');
+        const audits = await api.get('/api/audits?sort=-started_at&limit=5');
         const container = document.getElementById('recentAudits');
         
         if (!audits || audits.length === 0) {
@@ -170,10 +191,7 @@ async function loadRecentAudits() {
             return;
         }
 
-        // Show only last 5 audits
-        const recentAudits = audits.slice(-5).reverse();
-        
-        container.innerHTML = recentAudits.map(audit => {
+        container.innerHTML = audits.map(audit => {
             const result = audit.result || {};
             return `
                 <div class="network-item">
@@ -197,39 +215,16 @@ async function loadRecentAudits() {
 }
 
 // Update Stats
-function updateStats(networks = []) {
-    const stats = {
-        total: networks.length,
-        secure: 0,
-        vulnerable: 0,
-        open: 0
-    };
-
-    networks.forEach(network => {
-        const enc = (network.encryption || '').toUpperCase();
-        if (enc.includes('WPA3')) {
-            stats.secure++;
-        } else if (enc.includes('OPEN') || !enc) {
-            stats.open++;
-        } else {
-            stats.vulnerable++;
-        }
-    });
-
-    document.getElementById('totalNetworks').textContent = stats.total;
-    document.getElementById('secureNetworks').textContent = stats.secure;
-    document.getElementById('vulnerableNetworks').textContent = stats.vulnerable;
-    document.getElementById('openNetworks').textContent = stats.open;
+function updateStats(networks = {}) {
+    const security = networks.security || {};
+    document.getElementById('totalNetworks').textContent = networks.total || 0;
+    document.getElementById('secureNetworks').textContent = security.secure || 0;
+    document.getElementById('vulnerableNetworks').textContent = security.vulnerable || 0;
+    document.getElementById('openNetworks').textContent = security.open || 0;
 }
 
 // Update Chart
-function updateChart(networks = []) {
-    const encryptionTypes = {};
-    
-    networks.forEach(network => {
-        const type = network.encryption || 'Unknown';
-        encryptionTypes[type] = (encryptionTypes[type] || 0) + 1;
-    });
+function updateChart(encryptionTypes = {}) {
 
     const ctx = document.getElementById('encryptionChart');
     if (!ctx) return;
@@ -1,16 +1,19 @@
 // Networks Page JavaScript
 
 let allNetworks = [];
+let nextCursor = null;
 let currentFilter = 'all';
 let currentSort = 'signal';
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     loadNetworks();
+    subscribeToEvents();
     
     // Event Listeners
     document.getElementById('scanBtn')?.addEventListener('click', startScan);
     document.getElementById('refreshBtn')?.addEventListener('click', loadNetworks);
+    document.getElementById('loadMoreBtn')?.addEventListener('click', loadMoreNetworks);
     document.getElementById('searchInput')?.addEventListener('input', filterNetworks);
     
     // Filter buttons
@@ -34,7 +37,7 @@ document.addEventListener('DOMContentLoaded', () => {
 async function startScan() {
     showLoading();
     try {
-        const data = await api.post('/api/networks/scan');
+        const data = await api.scan();
         showToast(`Found ${data.found} networks!`, 'success');
         await loadNetworks();
     } catch (error) {
@@ -44,18 +47,65 @@ async function startScan() {
     }
 }
 
-// Load Networks
+// Load Networks: the most recently seen page; older pages are fetched
+// on demand with the X-Next-Cursor of the last one
+const NETWORKS_ENDPOINT = '/api/networks?sort=-last_seen';
+
 async function loadNetworks() {
     try {
-        allNetworks = await api.get('/api/networks');
+        const page = await api.getPage(NETWORKS_ENDPOINT);
+        allNetworks = page.items;
+        nextCursor = page.nextCursor;
         filterNetworks();
         updateFilterCounts();
+        updateLoadMore();
     } catch (error) {
         console.error('Load networks error:', error);
         showToast('Failed to load networks', 'error');
     }
 }
 
+async function loadMoreNetworks() {
+    if (!nextCursor) return;
+    try {
+        const page = await api.getPage(NETWORKS_ENDPOINT, nextCursor);
+        const known = new Set(allNetworks.map(n => n.bssid));
+        allNetworks.push(...page.items.filter(n => !known.has(n.bssid)));
+        nextCursor = page.nextCursor;
+        filterNetworks();
+        updateFilterCounts();
+        updateLoadMore();
+    } catch (error) {
+        console.error('Load networks error:', error);
+    }
+}
+
+function updateLoadMore() {
+    const button = document.getElementById('loadMoreBtn');
+    if (button) button.style.display = nextCursor ? '' : 'none';
+}
+
+// Live Updates: apply network deltas to the loaded list
+function subscribeToEvents() {
+    api.events({
+        'network.new': network => {
+            if (!allNetworks.some(n => n.bssid === network.bssid)) {
+                allNetworks.unshift(network);
+                filterNetworks();
+                updateFilterCounts();
+            }
+        },
+        'network.signal': change => {
+            const network = allNetworks.find(n => n.bssid === change.bssid);
+            if (network) {
+                network.signal = change.signal;
+                filterNetworks();
+            }
+        },
+        'overflow': loadNetworks
+    });
+}
+
 // Filter Networks
 function filterNetworks() {
     let filtered = [...allNetworks];
@@ -16,7 +16,7 @@ def test_scan():
     """Test the scan endpoint"""
     print("Testing WiFi scan...")
     try:
-        response = requests.post(f"{BASE_URL}/api/networks/scan", headers=HEADERS)
+        response = requests.post(f"{BASE_URL}/api/networks/scan?wait=true", headers=HEADERS)
         print(f"Status: {response.status_code}")
         print(f"Response: {json.dumps(response.json(), indent=2)}")
     except Exception as e:
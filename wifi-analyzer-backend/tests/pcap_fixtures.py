@@ -0,0 +1,79 @@
+"""
+Helpers building synthetic 802.11 monitor-mode captures for tests and benchmarks
+"""
+import struct
+
+RSN_PSK = bytes([1, 0, 0x00, 0x0F, 0xAC, 4, 1, 0, 0x00, 0x0F, 0xAC, 4, 1, 0, 0x00, 0x0F, 0xAC, 2])
+RSN_SAE = bytes([1, 0, 0x00, 0x0F, 0xAC, 4, 1, 0, 0x00, 0x0F, 0xAC, 4, 1, 0, 0x00, 0x0F, 0xAC, 8])
+WPA_IE = bytes([0x00, 0x50, 0xF2, 0x01, 1, 0])
+
+
+def build_beacon(bssid, ssid, channel, signal, rsn=None, wpa=False, privacy=None,
+                 probe_response=False):
+    """
+    Build a radiotap + beacon (or probe response) frame
+
+    Args:
+        bssid: 'AA:BB:CC:DD:EE:FF'
+        ssid: Network name ('' for a hidden network)
+        channel: 2.4 GHz channel number
+        signal: Antenna signal in dBm
+        rsn: RSN element body (e.g. RSN_PSK) or None
+        wpa: Include a WPA vendor element
+        privacy: Privacy capability bit (default: set if rsn or wpa)
+
+    Returns:
+        bytes: Frame as captured on a radiotap link
+    """
+    freq = 2407 + 5 * channel
+    # present: flags, channel, antenna signal
+    radiotap = struct.pack('<BBHIBxHHb', 0, 0, 15, (1 << 1) | (1 << 3) | (1 << 5),
+                           0, freq, 0x00A0, signal)
+    mac = bytes(int(b, 16) for b in bssid.split(':'))
+    subtype = 0x50 if probe_response else 0x80
+    header = struct.pack('<BBH6s6s6sH', subtype, 0, 0, b'\xff' * 6, mac, mac, 0)
+    if privacy is None:
+        privacy = bool(rsn or wpa)
+    fixed = struct.pack('<QHH', 0, 100, 0x0001 | (0x0010 if privacy else 0))
+    ssid_bytes = ssid.encode()
+    ies = bytes([0, len(ssid_bytes)]) + ssid_bytes + bytes([3, 1, channel])
+    if rsn:
+        ies += bytes([48, len(rsn)]) + rsn
+    if wpa:
+        ies += bytes([221, len(WPA_IE)]) + WPA_IE
+    return radiotap + header + fixed + ies
+
+
+def pcap_bytes(frames, linktype=127):
+    """Wrap frames into a little endian classic pcap file"""
+    out = [struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, linktype)]
+    for i, frame in enumerate(frames):
+        out.append(struct.pack('<IIII', i, 0, len(frame), len(frame)))
+        out.append(frame)
+    return b''.join(out)
+
+
+def write_pcap(path, frames, linktype=127):
+    """Write frames to a pcap file at `path`"""
+    with open(path, 'wb') as f:
+        f.write(pcap_bytes(frames, linktype))
+
+
+def pcapng_bytes(frames, linktype=127):
+    """Wrap frames into a little endian pcapng file (SHB, IDB, EPBs)"""
+    out = [struct.pack('<IIIHHqI', 0x0A0D0D0A, 28, 0x1A2B3C4D, 1, 0, -1, 28),
+           struct.pack('<IIHHII', 1, 20, linktype, 0, 65535, 20)]
+    for i, frame in enumerate(frames):
+        padded = frame + b'\x00' * (-len(frame) % 4)
+        length = 32 + len(padded)
+        out.append(struct.pack('<IIIIIII', 6, length, 0, 0, i, len(frame), len(frame)))
+        out.append(padded)
+        out.append(struct.pack('<I', length))
+    return b''.join(out)
+
+
+def build_data_frame(bssid):
+    """Build a radiotap + minimal data frame (ignored by the parser)"""
+    radiotap = struct.pack('<BBHI', 0, 0, 8, 0)
+    mac = bytes(int(b, 16) for b in bssid.split(':'))
+    return radiotap + struct.pack('<BBH6s6s6sH', 0x08, 0x01, 0, mac, mac, mac, 0) + b'payload'
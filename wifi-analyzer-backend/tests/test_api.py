@@ -3,8 +3,10 @@ API Tests for WiFi Security Analyzer Backend
 """
 import pytest
 import json
+import time
 from app_new import create_app
 from models import db, Network, Audit
+from services.query_service import encode_cursor
 
 
 @pytest.fixture
@@ -20,6 +22,21 @@ def client():
             db.drop_all()
 
 
+@pytest.fixture
+def tracking_client(monkeypatch):
+    """Create test client for an app with CHANGE_TRACKING enabled"""
+    from config import config
+    monkeypatch.setattr(config['testing'], 'CHANGE_TRACKING', True)
+    app = create_app('testing')
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+        yield client
+        with app.app_context():
+            db.drop_all()
+
+
 @pytest.fixture
 def auth_headers():
     """Return authorization headers"""
@@ -59,7 +76,7 @@ def test_scan_with_invalid_token(client):
 
 def test_scan_with_auth(client, auth_headers):
     """Test scan endpoint with valid authentication"""
-    response = client.post('/api/networks/scan', headers=auth_headers)
+    response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
     assert response.status_code == 201
     data = json.loads(response.data)
     assert 'found' in data
@@ -71,7 +88,7 @@ def test_scan_with_auth(client, auth_headers):
 def test_list_networks(client, auth_headers):
     """Test list networks endpoint"""
     # First scan to populate data
-    client.post('/api/networks/scan', headers=auth_headers)
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
     
     # Then list
     response = client.get('/api/networks', headers=auth_headers)
@@ -84,7 +101,7 @@ def test_list_networks(client, auth_headers):
 def test_start_audit(client, auth_headers):
     """Test starting an audit"""
     # First scan to create a network
-    scan_response = client.post('/api/networks/scan', headers=auth_headers)
+    scan_response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
     scan_data = json.loads(scan_response.data)
     bssid = scan_data['networks'][0]['bssid']
     
@@ -100,7 +117,7 @@ def test_start_audit(client, auth_headers):
 def test_list_audits(client, auth_headers):
     """Test list audits endpoint"""
     # Create a network and audit
-    scan_response = client.post('/api/networks/scan', headers=auth_headers)
+    scan_response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
     scan_data = json.loads(scan_response.data)
     bssid = scan_data['networks'][0]['bssid']
     client.post(f'/api/audits/start/{bssid}', headers=auth_headers)
@@ -116,7 +133,7 @@ def test_list_audits(client, auth_headers):
 def test_export_audits_json(client, auth_headers):
     """Test exporting audits as JSON"""
     # Create audit data
-    scan_response = client.post('/api/networks/scan', headers=auth_headers)
+    scan_response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
     scan_data = json.loads(scan_response.data)
     bssid = scan_data['networks'][0]['bssid']
     client.post(f'/api/audits/start/{bssid}', headers=auth_headers)
@@ -133,7 +150,7 @@ def test_export_audits_json(client, auth_headers):
 def test_export_audits_csv(client, auth_headers):
     """Test exporting audits as CSV"""
     # Create audit data
-    scan_response = client.post('/api/networks/scan', headers=auth_headers)
+    scan_response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
     scan_data = json.loads(scan_response.data)
     bssid = scan_data['networks'][0]['bssid']
     client.post(f'/api/audits/start/{bssid}', headers=auth_headers)
@@ -143,3 +160,704 @@ def test_export_audits_csv(client, auth_headers):
     assert response.status_code == 200
     assert response.headers['Content-Type'] == 'text/csv'
     assert b'Audit ID' in response.data
+
+
+def test_rescan_updates_existing_networks(client, auth_headers):
+    """Test that scanning the same site twice upserts instead of failing"""
+    first = json.loads(client.post('/api/networks/scan?wait=true', headers=auth_headers).data)
+    response = client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    assert response.status_code == 201
+    second = json.loads(response.data)
+
+    first_ids = {n['bssid']: n['id'] for n in first['networks']}
+    second_ids = {n['bssid']: n['id'] for n in second['networks']}
+    assert first_ids == second_ids
+
+    data = json.loads(client.get('/api/networks', headers=auth_headers).data)
+    assert len(data) == 3
+
+
+def test_network_history(client, auth_headers):
+    """Test that each scan appends to the RSSI history of a network"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    scan = json.loads(client.post('/api/networks/scan?wait=true', headers=auth_headers).data)
+    assert 'scan_id' in scan
+
+    response = client.get('/api/networks/history/AA:BB:CC:11:22:33?hours=1',
+                          headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data['observations']) == 2
+    assert data['observations'][-1]['scan_id'] == scan['scan_id']
+    assert data['observations'][0]['signal'] == -50
+
+
+def test_network_history_invalid_hours(client, auth_headers):
+    """Test history endpoint rejects a bad look-back window"""
+    for query in ('hours=abc', 'hours=nan', 'hours=inf', 'hours=-1', 'hours=1e12',
+                  'limit=-1', 'limit=x'):
+        response = client.get(f'/api/networks/history/AA:BB:CC:11:22:33?{query}',
+                              headers=auth_headers)
+        assert response.status_code == 400, query
+
+
+def test_list_networks_pagination(client, auth_headers):
+    """Test keyset pagination over the networks list"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+
+    response = client.get('/api/networks?limit=2&sort=-signal', headers=auth_headers)
+    assert response.status_code == 200
+    first_page = json.loads(response.data)
+    assert [n['signal'] for n in first_page] == [-50, -60]
+    cursor = response.headers['X-Next-Cursor']
+
+    response = client.get(f'/api/networks?limit=2&sort=-signal&cursor={cursor}',
+                          headers=auth_headers)
+    second_page = json.loads(response.data)
+    assert [n['signal'] for n in second_page] == [-70]
+    assert 'X-Next-Cursor' not in response.headers
+
+    for value, row_id in (({'a': 1}, 'x'), ('-50', 'x'), (True, 'x'), (-50, {'a': 1})):
+        bad = encode_cursor('signal', value, row_id)
+        response = client.get(f'/api/networks?sort=-signal&cursor={bad}', headers=auth_headers)
+        assert response.status_code == 400, (value, row_id)
+
+
+def test_list_networks_default_page_size(client, auth_headers):
+    """Test a request without limit still gets one page"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    client.application.config['API_PAGE_SIZE'] = 2
+
+    response = client.get('/api/networks', headers=auth_headers)
+    assert len(json.loads(response.data)) == 2
+    assert 'X-Next-Cursor' in response.headers
+
+
+def test_list_networks_filters_and_fields(client, auth_headers):
+    """Test server-side filters and field projection"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+
+    response = client.get('/api/networks?encryption=open,wpa3&fields=bssid,encryption',
+                          headers=auth_headers)
+    data = json.loads(response.data)
+    assert sorted(n['encryption'] for n in data) == ['Open', 'WPA3']
+    assert all(set(n) == {'bssid', 'encryption'} for n in data)
+
+    data = json.loads(client.get('/api/networks?min_signal=-55', headers=auth_headers).data)
+    assert [n['ssid'] for n in data] == ['HomeNetwork']
+
+    response = client.get('/api/networks?fields=password', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_list_audits_risk_filter(client, auth_headers):
+    """Test filtering audits by risk level"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    for bssid in ['AA:BB:CC:11:22:33', '12:34:56:AA:BB:CC']:
+        client.post(f'/api/audits/start/{bssid}', headers=auth_headers)
+
+    response = client.get('/api/audits?risk_level=high&fields=network_bssid,result',
+                          headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data) == 1
+    assert data[0]['network_bssid'] == '12:34:56:AA:BB:CC'
+    assert data[0]['result']['risk_level'] == 'high'
+
+
+def test_export_audits_ndjson_gzip(client, auth_headers):
+    """Test streaming NDJSON export with on-the-fly gzip"""
+    import gzip
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    for bssid in ['AA:BB:CC:11:22:33', '12:34:56:AA:BB:CC']:
+        client.post(f'/api/audits/start/{bssid}', headers=auth_headers)
+
+    headers = dict(auth_headers, **{'Accept-Encoding': 'gzip'})
+    response = client.get('/api/audits/export?format=ndjson', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode().splitlines()
+    audits = [json.loads(line) for line in lines]
+    assert [a['network_bssid'] for a in audits] == ['AA:BB:CC:11:22:33', '12:34:56:AA:BB:CC']
+    assert audits[1]['result']['risk_level'] == 'high'
+
+
+def test_export_audits_time_range(client, auth_headers):
+    """Test since/until filters on the export"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    client.post('/api/audits/start/AA:BB:CC:11:22:33', headers=auth_headers)
+
+    response = client.get('/api/audits/export?since=2000-01-01T00:00:00Z', headers=auth_headers)
+    assert json.loads(response.data)['total_audits'] == 1
+    response = client.get('/api/audits/export?until=2000-01-01T00:00:00Z', headers=auth_headers)
+    assert json.loads(response.data) == {
+        'export_date': json.loads(response.data)['export_date'],
+        'audits': [],
+        'total_audits': 0
+    }
+    response = client.get('/api/audits/export?since=yesterday', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_scan_job_status(client, auth_headers):
+    """Test that a scan is queued and its job can be polled"""
+    response = client.post('/api/networks/scan', headers=auth_headers)
+    assert response.status_code == 202
+    job = json.loads(response.data)
+    assert job['status'] in ('queued', 'running', 'completed')
+
+    jobs = client.application.extensions['scan_jobs']
+    jobs.wait(jobs.get(job['job_id']), 10)
+    response = client.get(job['status_url'], headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'completed'
+    assert data['found'] == 3
+
+    response = client.get('/api/networks/scan/unknown', headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_scan_unknown_interface(client, auth_headers):
+    """Test that a scan of an interface the backend lacks fails instead of faking data"""
+    from services.scanners import UnknownInterface
+
+    def scan(interface):
+        raise UnknownInterface(f"Unknown interface '{interface}'")
+
+    client.application.extensions['scan_jobs'].scan_fn = scan
+    response = client.post('/api/networks/scan?wait=true', headers=auth_headers,
+                           json={'interface': 'wlan9'})
+    assert response.status_code == 400
+    assert 'wlan9' in json.loads(response.data)['error']
+    assert json.loads(client.get('/api/networks', headers=auth_headers).data) == []
+
+
+def test_ingest_capture(client, auth_headers, tmp_path):
+    """Test importing a pcap from the capture directory"""
+    from tests.pcap_fixtures import build_beacon, write_pcap, RSN_PSK
+    client.application.config['CAPTURE_DIR'] = str(tmp_path)
+    write_pcap(tmp_path / 'field.pcap', [
+        build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -40, rsn=RSN_PSK),
+        build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -50, rsn=RSN_PSK),
+    ])
+
+    response = client.post('/api/networks/ingest?wait=true', headers=auth_headers,
+                           json={'file': 'field.pcap'})
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['found'] == 1
+    assert data['summary']['frames'] == 2
+    assert data['summary']['audited'] == 1
+    audits = json.loads(client.get('/api/audits?bssid=AA:BB:CC:11:22:33',
+                                   headers=auth_headers).data)
+    assert len(audits) == 1
+
+    response = client.get('/api/networks', headers=auth_headers)
+    nets = json.loads(response.data)
+    assert [(n['bssid'], n['signal'], n['encryption']) for n in nets] == [
+        ("AA:BB:CC:11:22:33", -45, "WPA2-PSK")
+    ]
+
+    for name in ('../field.pcap', 'missing.pcap', None, 5):
+        response = client.post('/api/networks/ingest', headers=auth_headers,
+                               json={'file': name})
+        assert response.status_code == 400
+    for files in ('field.pcap', ['field.pcap', {'name': 'x'}], [['field.pcap']]):
+        response = client.post('/api/networks/ingest', headers=auth_headers,
+                               json={'files': files})
+        assert response.status_code == 400
+
+
+def test_batch_audit(client, auth_headers):
+    """Test auditing a filtered set and then all networks in one request"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+
+    response = client.post('/api/audits/batch', headers=auth_headers,
+                           json={'encryption': ['Open', 'WPA3']})
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['audited'] == 2
+    assert data['risk_levels'] == {'low': 1, 'medium': 0, 'high': 1}
+
+    response = client.post('/api/audits/batch', headers=auth_headers)
+    data = json.loads(response.data)
+    assert data['audited'] == 3
+
+    response = client.get('/api/audits?bssid=AA:BB:CC:11:22:33', headers=auth_headers)
+    audit = json.loads(response.data)[0]
+    single = client.post('/api/audits/start/AA:BB:CC:11:22:33', headers=auth_headers)
+    assert audit['result'] == json.loads(single.data)['result']
+    assert audit['rule_set'] == json.loads(single.data)['rule_set'] == data['rule_set']
+
+    response = client.post('/api/audits/batch', headers=auth_headers,
+                           json={'bssids': 'AA:BB:CC:11:22:33'})
+    assert response.status_code == 400
+
+    response = client.post('/api/audits/batch', headers=auth_headers,
+                           json={'channel': 6, 'min_signal': -70})
+    assert response.status_code == 201
+    assert json.loads(response.data)['audited'] == 1
+    for body in ({'since': 123}, {'channel': {'gt': 1}}, {'bssids': [1]},
+                 {'bssids': ['AA:BB:CC:11:22:33'] * 1001}):
+        response = client.post('/api/audits/batch', headers=auth_headers, json=body)
+        assert response.status_code == 400, body
+
+
+def test_audit_findings(client, auth_headers):
+    """Test that fired rules are stored as findings and can be filtered on"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    audit_id = json.loads(client.post('/api/audits/start/12:34:56:AA:BB:CC',
+                                      headers=auth_headers).data)['audit_id']
+    client.post('/api/audits/start/DE:AD:BE:EF:00:01', headers=auth_headers)
+
+    data = json.loads(client.get(f'/api/audits/{audit_id}', headers=auth_headers).data)
+    assert [f['rule_id'] for f in data['findings']] == ['open-network', 'weak-cipher']
+    assert data['findings'][0]['severity'] == 'high'
+
+    response = client.get('/api/audits?finding=open-network&fields=id,risk_level,open_network',
+                          headers=auth_headers)
+    assert json.loads(response.data) == [
+        {'id': audit_id, 'risk_level': 'high', 'open_network': True}
+    ]
+
+    response = client.get('/api/audits/export?format=csv', headers=auth_headers)
+    assert b'high,Network is unencrypted and vulnerable to eavesdropping; ' \
+           b'Network uses weak encryption' in response.data
+
+
+def test_stats(client, auth_headers):
+    """Test that the dashboard stats follow scans and audits"""
+    response = client.get('/api/stats', headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['networks']['total'] == 0
+    assert len(data['discoveries']) == 24
+
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    client.post('/api/audits/start/12:34:56:AA:BB:CC', headers=auth_headers)
+    client.post('/api/audits/batch', headers=auth_headers)
+
+    data = json.loads(client.get('/api/stats?hours=2', headers=auth_headers).data)
+    assert data['networks']['total'] == 3
+    assert data['networks']['by_encryption'] == {'WPA2': 1, 'Open': 1, 'WPA3': 1}
+    assert data['networks']['security'] == {'secure': 1, 'vulnerable': 1, 'open': 1}
+    assert data['audits'] == {'total': 4, 'by_risk_level': {'high': 2, 'medium': 1, 'low': 1}}
+    assert [h['count'] for h in data['discoveries']] == [0, 3]
+
+    response = client.get('/api/stats?hours=0', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_event_stream(client, auth_headers):
+    """Test that scans and audits are pushed to the event stream"""
+    assert client.get('/api/events?types=bogus', headers=auth_headers).status_code == 400
+
+    response = client.get('/api/events', headers=auth_headers)
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    assert next(stream) == b': connected\n\n'
+
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    chunk = next(stream).decode()
+    assert chunk.count('event: network.new') == 3
+    assert '"bssid":"12:34:56:AA:BB:CC"' in chunk
+
+    client.post('/api/audits/start/12:34:56:AA:BB:CC', headers=auth_headers)
+    chunk = next(stream).decode()
+    assert chunk.startswith('event: audit.completed')
+    assert '"risk_level":"high"' in chunk
+
+    events = client.application.extensions['events']
+    assert events.subscriber_count == 1
+    response.close()
+    assert events.subscriber_count == 0
+
+
+def test_scheduler_state(client, auth_headers):
+    """Test the scheduler state and control endpoints"""
+    data = json.loads(client.get('/api/scheduler', headers=auth_headers).data)
+    assert data['running'] is False
+    assert data['interfaces'][0]['interface'] is None
+    assert data['interfaces'][0]['last_run'] is None
+
+    response = client.post('/api/scheduler/start', headers=auth_headers)
+    assert response.status_code == 201
+    scheduler = client.application.extensions['scan_scheduler']
+    for _ in range(500):
+        if scheduler.states[None].runs:
+            break
+        time.sleep(0.01)
+    scheduler.stop()
+    data = json.loads(client.get('/api/scheduler', headers=auth_headers).data)
+    assert data['running'] is False
+    assert data['interfaces'][0]['last_run']['found'] == 3
+
+
+def test_network_changes(tracking_client, auth_headers):
+    """Test the change feed of consecutive scans"""
+    client = tracking_client
+    first = json.loads(client.post('/api/networks/scan?wait=true', headers=auth_headers).data)
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    # Unchanged readings are not stored again
+    history = json.loads(client.get('/api/networks/history/AA:BB:CC:11:22:33',
+                                    headers=auth_headers).data)
+    assert [o['scan_id'] for o in history['observations']] == [first['scan_id']]
+
+    response = client.get('/api/networks/changes?limit=2', headers=auth_headers)
+    assert response.status_code == 200
+    changes = json.loads(response.data)
+    assert [c['kind'] for c in changes] == ['appeared', 'appeared']
+    assert changes[0]['scan_id'] == first['scan_id']
+    cursor = response.headers['X-Next-Cursor']
+
+    response = client.get(f'/api/networks/changes?cursor={cursor}', headers=auth_headers)
+    assert [c['bssid'] for c in json.loads(response.data)] == ['DE:AD:BE:EF:00:01']
+
+    response = client.get('/api/networks/changes?since=2999-01-01T00:00:00Z',
+                          headers=auth_headers)
+    assert json.loads(response.data) == []
+    response = client.get('/api/networks/changes?since=yesterday', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_rogue_networks(client, auth_headers):
+    """Test that scans feed the rogue AP index behind /api/networks/rogue"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    assert json.loads(client.get('/api/networks/rogue', headers=auth_headers).data) == []
+
+    networks = [
+        {"ssid": "OfficeNet", "bssid": "DE:AD:BE:EF:00:02", "channel": 6,
+         "signal": -62, "encryption": "WPA3"},
+        {"ssid": "officenet", "bssid": "00:13:37:00:00:01", "channel": 1,
+         "signal": -61, "encryption": "Open"},
+    ]
+    detector = client.application.extensions['rogue_detector']
+    version = detector.version
+    with client.application.app_context():
+        from services.scan_service import save_networks_to_db
+        save_networks_to_db(db, Network, networks)
+    # Its own write keeps the index current without a rebuild
+    assert detector.version == version + 1
+
+    data = json.loads(client.get('/api/networks/rogue?ssid=OFFICENET',
+                                 headers=auth_headers).data)
+    assert [(f['bssid'], f['kinds']) for f in data] == [
+        ('00:13:37:00:00:01', ['encryption_mismatch', 'vendor_mismatch'])
+    ]
+    assert data[0]['group_size'] == 3
+
+
+def test_rogue_index_follows_other_workers(client, auth_headers):
+    """Test that networks written by another process reach the rogue index"""
+    from services.scan_service import save_networks_to_db
+    app = client.application
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    detector = app.extensions['rogue_detector']
+    assert client.get('/api/networks/rogue', headers=auth_headers).status_code == 200
+    version = detector.version
+
+    # Another worker: same table, its own detector
+    with app.app_context():
+        del app.extensions['rogue_detector']
+        save_networks_to_db(db, Network, [
+            {"ssid": "OfficeNet", "bssid": "00:13:37:00:00:01", "channel": 1,
+             "signal": -61, "encryption": "Open"},
+        ])
+        app.extensions['rogue_detector'] = detector
+        # This worker's next write does not hide the gap
+        save_networks_to_db(db, Network, [
+            {"ssid": "Guest", "bssid": "02:00:00:00:00:09", "channel": 11,
+             "signal": -70, "encryption": "Open"},
+        ])
+    assert '00:13:37:00:00:01' not in detector.by_bssid
+    assert detector.version == version
+
+    data = json.loads(client.get('/api/networks/rogue', headers=auth_headers).data)
+    assert [f['bssid'] for f in data] == ['00:13:37:00:00:01']
+    assert '02:00:00:00:00:09' in detector.by_bssid
+    assert detector.version == version + 2
+
+
+def test_response_cache(client, auth_headers):
+    """Test that cached reads are invalidated by scans and audits"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    first = client.get('/api/networks', headers=auth_headers)
+    assert first.headers['X-Cache'] == 'MISS'
+    again = client.get('/api/networks', headers=auth_headers)
+    assert again.headers['X-Cache'] == 'HIT'
+    assert again.data == first.data
+
+    network = json.loads(first.data)[0]
+    assert client.get(f"/api/networks/{network['id']}", headers=auth_headers) \
+        .headers['X-Cache'] == 'MISS'
+    assert client.get(f"/api/networks/{network['id']}", headers=auth_headers) \
+        .headers['X-Cache'] == 'HIT'
+    assert client.get('/api/audits', headers=auth_headers).data == b'[]\n'
+
+    networks = [dict(network, signal=-20)]
+    with client.application.app_context():
+        from services.scan_service import save_networks_to_db
+        save_networks_to_db(db, Network, networks)
+    response = client.get(f"/api/networks/{network['id']}", headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert json.loads(response.data)['signal'] == -20
+    assert client.get('/api/networks', headers=auth_headers).headers['X-Cache'] == 'MISS'
+
+    client.post(f"/api/audits/start/{network['bssid']}", headers=auth_headers)
+    assert len(json.loads(client.get('/api/audits', headers=auth_headers).data)) == 1
+
+    stats = json.loads(client.get('/api/stats/cache', headers=auth_headers).data)
+    assert stats['hits'] == 2
+    assert stats['stale'] == 3
+    assert stats['invalidations'] == 3
+
+
+def shared_apps(tmp_path, monkeypatch, count=2):
+    """Apps on one database file, like gunicorn workers"""
+    from config import config
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI',
+                        f"sqlite:///{tmp_path / 'shared.db'}")
+    apps = [create_app('testing') for _ in range(count)]
+    with apps[0].app_context():
+        db.create_all()
+    return apps
+
+
+def close_apps(apps):
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def test_scan_job_polled_through_other_app(tmp_path, monkeypatch, auth_headers):
+    """Test that a job accepted by one worker can be polled through another"""
+    worker_a, worker_b = shared_apps(tmp_path, monkeypatch)
+    scan = json.loads(worker_a.test_client().post('/api/networks/scan?wait=true',
+                                                  headers=auth_headers).data)
+    other = worker_b.test_client()
+
+    response = other.get(f"/api/networks/scan/{scan['job_id']}", headers=auth_headers)
+    assert response.status_code == 200
+    job = json.loads(response.data)
+    assert job['status'] == 'completed'
+    assert job['found'] == 3
+    assert [n['bssid'] for n in job['networks']] == [n['bssid'] for n in scan['networks']]
+    assert other.get('/api/networks/scan/unknown', headers=auth_headers).status_code == 404
+
+    def fail(interface):
+        raise RuntimeError("radio busy")
+
+    worker_a.extensions['scan_jobs'].scan_fn = fail
+    scan = json.loads(worker_a.test_client().post('/api/networks/scan?wait=true',
+                                                  headers=auth_headers).data)
+    job = json.loads(other.get(f"/api/networks/scan/{scan['job_id']}", headers=auth_headers).data)
+    assert (job['status'], job['error']) == ('failed', 'radio busy')
+    close_apps([worker_a, worker_b])
+
+
+def test_cache_follows_writes_of_other_apps(tmp_path, monkeypatch, auth_headers):
+    """Test that a cached body is never served under a newer ETag"""
+    from services.scan_service import save_networks_to_db
+    worker_a, worker_b = shared_apps(tmp_path, monkeypatch)
+    network = {"ssid": "Lab", "bssid": "02:00:00:00:00:01", "channel": 6,
+               "signal": -50, "encryption": "WPA2"}
+    with worker_a.app_context():
+        save_networks_to_db(db, Network, [network])
+
+    client = worker_b.test_client()
+    first = client.get('/api/networks', headers=auth_headers)
+    assert client.get('/api/networks', headers=auth_headers).headers['X-Cache'] == 'HIT'
+
+    # Worker A writes; worker B's cache never hears of it
+    with worker_a.app_context():
+        save_networks_to_db(db, Network, [dict(network, bssid="02:00:00:00:00:02")])
+    response = client.get('/api/networks', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert len(json.loads(response.data)) == 2
+    response = client.get('/api/networks',
+                          headers=dict(auth_headers, **{'If-None-Match': response.headers['ETag']}))
+    assert response.status_code == 304
+    close_apps((worker_a, worker_b))
+
+
+def test_cached_stats_follow_other_apps(tmp_path, monkeypatch, auth_headers):
+    """Test that the memory cache of one worker sees the writes of another"""
+    from services.scan_service import save_networks_to_db
+    worker_a, worker_b = shared_apps(tmp_path, monkeypatch)
+    client = worker_b.test_client()
+    assert json.loads(client.get('/api/stats', headers=auth_headers).data)['networks']['total'] == 0
+    assert client.get('/api/stats', headers=auth_headers).headers['X-Cache'] == 'HIT'
+
+    with worker_a.app_context():
+        save_networks_to_db(db, Network, [{"ssid": "Lab", "bssid": "02:00:00:00:00:01",
+                                           "channel": 6, "signal": -50, "encryption": "WPA2"}])
+    response = client.get('/api/stats', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert json.loads(response.data)['networks']['total'] == 1
+    close_apps((worker_a, worker_b))
+
+
+def test_conditional_get(client, auth_headers):
+    """Test ETags and 304 answers on the list and detail endpoints"""
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    response = client.get('/api/networks', headers=auth_headers)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    response = client.get('/api/networks', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    other = client.get('/api/networks?limit=1', headers=auth_headers).headers['ETag']
+    assert other != etag
+
+    audits_etag = client.get('/api/audits', headers=auth_headers).headers['ETag']
+    # A rescan refreshes last_seen, so the list changes
+    client.post('/api/networks/scan?wait=true', headers=auth_headers)
+    response = client.get('/api/networks', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    network = json.loads(client.get('/api/networks', headers=auth_headers).data)[0]
+    with client.application.app_context():
+        from services.scan_service import save_networks_to_db
+        save_networks_to_db(db, Network, [dict(network, signal=-20)])
+    response = client.get('/api/networks', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    response = client.get('/api/audits', headers=dict(auth_headers, **{'If-None-Match': audits_etag}))
+    assert response.status_code == 304
+
+    client.post('/api/audits/start/12:34:56:AA:BB:CC', headers=auth_headers)
+    response = client.get('/api/audits', headers=dict(auth_headers, **{'If-None-Match': audits_etag}))
+    assert response.status_code == 200
+    audit_id = json.loads(response.data)[0]['id']
+    etag = client.get(f'/api/audits/{audit_id}', headers=auth_headers).headers['ETag']
+    response = client.get(f'/api/audits/{audit_id}',
+                          headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+
+    response = client.get('/api/audits/missing', headers=auth_headers)
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_token_scopes(client, auth_headers, tmp_path):
+    """Test that registry tokens are limited to their scopes"""
+    from services.token_registry import TokenRegistry, hash_token
+    path = tmp_path / 'tokens.json'
+    path.write_text(json.dumps({"tokens": [
+        {"name": "dashboard", "sha256": hash_token("dash-token"), "scopes": ["read"]},
+        {"name": "sensor", "sha256": hash_token("sensor-token"), "scopes": ["scan"]},
+    ]}))
+    client.application.extensions['tokens'] = TokenRegistry(str(path), legacy_token='mysecrettoken')
+    dashboard = {'Authorization': 'Bearer dash-token'}
+    sensor = {'Authorization': 'Bearer  sensor-token '}
+
+    assert client.get('/api/networks', headers=dashboard).status_code == 200
+    response = client.post('/api/networks/scan', headers=dashboard)
+    assert response.status_code == 403
+    assert json.loads(response.data)['error'] == "Token lacks the 'scan' scope"
+    assert client.post('/api/networks/scan', headers=sensor).status_code == 202
+    assert client.get('/api/networks', headers=sensor).status_code == 403
+    assert client.post('/api/scheduler/stop', headers=auth_headers).status_code == 200
+    assert client.get('/api/networks', headers={'Authorization': 'Basic abc'}).status_code == 401
+
+
+def test_empty_token_registry_is_kept(client, auth_headers):
+    """Test that an empty registry is not rebuilt on every request"""
+    from services.token_registry import TokenRegistry
+    registry = TokenRegistry(None)
+    client.application.extensions['tokens'] = registry
+
+    assert client.get('/api/networks', headers=auth_headers).status_code == 403
+    assert client.get('/api/networks', headers=auth_headers).status_code == 403
+    assert client.application.extensions['tokens'] is registry
+
+
+def test_rate_limit_and_scan_queue(client, auth_headers):
+    """Test 429 answers from the rate limiter and the scan queue"""
+    from services.rate_limiter import RateLimiter, MemoryBuckets
+    from services.scan_jobs import ScanQueueFull
+    app = client.application
+    app.extensions['rate_limiter'] = RateLimiter(MemoryBuckets(), {'scan': (1.0, 60.0)})
+
+    assert client.post('/api/networks/scan?wait=true', headers=auth_headers).status_code == 201
+    response = client.post('/api/networks/scan', headers=auth_headers)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    # Other endpoint classes keep their own budget
+    assert client.post('/api/audits/batch', headers=auth_headers).status_code == 201
+
+    app.extensions['rate_limiter'] = None
+    jobs = app.extensions['scan_jobs']
+    jobs.max_pending = 0
+    response = client.post('/api/networks/scan', headers=auth_headers)
+    assert response.status_code == 429
+    assert json.loads(response.data)['error'] == str(ScanQueueFull(1))
+    assert response.headers['Retry-After'] == str(json.loads(response.data)['retry_after'])
+
+    stats = json.loads(client.get('/api/stats/limits', headers=auth_headers).data)
+    assert stats['rate_limiter'] is None
+    assert stats['scan_queue']['rejected'] == 1
+
+
+def test_metrics_endpoint(client, auth_headers):
+    """Test the Prometheus exposition of request, scan and write metrics"""
+    from services.metrics import init_metrics
+    app = client.application
+    assert client.get('/metrics', headers=auth_headers).status_code == 404
+    app.config['METRICS_ENABLED'] = True
+    init_metrics(app)
+
+    assert client.post('/api/networks/scan?wait=true', headers=auth_headers).status_code == 201
+    client.get('/api/networks', headers=auth_headers)
+    client.post('/api/audits/batch', headers=auth_headers)
+    response = client.get('/metrics', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert ('wifi_http_request_duration_seconds_count'
+            '{endpoint="networks.list_networks",method="GET",status="200"} 1') in text
+    assert 'wifi_scan_duration_seconds_count{backend="simulated"} 1' in text
+    assert 'wifi_scan_access_points_sum{backend="simulated"} 3' in text
+    assert 'wifi_rows_written_total{table="audit"} 3' in text
+    assert 'wifi_db_commit_duration_seconds_count' in text
+    assert 'wifi_cache_misses_total 1' in text
+    assert 'wifi_scan_requests_total{outcome="admitted"} 1' in text
+
+
+def test_request_profiling(client, auth_headers, tmp_path):
+    """Test profiling a request on demand and downloading the result"""
+    import pstats
+    from services.profiler import init_profiler
+    app = client.application
+    app.config['PROFILING_ENABLED'] = True
+    init_profiler(app)
+
+    response = client.get('/api/networks', headers=auth_headers)
+    assert 'X-Profile-Id' not in response.headers
+    response = client.get('/api/networks?limit=5', headers={**auth_headers, 'X-Profile': '1'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    # Servers close the body once it is sent, which completes the profile
+    response.close()
+
+    listed = json.loads(client.get('/api/profiles', headers=auth_headers).data)
+    assert [p['profile_id'] for p in listed] == [profile_id]
+    detail = json.loads(client.get(f'/api/profiles/{profile_id}', headers=auth_headers).data)
+    assert detail['path'] == '/api/networks' and detail['trigger'] == 'header'
+    assert detail['sql_statements'] > 0
+    assert any('FROM network' in s['statement'] for s in detail['sql'])
+    assert detail['top_functions']
+
+    path = tmp_path / 'profile.pstats'
+    path.write_bytes(client.get(f'/api/profiles/{profile_id}/pstats', headers=auth_headers).data)
+    assert pstats.Stats(str(path)).total_calls > 0
+    collapsed = client.get(f'/api/profiles/{profile_id}/collapsed', headers=auth_headers)
+    assert collapsed.content_type.startswith('text/plain')
+    assert client.get('/api/profiles/unknown', headers=auth_headers).status_code == 404
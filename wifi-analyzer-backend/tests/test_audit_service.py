@@ -0,0 +1,91 @@
+"""
+Audit Service Tests
+"""
+import json
+import pytest
+from app_new import create_app
+from sqlalchemy import text
+from models import db, Audit, AuditFinding, Network, StatCounter, upgrade_schema
+from services.audit_service import backfill_audit_columns
+
+
+@pytest.fixture
+def app():
+    """Create app with an empty in-memory database"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def legacy_result(risk, weak, is_open, signal, details):
+    return json.dumps({"weak_cipher": weak, "open_network": is_open,
+                       "signal_strength": signal, "risk_level": risk, "details": details})
+
+
+def test_backfill_legacy_audits(app):
+    """Test that pre-column audits are converted in batches and only once"""
+    db.session.add(Network(id='n1', ssid='Cafe', bssid='12:34:56:AA:BB:CC'))
+    db.session.commit()
+    rows = [
+        {"id": f"a{i}", "network_bssid": "12:34:56:AA:BB:CC", "result_json": blob}
+        for i, blob in enumerate([
+            legacy_result("high", True, True, -40, [
+                "Network is unencrypted and vulnerable to eavesdropping",
+                "Network uses weak encryption that may be vulnerable",
+                "Strong signal strength detected",
+            ]),
+            legacy_result("low", False, False, -70, []),
+            legacy_result("medium", True, False, -60, ["Something retired"]),
+            "not json",
+        ])
+    ]
+    db.session.execute(Audit.__table__.insert(), rows)
+    db.session.commit()
+
+    assert backfill_audit_columns(db.engine, batch_size=3) == 4
+    assert backfill_audit_columns(db.engine, batch_size=3) == 0
+
+    audits = {a.id: a for a in Audit.query.all()}
+    assert (audits['a0'].risk_level, audits['a0'].open_network, audits['a0'].signal_strength) \
+        == ('high', True, -40)
+    assert [f.rule_id for f in audits['a0'].findings] == \
+        ['open-network', 'weak-cipher', 'strong-signal']
+    assert audits['a1'].weak_cipher is False and audits['a1'].findings == []
+    assert [(f.rule_id, f.message) for f in audits['a2'].findings] == \
+        [('legacy', 'Something retired')]
+    assert audits['a3'].risk_level == 'unknown'
+    assert AuditFinding.query.count() == 4
+
+
+def test_migrate_command_converts_old_databases(app):
+    """Test that startup only patches the schema and `flask migrate` converts the rows"""
+    db.session.add(Network(id='n1', ssid='Cafe', bssid='12:34:56:AA:BB:CC'))
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_audit_risk_level_started_at"))
+        conn.execute(text("ALTER TABLE network DROP COLUMN last_seen"))
+        conn.execute(Audit.__table__.insert(), [
+            {"id": "a0", "network_bssid": "12:34:56:AA:BB:CC",
+             "result_json": legacy_result("high", True, True, -40, [])},
+        ])
+
+    upgrade_schema()
+    assert Network.query.one().last_seen is None
+    assert Audit.query.one().risk_level is None
+    assert StatCounter.query.count() == 0
+
+    result = app.test_cli_runner().invoke(args=['migrate'])
+    assert result.exit_code == 0, result.output
+    assert 'network.last_seen: 1 row(s)' in result.output
+    assert 'audits: 1 row(s)' in result.output
+    db.session.expire_all()
+    network = Network.query.one()
+    assert network.last_seen == network.discovered_at
+    assert Audit.query.one().risk_level == 'high'
+    assert StatCounter.query.filter_by(dimension='audit_risk', key='high').one().count == 1
+
+    result = app.test_cli_runner().invoke(args=['migrate'])
+    assert 'network.last_seen: 0 row(s)' in result.output
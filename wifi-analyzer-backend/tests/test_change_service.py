@@ -0,0 +1,103 @@
+"""
+Change Detection Tests
+"""
+import datetime
+import pytest
+from app_new import create_app
+from models import db, Network, NetworkChange, Observation
+from services.change_service import ChangeTracker
+from services.stats_service import get_stats
+
+
+@pytest.fixture
+def app():
+    """Create app with an empty in-memory database"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def scan(**overrides):
+    networks = {
+        "AA": {"ssid": "Home", "bssid": "AA", "channel": 6, "signal": -50, "encryption": "WPA2"},
+        "BB": {"ssid": "Cafe", "bssid": "BB", "channel": 11, "signal": -70, "encryption": "Open"},
+        "CC": {"ssid": "Office", "bssid": "CC", "channel": 1, "signal": -60, "encryption": "WPA3"},
+    }
+    for bssid, values in overrides.items():
+        if values is None:
+            networks.pop(bssid)
+        else:
+            networks[bssid] = dict(networks.get(bssid, {"bssid": bssid}), **values)
+    return list(networks.values())
+
+
+def kinds(changes):
+    return sorted((c["bssid"], c["kind"], c["old_value"], c["new_value"]) for c in changes)
+
+
+def test_only_changes_are_written(app):
+    """Test that a scan writes only appeared and changed networks"""
+    tracker = ChangeTracker(signal_delta=5, missed_scans=2)
+    saved, changes = tracker.save(db, scan(), scan_id="s1")
+    assert len(saved) == 3
+    assert [c["kind"] for c in changes] == ["appeared"] * 3
+
+    saved, changes = tracker.save(db, scan(AA={"signal": -53}), scan_id="s2")
+    assert changes == []
+    assert len(saved) == 3
+    assert Observation.query.count() == 3
+
+    _, changes = tracker.save(db, scan(AA={"signal": -58}, BB={"encryption": "WPA2"},
+                                       DD={"ssid": "New", "channel": 36, "signal": -80,
+                                           "encryption": "WPA3"}), scan_id="s3")
+    assert kinds(changes) == [
+        ("AA", "signal", "-50", "-58"),
+        ("BB", "encryption", "Open", "WPA2"),
+        ("DD", "appeared", None, "New"),
+    ]
+    assert Observation.query.filter_by(scan_id="s3").count() == 3
+    assert db.session.get(Network, db.session.query(Network.id).filter_by(bssid="BB")
+                          .scalar()).encryption == "WPA2"
+    assert get_stats(db)["networks"]["by_encryption"] == {"WPA2": 2, "WPA3": 2}
+
+
+def test_disappeared_after_missed_scans(app):
+    """Test that a BSSID must be missing twice to disappear, and can reappear"""
+    tracker = ChangeTracker(missed_scans=2)
+    tracker.save(db, scan())
+    assert tracker.save(db, scan(CC=None))[1] == []
+    assert kinds(tracker.save(db, scan(CC=None))[1]) == [("CC", "disappeared", "Office", None)]
+    assert tracker.save(db, scan(CC=None))[1] == []
+    assert kinds(tracker.save(db, scan())[1]) == [("CC", "appeared", None, "Office")]
+    assert NetworkChange.query.count() == 5
+
+
+def test_cold_index_uses_stored_state(app):
+    """Test that a restarted tracker diffs against the database, not from scratch"""
+    ChangeTracker().save(db, scan(), interface="wlan0")
+    tracker = ChangeTracker()
+    assert tracker.save(db, scan(), interface="wlan0")[1] == []
+    assert kinds(tracker.save(db, scan(BB={"channel": 1}), interface="wlan0")[1]) == [
+        ("BB", "channel", "11", "1")
+    ]
+    assert {c.interface for c in NetworkChange.query} == {"wlan0"}
+
+
+def test_unchanged_last_seen_is_refreshed_periodically(app):
+    """Test that unchanged networks get last_seen touched after touch_interval"""
+    tracker = ChangeTracker(touch_interval=60)
+    tracker.save(db, scan())
+    old = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    Network.query.update({"last_seen": old})
+    db.session.commit()
+    index = tracker.index(None)
+    for bssid in index.seen_at:
+        index.seen_at[bssid] = old
+
+    saved, changes = tracker.save(db, scan())
+    assert changes == []
+    assert all(n.last_seen > old for n in Network.query)
+    assert all(n["last_seen"] > old.isoformat() for n in saved)
@@ -0,0 +1,74 @@
+"""
+SQLite Tuning Tests
+"""
+import sqlite3
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from config import config
+from models import db
+from services.db_tuning import init_database, is_sqlite_file, begin_write, WRITE_OPTION
+
+
+def make_app(uri, tuning=True):
+    app = Flask(__name__)
+    app.config.from_object(config['production'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLITE_TUNING'] = tuning
+    return app
+
+
+def pragma(name):
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_production_profile_sets_pragmas_and_pool(tmp_path):
+    """Test that file databases get WAL, the pragmas and a bounded pool"""
+    app = make_app(f"sqlite:///{tmp_path / 'wifi.db'}")
+    assert init_database(app)
+    with app.app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -65536
+        assert db.engine.pool.size() == app.config['DB_POOL_SIZE']
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_profile_skips_memory_and_disabled(tmp_path):
+    """Test that in-memory databases and SQLITE_TUNING=False are untouched"""
+    assert not is_sqlite_file('sqlite:///:memory:')
+    assert not is_sqlite_file('postgresql://localhost/wifi')
+    assert not init_database(make_app('sqlite:///:memory:'))
+
+    app = make_app(f"sqlite:///{tmp_path / 'plain.db'}", tuning=False)
+    assert not init_database(app)
+    with app.app_context():
+        assert pragma('journal_mode') == 'delete'
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_writers_begin_immediate(tmp_path):
+    """Test that begin_write() holds the write lock before its first read"""
+    path = tmp_path / 'locks.db'
+    app = make_app(f"sqlite:///{path}")
+    init_database(app)
+    other = sqlite3.connect(path, timeout=0, isolation_level=None)
+    with app.app_context():
+        db.session.execute(text("SELECT 1"))
+        assert db.session.connection().info[WRITE_OPTION] is False
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+
+        begin_write(db)
+        assert db.session.connection().info[WRITE_OPTION] is True
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("BEGIN IMMEDIATE")
+        db.session.commit()
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        db.session.remove()
+        db.engine.dispose()
+    other.close()
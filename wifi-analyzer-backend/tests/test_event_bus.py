@@ -0,0 +1,81 @@
+"""
+Event Bus Tests
+"""
+import json
+from services.event_bus import (
+    EventBus, SocketBroker, NETWORK_NEW, NETWORK_SIGNAL, AUDIT_COMPLETED
+)
+from services.scan_service import network_events
+
+
+def parse(frames):
+    """Decode SSE frames into (event type, data) pairs"""
+    events = []
+    for frame in frames:
+        lines = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_slow_subscriber_drops_oldest():
+    """Test that a full queue keeps the newest events and reports the loss"""
+    bus = EventBus(queue_size=3)
+    subscription = bus.subscribe()
+    bus.publish_many([(NETWORK_NEW, {"n": i}) for i in range(10)])
+
+    events = parse(subscription.get(timeout=0))
+    assert events[0] == ("overflow", {"dropped": 7})
+    assert [data["n"] for _, data in events[1:]] == [7, 8, 9]
+    assert subscription.get(timeout=0) == []
+
+
+def test_type_filter_and_client_limit():
+    """Test per-subscriber type filtering and the subscriber limit"""
+    bus = EventBus(max_subscribers=1)
+    subscription = bus.subscribe([AUDIT_COMPLETED])
+    assert bus.subscribe() is None
+    assert bus.listening()
+
+    bus.publish(NETWORK_NEW, {"bssid": "a"})
+    bus.publish(AUDIT_COMPLETED, {"audit_id": "1"})
+    assert parse(subscription.get(timeout=0)) == [(AUDIT_COMPLETED, {"audit_id": "1"})]
+
+    bus.unsubscribe(subscription)
+    assert not bus.listening()
+
+
+def test_socket_broker_relays_between_buses(tmp_path):
+    """Test that events reach subscribers of another process's bus"""
+    publisher = EventBus(broker=SocketBroker(str(tmp_path)))
+    worker = EventBus(broker=SocketBroker(str(tmp_path)))
+    assert not publisher.listening()
+
+    subscription = worker.subscribe()
+    assert publisher.listening()
+    publisher.publish_many([(NETWORK_NEW, {"ssid": "x" * 1000, "n": i}) for i in range(200)])
+
+    received = []
+    while len(received) < 200:
+        frames = subscription.get(timeout=2)
+        assert frames
+        received.extend(parse(frames))
+    assert [data["n"] for _, data in received] == list(range(200))
+
+    worker.unsubscribe(subscription)
+    assert list(tmp_path.iterdir()) == []
+    assert not publisher.listening()
+
+
+def test_network_events():
+    """Test that only new BSSIDs and significant RSSI changes are reported"""
+    previous = {"a": ("WPA2", "1", -60), "b": ("WPA2", "1", -60)}
+    networks = [
+        {"bssid": "a", "ssid": "A", "channel": 1, "signal": -61, "encryption": "WPA2"},
+        {"bssid": "b", "ssid": "B", "channel": 1, "signal": -70, "encryption": "WPA2"},
+        {"bssid": "c", "ssid": "C", "channel": 6, "signal": -50, "encryption": "Open"},
+    ]
+    assert network_events(previous, networks, min_signal_change=3) == [
+        (NETWORK_SIGNAL, {"bssid": "b", "signal": -70, "previous": -60}),
+        (NETWORK_NEW, {"id": None, "bssid": "c", "ssid": "C", "channel": 6,
+                       "signal": -50, "encryption": "Open"}),
+    ]
@@ -0,0 +1,54 @@
+"""
+Metrics Tests
+"""
+from flask import Flask
+from services.metrics import Histogram, Counter, init_metrics, timed_scan, timed_write
+
+
+def test_histogram_exposition():
+    """Test cumulative buckets, sum and count in the text format"""
+    histogram = Histogram('latency_seconds', 'Latency', ('endpoint',), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, 'a"b')
+    lines = dict(line.rsplit(' ', 1) for line in
+                 (f"{name} {value}" for name, value in histogram.samples()))
+    assert lines['latency_seconds_bucket{endpoint="a\\"b",le="0.1"}'] == '2'
+    assert lines['latency_seconds_bucket{endpoint="a\\"b",le="1"}'] == '3'
+    assert lines['latency_seconds_bucket{endpoint="a\\"b",le="+Inf"}'] == '4'
+    assert lines['latency_seconds_count{endpoint="a\\"b"}'] == '4'
+    assert float(lines['latency_seconds_sum{endpoint="a\\"b"}']) == 3.65
+
+
+def test_decorators_record_only_when_enabled():
+    """Test that the decorators pass through without a registry"""
+    class Scanner:
+        name = 'fake'
+
+        @timed_scan
+        def scan(self):
+            return [{}, {}]
+
+    @timed_write('network', rows=len)
+    def save(rows):
+        return rows
+
+    app = Flask(__name__)
+    with app.app_context():
+        assert len(Scanner().scan()) == 2
+        app.config['METRICS_ENABLED'] = True
+        registry = init_metrics(app)
+        Scanner().scan()
+        save([1, 2, 3])
+
+    assert registry.scans.count('fake') == 1
+    assert registry.access_points.count('fake') == 1
+    assert registry.writes.count(save.__qualname__) == 1
+    assert registry.rows.get('network') == 3
+
+    counter = Counter('events_total', 'Events')
+    registry.metrics.append(counter)
+    registry.add_collector(lambda: [('queue_depth', 'gauge', 'Depth', [({'state': 'queued'}, 2)])])
+    text = registry.render()
+    assert '# TYPE wifi_rows_written_total counter' in text
+    assert 'wifi_rows_written_total{table="network"} 3' in text
+    assert 'queue_depth{state="queued"} 2' in text
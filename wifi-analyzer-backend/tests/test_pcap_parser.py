@@ -0,0 +1,142 @@
+"""
+Capture Parser Tests
+"""
+import pytest
+from services.pcap_parser import (
+    CaptureAggregate, CaptureReader, CaptureError, scan_capture, read_capture_networks
+)
+from tests.pcap_fixtures import (
+    build_beacon, build_data_frame, pcap_bytes, pcapng_bytes, write_pcap, RSN_PSK
+)
+
+FRAMES = [
+    build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -40, rsn=RSN_PSK),
+    build_data_frame("AA:BB:CC:11:22:33"),
+    build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -50, rsn=RSN_PSK),
+    build_beacon("02:00:00:00:00:01", "", 11, -80),
+    build_beacon("02:00:00:00:00:01", "Lobby", 11, -70, probe_response=True),
+    build_beacon("02:00:00:00:00:02", "Legacy", 1, -60, wpa=True),
+]
+
+
+def summarise(networks):
+    return {n['bssid']: (n['ssid'], n['channel'], n['signal'], n['encryption'], n['frames'])
+            for n in networks}
+
+
+EXPECTED = {
+    "AA:BB:CC:11:22:33": ("HomeNetwork", 6, -45, "WPA2-PSK", 2),
+    "02:00:00:00:00:01": ("Lobby", 11, -75, "Open", 2),
+    "02:00:00:00:00:02": ("Legacy", 1, -60, "WPA-PSK", 1),
+}
+
+
+@pytest.mark.parametrize('builder', [pcap_bytes, pcapng_bytes])
+def test_capture_formats(tmp_path, builder):
+    """Test that pcap and pcapng captures aggregate identically"""
+    path = tmp_path / 'capture'
+    path.write_bytes(builder(FRAMES))
+    agg, _ = scan_capture(str(path))
+    assert agg.frames == len(FRAMES)
+    assert agg.management == 5
+    assert summarise(agg.networks()) == EXPECTED
+
+
+@pytest.mark.parametrize('builder', [pcap_bytes, pcapng_bytes])
+def test_beacon_after_probe_response(tmp_path, builder):
+    """Test that a beacon is parsed even when a probe response came first in the window"""
+    path = tmp_path / 'probe-first'
+    path.write_bytes(builder([
+        build_beacon("02:00:00:00:00:03", "Lobby", 11, -70, probe_response=True),
+        build_beacon("02:00:00:00:00:03", "Lobby-Secure", 6, -60, rsn=RSN_PSK),
+    ]))
+    agg, _ = scan_capture(str(path))
+    assert summarise(agg.networks()) == {
+        "02:00:00:00:00:03": ("Lobby-Secure", 6, -65, "WPA2-PSK", 2),
+    }
+
+
+def test_truncated_capture(tmp_path):
+    """Test that a capture cut mid-record keeps the complete records"""
+    path = tmp_path / 'cut.pcap'
+    path.write_bytes(pcap_bytes(FRAMES)[:-20])
+    networks = read_capture_networks(str(path))
+    assert summarise(networks)["AA:BB:CC:11:22:33"] == EXPECTED["AA:BB:CC:11:22:33"]
+    assert "02:00:00:00:00:02" not in summarise(networks)
+
+
+@pytest.mark.parametrize('builder', [pcap_bytes, pcapng_bytes])
+def test_short_records(tmp_path, builder):
+    """Test that records too short for an 802.11 header are skipped"""
+    radiotap_only = FRAMES[0][:15]
+    snapped = FRAMES[0][:15 + 12]
+    path = tmp_path / 'short'
+    path.write_bytes(builder([snapped, radiotap_only] + FRAMES + [snapped, b'\x00']))
+    agg, _ = scan_capture(str(path))
+    assert agg.frames == len(FRAMES) + 4
+    assert agg.management == 5
+    assert summarise(agg.networks()) == EXPECTED
+
+
+def test_windows_fold_consistently(tmp_path, monkeypatch):
+    """Test that tiny processing windows give the same aggregate"""
+    import services.pcap_parser as pcap_parser
+    path = tmp_path / 'capture.pcap'
+    write_pcap(path, FRAMES * 50)
+    monkeypatch.setattr(pcap_parser, 'WINDOW_BYTES', 500)
+    progress = []
+    with CaptureReader(str(path)) as reader:
+        agg = reader.aggregate(progress=lambda done, total: progress.append((done, total)))
+    assert len(progress) > 10
+    assert progress[-1][0] >= progress[-1][1]
+    home = summarise(agg.networks())["AA:BB:CC:11:22:33"]
+    assert home == ("HomeNetwork", 6, -45, "WPA2-PSK", 100)
+
+
+def test_rejects_unknown_files(tmp_path):
+    """Test errors for non-capture files and unsupported link types"""
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'hello world, not a capture')
+    with pytest.raises(CaptureError):
+        CaptureReader(str(path))
+
+    path = tmp_path / 'ethernet.pcap'
+    path.write_bytes(pcap_bytes(FRAMES, linktype=1))
+    with pytest.raises(CaptureError):
+        scan_capture(str(path))
+
+
+@pytest.mark.parametrize('builder', [pcap_bytes, pcapng_bytes])
+def test_split_at_record_boundaries(tmp_path, builder):
+    """Test that byte ranges cover every record exactly once"""
+    path = tmp_path / 'capture'
+    path.write_bytes(builder(FRAMES * 40))
+    with CaptureReader(str(path)) as reader:
+        ranges = reader.split(7)
+        assert len(ranges) > 1
+        assert ranges[0][0] == reader.data_start
+        assert ranges[-1][1] == reader.size
+        merged = CaptureAggregate()
+        for start, stop in ranges:
+            merged.merge(reader.aggregate(start, stop))
+    whole, _ = scan_capture(str(path))
+    assert merged.frames == whole.frames == len(FRAMES) * 40
+    assert summarise(merged.networks()) == summarise(whole.networks())
+
+
+def test_parallel_ingest_matches_serial(tmp_path):
+    """Test that sharding over a process pool gives the serial aggregate"""
+    from services.capture_service import aggregate_captures
+    paths = []
+    for i in range(2):
+        path = tmp_path / f'part{i}.pcap'
+        write_pcap(path, FRAMES * 30)
+        paths.append(str(path))
+    progress = []
+    parallel, _ = aggregate_captures(paths, workers=3, shard_bytes=4096,
+                                     progress=lambda done, total: progress.append((done, total)))
+    serial, _ = aggregate_captures(paths, workers=1)
+    assert parallel.frames == serial.frames == len(FRAMES) * 60
+    assert summarise(parallel.networks()) == summarise(serial.networks())
+    assert len(progress) > 2
+    assert progress[-1][0] == progress[-1][1]
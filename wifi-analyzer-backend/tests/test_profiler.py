@@ -0,0 +1,58 @@
+"""
+Request Profiler Tests
+"""
+import time
+from services.profiler import Profiler, ProfilingMiddleware
+from services.token_registry import TokenRegistry, Token, hash_token, READ
+
+
+def environ(path='/api/networks', **headers):
+    env = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': ''}
+    env.update(('HTTP_' + name.upper(), value) for name, value in headers.items())
+    return env
+
+
+def test_trigger_requires_admin_token():
+    """Test that only admin tokens can ask for a profile"""
+    registry = TokenRegistry(legacy_token='admin-token')
+    registry._static.append(Token('reader', bytes.fromhex(hash_token('read-token')), (READ,)))
+    registry._install([])
+    profiler = Profiler(tokens=registry)
+
+    assert profiler.trigger(environ(x_profile='1', authorization='Bearer admin-token')) == 'header'
+    assert profiler.trigger(environ(x_profile='1', authorization='Bearer read-token')) is None
+    assert profiler.trigger(environ(x_profile='1')) is None
+    assert profiler.trigger(environ()) is None
+    assert profiler.trigger(environ('/api/profiles', x_profile='1',
+                                    authorization='Bearer admin-token')) is None
+
+    sampled = Profiler(sample_rate=1.0)
+    assert sampled.trigger(environ()) == 'sample'
+
+
+def test_middleware_records_profiles_in_ring_buffer():
+    """Test that profiles cover the streamed body and only the last N are kept"""
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def body():
+            time.sleep(0.03)
+            yield b'done'
+        return body()
+
+    profiler = Profiler(sample_rate=1.0, history=2, sample_interval=0.001)
+    middleware = ProfilingMiddleware(app, profiler)
+    ids = []
+    for _ in range(3):
+        headers = {}
+        body = middleware(environ(), lambda status, h, exc_info=None: headers.update(h))
+        assert b''.join(body) == b'done'
+        body.close()
+        ids.append(headers['X-Profile-Id'])
+
+    assert [p.id for p in profiler.recent()] == ids[:0:-1]
+    profile = profiler.get(ids[-1])
+    assert profile.status == 200
+    assert profile.duration >= 0.03
+    assert 'body' in profile.collapsed()
+    assert any('body' in row['function'] for row in profile.top_functions())
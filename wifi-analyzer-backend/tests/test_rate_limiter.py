@@ -0,0 +1,54 @@
+"""
+Rate Limiter Tests
+"""
+import pytest
+from services.rate_limiter import MemoryBuckets, SqliteBuckets, RateLimiter
+from services.token_registry import Token, SCAN, AUDIT
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SqliteBuckets(str(tmp_path / 'buckets.db'))
+    return MemoryBuckets()
+
+
+def test_bucket_burst_and_refill(store):
+    """Test that a bucket allows its burst, then refills at its rate"""
+    # 3 requests, refilled at 1 per second
+    assert [store.take('k', 3, 1.0, 100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take('k', 3, 1.0, 100.0) == pytest.approx(1.0)
+    assert store.take('k', 3, 1.0, 100.5) == pytest.approx(0.5)
+    assert store.take('k', 3, 1.0, 101.0) == 0.0
+    # Idle time never fills a bucket beyond its size
+    assert [store.take('k', 3, 1.0, 200.0) for _ in range(4)][-1] > 0
+    assert store.take('other', 3, 1.0, 101.0) == 0.0
+    assert len(store) == 2
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    """Test that two stores on one file (two workers) share a bucket"""
+    path = str(tmp_path / 'buckets.db')
+    first, second = SqliteBuckets(path), SqliteBuckets(path)
+    assert first.take('k', 2, 1.0, 10.0) == 0.0
+    assert second.take('k', 2, 1.0, 10.0) == 0.0
+    assert first.take('k', 2, 1.0, 10.0) > 0
+
+
+def test_limits_per_token_and_class():
+    """Test that the token's own limit wins over the class default"""
+    limiter = RateLimiter(MemoryBuckets(), {SCAN: (1.0, 60.0)})
+    sensor = Token('sensor', b'1', [SCAN], rate_limit=(2.0, 60.0))
+    dashboard = Token('dashboard', b'2', [SCAN])
+
+    assert [limiter.check(sensor, SCAN, now=0) for _ in range(3)][-1] == pytest.approx(30.0)
+    assert limiter.check(dashboard, SCAN, now=0) == 0.0
+    assert limiter.check(dashboard, SCAN, now=0) == pytest.approx(60.0)
+    # Separate buckets per class; no default for audits
+    assert limiter.check(sensor, AUDIT, now=0) == 0.0
+    assert all(limiter.check(dashboard, AUDIT, now=0) == 0.0 for _ in range(5))
+
+    stats = limiter.to_dict()
+    assert stats['allowed'] == {SCAN: 3, AUDIT: 6}
+    assert stats['limited'] == {SCAN: 2}
+    assert stats['limits'] == {SCAN: {"requests": 1.0, "period": 60.0}}
@@ -0,0 +1,74 @@
+"""
+Response Cache Tests
+"""
+import time
+from services.response_cache import ResponseCache, MemoryStore, SqliteStore
+
+
+def put(cache, key, tags, value):
+    cache.set(key, tags, cache.versions(tags), value)
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = ResponseCache(MemoryStore(max_entries=2))
+    put(cache, 'a', (), 1)
+    put(cache, 'b', (), 2)
+    assert cache.get('a', ()) == 1
+    put(cache, 'c', (), 3)
+    assert cache.get('b', ()) is None
+    assert (cache.get('a', ()), cache.get('c', ())) == (1, 3)
+    stats = cache.to_dict()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (3, 1, 1)
+
+
+def test_ttl_expiry():
+    """Test that entries are not served past their TTL"""
+    cache = ResponseCache(MemoryStore(), ttl=0.05)
+    put(cache, 'a', (), 1)
+    assert cache.get('a', ()) == 1
+    time.sleep(0.06)
+    assert cache.get('a', ()) is None
+    assert cache.to_dict()['expired'] == 1
+    assert len(cache.store) == 0
+
+
+def test_tag_invalidation_is_precise():
+    """Test that bumping a tag only drops the entries carrying it"""
+    cache = ResponseCache(MemoryStore())
+    put(cache, 'list', ('networks',), 'list')
+    put(cache, 'one', ('network:1',), 'one')
+    put(cache, 'two', ('network:2',), 'two')
+
+    cache.invalidate(['networks', 'network:1'])
+    assert cache.get('list', ('networks',)) is None
+    assert cache.get('one', ('network:1',)) is None
+    assert cache.get('two', ('network:2',)) == 'two'
+    assert cache.to_dict()['stale'] == 2
+
+
+def test_write_during_build_leaves_entry_stale():
+    """Test that a value built under old versions is never served"""
+    cache = ResponseCache(MemoryStore())
+    versions = cache.versions(('networks',))
+    cache.invalidate(['networks'])
+    cache.set('list', ('networks',), versions, 'old')
+    assert cache.get('list', ('networks',)) is None
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    """Test that two processes' stores see each other's entries and bumps"""
+    path = str(tmp_path / 'cache.db')
+    first = ResponseCache(SqliteStore(path, max_entries=2))
+    second = ResponseCache(SqliteStore(path, max_entries=2))
+
+    put(first, '/api/networks?', ('networks',), (b'[]', {'Content-Type': 'application/json'}))
+    assert second.get('/api/networks?', ('networks',)) == \
+        (b'[]', {'Content-Type': 'application/json'})
+    second.invalidate(['networks'])
+    assert first.get('/api/networks?', ('networks',)) is None
+
+    for key in ('a', 'b', 'c'):
+        put(first, key, (), (b'', {}))
+    assert len(second.store) == 2
+    assert first.to_dict()['evictions'] == 1
@@ -0,0 +1,81 @@
+"""
+Rogue AP Detector Tests
+"""
+from services.rogue_detector import (
+    RogueDetector, OuiTrie, normalize_ssid, security_class,
+    ENCRYPTION_MISMATCH, VENDOR_MISMATCH, SIGNAL_OUTLIER, CHANNEL_CHANGE
+)
+
+
+def ap(bssid, ssid="Corp", encryption="WPA2", channel=6, signal=-60):
+    return {"bssid": bssid, "ssid": ssid, "encryption": encryption,
+            "channel": channel, "signal": signal}
+
+
+def kinds(detector):
+    return {f["bssid"]: f["kinds"] for f in detector.report()}
+
+
+def test_normalize_ssid_and_security_class():
+    """Test SSID grouping keys and encryption classes"""
+    assert normalize_ssid(" CORP\u200b ") == normalize_ssid("\uff43\uff4f\uff52\uff50") == "corp"
+    assert normalize_ssid("") is None
+    assert normalize_ssid("Hidden Network") is None
+    assert [security_class(e) for e in ("WPA2-PSK", "WPA3", "Open", "WEP", "WPA-PSK", None)] == \
+        ["wpa2", "wpa3", "open", "wep", "wpa", "open"]
+
+
+def test_oui_trie_longest_prefix(tmp_path):
+    """Test vendor lookup across OUI and MA-S block lengths and file formats"""
+    manuf = tmp_path / "manuf"
+    manuf.write_text(
+        "# comment\n"
+        "00:1B:C5\tIeeeRegi\tIEEE Registration Authority\n"
+        "00:1B:C5:00:00:00/36\tConverge\tConverging Systems\n"
+        "3C-5A-B4   (hex)\t\tGoogle, Inc.\n"
+    )
+    trie = OuiTrie.load(str(manuf))
+    assert trie.size == 3
+    assert trie.lookup("00:1B:C5:00:00:42") == "Converging Systems"
+    assert trie.lookup("00:1B:C5:99:00:42") == "IEEE Registration Authority"
+    assert trie.lookup("3c:5a:b4:01:02:03") == "Google, Inc."
+    assert trie.lookup("AA:BB:CC:00:00:00") is None
+
+
+def test_group_anomalies():
+    """Test encryption, vendor and signal checks within an SSID group"""
+    detector = RogueDetector(signal_margin=20)
+    detector.observe([
+        ap("00:11:22:00:00:01"), ap("00:11:22:00:00:02"), ap("00:11:22:00:00:03"),
+        ap("00:11:22:00:00:04", ssid="CORP", encryption="Open"),
+        ap("66:77:88:00:00:05", signal=-30),
+        ap("02:11:22:00:00:06"),
+        ap("00:11:22:00:00:07", ssid="Guest", encryption="Open"),
+    ])
+    assert kinds(detector) == {
+        "00:11:22:00:00:04": [ENCRYPTION_MISMATCH],
+        "66:77:88:00:00:05": [VENDOR_MISMATCH, SIGNAL_OUTLIER],
+        "02:11:22:00:00:06": [VENDOR_MISMATCH],
+    }
+    assert detector.report(ssid="guest") == []
+    assert [f["bssid"] for f in detector.report(kinds=[SIGNAL_OUTLIER])] == ["66:77:88:00:00:05"]
+
+
+def test_incremental_updates():
+    """Test that observe() re-checks only changed groups and reports new findings"""
+    detector = RogueDetector()
+    assert detector.observe([ap("00:11:22:00:00:01"), ap("00:11:22:00:00:02")]) == []
+
+    found = detector.observe([ap("00:11:22:00:00:03", encryption="Open"),
+                              ap("00:11:22:00:00:01", channel=11)])
+    assert {f["bssid"]: f["kinds"] for f in found} == {
+        "00:11:22:00:00:03": [ENCRYPTION_MISMATCH],
+        "00:11:22:00:00:01": [CHANNEL_CHANGE],
+    }
+    # Unchanged findings are not reported again
+    assert detector.observe([ap("00:11:22:00:00:03", encryption="Open", signal=-61)]) == []
+
+    # Renaming the SSID moves the AP out of the group and clears its finding
+    detector.observe([ap("00:11:22:00:00:03", ssid="Other", encryption="Open")])
+    assert "00:11:22:00:00:03" not in kinds(detector)
+    assert set(detector.groups) == {"corp", "other"}
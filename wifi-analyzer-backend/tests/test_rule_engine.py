@@ -0,0 +1,99 @@
+"""
+Audit Rule Engine Tests
+"""
+import json
+import pytest
+from services.rule_engine import RuleSet, RuleError, build_context, default_rule_set, load_rule_set
+
+
+def network(encryption, signal=-70, ssid="Net", bssid="AA:BB:CC:00:00:01", channel=6, **extra):
+    return dict(ssid=ssid, bssid=bssid, channel=channel, signal=signal,
+                encryption=encryption, **extra)
+
+
+@pytest.mark.parametrize('encryption, signal, risk, weak, is_open', [
+    ("Open", -40, "high", True, True),
+    ("WPA2", -70, "medium", True, False),
+    ("WPA2-PSK", -49, "medium", True, False),
+    ("WPA3", -30, "low", False, False),
+    (None, -60, "medium", True, False),
+])
+def test_default_rules_keep_legacy_checks(encryption, signal, risk, weak, is_open):
+    """Test that the bundled rules reproduce the original three checks"""
+    result = default_rule_set().evaluate(network(encryption, signal))
+    assert result["risk_level"] == risk
+    assert result["weak_cipher"] is weak
+    assert result["open_network"] is is_open
+    assert result["signal_strength"] == signal
+    assert ("strong-signal" in result["findings"]) == (signal > -50)
+
+
+def test_default_rules_extended_checks():
+    """Test WEP, hidden SSID, channel overlap, vendor OUI and evil twin rules"""
+    rules = default_rule_set()
+    assert rules.evaluate(network("WEP"))["risk_level"] == "high"
+    assert "hidden-ssid" in rules.evaluate(network("WPA3", ssid=""))["findings"]
+    assert "channel-overlap" in rules.evaluate(network("WPA3", channel=3))["findings"]
+    assert "channel-overlap" not in rules.evaluate(network("WPA3", channel=36))["findings"]
+    assert "attack-hardware-oui" in rules.evaluate(
+        network("WPA3", bssid="00:13:37:AA:BB:CC"))["findings"]
+
+    twins = [network("WPA2", ssid="Cafe"), network("Open", ssid="cafe", bssid="02:00:00:00:00:09")]
+    context = build_context(twins)
+    assert context == {"cafe": 2}
+    result = rules.evaluate(twins[0], context)
+    assert "evil-twin" in result["findings"]
+    assert result["risk_level"] == "high"
+
+
+def test_outcome_json_matches_result():
+    """Test that the precomputed JSON equals the evaluated result"""
+    rules = default_rule_set()
+    net = network("Open", -42)
+    outcome = rules.outcome(net)
+    assert json.loads(outcome.result_json(-42)) == rules.evaluate(net)
+
+
+def test_conditions_compile_once():
+    """Test that identical conditions share one bit and rules AND their conditions"""
+    rules = RuleSet("1", [
+        {"id": "a", "severity": "low", "when": [{"field": "encryption", "op": "eq", "value": "WEP"}]},
+        {"id": "b", "severity": "high", "when": [
+            {"field": "encryption", "op": "eq", "value": "wep"},
+            {"field": "signal", "op": "ge", "value": -60},
+        ]},
+    ])
+    assert len(rules._conditions["encryption"]) == 1
+    assert rules.evaluate(network("WEP", -70))["findings"] == ["a"]
+    assert rules.evaluate(network("WEP", -50))["findings"] == ["a", "b"]
+    assert rules.evaluate(network("WEP", None))["risk_level"] == "low"
+
+
+@pytest.mark.parametrize('rules', [
+    [{"id": "x", "when": [{"field": "nope", "op": "eq", "value": 1}]}],
+    [{"id": "x", "when": [{"field": "signal", "op": "near", "value": 1}]}],
+    [{"id": "x", "when": [{"field": "channel", "op": "in", "value": 1}]}],
+    [{"id": "x", "severity": "extreme", "when": [{"field": "signal", "op": "gt", "value": 1}]}],
+    [{"id": "x", "when": []}],
+])
+def test_invalid_rules_rejected(rules):
+    """Test that malformed rules fail at compile time"""
+    with pytest.raises(RuleError):
+        RuleSet("1", rules)
+
+
+def test_yaml_rule_file(tmp_path):
+    """Test loading a YAML rule file"""
+    pytest.importorskip('yaml')
+    path = tmp_path / 'rules.yaml'
+    path.write_text(
+        "version: site-7\n"
+        "rules:\n"
+        "  - id: weak\n"
+        "    severity: high\n"
+        "    when:\n"
+        "      - {field: encryption, op: in, value: [WEP, Open]}\n"
+    )
+    rules = load_rule_set(str(path))
+    assert rules.version == "site-7"
+    assert rules.evaluate(network("open"))["risk_level"] == "high"
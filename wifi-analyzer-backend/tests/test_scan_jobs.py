@@ -0,0 +1,108 @@
+"""
+Scan Job Tests
+"""
+import threading
+import pytest
+from flask import Flask
+from services.scan_jobs import ScanJobManager, ScanQueueFull, COMPLETED, FAILED
+from services.scan_service import simulate_scan
+
+
+def make_manager(scan_fn, history=100):
+    saved = []
+
+    def save(networks, scan_id, interface):
+        saved.append(scan_id)
+        return networks
+
+    manager = ScanJobManager(Flask(__name__), scan_fn, save, max_workers=2, history=history)
+    return manager, saved
+
+
+def test_scan_job_runs_backend():
+    """Test that a job runs the backend and saves its results"""
+    manager, saved = make_manager(lambda interface: simulate_scan())
+    job, coalesced = manager.submit()
+    assert not coalesced
+    assert manager.wait(job, 5)
+    assert job.status == COMPLETED
+    assert len(job.networks) == 3
+    assert saved == [job.id]
+    manager.shutdown()
+
+
+def test_concurrent_scans_coalesce_per_interface():
+    """Test that requests for a busy interface share one radio scan"""
+    release = threading.Event()
+    calls = []
+
+    def slow_scan(interface):
+        calls.append(interface)
+        release.wait(5)
+        return simulate_scan()
+
+    manager, _ = make_manager(slow_scan)
+    first, _ = manager.submit('wlan0')
+    second, coalesced = manager.submit('wlan0')
+    other, other_coalesced = manager.submit('wlan1')
+    assert coalesced and second is first
+    assert not other_coalesced and other is not first
+
+    release.set()
+    assert manager.wait(first, 5) and manager.wait(other, 5)
+    assert sorted(calls) == ['wlan0', 'wlan1']
+
+    # Once finished, a new request starts a fresh scan
+    third, coalesced = manager.submit('wlan0')
+    assert not coalesced and third is not first
+    manager.wait(third, 5)
+    manager.shutdown()
+
+
+def test_failed_scan_and_history_limit():
+    """Test failure reporting and eviction of old finished jobs"""
+    def broken_scan(interface):
+        raise RuntimeError("radio busy")
+
+    manager, _ = make_manager(broken_scan, history=1)
+    first, _ = manager.submit()
+    manager.wait(first, 5)
+    assert first.status == FAILED
+    assert first.error == "radio busy"
+
+    second, _ = manager.submit()
+    manager.wait(second, 5)
+    manager.submit()
+    assert manager.get(first.id) is None
+    assert manager.get(second.id) is second
+    manager.shutdown()
+
+
+def test_scan_admission_control():
+    """Test that new scans are rejected once the queue is full"""
+    release = threading.Event()
+
+    def slow_scan(interface):
+        release.wait(5)
+        return simulate_scan()
+
+    manager = ScanJobManager(Flask(__name__), slow_scan, lambda n, s, i: n,
+                             max_workers=1, max_pending=2)
+    first, _ = manager.submit('wlan0')
+    manager.submit('wlan1')
+    with pytest.raises(ScanQueueFull) as error:
+        manager.submit('wlan2')
+    assert error.value.retry_after >= 1
+    # Requests joining an in-flight scan and the scheduler are still admitted
+    assert manager.submit('wlan0') == (first, True)
+    bypass, _ = manager.submit('wlan3', admission=False)
+
+    stats = manager.stats()
+    assert stats['queued'] + stats['running'] == 3
+    assert stats['capacity'] == 2
+    assert (stats['admitted'], stats['coalesced'], stats['rejected']) == (3, 1, 1)
+
+    release.set()
+    assert manager.wait(bypass, 5)
+    manager.submit('wlan2')
+    manager.shutdown()
@@ -0,0 +1,88 @@
+"""
+Scan Scheduler Tests
+"""
+import threading
+import time
+import pytest
+from flask import Flask
+from services.scan_jobs import ScanJobManager
+from services.scan_scheduler import ScanScheduler, bssid_churn
+
+
+def make_networks(bssids):
+    return [{"ssid": b, "bssid": b, "channel": 1, "signal": -60, "encryption": "WPA2"}
+            for b in bssids]
+
+
+def make_scheduler(scans, **kwargs):
+    """Scheduler over a job manager whose scans return `scans` in turn"""
+    scans = iter(scans)
+    manager = ScanJobManager(Flask(__name__), lambda interface: make_networks(next(scans)),
+                             lambda networks, scan_id, interface: networks)
+    options = dict(interval=10, min_interval=5, max_interval=40)
+    options.update(kwargs)
+    return ScanScheduler(manager, **options), manager
+
+
+def test_bssid_churn():
+    """Test the share of appeared/disappeared BSSIDs"""
+    assert bssid_churn(None, {"a"}) is None
+    assert bssid_churn(set(), set()) == 0.0
+    assert bssid_churn({"a", "b"}, {"a", "b"}) == 0.0
+    assert bssid_churn({"a", "b"}, {"b", "c"}) == pytest.approx(2 / 3)
+
+
+def test_interval_adapts_to_churn():
+    """Test back-off when stable and speed-up when churning, within bounds"""
+    stable = ["ab"] * 5
+    scheduler, manager = make_scheduler(stable + ["cd", "ef", "gh"])
+    state = scheduler.states[None]
+    intervals = []
+    for _ in range(8):
+        record = scheduler.run_once(state, timeout=5)
+        intervals.append(state.interval)
+    assert intervals == [10, 15, 22.5, 33.75, 40, 20, 10, 5]
+    assert record["churn"] == 1.0
+    assert record["found"] == 2
+    assert record["scan_seconds"] is not None
+    assert state.runs == 8 and state.failures == 0
+    manager.shutdown()
+
+
+def test_overlapping_scan_is_skipped():
+    """Test that a scheduled run joins an in-flight scan instead of queueing one"""
+    release = threading.Event()
+    calls = []
+
+    def slow_scan(interface):
+        calls.append(interface)
+        release.wait(5)
+        return make_networks("ab")
+
+    manager = ScanJobManager(Flask(__name__), slow_scan, lambda networks, scan_id, interface: networks)
+    scheduler = ScanScheduler(manager, interval=10, min_interval=5, max_interval=40)
+    manual, _ = manager.submit()
+    threading.Timer(0.05, release.set).start()
+    record = scheduler.run_once(scheduler.states[None], timeout=5)
+
+    assert record["coalesced"] and record["job_id"] == manual.id
+    assert calls == [None]
+    assert scheduler.states[None].skipped == 1
+    assert scheduler.states[None].runs == 0
+    manager.shutdown()
+
+
+def test_scheduler_loop_start_stop():
+    """Test that the loop scans repeatedly and stops promptly"""
+    scheduler, manager = make_scheduler(["ab"] * 100, interval=0.01,
+                                        min_interval=0.01, max_interval=0.02)
+    assert scheduler.start()
+    assert not scheduler.start()
+    deadline = time.monotonic() + 5
+    while scheduler.states[None].runs < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+    assert not scheduler.running
+    assert scheduler.states[None].runs >= 3
+    assert 0 < scheduler.to_dict()["interfaces"][0]["duty_cycle"] <= 1
+    manager.shutdown()
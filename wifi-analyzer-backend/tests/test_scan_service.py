@@ -0,0 +1,77 @@
+"""
+Scan Service Tests
+"""
+import datetime
+import pytest
+from app_new import create_app
+from models import db, Network
+from services.scan_service import save_networks_to_db
+from services.observation_service import record_observations, get_signal_history
+
+
+@pytest.fixture
+def app():
+    """Create app with an empty in-memory database"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_networks(count, signal=-60):
+    """Build synthetic scan results"""
+    return [
+        {
+            "ssid": f"Net{i}",
+            "bssid": f"02:00:00:00:{i // 256:02X}:{i % 256:02X}",
+            "channel": 1 + i % 11,
+            "signal": signal,
+            "encryption": "WPA2"
+        }
+        for i in range(count)
+    ]
+
+
+def test_save_networks_chunked_upsert(app):
+    """Test that chunked upserts insert once and then update in place"""
+    saved = save_networks_to_db(db, Network, make_networks(25), chunk_size=10)
+    assert len(saved) == 25
+    ids = {n['bssid']: n['id'] for n in saved}
+
+    updated = save_networks_to_db(db, Network, make_networks(25, signal=-40), chunk_size=7)
+    assert {n['bssid']: n['id'] for n in updated} == ids
+    assert all(n['signal'] == -40 for n in updated)
+    assert Network.query.count() == 25
+
+
+def test_save_networks_deduplicates_bssids(app):
+    """Test that duplicate BSSIDs within one scan keep the last reading"""
+    data = make_networks(1) + make_networks(1, signal=-30)
+    saved = save_networks_to_db(db, Network, data)
+    assert len(saved) == 1
+    assert saved[0]['signal'] == -30
+    assert saved[0]['discovered_at'].endswith('Z')
+
+
+def test_save_networks_empty(app):
+    """Test that an empty scan is a no-op"""
+    assert save_networks_to_db(db, Network, []) == []
+
+
+def test_signal_history_window_and_limit(app):
+    """Test history filtering by look-back window and row limit"""
+    now = datetime.datetime.utcnow()
+    readings = make_networks(1)
+    for age_hours, signal in [(30, -80), (5, -70), (2, -60), (1, -50)]:
+        readings[0]['signal'] = signal
+        record_observations(db, f"scan-{age_hours}", readings,
+                            observed_at=now - datetime.timedelta(hours=age_hours))
+    db.session.commit()
+
+    bssid = readings[0]['bssid']
+    history = get_signal_history(db, bssid, hours=24)
+    assert [o['signal'] for o in history] == [-70, -60, -50]
+    assert [o['signal'] for o in get_signal_history(db, bssid, hours=24, limit=2)] == [-60, -50]
+    assert get_signal_history(db, "00:00:00:00:00:00") == []
@@ -0,0 +1,138 @@
+"""
+Scanner Backend Tests
+"""
+import pytest
+from services.scanners import (
+    SCANNERS, create_scanner, FileScanner, PyWiFiScanner, Scanner, SyntheticScanner,
+    UnknownInterface
+)
+from tests.pcap_fixtures import build_beacon, write_pcap, RSN_PSK, RSN_SAE
+
+IW_OUTPUT = """BSS aa:bb:cc:11:22:33(on wlan0) -- associated
+\tTSF: 1234 usec (0d, 00:00:00)
+\tfreq: 2437
+\tbeacon interval: 100 TUs
+\tcapability: ESS Privacy ShortSlotTime (0x0411)
+\tsignal: -48.00 dBm
+\tSSID: HomeNetwork
+\tDS Parameter set: channel 6
+\tRSN:\t * Version: 1
+\t\t * Group cipher: CCMP
+\t\t * Pairwise ciphers: CCMP
+\t\t * Authentication suites: IEEE 802.1X
+BSS 12:34:56:aa:bb:cc(on wlan0)
+\tfreq: 5180.0
+\tcapability: ESS (0x0401)
+\tsignal: -71.00 dBm
+\tSSID: 
+"""
+
+NMCLI_OUTPUT = """HomeNetwork:AA\\:BB\\:CC\\:11\\:22\\:33:6:80:WPA2
+Cafe\\:Guest:12\\:34\\:56\\:AA\\:BB\\:CC:11:30:
+Office:DE\\:AD\\:BE\\:EF\\:00\\:01:36:60:WPA3
+"""
+
+
+def test_registry_selects_configured_backend():
+    """Test backend lookup from configuration"""
+    assert {'pywifi', 'simulated', 'iw', 'nmcli', 'pcap', 'synthetic'} <= set(SCANNERS)
+    assert len(create_scanner({'SCAN_BACKEND': 'simulated'}).scan()) == 3
+    with pytest.raises(ValueError):
+        create_scanner({'SCAN_BACKEND': 'nope'})
+    with pytest.raises(ValueError):
+        create_scanner({'SCAN_BACKEND': 'iw'})
+
+
+class FakeInterface:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+def test_pywifi_falls_back_only_without_interfaces(monkeypatch):
+    """Test that simulated networks replace a missing scanner, not a bad interface name"""
+    scanned = []
+    monkeypatch.setattr(PyWiFiScanner, '_scan', lambda self, iface: scanned.append(iface.name()))
+    scanner = PyWiFiScanner(settle_time=0)
+
+    monkeypatch.setattr(PyWiFiScanner, '_interfaces', lambda self: [FakeInterface('wlan0')])
+    scanner.scan('wlan0')
+    assert scanned == ['wlan0']
+    with pytest.raises(UnknownInterface, match='wlan0'):
+        scanner.scan('wlan9')
+
+    monkeypatch.setattr(PyWiFiScanner, '_interfaces', lambda self: [])
+    assert len(scanner.scan('wlan9')) == 3
+    with pytest.raises(RuntimeError):
+        PyWiFiScanner(settle_time=0, fallback=False).scan()
+
+
+def test_backends_must_implement_their_hooks():
+    """Test that the base classes cannot be used without scan()/parse()"""
+    with pytest.raises(TypeError):
+        Scanner()
+    with pytest.raises(TypeError):
+        FileScanner('scan.txt')
+
+
+def test_iw_scan_file(tmp_path):
+    """Test parsing of saved `iw dev <if> scan` output"""
+    path = tmp_path / 'iw.txt'
+    path.write_text(IW_OUTPUT)
+    networks = create_scanner({'SCAN_BACKEND': 'iw', 'SCAN_SOURCE': str(path)}).scan()
+    assert networks == [
+        {"ssid": "HomeNetwork", "bssid": "AA:BB:CC:11:22:33", "channel": 6,
+         "signal": -48, "encryption": "WPA2-Enterprise"},
+        {"ssid": "Hidden Network", "bssid": "12:34:56:AA:BB:CC", "channel": 36,
+         "signal": -71, "encryption": "Open"},
+    ]
+
+
+def test_nmcli_file(tmp_path):
+    """Test parsing of saved terse nmcli output with escaped colons"""
+    path = tmp_path / 'nmcli.txt'
+    path.write_text(NMCLI_OUTPUT)
+    networks = create_scanner({'SCAN_BACKEND': 'nmcli', 'SCAN_SOURCE': str(path)}).scan()
+    assert [(n['ssid'], n['bssid'], n['channel'], n['signal'], n['encryption'])
+            for n in networks] == [
+        ("HomeNetwork", "AA:BB:CC:11:22:33", 6, -60, "WPA2-PSK"),
+        ("Cafe:Guest", "12:34:56:AA:BB:CC", 11, -85, "Open"),
+        ("Office", "DE:AD:BE:EF:00:01", 36, -70, "WPA3"),
+    ]
+
+
+def test_pcap_replay(tmp_path):
+    """Test replaying beacons from a radiotap capture"""
+    path = tmp_path / 'capture.pcap'
+    write_pcap(path, [
+        build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -60, rsn=RSN_PSK),
+        build_beacon("AA:BB:CC:11:22:33", "HomeNetwork", 6, -52, rsn=RSN_PSK),
+        build_beacon("DE:AD:BE:EF:00:01", "", 1, -70, rsn=RSN_SAE),
+        build_beacon("DE:AD:BE:EF:00:01", "OfficeNet", 1, -75, rsn=RSN_SAE,
+                     probe_response=True),
+        build_beacon("12:34:56:AA:BB:CC", "Old", 11, -80, privacy=True),
+    ])
+    networks = create_scanner({'SCAN_BACKEND': 'pcap', 'SCAN_SOURCE': str(path)}).scan()
+    by_bssid = {n['bssid']: n for n in networks}
+    home = by_bssid["AA:BB:CC:11:22:33"]
+    assert (home["ssid"], home["channel"], home["encryption"]) == ("HomeNetwork", 6, "WPA2-PSK")
+    assert (home["signal"], home["signal_min"], home["signal_max"], home["frames"]) == (-56, -60, -52, 2)
+    assert by_bssid["DE:AD:BE:EF:00:01"]["ssid"] == "OfficeNet"
+    assert by_bssid["DE:AD:BE:EF:00:01"]["encryption"] == "WPA3"
+    assert by_bssid["12:34:56:AA:BB:CC"]["encryption"] == "WEP"
+
+
+def test_synthetic_is_deterministic():
+    """Test that the synthetic population depends only on the seed"""
+    first = SyntheticScanner(count=500, seed=7)
+    second = SyntheticScanner(count=500, seed=7)
+    scan_a, scan_b = first.scan(), second.scan()
+    assert scan_a == scan_b
+    assert len({n['bssid'] for n in scan_a}) == 500
+
+    rescan = first.scan()
+    assert [n['bssid'] for n in rescan] == [n['bssid'] for n in scan_a]
+    assert all(abs(n['signal'] - o['signal']) <= 6 for n, o in zip(rescan, scan_a))
+    assert SyntheticScanner(count=500, seed=8).scan() != scan_a
@@ -0,0 +1,48 @@
+"""
+Serialization Tests
+"""
+import datetime
+import json
+import pytest
+from services.serialization import RowEncoder, embed, orjson, VALUE, TIME, RAW_JSON
+
+COLUMNS = [("id", VALUE), ("ssid", VALUE), ("signal", VALUE), ("open", VALUE),
+           ("seen", TIME), ("result", RAW_JSON)]
+
+ROWS = [
+    ("a", "Café \"Wi-Fi\"", -40, True, datetime.datetime(2024, 5, 1, 12, 0, 0, 5),
+     '{"risk_level": "high", "findings": ["Open"]}', "extra column"),
+    ("b", None, None, False, None, None, "extra column"),
+]
+
+EXPECTED = [
+    {"id": "a", "ssid": "Café \"Wi-Fi\"", "signal": -40, "open": True,
+     "seen": "2024-05-01T12:00:00.000005Z",
+     "result": {"risk_level": "high", "findings": ["Open"]}},
+    {"id": "b", "ssid": None, "signal": None, "open": False, "seen": None, "result": None},
+]
+
+ENCODERS = [False] + ([True] if orjson is not None else [])
+
+
+@pytest.mark.parametrize("use_orjson", ENCODERS)
+def test_encode_many_matches_to_dict_format(use_orjson):
+    """Test rows are encoded like the to_dict() methods, stored JSON verbatim"""
+    encoder = RowEncoder(COLUMNS, use_orjson=use_orjson)
+    assert json.loads(encoder.encode_many(ROWS)) == EXPECTED
+    assert json.loads(encoder.encode(ROWS[0])) == EXPECTED[0]
+    assert encoder.encode_many([]) == b'[]'
+
+
+@pytest.mark.parametrize("use_orjson", ENCODERS)
+def test_encode_without_stored_json(use_orjson):
+    """Test the layouts without raw columns"""
+    encoder = RowEncoder(COLUMNS[:5], use_orjson=use_orjson)
+    expected = [{k: v for k, v in e.items() if k != "result"} for e in EXPECTED]
+    assert json.loads(encoder.encode_many(ROWS)) == expected
+
+
+def test_embed():
+    """Test appending pre-encoded fields to an object"""
+    assert json.loads(embed(b'{"id":"a"}', "findings", b'[]')) == {"id": "a", "findings": []}
+    assert json.loads(embed(b'{}', "result", b'null')) == {"result": None}
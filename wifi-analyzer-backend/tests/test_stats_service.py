@@ -0,0 +1,130 @@
+"""
+Stats Service Tests
+"""
+import datetime
+import pytest
+from app_new import create_app
+from models import db, Network, StatCounter
+from services.audit_service import audit_networks
+from services.scan_service import save_networks_to_db, _save_networks_orm
+from services.stats_service import get_stats, rebuild_stats, hour_key, table_versions
+
+
+@pytest.fixture
+def app():
+    """Create app with an empty in-memory database"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_networks(count, encryption="WPA2"):
+    """Build synthetic scan results"""
+    return [
+        {
+            "ssid": f"Net{i}",
+            "bssid": f"02:00:00:00:{i // 256:02X}:{i % 256:02X}",
+            "channel": 1 + i % 3,
+            "signal": -60,
+            "encryption": encryption if i % 2 else "Open"
+        }
+        for i in range(count)
+    ]
+
+
+def counters():
+    return {(c.dimension, c.key): c.count for c in StatCounter.query if c.count}
+
+
+def test_incremental_counters_match_rebuild(app):
+    """Test that counters kept on write equal a full recomputation"""
+    save_networks_to_db(db, Network, make_networks(20), chunk_size=7)
+    save_networks_to_db(db, Network, make_networks(30, encryption="WPA3"), chunk_size=4)
+    audit_networks(db)
+    incremental = counters()
+
+    rebuild_stats(db)
+    assert counters() == incremental
+
+    stats = get_stats(db)
+    assert stats["networks"]["total"] == 30
+    assert stats["networks"]["by_encryption"] == {"Open": 15, "WPA3": 15}
+    assert stats["networks"]["by_channel"] == {"1": 10, "2": 10, "3": 10}
+    assert stats["networks"]["security"] == {"secure": 15, "vulnerable": 0, "open": 15}
+    assert stats["audits"]["total"] == 30
+    assert stats["discoveries"][-1]["count"] == 30
+
+
+def test_orm_fallback_maintains_counters(app):
+    """Test the counters on the upsert path used by dialects without ON CONFLICT"""
+    now = datetime.datetime.utcnow()
+    _save_networks_orm(db, Network, make_networks(4), now)
+    _save_networks_orm(db, Network, make_networks(4, encryption="WEP"), now)
+    stats = get_stats(db)
+    assert stats["networks"]["by_encryption"] == {"Open": 2, "WEP": 2}
+    assert stats["discoveries"][-1] == {"hour": hour_key(now) + "Z", "count": 4}
+
+
+def test_discovery_histogram_window(app):
+    """Test that the histogram covers exactly the requested hours"""
+    old = datetime.datetime.utcnow() - datetime.timedelta(hours=30)
+    _save_networks_orm(db, Network, make_networks(3), old)
+    save_networks_to_db(db, Network, make_networks(5))
+
+    day = get_stats(db, hours=24)["discoveries"]
+    assert len(day) == 24
+    assert sum(h["count"] for h in day) == 2
+    assert sum(h["count"] for h in get_stats(db, hours=48)["discoveries"]) == 5
+
+
+def test_table_versions_follow_writes(app):
+    """Test that each write transaction bumps its table's version"""
+    assert table_versions(db, ('network', 'audit')) == (0, 0)
+    save_networks_to_db(db, Network, make_networks(10), chunk_size=3)
+    save_networks_to_db(db, Network, make_networks(10))
+    audit_networks(db)
+    assert table_versions(db, ('network', 'audit')) == (2, 1)
+
+    rebuild_stats(db)
+    assert table_versions(db, ('audit', 'network')) == (1, 2)
+
+
+def test_concurrent_writers_count_each_bssid_once(tmp_path, monkeypatch):
+    """Test that writers saving overlapping BSSIDs at once keep exact counters"""
+    import threading
+    from config import config
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI',
+                        f"sqlite:///{tmp_path / 'shared.db'}")
+    monkeypatch.setattr(config['testing'], 'SQLITE_TUNING', True)
+    workers = [create_app('testing') for _ in range(4)]
+    with workers[0].app_context():
+        db.create_all()
+    networks = make_networks(300)
+    barrier = threading.Barrier(len(workers))
+
+    def ingest(app, offset):
+        with app.app_context():
+            barrier.wait()
+            for start in range(0, 300, 20):
+                batch = networks[(start + offset) % 300:][:20]
+                save_networks_to_db(db, Network, batch, chunk_size=10)
+            db.session.remove()
+
+    threads = [threading.Thread(target=ingest, args=(app, i * 40)) for i, app in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with workers[0].app_context():
+        stats = get_stats(db)
+        assert stats["networks"]["total"] == Network.query.count() == 300
+        assert sum(stats["networks"]["by_channel"].values()) == 300
+        assert table_versions(db, ('network',)) == (4 * 15,)
+    for app in workers:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
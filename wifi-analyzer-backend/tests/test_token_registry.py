@@ -0,0 +1,79 @@
+"""
+Token Registry Tests
+"""
+import json
+import os
+import pytest
+from services.token_registry import (
+    TokenRegistry, TokenError, hash_token, load_token_file, parse_rate_limit, ADMIN
+)
+
+
+def write_tokens(path, entries):
+    path.write_text(json.dumps({"tokens": entries}))
+
+
+def test_parse_rate_limit():
+    """Test the rate limit notations"""
+    assert parse_rate_limit("60/minute") == (60.0, 60.0)
+    assert parse_rate_limit("5/s") == (5.0, 1.0)
+    assert parse_rate_limit("1000/15min") == (1000.0, 900.0)
+    assert parse_rate_limit(None) is None
+    for value in ("fast", "0/minute", "0.0/s", "5/0min"):
+        with pytest.raises(TokenError):
+            parse_rate_limit(value)
+
+
+def test_verify_scopes_and_legacy_token(tmp_path):
+    """Test lookups by digest, scopes and the legacy admin token"""
+    path = tmp_path / "tokens.json"
+    write_tokens(path, [
+        {"name": "sensor", "sha256": hash_token("s3nsor"), "scopes": ["scan"],
+         "rate_limit": "30/minute"},
+        {"name": "dashboard", "sha256": hash_token("d4sh").upper()},
+    ])
+    registry = TokenRegistry(str(path), legacy_token="legacy")
+    assert len(registry) == 3
+
+    sensor = registry.verify("s3nsor")
+    assert sensor.name == "sensor"
+    assert sensor.allows("scan") and not sensor.allows("read")
+    assert sensor.rate_limit == (30.0, 60.0)
+    assert registry.verify("d4sh").scopes == {"read"}
+    assert registry.verify("legacy").scopes == {ADMIN}
+    assert registry.verify("legacy").allows("audit")
+    assert registry.verify("s3nsor ") is None
+    assert registry.verify(hash_token("s3nsor")) is None
+
+
+def test_invalid_files(tmp_path):
+    """Test that malformed registries are rejected"""
+    path = tmp_path / "tokens.json"
+    for entries in ([{"sha256": hash_token("x")}],
+                    [{"name": "a", "sha256": "abc"}],
+                    [{"name": "a", "sha256": hash_token("x"), "scopes": ["root"]}],
+                    [{"name": "a", "sha256": hash_token("x")},
+                     {"name": "a", "sha256": hash_token("y")}]):
+        write_tokens(path, entries)
+        with pytest.raises(TokenError):
+            load_token_file(str(path))
+
+
+def test_hot_reload(tmp_path):
+    """Test that file changes are picked up and broken files ignored"""
+    path = tmp_path / "tokens.json"
+    registry = TokenRegistry(str(path), reload_interval=0)
+    assert registry.verify("one") is None
+
+    write_tokens(path, [{"name": "one", "sha256": hash_token("one")}])
+    assert registry.verify("one").name == "one"
+
+    write_tokens(path, [{"name": "two", "sha256": hash_token("two")}])
+    os.utime(path, ns=(1, 1))
+    assert registry.verify("one") is None
+    assert registry.verify("two").name == "two"
+
+    path.write_text("{not json")
+    assert registry.verify("two").name == "two"
+    assert registry.error
+    assert registry.reloads == 2